@@ -4,10 +4,15 @@ This is the only component that should write direct SQL queries for users.
 Component B from the architecture guide.
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 from typing import Optional, List
 from repo_src.backend.database.models import User
 from repo_src.backend.data.schemas import UserCreate, UserUpdate
+from repo_src.backend.functions.pagination import Page, paginate
+from repo_src.backend.functions.users import update_user, upsert_user
+
+# Columns list endpoints need (UserSummary, plus id for the cursor)
+SUMMARY_COLUMNS = (User.id, User.user_id, User.name, User.bio)
 
 
 class UserService:
@@ -38,8 +43,8 @@ class UserService:
             wiki_content=user_data.wiki_content
         )
         db.add(db_user)
+        # id and the timestamps come back from the INSERT itself (RETURNING)
         db.commit()
-        db.refresh(db_user)
         return db_user
 
     @staticmethod
@@ -59,7 +64,8 @@ class UserService:
     @staticmethod
     def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
         """
-        Retrieve all users with optional pagination.
+        Retrieve all users with optional pagination, in id order.
+        wiki_content is deferred (see get_users_page).
 
         Args:
             db: Database session
@@ -69,13 +75,36 @@ class UserService:
         Returns:
             List of User objects
         """
-        return db.query(User).offset(skip).limit(limit).all()
+        return UserService.get_users_page(db, skip=skip, limit=limit).items
+
+    @staticmethod
+    def get_users_page(db: Session, limit: int = 100, skip: int = 0, cursor: Optional[str] = None) -> Page:
+        """
+        Retrieve one page of users in id order, by cursor (keyset) or skip.
+        Only the summary columns are read; wiki_content (often tens of KB per
+        user) is left deferred and loads on first access.
+
+        Args:
+            db: Database session
+            limit: Maximum number of records to return (default: 100)
+            skip: Number of records to skip; only allowed without a cursor
+            cursor: next_cursor from the previous page, or None for the first page
+
+        Returns:
+            The page of User objects and the cursor for the next page
+
+        Raises:
+            InvalidCursor: If the cursor is invalid or combined with skip
+        """
+        query = db.query(User).options(load_only(*SUMMARY_COLUMNS))
+        return paginate(query, User.id, "users", limit, skip=skip, cursor=cursor)
 
     @staticmethod
     def update_user(db: Session, user_id: str, user_data: UserUpdate) -> Optional[User]:
         """
         Update an existing user's information.
-        Only updates fields that are provided (not None).
+        Only updates fields that are provided (not None), in a single
+        UPDATE ... RETURNING statement (see functions/users.update_user).
 
         Args:
             db: Database session
@@ -85,24 +114,16 @@ class UserService:
         Returns:
             Updated User object if found, None otherwise
         """
-        db_user = UserService.get_user_by_user_id(db, user_id)
-        if not db_user:
-            return None
-
-        # Only update fields that are provided
-        update_data = user_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
-
-        db.commit()
-        db.refresh(db_user)
-        return db_user
+        return update_user(db, user_id, user_data)
 
     @staticmethod
     def create_or_update_user(db: Session, user_data: UserCreate) -> User:
         """
         Create a new user or update if user_id already exists.
-        This is useful for the ingestion pipeline.
+        This is useful for the ingestion pipeline. A single
+        INSERT ... ON CONFLICT statement, so concurrent calls for the same
+        user_id don't race; an existing user's name, bio and wiki_content are
+        all overwritten.
 
         Args:
             db: Database session
@@ -111,19 +132,7 @@ class UserService:
         Returns:
             The created or updated User object
         """
-        existing_user = UserService.get_user_by_user_id(db, user_data.user_id)
-
-        if existing_user:
-            # Update existing user
-            update_data = UserUpdate(
-                name=user_data.name,
-                bio=user_data.bio,
-                wiki_content=user_data.wiki_content
-            )
-            return UserService.update_user(db, user_data.user_id, update_data)
-        else:
-            # Create new user
-            return UserService.create_user(db, user_data)
+        return upsert_user(db, user_data, update_columns=("name", "bio", "wiki_content"))
 
     @staticmethod
     def delete_user(db: Session, user_id: str) -> bool:
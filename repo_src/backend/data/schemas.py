@@ -37,6 +37,16 @@ class ChatResponse(BaseModel):
     response: str
     model_used: str
 
+class ChatStreamSummary(BaseModel):
+    """Final event of a streamed chat response"""
+    model_used: str
+    time_to_first_token_ms: Optional[float] = None
+    total_time_ms: float
+    prompt_tokens: Optional[int] = None
+    completion_tokens: int
+    total_tokens: int
+    usage_estimated: bool = False  # True when the provider sent no usage report
+
 # User-related schemas for Social OS
 class UserBase(BaseModel):
     """Base schema for user data"""
@@ -74,4 +84,24 @@ class UserResponse(BaseModel):
     created_at: datetime = Field(serialization_alias="createdAt")
     updated_at: datetime = Field(serialization_alias="updatedAt")
 
-    model_config = ConfigDict(from_attributes=True, populate_by_name=True) 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True) 
+# Ingestion job queue schemas
+class IngestionJobCreate(BaseModel):
+    """Schema for submitting text to the ingestion queue"""
+    text: str = Field(min_length=1)
+    source_name: Optional[str] = None
+
+class IngestionJobResponse(BaseModel):
+    """Schema for reporting an ingestion job's status"""
+    id: int
+    status: str  # queued, running, succeeded, dead
+    source_name: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    user_id: Optional[str] = None  # set once the job has succeeded
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
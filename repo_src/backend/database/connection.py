@@ -1,4 +1,8 @@
-from sqlalchemy import create_engine
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import StaticPool
 import os
@@ -7,22 +11,166 @@ import os
 # good for quick starts or some test scenarios outside of full test suite.
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app_default.db")
 
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    connect_args["check_same_thread"] = False
-    if ":memory:" in DATABASE_URL: # Specific setup for in-memory SQLite for testing outside of TestClient
-        # This StaticPool is more for when you want a single in-memory DB shared across direct test calls.
-        # For TestClient, overriding dependencies with a fresh in-memory DB per test is often preferred.
-        # engine = create_engine(DATABASE_URL, connect_args=connect_args, poolclass=StaticPool)
-        pass # Handled by test_database.py for specific test engine config
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+TEMP_STORES = ("DEFAULT", "FILE", "MEMORY")
+
+
+@dataclass
+class SQLitePragmas:
+    """
+    Pragmas applied to every new SQLite connection. The defaults are the
+    production profile for concurrent API readers plus an ingestion writer:
+    WAL lets reads proceed while a write commits, synchronous=NORMAL only
+    fsyncs at checkpoints (still safe against corruption; a power cut can
+    lose the last commits), and busy_timeout makes a second writer wait for
+    the lock instead of failing with "database is locked".
+    """
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    busy_timeout_ms: int = 5000
+    cache_size_kib: int = 8192  # page cache per connection; up to pool_size + max_overflow connections are open
+    mmap_size_mb: int = 256  # 0 disables memory-mapped reads
+    temp_store: str = "MEMORY"  # temp tables and sort spills
+
+    @classmethod
+    def from_env(cls) -> Optional["SQLitePragmas"]:
+        """
+        Build the pragma profile from SQLITE_* environment variables.
+
+        Returns:
+            The pragmas to apply, or None when SQLITE_PRAGMA_PROFILE=off
+            (SQLite and driver defaults)
+
+        Raises:
+            ValueError: If a setting is not a valid value for its pragma
+        """
+        profile = os.getenv("SQLITE_PRAGMA_PROFILE", "production").lower()
+        if profile == "off":
+            return None
+        if profile != "production":
+            raise ValueError(f"SQLITE_PRAGMA_PROFILE must be 'production' or 'off', not {profile!r}")
+        pragmas = cls(
+            journal_mode=os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper(),
+            synchronous=os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper(),
+            busy_timeout_ms=int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+            cache_size_kib=int(os.getenv("SQLITE_CACHE_SIZE_KIB", "8192")),
+            mmap_size_mb=int(os.getenv("SQLITE_MMAP_SIZE_MB", "256")),
+            temp_store=os.getenv("SQLITE_TEMP_STORE", "MEMORY").upper(),
+        )
+        pragmas.validate()
+        return pragmas
+
+    def validate(self) -> None:
+        """
+        Raises:
+            ValueError: If a setting is not a valid value for its pragma
+        """
+        for name, value, allowed in (
+            ("journal_mode", self.journal_mode, JOURNAL_MODES),
+            ("synchronous", self.synchronous, SYNCHRONOUS_MODES),
+            ("temp_store", self.temp_store, TEMP_STORES),
+        ):
+            if value.upper() not in allowed:
+                raise ValueError(f"SQLite {name} must be one of {', '.join(allowed)}, not {value!r}")
+        if min(self.busy_timeout_ms, self.cache_size_kib, self.mmap_size_mb) < 0:
+            raise ValueError("SQLite busy_timeout, cache_size and mmap_size can't be negative")
+
+    def statements(self) -> List[str]:
+        """The PRAGMA statements, in the order they are applied"""
+        self.validate()
+        return [
+            # busy_timeout first, so switching the journal mode waits out other connections
+            f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}",
+            f"PRAGMA journal_mode = {self.journal_mode.upper()}",
+            f"PRAGMA synchronous = {self.synchronous.upper()}",
+            f"PRAGMA cache_size = -{int(self.cache_size_kib)}",  # negative means KiB rather than pages
+            f"PRAGMA mmap_size = {int(self.mmap_size_mb) * 1024 * 1024}",
+            f"PRAGMA temp_store = {self.temp_store.upper()}",
+        ]
+
+
+@dataclass
+class PoolConfig:
+    """
+    Connection pool sizing. With WAL, SQLite readers don't block each other,
+    so the pool should cover the concurrent requests and workers; past
+    pool_size + max_overflow, a checkout waits up to timeout seconds.
+    """
+    size: int = 10
+    max_overflow: int = 10
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        """Build pool settings from DB_POOL_* environment variables"""
+        return cls(
+            size=max(1, int(os.getenv("DB_POOL_SIZE", "10"))),
+            max_overflow=max(0, int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        )
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: SQLitePragmas) -> None:
+    """Run the pragmas on every connection the engine opens"""
+    statements = pragmas.statements()
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def create_db_engine(
+    url: str,
+    pragmas: Optional[SQLitePragmas] = None,
+    pool: Optional[PoolConfig] = None
+) -> Engine:
+    """
+    Create an engine with the pool sizing and, for SQLite, the pragma profile.
+
+    Args:
+        url: Database URL
+        pragmas: SQLite pragmas to apply to each connection (None for defaults)
+        pool: Pool sizing (None for SQLAlchemy's defaults)
+
+    Returns:
+        The configured engine
+    """
+    connect_args = {}
+    engine_args = {}
+    in_memory = False
+    if url.startswith("sqlite"):
+        connect_args["check_same_thread"] = False
+        in_memory = make_url(url).database in (None, "", ":memory:")
+        if in_memory: # Specific setup for in-memory SQLite for testing outside of TestClient
+            # This StaticPool is more for when you want a single in-memory DB shared across direct test calls.
+            # For TestClient, overriding dependencies with a fresh in-memory DB per test is often preferred.
+            # engine = create_engine(DATABASE_URL, connect_args=connect_args, poolclass=StaticPool)
+            pass # Handled by test_database.py for specific test engine config
+    if pool is not None and not in_memory:
+        # In-memory SQLite uses a per-thread pool that can't be sized
+        engine_args.update(pool_size=pool.size, max_overflow=pool.max_overflow, pool_timeout=pool.timeout)
+
+    engine = create_engine(url, connect_args=connect_args, **engine_args)
+    if pragmas is not None and url.startswith("sqlite"):
+        apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+engine = create_db_engine(DATABASE_URL, SQLitePragmas.from_env(), PoolConfig.from_env())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 def get_db():
-    db = SessionLocal()
+    # Request sessions keep their objects loaded after commit, so a response is
+    # built from the values the write statement returned instead of re-reading them
+    db = SessionLocal(expire_on_commit=False)
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
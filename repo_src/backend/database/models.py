@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, Float, String, DateTime, Text
 from sqlalchemy.sql import func # for server_default=func.now()
 from repo_src.backend.database.connection import Base
 
@@ -29,4 +29,51 @@ class User(Base):
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now()) 
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now()) 
+
+class IngestionManifestEntry(Base):
+    """
+    One row per ingested source file, recording what was extracted from it
+    and with which pipeline version, so unchanged files can be skipped on
+    re-ingestion.
+    """
+    __tablename__ = "ingestion_manifest"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    path = Column(String, unique=True, nullable=False, index=True)  # Absolute path of the source file
+    size = Column(Integer, nullable=False)
+    mtime = Column(Float, nullable=False)
+    content_hash = Column(String, nullable=False)  # SHA-256 of the file bytes
+    pipeline_version = Column(String, nullable=False)  # Prompt/model fingerprint used for extraction
+    user_id = Column(String, nullable=True, index=True)  # Profile the file produced
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+
+class IngestionJob(Base):
+    """
+    A queued profile extraction. Workers lease jobs by setting lease_owner and
+    lease_expires_at; a job whose lease expires (worker crashed or stalled)
+    becomes visible to other workers again. Failed attempts are retried after
+    available_at until max_attempts, then the job is dead-lettered.
+    """
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    status = Column(String, nullable=False, index=True, default="queued")  # queued, running, succeeded, dead
+    source_name = Column(String, nullable=True)  # Original filename or caller-supplied label
+    content = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    available_at = Column(DateTime, nullable=False, index=True)  # UTC; not leased before this
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)  # UTC
+    last_error = Column(Text, nullable=True)
+    user_id = Column(String, nullable=True)  # Profile produced on success
+    finished_at = Column(DateTime, nullable=True)  # UTC
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
@@ -0,0 +1,225 @@
+"""
+Ingestion job queue - database operations
+A durable queue in the application database. Every state change is a
+conditional UPDATE, so any number of worker processes can share the table:
+a job is only leased, completed or retried by the worker whose update
+matched.
+"""
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+
+from repo_src.backend.database.models import IngestionJob
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+DEAD = "dead"
+
+
+def utcnow() -> datetime:
+    """Naive UTC timestamp, the format the job table stores"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def enqueue_job(
+    db: Session,
+    content: str,
+    source_name: Optional[str] = None,
+    max_attempts: int = 3
+) -> IngestionJob:
+    """
+    Add a job to the queue.
+
+    Args:
+        db: Database session
+        content: Text to extract a profile from
+        source_name: Original filename or label, for status display
+        max_attempts: Attempts before the job is dead-lettered
+
+    Returns:
+        The queued IngestionJob
+    """
+    job = IngestionJob(
+        status=QUEUED,
+        source_name=source_name,
+        content=content,
+        attempts=0,
+        max_attempts=max(1, max_attempts),
+        available_at=utcnow(),
+    )
+    db.add(job)
+    # id and the timestamps come back from the INSERT itself (RETURNING)
+    db.commit()
+    return job
+
+
+def _leasable(now: datetime):
+    """Queued jobs that are due, and running jobs whose lease has expired"""
+    return or_(
+        and_(IngestionJob.status == QUEUED, IngestionJob.available_at <= now),
+        and_(IngestionJob.status == RUNNING, IngestionJob.lease_expires_at <= now),
+    )
+
+
+def lease_jobs(
+    db: Session,
+    worker_id: str,
+    limit: int,
+    lease_seconds: float,
+    now: Optional[datetime] = None
+) -> List[IngestionJob]:
+    """
+    Claim up to `limit` due jobs for a worker.
+    Jobs whose lease expired after their last allowed attempt are
+    dead-lettered instead of being handed out again.
+
+    Args:
+        db: Database session
+        worker_id: Identifier of the claiming worker
+        limit: Maximum number of jobs to claim
+        lease_seconds: Visibility timeout; the job returns to the queue if the
+            lease is not completed or extended before then
+        now: Current UTC time (for tests)
+
+    Returns:
+        The leased jobs, with attempts already incremented
+    """
+    now = now or utcnow()
+    db.execute(
+        update(IngestionJob)
+        .where(
+            IngestionJob.status == RUNNING,
+            IngestionJob.lease_expires_at <= now,
+            IngestionJob.attempts >= IngestionJob.max_attempts,
+        )
+        .values(status=DEAD, lease_owner=None, lease_expires_at=None, finished_at=now,
+                last_error=func.coalesce(IngestionJob.last_error, "lease expired"))
+    )
+    db.commit()
+
+    candidates = [
+        job_id for (job_id,) in db.query(IngestionJob.id)
+        .filter(_leasable(now))
+        .order_by(IngestionJob.available_at, IngestionJob.id)
+        .limit(limit)
+        .all()
+    ]
+    leased_ids = []
+    for job_id in candidates:
+        # Compare-and-set: only one worker's update matches a leasable row
+        result = db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id, _leasable(now))
+            .values(status=RUNNING, lease_owner=worker_id,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    attempts=IngestionJob.attempts + 1)
+        )
+        if result.rowcount == 1:
+            leased_ids.append(job_id)
+    db.commit()
+    if not leased_ids:
+        return []
+    return db.query(IngestionJob).filter(IngestionJob.id.in_(leased_ids)).order_by(IngestionJob.id).all()
+
+
+def _update_leased(db: Session, job_id: int, worker_id: str, commit: bool = True, **values) -> bool:
+    """Update a job only while `worker_id` still holds its lease"""
+    result = db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id, IngestionJob.status == RUNNING, IngestionJob.lease_owner == worker_id)
+        .values(**values)
+    )
+    if commit:
+        db.commit()
+    return result.rowcount == 1
+
+
+def extend_lease(db: Session, job_id: int, worker_id: str, lease_seconds: float) -> bool:
+    """
+    Push a running job's visibility timeout out while work continues.
+
+    Returns:
+        False if the lease was lost (expired and claimed by another worker)
+    """
+    return _update_leased(db, job_id, worker_id, lease_expires_at=utcnow() + timedelta(seconds=lease_seconds))
+
+
+def complete_job(db: Session, job_id: int, worker_id: str, user_id: str, commit: bool = True) -> bool:
+    """
+    Mark a leased job as succeeded. This is a compare-and-set on the lease,
+    so with commit=False it can claim the completion before the job's
+    result is written in the same transaction.
+
+    Args:
+        db: Database session
+        job_id: The job id
+        worker_id: The worker that should hold the lease
+        user_id: Profile the job produced
+        commit: Commit at the end; pass False to add more work to the transaction
+
+    Returns:
+        False if the lease was lost before completion
+    """
+    now = utcnow()
+    return _update_leased(db, job_id, worker_id, commit=commit, status=SUCCEEDED, user_id=user_id,
+                          last_error=None, lease_owner=None, lease_expires_at=None, finished_at=now)
+
+
+def fail_job(db: Session, job_id: int, worker_id: str, error: str, retry_delay: float) -> Optional[str]:
+    """
+    Record a failed attempt: requeue after `retry_delay` seconds, or
+    dead-letter the job if it has used all its attempts.
+
+    Returns:
+        The job's new status, or None if the lease was lost
+    """
+    job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+    if job is None:
+        return None
+    now = utcnow()
+    if job.attempts >= job.max_attempts:
+        updated = _update_leased(db, job_id, worker_id, status=DEAD, last_error=error,
+                                 lease_owner=None, lease_expires_at=None, finished_at=now)
+        return DEAD if updated else None
+    updated = _update_leased(db, job_id, worker_id, status=QUEUED, last_error=error,
+                             lease_owner=None, lease_expires_at=None,
+                             available_at=now + timedelta(seconds=retry_delay))
+    return QUEUED if updated else None
+
+
+def release_job(db: Session, job_id: int, worker_id: str) -> bool:
+    """
+    Return a leased job to the queue without counting the attempt,
+    e.g. when a worker shuts down mid-extraction.
+    """
+    return _update_leased(db, job_id, worker_id, status=QUEUED, lease_owner=None, lease_expires_at=None,
+                          available_at=utcnow(), attempts=IngestionJob.attempts - 1)
+
+
+def get_job(db: Session, job_id: int) -> Optional[IngestionJob]:
+    """
+    Retrieve a single job by id.
+
+    Args:
+        db: Database session
+        job_id: The job id
+
+    Returns:
+        IngestionJob or None if not found
+    """
+    return db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+
+
+def count_jobs_by_status(db: Session) -> Dict[str, int]:
+    """
+    Count jobs in each status.
+
+    Returns:
+        Mapping of status to job count (every status present, zero if none)
+    """
+    counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, DEAD: 0}
+    for status, count in db.query(IngestionJob.status, func.count(IngestionJob.id)).group_by(IngestionJob.status):
+        counts[status] = count
+    return counts
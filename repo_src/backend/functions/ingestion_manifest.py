@@ -0,0 +1,69 @@
+"""
+Ingestion manifest - which source files have been extracted, and how
+Lets re-ingestion skip files that are unchanged since their last extraction
+"""
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+
+from repo_src.backend.database.models import IngestionManifestEntry
+from repo_src.backend.pipelines.manifest import FileFingerprint
+
+# Stay well below SQLite's bound-parameter limit for IN (...) lookups
+_LOOKUP_CHUNK = 500
+
+
+def get_manifest_entries(db: Session, paths: List[str]) -> Dict[str, IngestionManifestEntry]:
+    """
+    Look up the manifest entries for a set of files.
+
+    Args:
+        db: Database session
+        paths: Absolute file paths
+
+    Returns:
+        Mapping of path to manifest entry, for the paths that have one
+    """
+    entries = {}
+    for start in range(0, len(paths), _LOOKUP_CHUNK):
+        chunk = paths[start:start + _LOOKUP_CHUNK]
+        for entry in db.query(IngestionManifestEntry).filter(IngestionManifestEntry.path.in_(chunk)).all():
+            entries[entry.path] = entry
+    return entries
+
+
+def record_ingested_files(
+    db: Session,
+    files: List[FileFingerprint],
+    user_ids: List[Optional[str]],
+    pipeline_version: str,
+    commit: bool = True
+) -> None:
+    """
+    Create or update manifest entries for files that were just extracted.
+
+    Args:
+        db: Database session
+        files: Fingerprints of the ingested files
+        user_ids: The user_id each file produced, in the same order
+        pipeline_version: Version of the extraction pipeline that ran
+        commit: Commit now; pass False to record in the caller's transaction
+    """
+    existing = get_manifest_entries(db, [f.path for f in files])
+    for fingerprint, user_id in zip(files, user_ids):
+        entry = existing.get(fingerprint.path)
+        if entry is None:
+            entry = IngestionManifestEntry(path=fingerprint.path)
+            db.add(entry)
+            existing[fingerprint.path] = entry
+        entry.size = fingerprint.size
+        entry.mtime = fingerprint.mtime
+        entry.content_hash = fingerprint.content_hash
+        entry.pipeline_version = pipeline_version
+        entry.user_id = user_id
+
+    if commit:
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
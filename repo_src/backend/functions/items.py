@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from repo_src.backend.database.connection import get_db
 from repo_src.backend.database.models import Item
 from repo_src.backend.data.schemas import ItemCreate, ItemResponse, ItemUpdate
+from repo_src.backend.functions.pagination import NEXT_CURSOR_HEADER, InvalidCursor, paginate
 
 router = APIRouter(
     prefix="/api/items",
@@ -17,15 +19,26 @@ def create_item(item: ItemCreate, db: Session = Depends(get_db)):
     """Create a new item in the database"""
     db_item = Item(**item.dict())
     db.add(db_item)
+    # id and the timestamps come back from the INSERT itself (RETURNING)
     db.commit()
-    db.refresh(db_item)
     return db_item
 
 @router.get("/", response_model=List[ItemResponse])
-def read_items(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get a list of items from the database"""
-    items = db.query(Item).offset(skip).limit(limit).all()
-    return items
+def read_items(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=0),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get a list of items in id order; pass the X-Next-Cursor header back as cursor for the next page"""
+    try:
+        page = paginate(db.query(Item), Item.id, "items", limit, skip=skip, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 @router.get("/{item_id}", response_model=ItemResponse)
 def read_item(item_id: int, db: Session = Depends(get_db)):
@@ -37,17 +50,20 @@ def read_item(item_id: int, db: Session = Depends(get_db)):
 
 @router.put("/{item_id}", response_model=ItemResponse)
 def update_item(item_id: int, item: ItemUpdate, db: Session = Depends(get_db)):
-    """Update an existing item"""
-    db_item = db.query(Item).filter(Item.id == item_id).first()
+    """Update an existing item, in a single UPDATE ... RETURNING statement where the database supports it"""
+    update_data = item.dict(exclude_unset=True)
+    if update_data and db.get_bind().dialect.update_returning:
+        statement = update(Item).where(Item.id == item_id).values(**update_data).returning(Item)
+        db_item = db.scalars(statement, execution_options={"populate_existing": True}).one_or_none()
+    else:
+        db_item = db.query(Item).filter(Item.id == item_id).first()
+        if db_item is not None:
+            for key, value in update_data.items():
+                setattr(db_item, key, value)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Item not found")
-    
-    update_data = item.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_item, key, value)
-    
+
     db.commit()
-    db.refresh(db_item)
     return db_item
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,91 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+A page is read with WHERE id > :last_id ORDER BY id LIMIT n, so the database
+seeks straight to the page through the primary key instead of reading and
+discarding every earlier row the way OFFSET does. Rows inserted while a
+client is paging don't shift the remaining pages either.
+
+Cursors are opaque to clients: URL-safe base64 of the list they belong to
+and the last id on the page. List endpoints return the next page's cursor in
+the X-Next-Cursor response header (the body stays a plain list, so existing
+clients are unaffected), and the header is omitted on the last page.
+skip/limit still work, with the same id ordering.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """A cursor that is malformed, belongs to another list, or is combined with skip"""
+
+
+@dataclass
+class Page:
+    """One page of a list and the cursor for the next one (None on the last page)"""
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(scope: str, last_id: int) -> str:
+    """Build the cursor for the page after last_id in the named list"""
+    raw = json.dumps([scope, last_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(scope: str, cursor: str) -> int:
+    """
+    Read the last id back out of a cursor.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed or was issued for another list
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_scope, last_id = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if cursor_scope != scope or not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise InvalidCursor(f"Cursor does not belong to {scope}")
+    return last_id
+
+
+def paginate(query: Query, id_column, scope: str, limit: int, skip: int = 0, cursor: Optional[str] = None) -> Page:
+    """
+    Read one page of a query in id order.
+
+    Args:
+        query: The rows to page through (without ordering or limits)
+        id_column: Unique, indexed integer column to order and seek by
+        scope: Name of the list, so cursors can't be replayed against another one
+        limit: Maximum number of rows on the page (0 or less gives an empty page)
+        skip: Rows to skip (OFFSET); only allowed without a cursor
+        cursor: Cursor from the previous page, or None for the first page
+
+    Returns:
+        The page, with next_cursor set when there may be more rows
+
+    Raises:
+        InvalidCursor: If the cursor is invalid or combined with skip
+    """
+    query = query.order_by(id_column)
+    if cursor:
+        if skip:
+            raise InvalidCursor("skip can't be combined with a cursor")
+        query = query.filter(id_column > decode_cursor(scope, cursor))
+    elif skip:
+        query = query.offset(skip)
+
+    # One extra row tells us whether there is a next page
+    rows = query.limit(limit + 1).all() if limit > 0 else []
+    if not rows or len(rows) <= limit:
+        return Page(rows)
+    rows = rows[:limit]
+    return Page(rows, encode_cursor(scope, getattr(rows[-1], id_column.key)))
@@ -2,18 +2,102 @@
 SQL Service (Component B) - User CRUD operations
 Manages all database operations for user profiles
 """
+from dataclasses import dataclass
+from itertools import islice
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from typing import List, Optional
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from repo_src.backend.database.models import User
 from repo_src.backend.data.schemas import UserCreate, UserUpdate
 
+# Rows per statement batch in bulk_upsert_users; keeps the IN (...) lookup
+# well below SQLite's bound-parameter limit
+DEFAULT_UPSERT_BATCH_SIZE = 500
+
+UPSERT_CREATED = "created"
+UPSERT_UPDATED = "updated"
+UPSERT_FAILED = "failed"
+
+
+@dataclass
+class UpsertOutcome:
+    """What bulk_upsert_users did with one input row"""
+    index: int  # position of the row in the input
+    user_id: str
+    status: str  # UPSERT_CREATED, UPSERT_UPDATED or UPSERT_FAILED
+    id: Optional[int] = None  # database id of the user row
+    error: Optional[str] = None
+
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def upsert_user(
+    db: Session,
+    user_data: UserCreate,
+    update_columns: Optional[Sequence[str]] = None,
+    commit: bool = True
+) -> User:
+    """
+    Insert a user, or update the existing row with the same user_id, in one
+    statement: INSERT ... ON CONFLICT (user_id) DO UPDATE ... RETURNING on
+    SQLite and PostgreSQL. Unlike a read followed by an insert, concurrent
+    upserts of the same user_id can't race on the unique constraint. Other
+    dialects fall back to a lookup followed by an update or insert.
+
+    Args:
+        db: Database session
+        user_data: User data to create or update
+        update_columns: Columns to overwrite when the user exists (defaults to
+            the fields that were set on user_data)
+        commit: Commit at the end; pass False to add more work to the transaction
+
+    Returns:
+        The created or updated User model instance
+    """
+    values = user_data.model_dump()
+    if update_columns is None:
+        update_columns = [key for key in user_data.model_dump(exclude_unset=True) if key != "user_id"]
+    dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+
+    if dialect_insert is not None:
+        statement = dialect_insert(User).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[User.user_id],
+            # ON CONFLICT updates don't run column onupdate defaults
+            set_={**{column: statement.excluded[column] for column in update_columns}, "updated_at": func.now()},
+        ).returning(User)
+        db_user = db.scalars(statement, execution_options={"populate_existing": True}).one()
+    else:
+        db_user = get_user_by_id(db, user_data.user_id)
+        if db_user is None:
+            db_user = User(**values)
+            db.add(db_user)
+        else:
+            for key in update_columns:
+                setattr(db_user, key, values[key])
+        if not commit:
+            db.flush()
+
+    if commit:
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return db_user
+
 
 def create_or_update_user(db: Session, user_data: UserCreate) -> User:
     """
     Create a new user or update existing user if user_id already exists.
-    This is the primary function for the ingestion pipeline.
+    This is the primary function for the ingestion pipeline. It is a single
+    upsert statement (see upsert_user); an update only touches the fields
+    that were set on user_data.
 
     Args:
         db: Database session
@@ -22,23 +106,115 @@ def create_or_update_user(db: Session, user_data: UserCreate) -> User:
     Returns:
         The created or updated User model instance
     """
-    # Check if user already exists
-    existing_user = db.query(User).filter(User.user_id == user_data.user_id).first()
+    return upsert_user(db, user_data)
 
-    if existing_user:
-        # Update existing user
-        for key, value in user_data.model_dump(exclude_unset=True).items():
-            setattr(existing_user, key, value)
-        db.commit()
-        db.refresh(existing_user)
-        return existing_user
-    else:
-        # Create new user
-        db_user = User(**user_data.model_dump())
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        return db_user
+
+def bulk_upsert_users(
+    db: Session,
+    users_data: Iterable[UserCreate],
+    batch_size: int = DEFAULT_UPSERT_BATCH_SIZE,
+    commit: bool = True
+) -> List[UpsertOutcome]:
+    """
+    Create or update any number of users in a single transaction.
+
+    Rows are written in batches of `batch_size`: one SELECT of the existing
+    ids, one multi-row INSERT and one executemany UPDATE per batch, and no ORM
+    objects are loaded, so N users cost about 3N/batch_size statements and a
+    single commit instead of three round trips and a commit each. This is the
+    batch entry point for seeding and ingestion. Like create_or_update_user,
+    updates only touch the fields that were set; a user_id given more than
+    once is applied in order.
+
+    Each batch runs in a savepoint. If a batch hits a database error (e.g. a
+    concurrent insert of the same user_id), it is retried row by row and only
+    the rows that still fail are reported as failed; the rest of the
+    transaction is kept.
+
+    Args:
+        db: Database session
+        users_data: Users to create or update; any iterable, consumed one batch at a time
+        batch_size: Rows per batch
+        commit: Commit at the end; pass False to add more work to the transaction
+
+    Returns:
+        One UpsertOutcome per input row, in input order
+
+    Raises:
+        SQLAlchemyError: If the commit fails (the transaction is rolled back)
+    """
+    rows = iter(enumerate(users_data))
+    outcomes: List[UpsertOutcome] = []
+    try:
+        while True:
+            batch = list(islice(rows, max(1, batch_size)))
+            if not batch:
+                break
+            try:
+                with db.begin_nested():
+                    outcomes.extend(_upsert_batch(db, batch))
+                continue
+            except SQLAlchemyError as e:
+                if len(batch) == 1:
+                    outcomes.append(_failed_upsert(batch[0], e))
+                    continue
+            for row in batch:
+                try:
+                    with db.begin_nested():
+                        outcomes.extend(_upsert_batch(db, [row]))
+                except SQLAlchemyError as e:
+                    outcomes.append(_failed_upsert(row, e))
+        if commit:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return outcomes
+
+
+def _failed_upsert(row: Tuple[int, UserCreate], error: SQLAlchemyError) -> UpsertOutcome:
+    index, user_data = row
+    message = str(getattr(error, "orig", None) or error).splitlines()[0]
+    return UpsertOutcome(index, user_data.user_id, UPSERT_FAILED, error=message)
+
+
+def _upsert_batch(db: Session, batch: List[Tuple[int, UserCreate]]) -> List[UpsertOutcome]:
+    """Write one batch of bulk_upsert_users; returns its outcomes"""
+    user_ids = list(dict.fromkeys(user_data.user_id for _, user_data in batch))
+    existing = dict(db.execute(select(User.user_id, User.id).where(User.user_id.in_(user_ids))).all())
+
+    # Fold repeated user_ids into one row each, applied in input order
+    inserts: Dict[str, Dict[str, Any]] = {}
+    updates: Dict[str, Dict[str, Any]] = {}
+    statuses = []
+    for _, user_data in batch:
+        user_id = user_data.user_id
+        if user_id in existing:
+            updates.setdefault(user_id, {}).update(user_data.model_dump(exclude_unset=True))
+            statuses.append(UPSERT_UPDATED)
+        elif user_id in inserts:
+            inserts[user_id].update(user_data.model_dump(exclude_unset=True))
+            statuses.append(UPSERT_UPDATED)
+        else:
+            inserts[user_id] = user_data.model_dump()
+            statuses.append(UPSERT_CREATED)
+
+    if inserts:
+        created = db.execute(insert(User).returning(User.user_id, User.id), list(inserts.values()))
+        existing.update(created.all())
+    # An executemany UPDATE needs the same columns in every row
+    by_columns: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for user_id, values in updates.items():
+        values.pop("user_id", None)
+        if values:
+            by_columns.setdefault(tuple(sorted(values)), []).append({"id": existing[user_id], **values})
+    for rows in by_columns.values():
+        db.execute(update(User), rows)
+
+    return [
+        UpsertOutcome(index, user_data.user_id, status, id=existing[user_data.user_id])
+        for (index, user_data), status in zip(batch, statuses)
+    ]
 
 
 def get_user_by_id(db: Session, user_id: str) -> Optional[User]:
@@ -55,6 +231,22 @@ def get_user_by_id(db: Session, user_id: str) -> Optional[User]:
     return db.query(User).filter(User.user_id == user_id).first()
 
 
+def get_user_for_update(db: Session, user_id: str) -> Optional[User]:
+    """
+    Retrieve a user and lock its row until the transaction ends, so a
+    read-modify-write of the profile can't interleave with another one.
+    (SELECT ... FOR UPDATE on PostgreSQL; SQLite already serializes writers.)
+
+    Args:
+        db: Database session
+        user_id: The unique user identifier
+
+    Returns:
+        User model instance or None if not found
+    """
+    return db.query(User).filter(User.user_id == user_id).with_for_update().first()
+
+
 def get_user_by_internal_id(db: Session, id: int) -> Optional[User]:
     """
     Retrieve a single user by their internal database ID.
@@ -84,28 +276,40 @@ def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
     return db.query(User).offset(skip).limit(limit).all()
 
 
-def update_user(db: Session, user_id: str, user_data: UserUpdate) -> Optional[User]:
+def update_user(db: Session, user_id: str, user_data: UserUpdate, commit: bool = True) -> Optional[User]:
     """
-    Update an existing user's information.
+    Update an existing user's information. Where the database supports it,
+    this is a single UPDATE ... RETURNING, so the new updated_at comes back
+    without a lookup beforehand or a refresh afterwards.
 
     Args:
         db: Database session
         user_id: The unique user identifier
         user_data: Updated user data (only provided fields will be updated)
+        commit: Commit at the end; pass False to add more work to the transaction
 
     Returns:
         Updated User model instance or None if not found
     """
-    db_user = get_user_by_id(db, user_id)
-    if not db_user:
-        return None
-
     update_data = user_data.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_user, key, value)
+    if not update_data:
+        return get_user_by_id(db, user_id)
 
-    db.commit()
-    db.refresh(db_user)
+    if db.get_bind().dialect.update_returning:
+        statement = update(User).where(User.user_id == user_id).values(**update_data).returning(User)
+        db_user = db.scalars(statement, execution_options={"populate_existing": True}).one_or_none()
+    else:
+        db_user = get_user_by_id(db, user_id)
+        if db_user is not None:
+            for key, value in update_data.items():
+                setattr(db_user, key, value)
+    if db_user is None:
+        if commit:
+            db.rollback()
+        return None
+
+    if commit:
+        db.commit()
     return db_user
 
 
@@ -0,0 +1,316 @@
+"""
+Content-addressed LLM response cache.
+
+Responses are keyed on a hash of (model, system message, prompt, temperature,
+max_tokens). The system message is hashed as sent, including any injected
+date/time line, so an answer that may depend on the time is only reused
+within the same minute. Lookups go through an in-memory LRU front tier and
+then a SQLite back tier that survives restarts. Both tiers expire entries
+after a TTL; the SQLite tier is also capped by total size and evicts
+least-recently-used rows.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Optional, Dict, Tuple
+
+from repo_src.backend.llm_chat.providers import CompletionResult
+
+
+
+def default_cache_path() -> str:
+    """SQLite tier location: the user cache directory ($XDG_CACHE_HOME or ~/.cache), not the working directory"""
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "social-os", "llm_cache.db")
+
+
+def make_cache_key(
+    model: str,
+    system_message: str,
+    prompt_text: str,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """
+    Build a stable content hash for an LLM request.
+
+    Args:
+        model: Model identifier
+        system_message: System message as sent, including any date/time line
+        prompt_text: User prompt
+        temperature: Sampling temperature
+        max_tokens: Completion token limit
+
+    Returns:
+        Hex SHA-256 digest identifying the request
+    """
+    payload = json.dumps(
+        {
+            "model": model,
+            "system": system_message,
+            "prompt": prompt_text,
+            "temperature": round(float(temperature), 4),
+            "max_tokens": int(max_tokens),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheConfig:
+    """Settings for the tiered response cache"""
+    enabled: bool = True
+    max_entries: int = 1024
+    ttl_seconds: float = 86400.0
+    path: Optional[str] = field(default_factory=default_cache_path)
+    max_bytes: int = 100 * 1024 * 1024
+
+    @classmethod
+    def from_env(cls) -> "CacheConfig":
+        """Build cache settings from LLM_CACHE_* environment variables"""
+        return cls(
+            enabled=os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400")),
+            path=os.path.expanduser(os.getenv("LLM_CACHE_PATH", default_cache_path())) or None,
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024))),
+        )
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for the cache"""
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    expirations: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """In-memory LRU with per-entry TTL; safe to share between threads (aget/aset run in workers)"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, CompletionResult]]" = OrderedDict()
+
+    def get(self, key: str) -> Tuple[Optional[CompletionResult], bool]:
+        """Return (value, expired) for a key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None, True
+            self._entries.move_to_end(key)
+            return value, False
+
+    def set(self, key: str, value: CompletionResult, stored_at: Optional[float] = None) -> int:
+        """Store a value and return the number of entries evicted"""
+        with self._lock:
+            self._entries[key] = (stored_at or time.time(), value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Persistent cache tier with TTL and total-size eviction"""
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed ON llm_cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Tuple[Optional[CompletionResult], Optional[float], bool]:
+        """Return (value, created_at, expired) for a key"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, None, False
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None, None, True
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return CompletionResult(**json.loads(value)), created_at, False
+
+    def set(self, key: str, value: CompletionResult) -> int:
+        """Store a value and return the number of rows evicted to stay under max_bytes"""
+        now = time.time()
+        encoded = json.dumps(asdict(value), ensure_ascii=False)
+        size = len(encoded.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, size, now, now),
+            )
+            evicted = self._evict_locked(now)
+            self._conn.commit()
+        return evicted
+
+    def _evict_locked(self, now: float) -> int:
+        evicted = self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return evicted
+        rows = self._conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at ASC").fetchall()
+        doomed = []
+        for row_key, row_size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((row_key,))
+            total -= row_size
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", doomed)
+        return evicted + len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + SQLite) cache of LLM completions"""
+
+    def __init__(self, config: CacheConfig):
+        self.config = config
+        self.stats = CacheStats()
+        self.memory = LRUCache(config.max_entries, config.ttl_seconds)
+        self.disk = SQLiteCache(config.path, config.ttl_seconds, config.max_bytes) if config.path else None
+
+    def get(self, key: str) -> Optional[CompletionResult]:
+        """Look up a key in memory, then on disk (promoting disk hits to memory)"""
+        value, expired = self.memory.get(key)
+        if value is not None:
+            self.stats.memory_hits += 1
+            return value
+        if expired:
+            self.stats.expirations += 1
+
+        if self.disk is not None:
+            value, created_at, expired = self.disk.get(key)
+            if value is not None:
+                self.stats.disk_hits += 1
+                self.stats.evictions += self.memory.set(key, value, stored_at=created_at)
+                return value
+            if expired:
+                self.stats.expirations += 1
+
+        self.stats.misses += 1
+        return None
+
+    def set(self, key: str, value: CompletionResult) -> None:
+        """Store a value in both tiers"""
+        self.stats.sets += 1
+        self.stats.evictions += self.memory.set(key, value)
+        if self.disk is not None:
+            self.stats.evictions += self.disk.set(key, value)
+
+    async def aget(self, key: str) -> Optional[CompletionResult]:
+        """Async lookup; disk reads run in a worker thread"""
+        if self.disk is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: CompletionResult) -> None:
+        """Async store; disk writes run in a worker thread"""
+        if self.disk is None:
+            self.set(key, value)
+            return
+        await asyncio.to_thread(self.set, key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+    def snapshot(self) -> Dict[str, float]:
+        """Counters plus current memory-tier size, for diagnostics endpoints"""
+        data = asdict(self.stats)
+        data["hit_rate"] = round(self.stats.hit_rate, 4)
+        data["memory_entries"] = len(self.memory)
+        return data
+
+
+# Process-wide cache shared by every caller of ask_llm
+_cache: Optional[ResponseCache] = None
+_cache_initialized = False
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Return the shared cache, creating it from the environment on first use"""
+    global _cache, _cache_initialized
+    if not _cache_initialized:
+        config = CacheConfig.from_env()
+        _cache = ResponseCache(config) if config.enabled else None
+        _cache_initialized = True
+    return _cache
+
+
+def set_cache(cache: Optional[ResponseCache]) -> None:
+    """Replace the shared cache (None disables caching; used by tests)"""
+    global _cache, _cache_initialized
+    _cache = cache
+    _cache_initialized = True
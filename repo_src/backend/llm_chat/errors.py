@@ -0,0 +1,81 @@
+"""
+Typed exceptions raised by the LLM layer.
+Providers translate their client library's errors into these so callers can
+tell retryable failures (rate limits, timeouts, 5xx) from permanent ones.
+"""
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class LLMError(Exception):
+    """Base class for all LLM call failures"""
+    retryable = False
+    status_code = 502  # HTTP status used when surfacing the error from the API
+
+    def __init__(self, message: str, model: Optional[str] = None):
+        super().__init__(message)
+        self.model = model
+
+
+class LLMNotConfiguredError(LLMError):
+    """No provider is configured (e.g. OPENROUTER_API_KEY is missing)"""
+    status_code = 503
+
+
+class LLMRateLimitError(LLMError):
+    """The upstream rejected the call with 429 Too Many Requests"""
+    retryable = True
+    status_code = 429
+
+    def __init__(self, message: str, model: Optional[str] = None, retry_after: Optional[float] = None):
+        super().__init__(message, model)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMError):
+    """The upstream did not answer in time"""
+    retryable = True
+    status_code = 504
+
+
+class LLMConnectionError(LLMError):
+    """The upstream could not be reached"""
+    retryable = True
+    status_code = 502
+
+
+class LLMUpstreamError(LLMError):
+    """The upstream returned a server error (5xx, 408 or 409)"""
+    retryable = True
+    status_code = 502
+
+
+class LLMRequestError(LLMError):
+    """The upstream rejected the request itself (4xx); retrying will not help"""
+    status_code = 400
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (delay in seconds or an HTTP date).
+
+    Args:
+        value: Raw header value
+
+    Returns:
+        Delay in seconds, or None if the header is missing or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,340 @@
+"""
+Offline stand-in for OpenRouter, for load and regression testing.
+
+FakeOpenRouterTransport answers OpenAI-compatible chat-completions requests
+in-process, so the real OpenRouterProvider (SDK parsing, error translation,
+streaming) is exercised without network access or spend. Latency, token rate,
+error, 429 and malformed-output injection are configurable, and extraction
+prompts get a deterministic profile JSON derived from the input text (an
+array of them for batched extraction prompts).
+
+Select it with LLM_PROVIDER=fake; see FakeLLMConfig for the FAKE_LLM_* settings.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from repo_src.backend.llm_chat.providers import OpenRouterProvider
+from repo_src.backend.llm_chat.tokens import CHARS_PER_TOKEN, estimate_message_tokens, estimate_tokens
+
+FAKE_BASE_URL = "http://fake-llm.local/api/v1"
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+# Vocabulary for deterministic chat replies
+_WORDS = (
+    "the system handles requests quickly and reliably while keeping latency low "
+    "under load so every user sees a fast and consistent response from the service"
+).split()
+
+
+@dataclass
+class FakeLLMConfig:
+    """Behaviour of the fake upstream"""
+    latency_distribution: str = "lognormal"  # fixed, uniform, exponential or lognormal
+    latency_ms: float = 300.0  # median time to first token (mean for exponential)
+    latency_sigma: float = 0.5  # lognormal shape / relative uniform spread
+    tokens_per_second: float = 100.0  # generation rate after the first token (0 = instant)
+    completion_tokens: int = 64  # length of non-extraction replies
+    error_rate: float = 0.0  # fraction of requests answered with HTTP 500
+    rate_limit_rate: float = 0.0  # fraction of requests answered with HTTP 429
+    retry_after: float = 1.0  # Retry-After seconds sent with 429s
+    concurrency_limit: int = 0  # requests beyond this many in flight get a 429 (0 = off)
+    malformed_rate: float = 0.0  # fraction of extraction answers replaced by off-topic prose
+    seed: Optional[int] = None  # seed for latency/error sampling
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMConfig":
+        """Build the fake's settings from FAKE_LLM_* environment variables"""
+        seed = os.getenv("FAKE_LLM_SEED")
+        config = cls(
+            latency_distribution=os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "lognormal").lower(),
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "300")),
+            latency_sigma=float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5")),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "100")),
+            completion_tokens=int(os.getenv("FAKE_LLM_COMPLETION_TOKENS", "64")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            rate_limit_rate=float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0")),
+            retry_after=float(os.getenv("FAKE_LLM_RETRY_AFTER", "1")),
+            concurrency_limit=int(os.getenv("FAKE_LLM_CONCURRENCY_LIMIT", "0")),
+            malformed_rate=float(os.getenv("FAKE_LLM_MALFORMED_RATE", "0")),
+            seed=int(seed) if seed else None,
+        )
+        if config.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"FAKE_LLM_LATENCY_DISTRIBUTION must be one of {', '.join(LATENCY_DISTRIBUTIONS)}"
+            )
+        return config
+
+
+@dataclass
+class FakeLLMStats:
+    """What the fake upstream has served"""
+    requests: int = 0
+    completed: int = 0
+    cancelled: int = 0  # streams the client closed before the end
+    errors: int = 0
+    rate_limited: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    peak_in_flight: int = 0
+
+
+def _sentences(text: str) -> List[str]:
+    """Sentences of the subject's own words (interviewer lines are skipped)"""
+    kept = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.lower().startswith("interviewer:") or line.startswith("---"):
+            continue
+        line = re.sub(r"^[A-Z][\w .'-]{0,40}:\s+", "", line)  # drop "Alice: " speaker labels
+        kept.extend(s.strip() for s in re.split(r"(?<=[.!?])\s+", line) if len(s.split()) >= 5)
+    return kept
+
+
+def _find_name(text: str) -> str:
+    patterns = (
+        r'"name":\s*"([^"]+)"',  # merge prompts carry partial profiles as JSON
+        r"^(?:Interview Transcript|Name|Profile|Transcript)[ \t]*:[ \t]*(?:(?:Dr|Mr|Mrs|Ms|Prof)\.[ \t]+)?([A-Z][\w'-]+(?:[ \t]+[A-Z][\w'-]+)+)",
+        r"\b(?:I'm|I am|My name is)[ \t]+([A-Z][a-z'-]+(?:[ \t]+[A-Z][a-z'-]+)+)",
+    )
+    for pattern in patterns:
+        match = re.search(pattern, text, re.MULTILINE)
+        if match:
+            return match.group(1).strip()
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:6]
+    return f"Person {digest}"
+
+
+def fake_extraction(text: str, max_tokens: int) -> str:
+    """
+    Deterministic profile JSON for an extraction prompt: the name comes from
+    the transcript header or a self-introduction, the bio from the first
+    sentence and wiki_content from the subject's sentences as bullet points,
+    sized to fit max_tokens.
+    """
+    if "TEXT TO ANALYZE:" in text:
+        text = text.split("TEXT TO ANALYZE:", 1)[1]
+    name = _find_name(text)
+    sentences = _sentences(text)
+    bio = (sentences[0] if sentences else f"Profile of {name}")[:100]
+
+    budget = max(0, max_tokens * CHARS_PER_TOKEN - 300)
+    bullets: List[str] = []
+    used = 0
+    for sentence in sentences:
+        if used + len(sentence) + 3 > budget:
+            break
+        bullets.append(f"- {sentence}")
+        used += len(sentence) + 3
+    profile = {
+        "user_id": re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_"),
+        "name": name,
+        "bio": bio,
+        "wiki_content": "## Overview\n\n" + "\n".join(bullets),
+    }
+    return json.dumps(profile)
+
+
+_BATCH_DOCUMENT = re.compile(r'<document index="(\d+)">\n?(.*?)</document>', re.DOTALL)
+
+
+def fake_batch_extraction(documents: List[tuple], max_tokens: int) -> str:
+    """JSON array answering a batch extraction prompt, one element per (index, text) document"""
+    share = max(1, max_tokens // max(1, len(documents)))
+    elements = []
+    for index, text in documents:
+        profile = json.loads(fake_extraction(text, share))
+        elements.append({"index": int(index), **profile})
+    return json.dumps(elements)
+
+
+def fake_profile_update(prompt: str, max_tokens: int) -> str:
+    """Delta-update JSON: the new material's sentences appended to the profile's Overview section"""
+    material = prompt.split("NEW MATERIAL:", 1)[-1].rsplit("Return the profile changes", 1)[0]
+    profile = json.loads(fake_extraction(material, max_tokens))
+    bullets = profile["wiki_content"].split("\n\n", 1)[-1]
+    edits = [{"section": "## Overview", "action": "append", "content": bullets}] if bullets.strip() else []
+    return json.dumps({"bio": None, "edits": edits})
+
+
+def fake_reply(prompt: str, completion_tokens: int) -> str:
+    """Deterministic filler reply whose words depend only on the prompt"""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+    return " ".join(rng.choice(_WORDS) for _ in range(max(1, completion_tokens)))
+
+
+class FakeOpenRouterTransport(httpx.AsyncBaseTransport):
+    """httpx transport that serves chat completions like OpenRouter would"""
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None):
+        self.config = config or FakeLLMConfig()
+        self.stats = FakeLLMStats()
+        self._rng = random.Random(self.config.seed)
+        self._in_flight = 0
+
+    def sample_latency(self) -> float:
+        """Time to first token, in seconds, drawn from the configured distribution"""
+        config = self.config
+        base = config.latency_ms / 1000
+        if config.latency_distribution == "fixed":
+            return base
+        if config.latency_distribution == "uniform":
+            return max(0.0, self._rng.uniform(base * (1 - config.latency_sigma), base * (1 + config.latency_sigma)))
+        if config.latency_distribution == "exponential":
+            return self._rng.expovariate(1 / base) if base > 0 else 0.0
+        return base * self._rng.lognormvariate(0, config.latency_sigma)
+
+    def _answer(self, body: Dict[str, Any]) -> str:
+        messages = body.get("messages") or []
+        system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+        prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        max_tokens = int(body.get("max_tokens") or 2048)
+        if '"edits"' in system:
+            return fake_profile_update(prompt, max_tokens)
+        if '"user_id"' in system:
+            documents = _BATCH_DOCUMENT.findall(prompt)
+            if documents:
+                answer = fake_batch_extraction(documents, max_tokens)
+            else:
+                answer = fake_extraction(prompt, max_tokens)
+            if self.config.malformed_rate and self._rng.random() < self.config.malformed_rate:
+                # An off-topic answer as long as the real one
+                return fake_reply(prompt, len(answer.split()))
+            return answer
+        return fake_reply(prompt, min(self.config.completion_tokens, max_tokens))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not request.url.path.endswith("/chat/completions"):
+            return httpx.Response(404, json={"error": {"message": f"Unknown path {request.url.path}"}})
+        await request.aread()
+        body = json.loads(request.content)
+        config = self.config
+        self.stats.requests += 1
+
+        if config.concurrency_limit and self._in_flight >= config.concurrency_limit:
+            return self._rate_limited("Too many concurrent requests")
+        roll = self._rng.random()
+        if roll < config.rate_limit_rate:
+            return self._rate_limited("Rate limit exceeded")
+        if roll < config.rate_limit_rate + config.error_rate:
+            self.stats.errors += 1
+            return httpx.Response(500, json={"error": {"message": "Injected upstream error", "code": 500}})
+
+        model = body.get("model") or "fake/model"
+        text = self._answer(body)
+        prompt_tokens = estimate_message_tokens(body.get("messages") or [])
+        completion_tokens = estimate_tokens(text)
+        self.stats.prompt_tokens += prompt_tokens
+
+        self._in_flight += 1
+        self.stats.peak_in_flight = max(self.stats.peak_in_flight, self._in_flight)
+        if body.get("stream"):
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=self._stream_body(model, text, prompt_tokens, completion_tokens),
+            )
+        try:
+            await asyncio.sleep(self.sample_latency() + self._generation_time(completion_tokens))
+        finally:
+            self._in_flight -= 1
+        self.stats.completed += 1
+        self.stats.completion_tokens += completion_tokens
+        return httpx.Response(200, json={
+            "id": "fake-completion",
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    def _rate_limited(self, message: str) -> httpx.Response:
+        self.stats.rate_limited += 1
+        return httpx.Response(
+            429,
+            json={"error": {"message": message, "code": 429}},
+            headers={"retry-after": f"{self.config.retry_after:g}"},
+        )
+
+    def _generation_time(self, completion_tokens: int) -> float:
+        rate = self.config.tokens_per_second
+        return completion_tokens / rate if rate > 0 else 0.0
+
+    async def _stream_body(
+        self, model: str, text: str, prompt_tokens: int, completion_tokens: int
+    ) -> AsyncIterator[bytes]:
+        """
+        SSE chunks paced at the configured token rate, ending with a usage chunk.
+        Completion tokens are counted as they are sent, so a stream the client
+        closes early only counts what was generated.
+        """
+        def event(payload: Dict[str, Any]) -> bytes:
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        base = {"id": "fake-stream", "object": "chat.completion.chunk", "created": 0, "model": model}
+        pieces = re.findall(r"\S+\s*", text) or [text]
+        per_piece = self._generation_time(completion_tokens) / len(pieces)
+        finished = False
+        sent_tokens = 0
+        try:
+            await asyncio.sleep(self.sample_latency())
+            for index, piece in enumerate(pieces, start=1):
+                tokens = completion_tokens * index // len(pieces)
+                self.stats.completion_tokens += tokens - sent_tokens
+                sent_tokens = tokens
+                yield event({**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+                if per_piece:
+                    await asyncio.sleep(per_piece)
+            # Settle the accounting before the last events: clients stop
+            # reading at [DONE] and may never resume this generator.
+            finished = True
+            self._in_flight -= 1
+            self.stats.completed += 1
+            yield event({**base, "choices": [], "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            }})
+            yield b"data: [DONE]\n\n"
+        finally:
+            if not finished:
+                self._in_flight -= 1
+                self.stats.cancelled += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**asdict(self.stats), "in_flight": self._in_flight}
+
+
+class FakeOpenRouterProvider(OpenRouterProvider):
+    """OpenRouterProvider wired to the in-process fake upstream"""
+
+    name = "fake"
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None):
+        self.transport = FakeOpenRouterTransport(config)
+        super().__init__(
+            api_key="fake-key",
+            base_url=FAKE_BASE_URL,
+            http_client=httpx.AsyncClient(transport=self.transport),
+        )
+
+
+def create_fake_provider() -> FakeOpenRouterProvider:
+    """Build the fake provider from FAKE_LLM_* environment variables"""
+    config = FakeLLMConfig.from_env()
+    print(f"Using fake LLM provider ({config.latency_distribution} latency, "
+          f"{config.latency_ms:g} ms median, {config.tokens_per_second:g} tok/s)")
+    return FakeOpenRouterProvider(config)
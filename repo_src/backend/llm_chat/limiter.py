@@ -0,0 +1,213 @@
+"""
+Per-model admission control for upstream LLM calls.
+
+Each model gets an AIMD concurrency limit (additive increase on success,
+multiplicative decrease on 429s) plus optional token buckets for requests and
+tokens per minute. A 429 with Retry-After pauses every caller of that model
+until the upstream is ready again.
+
+The limiter deliberately avoids asyncio.Lock/Condition: those bind to the first
+event loop that uses them, and CLI entry points run a fresh loop per
+asyncio.run().
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from repo_src.backend.llm_chat.errors import LLMRateLimitError
+
+
+@dataclass
+class LimiterConfig:
+    """Settings shared by every per-model limiter"""
+    initial_concurrency: float = 8.0
+    min_concurrency: float = 1.0
+    max_concurrency: float = 32.0
+    decrease_factor: float = 0.5
+    requests_per_minute: float = 0.0  # 0 disables the request bucket
+    tokens_per_minute: float = 0.0  # 0 disables the token bucket
+
+    @classmethod
+    def from_env(cls) -> "LimiterConfig":
+        """Build limiter settings from LLM_* environment variables"""
+        return cls(
+            initial_concurrency=float(os.getenv("LLM_INITIAL_CONCURRENCY", "8")),
+            min_concurrency=float(os.getenv("LLM_MIN_CONCURRENCY", "1")),
+            max_concurrency=float(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+            decrease_factor=float(os.getenv("LLM_CONCURRENCY_DECREASE", "0.5")),
+            requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")),
+            tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "0")),
+        )
+
+
+class TokenBucket:
+    """Continuously refilling bucket; callers sleep until enough capacity exists"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.available = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """
+        Take `amount` from the bucket, waiting for it to refill if needed.
+
+        Returns:
+            Seconds spent waiting
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.available >= amount:
+                self.available -= amount
+                return waited
+            delay = (amount - self.available) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with optional request/token buckets for one model"""
+
+    def __init__(self, model: str, config: LimiterConfig):
+        self.model = model
+        self.config = config
+        self.limit = config.initial_concurrency
+        self.in_flight = 0
+        self.successes = 0
+        self.throttled = 0
+        self.queue_wait_seconds = 0.0
+        self._paused_until = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._requests = TokenBucket(config.requests_per_minute) if config.requests_per_minute > 0 else None
+        self._tokens = TokenBucket(config.tokens_per_minute) if config.tokens_per_minute > 0 else None
+
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int = 0) -> AsyncIterator[None]:
+        """
+        Hold a concurrency slot for the duration of one upstream call.
+        Rate-limit errors raised inside the block shrink the limit; clean exits grow it.
+
+        Args:
+            estimated_tokens: Prompt plus max completion tokens, charged to the token bucket
+        """
+        start = time.monotonic()
+        await self._wait_for_pause()
+        if self._requests is not None:
+            await self._requests.acquire(1)
+        if self._tokens is not None and estimated_tokens:
+            await self._tokens.acquire(estimated_tokens)
+        await self._acquire_slot()
+        self.queue_wait_seconds += time.monotonic() - start
+        try:
+            yield
+        except LLMRateLimitError as e:
+            self.on_rate_limited(e.retry_after)
+            raise
+        else:
+            self.on_success()
+        finally:
+            self._release_slot()
+
+    def on_success(self) -> None:
+        """Additive increase: roughly +1 to the limit per limit's worth of successes"""
+        self.successes += 1
+        self.limit = min(self.config.max_concurrency, self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Multiplicative decrease, and pause all callers if the upstream said when to retry"""
+        self.throttled += 1
+        self.limit = max(self.config.min_concurrency, self.limit * self.config.decrease_factor)
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    async def _wait_for_pause(self) -> None:
+        while True:
+            remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(remaining)
+
+    async def _acquire_slot(self) -> None:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                # Pass a wake-up we may have consumed on to the next waiter
+                self._wake()
+                raise
+        self.in_flight += 1
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            try:
+                waiter.set_result(None)
+            except RuntimeError:
+                # The waiter's event loop has already been closed
+                continue
+            free -= 1
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current limit and counters, for diagnostics endpoints"""
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "successes": self.successes,
+            "throttled": self.throttled,
+            "queue_wait_seconds": round(self.queue_wait_seconds, 3),
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 3),
+        }
+
+
+# Per-model limiters shared by every caller of ask_llm
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_config: Optional[LimiterConfig] = None
+
+
+def get_limiter(model: str) -> AdaptiveLimiter:
+    """Return the limiter for a model, creating it on first use"""
+    global _config
+    limiter = _limiters.get(model)
+    if limiter is None:
+        if _config is None:
+            _config = LimiterConfig.from_env()
+        limiter = AdaptiveLimiter(model, _config)
+        _limiters[model] = limiter
+    return limiter
+
+
+def reset_limiters(config: Optional[LimiterConfig] = None) -> None:
+    """Drop all limiters, optionally switching configuration (used by tests)"""
+    global _config
+    _limiters.clear()
+    _config = config
+
+
+def limiter_snapshots() -> Dict[str, Dict[str, float]]:
+    """Snapshots of every model's limiter"""
+    return {model: limiter.snapshot() for model, limiter in _limiters.items()}
@@ -1,42 +1,87 @@
+import asyncio
 import os
-from typing import Optional
+import sys
+import time
+from typing import Callable, Optional, List, Dict, AsyncIterator
 from dotenv import load_dotenv
-from openai import OpenAI
 from datetime import datetime
 
+from repo_src.backend.llm_chat.providers import CompletionRequest, CompletionResult, StreamChunk, get_provider
+from repo_src.backend.llm_chat.cache import get_cache, make_cache_key
+from repo_src.backend.llm_chat.singleflight import get_singleflight
+from repo_src.backend.llm_chat.errors import LLMError, LLMNotConfiguredError
+from repo_src.backend.llm_chat.limiter import get_limiter
+from repo_src.backend.llm_chat.retry import call_with_retry
+from repo_src.backend.llm_chat.tokens import estimate_message_tokens, estimate_tokens
+from repo_src.backend.llm_chat.metrics import LLMCallRecord, get_metrics
+
 # Load environment variables from the .env file
 load_dotenv()
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 DEFAULT_MODEL_NAME = os.getenv("OPENROUTER_MODEL_NAME", "anthropic/claude-3.5-sonnet")
 
-# These are optional but recommended for OpenRouter tracking
-YOUR_SITE_URL = os.getenv("YOUR_SITE_URL", "http://localhost:5173")
-YOUR_APP_NAME = os.getenv("YOUR_APP_NAME", "AI-Friendly Repo Template")
-
 def _get_current_datetime() -> str:
     """Get the current date and time formatted for system prompts"""
     return datetime.now().strftime("%A, %B %d, %Y at %I:%M %p")
 
 if not OPENROUTER_API_KEY:
-    print("Warning: OPENROUTER_API_KEY not found in .env file. LLM calls will fail.")
+    print("Warning: OPENROUTER_API_KEY not found in .env file. LLM calls will fail.", file=sys.stderr)
 
-client = None
-if OPENROUTER_API_KEY:
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=OPENROUTER_API_KEY,
-    )
+PROVIDER_NOT_INITIALIZED = "OpenRouter client not initialized. Is OPENROUTER_API_KEY set in .env?"
 
-async def ask_llm(
+def _record_call(model: str, caller: str, outcome: str, start: float, **fields) -> None:
+    """Record one call in the shared token/cost/latency metrics"""
+    get_metrics().record(LLMCallRecord(
+        model=model,
+        caller=caller,
+        outcome=outcome,
+        latency_seconds=time.perf_counter() - start,
+        **fields,
+    ))
+
+def _with_datetime(system_message: str, include_datetime: bool) -> str:
+    """Prepend the current date/time to the system message if requested and not already present"""
+    if include_datetime and "Current date and time:" not in system_message:
+        current_datetime = _get_current_datetime()
+        system_message = f"Current date and time: {current_datetime}\n\n{system_message}"
+    return system_message
+
+def _build_messages(
+    prompt_text: str,
+    system_message: str,
+    include_datetime: bool = True
+) -> List[Dict[str, str]]:
+    """Build the chat messages, optionally adding the current date/time to the system message"""
+    return [
+        {"role": "system", "content": _with_datetime(system_message, include_datetime)},
+        {"role": "user", "content": prompt_text}
+    ]
+
+async def complete_llm(
     prompt_text: str,
     system_message: str = "You are a helpful assistant.",
     model_override: Optional[str] = None,
     max_tokens: int = 2048,
-    temperature: float = 0.7
-) -> str:
+    temperature: float = 0.7,
+    include_datetime: bool = True,
+    use_cache: bool = True,
+    caller: str = "default"
+) -> CompletionResult:
     """
-    Sends a prompt to the configured LLM via OpenRouter and returns the response.
+    Sends a prompt to the configured LLM via OpenRouter and returns the full
+    completion, including the model that answered and token usage.
+
+    Successful responses are stored in the shared response cache. The cache key
+    covers the system message as sent, so with include_datetime an answer is
+    only reused within the same minute and a time-dependent answer is never
+    more than a minute old; pass include_datetime=False for calls that don't
+    need the time.
+    Concurrent calls with the same key are coalesced into one upstream request.
+
+    Every call is recorded in the shared metrics (see llm_chat/metrics.py)
+    under its caller tag. Tokens are only counted for calls that reached the
+    model; cache hits and coalesced calls are recorded with zero tokens.
 
     Args:
         prompt_text: The user prompt to send to the LLM
@@ -44,38 +89,341 @@ async def ask_llm(
         model_override: Optional model to use instead of the default
         max_tokens: Maximum tokens in the response (default: 2048)
         temperature: Sampling temperature 0-1 (default: 0.7)
+        include_datetime: Prepend the current date/time to the system message (default: True)
+        use_cache: Read from and write to the response cache (default: True)
+        caller: Tag for metrics, e.g. "chat" or "ingestion" (default: "default")
 
     Returns:
-        The LLM's response text, or an error message if the call fails
+        CompletionResult with the response text and usage
+
+    Raises:
+        LLMNotConfiguredError: If no LLM provider is configured
+        LLMError: If the call fails after retries (see llm_chat/errors.py)
     """
-    if not client:
-        return "Error: OpenRouter client not initialized. Is OPENROUTER_API_KEY set in .env?"
+    provider = get_provider()
+    if not provider:
+        raise LLMNotConfiguredError(PROVIDER_NOT_INITIALIZED)
 
     model_to_use = model_override or DEFAULT_MODEL_NAME
+    start = time.perf_counter()
 
-    # Add current date/time to system message if not already present
-    if "Current date and time:" not in system_message:
-        current_datetime = _get_current_datetime()
-        system_message = f"Current date and time: {current_datetime}\n\n{system_message}"
+    # One key serves both the cache and in-flight coalescing; it covers the
+    # injected date/time, so time-dependent answers aren't reused once it changes
+    system_message = _with_datetime(system_message, include_datetime)
+    request_key = make_cache_key(model_to_use, system_message, prompt_text, temperature, max_tokens)
+    cache = get_cache() if use_cache else None
+    if cache is not None:
+        cached = await cache.aget(request_key)
+        if cached is not None:
+            _record_call(model_to_use, caller, "cache_hit", start)
+            return cached
+
+    request = CompletionRequest(
+        model=model_to_use,
+        messages=_build_messages(prompt_text, system_message, include_datetime),
+        temperature=temperature,
+        max_tokens=max_tokens,
+    )
+    limiter = get_limiter(model_to_use)
+    estimated_tokens = estimate_message_tokens(request.messages) + max_tokens
+
+    async def attempt() -> CompletionResult:
+        # Awaiting the shared async provider keeps the event loop free
+        # for other requests while the model is generating.
+        async with limiter.acquire(estimated_tokens):
+            return await provider.complete(request)
+
+    async def fetch() -> CompletionResult:
+        result = await call_with_retry(attempt, description=f"LLM call to {model_to_use}")
+        if cache is not None:
+            await cache.aset(request_key, result)
+        return result
 
+    singleflight = get_singleflight()
+    coalesced = singleflight.is_in_flight(request_key)
     try:
-        messages = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": prompt_text}
-        ]
+        # Concurrent identical calls share a single upstream request
+        result = await singleflight.do(request_key, fetch)
+    except LLMError as e:
+        print(f"Error calling OpenRouter API with model {model_to_use}: {e}")
+        _record_call(model_to_use, caller, type(e).__name__, start)
+        raise
+    except asyncio.CancelledError:
+        _record_call(model_to_use, caller, "cancelled", start)
+        raise
+
+    if coalesced:
+        _record_call(model_to_use, caller, "coalesced", start)
+    else:
+        _record_call(
+            model_to_use, caller, "ok", start,
+            prompt_tokens=result.prompt_tokens,
+            completion_tokens=result.completion_tokens,
+        )
+    return result
+
+
+async def complete_llm_streaming(
+    prompt_text: str,
+    new_consumer: Callable[[], Callable[[str], bool]],
+    system_message: str = "You are a helpful assistant.",
+    model_override: Optional[str] = None,
+    max_tokens: int = 2048,
+    temperature: float = 0.7,
+    include_datetime: bool = True,
+    use_cache: bool = True,
+    caller: str = "default"
+) -> CompletionResult:
+    """
+    Like complete_llm, but streams the upstream response through a consumer
+    so the caller can inspect the output while it is generated.
+
+    The consumer is called with every text delta. It returns True once it
+    has everything it needs, which closes the upstream stream without waiting
+    for trailing output; raising (e.g. ValueError for output that can no
+    longer be valid) aborts the request the same way and propagates. Either
+    way generation stops early and the tokens are not paid for.
+
+    `new_consumer` is called at the start of every attempt so a retried call
+    starts from fresh consumer state. A cache hit is fed to one consumer in a
+    single delta. Streamed calls are not coalesced. When the stream is cut
+    short, the provider sends no usage report, so the recorded completion
+    tokens are estimated from the text received, and the partial text is
+    not cached (complete_llm shares the cache key and expects full answers).
+
+    Args:
+        prompt_text: The user prompt to send to the LLM
+        new_consumer: Factory returning the consumer for one attempt
+        system_message: The system message to set context for the LLM
+        model_override: Optional model to use instead of the default
+        max_tokens: Maximum tokens in the response (default: 2048)
+        temperature: Sampling temperature 0-1 (default: 0.7)
+        include_datetime: Prepend the current date/time to the system message (default: True)
+        use_cache: Read from and write to the response cache (default: True)
+        caller: Tag for metrics, e.g. "chat" or "ingestion" (default: "default")
+
+    Returns:
+        CompletionResult with the text received (up to the point the consumer stopped)
+
+    Raises:
+        LLMNotConfiguredError: If no LLM provider is configured
+        LLMError: If the call fails after retries (see llm_chat/errors.py)
+        Exception: Whatever the consumer raised to abort the stream
+    """
+    provider = get_provider()
+    if not provider:
+        raise LLMNotConfiguredError(PROVIDER_NOT_INITIALIZED)
+
+    model_to_use = model_override or DEFAULT_MODEL_NAME
+    start = time.perf_counter()
+    system_message = _with_datetime(system_message, include_datetime)
+    request_key = make_cache_key(model_to_use, system_message, prompt_text, temperature, max_tokens)
+    cache = get_cache() if use_cache else None
+    if cache is not None:
+        cached = await cache.aget(request_key)
+        if cached is not None:
+            _record_call(model_to_use, caller, "cache_hit", start)
+            new_consumer()(cached.text)
+            return cached
+
+    request = CompletionRequest(
+        model=model_to_use,
+        messages=_build_messages(prompt_text, system_message, include_datetime),
+        temperature=temperature,
+        max_tokens=max_tokens,
+    )
+    limiter = get_limiter(model_to_use)
+    prompt_estimate = estimate_message_tokens(request.messages)
+    received: List[str] = []
+    usage: Dict[str, Optional[int]] = {}
+    first_token_at: List[float] = []
+    stopped: List[bool] = []  # the consumer closed the stream before its end
 
-        response = client.chat.completions.create(
+    async def attempt() -> CompletionResult:
+        consume = new_consumer()
+        received.clear()
+        usage.clear()
+        stopped.clear()
+        async with limiter.acquire(prompt_estimate + max_tokens):
+            stream = provider.stream(request)
+            try:
+                async for chunk in stream:
+                    if chunk.prompt_tokens is not None:
+                        usage["prompt"] = chunk.prompt_tokens
+                    if chunk.completion_tokens is not None:
+                        usage["completion"] = chunk.completion_tokens
+                    if not chunk.text:
+                        continue
+                    if not first_token_at:
+                        first_token_at.append(time.perf_counter())
+                    received.append(chunk.text)
+                    if consume(chunk.text):
+                        stopped.append(True)
+                        break
+            finally:
+                await stream.aclose()
+        text = "".join(received)
+        return CompletionResult(
+            text=text,
             model=model_to_use,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            extra_headers={
-                "HTTP-Referer": YOUR_SITE_URL,
-                "X-Title": YOUR_APP_NAME
-            }
+            prompt_tokens=usage.get("prompt") or prompt_estimate,
+            completion_tokens=usage.get("completion") or estimate_tokens(text),
         )
 
-        return response.choices[0].message.content
-    except Exception as e:
+    def record(outcome: str, result: Optional[CompletionResult] = None) -> None:
+        if result is None:
+            # Failed or aborted: count what was generated before the stream closed
+            text = "".join(received)
+            result = CompletionResult(
+                text=text,
+                model=model_to_use,
+                prompt_tokens=usage.get("prompt") or (prompt_estimate if text else 0),
+                completion_tokens=usage.get("completion") or (estimate_tokens(text) if text else 0),
+            )
+        _record_call(
+            model_to_use, caller, outcome, start,
+            prompt_tokens=result.prompt_tokens,
+            completion_tokens=result.completion_tokens,
+            time_to_first_token_seconds=first_token_at[0] - start if first_token_at else None,
+            streamed=True,
+        )
+
+    try:
+        result = await call_with_retry(attempt, description=f"Streamed LLM call to {model_to_use}")
+    except LLMError as e:
         print(f"Error calling OpenRouter API with model {model_to_use}: {e}")
-        return f"Error: Failed to get response from LLM. Details: {str(e)}"
+        record(type(e).__name__)
+        raise
+    except asyncio.CancelledError:
+        record("cancelled")
+        raise
+    except Exception:
+        record("aborted")
+        raise
+
+    record("ok", result)
+    if cache is not None and not stopped:
+        await cache.aset(request_key, result)
+    return result
+
+
+async def ask_llm(
+    prompt_text: str,
+    system_message: str = "You are a helpful assistant.",
+    model_override: Optional[str] = None,
+    max_tokens: int = 2048,
+    temperature: float = 0.7,
+    include_datetime: bool = True,
+    use_cache: bool = True,
+    caller: str = "default"
+) -> str:
+    """
+    Sends a prompt to the configured LLM via OpenRouter and returns the response.
+    See complete_llm for caching, coalescing and retry behaviour.
+
+    Args:
+        prompt_text: The user prompt to send to the LLM
+        system_message: The system message to set context for the LLM
+        model_override: Optional model to use instead of the default
+        max_tokens: Maximum tokens in the response (default: 2048)
+        temperature: Sampling temperature 0-1 (default: 0.7)
+        include_datetime: Prepend the current date/time to the system message (default: True)
+        use_cache: Read from and write to the response cache (default: True)
+        caller: Tag for metrics, e.g. "chat" or "ingestion" (default: "default")
+
+    Returns:
+        The LLM's response text
+
+    Raises:
+        LLMNotConfiguredError: If no LLM provider is configured
+        LLMError: If the call fails after retries (see llm_chat/errors.py)
+    """
+    result = await complete_llm(
+        prompt_text=prompt_text,
+        system_message=system_message,
+        model_override=model_override,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        include_datetime=include_datetime,
+        use_cache=use_cache,
+        caller=caller,
+    )
+    return result.text
+
+
+async def stream_llm(
+    prompt_text: str,
+    system_message: str = "You are a helpful assistant.",
+    model_override: Optional[str] = None,
+    max_tokens: int = 2048,
+    temperature: float = 0.7,
+    include_datetime: bool = True,
+    caller: str = "default"
+) -> AsyncIterator[StreamChunk]:
+    """
+    Streams the LLM's response as it is generated.
+
+    Closing the returned iterator (e.g. when an HTTP client disconnects)
+    closes the upstream request, so abandoned streams stop consuming tokens.
+    The call is recorded in the shared metrics with its time-to-first-token;
+    an abandoned stream is recorded as "cancelled".
+
+    Args:
+        prompt_text: The user prompt to send to the LLM
+        system_message: The system message to set context for the LLM
+        model_override: Optional model to use instead of the default
+        max_tokens: Maximum tokens in the response (default: 2048)
+        temperature: Sampling temperature 0-1 (default: 0.7)
+        include_datetime: Prepend the current date/time to the system message (default: True)
+        caller: Tag for metrics, e.g. "chat" or "ingestion" (default: "default")
+
+    Yields:
+        StreamChunk objects with text deltas; the final chunk carries usage
+
+    Raises:
+        LLMNotConfiguredError: If no LLM provider is configured
+        LLMError: If the upstream call fails
+    """
+    provider = get_provider()
+    if not provider:
+        raise LLMNotConfiguredError(PROVIDER_NOT_INITIALIZED)
+
+    request = CompletionRequest(
+        model=model_override or DEFAULT_MODEL_NAME,
+        messages=_build_messages(prompt_text, system_message, include_datetime),
+        temperature=temperature,
+        max_tokens=max_tokens,
+    )
+    limiter = get_limiter(request.model)
+    start = time.perf_counter()
+    first_token_at: Optional[float] = None
+    prompt_tokens = completion_tokens = 0
+    outcome = "cancelled"
+    try:
+        # The concurrency slot is held for the whole stream. Streams are not
+        # retried because tokens may already have been sent to the client.
+        async with limiter.acquire(estimate_message_tokens(request.messages) + max_tokens):
+            stream = provider.stream(request)
+            try:
+                async for chunk in stream:
+                    if chunk.text and first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    if chunk.prompt_tokens is not None:
+                        prompt_tokens = chunk.prompt_tokens
+                    if chunk.completion_tokens is not None:
+                        completion_tokens = chunk.completion_tokens
+                    yield chunk
+            finally:
+                await stream.aclose()
+        outcome = "ok"
+    except LLMError as e:
+        outcome = type(e).__name__
+        raise
+    finally:
+        _record_call(
+            request.model, caller, outcome, start,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            time_to_first_token_seconds=None if first_token_at is None else first_token_at - start,
+            streamed=True,
+        )
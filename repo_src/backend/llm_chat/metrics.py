@@ -0,0 +1,241 @@
+"""
+Token, cost and latency accounting for LLM calls.
+
+Every call made through llm_interface is recorded with its model, caller tag
+(e.g. "chat", "ingestion"), outcome, token usage, wall time and, for streams,
+time-to-first-token. Records are aggregated per (caller, model) into counters
+and latency histograms, and each one is also written as a JSON line to the
+"llm.calls" logger (and to LLM_CALL_LOG_PATH if set).
+"""
+import bisect
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+call_logger = logging.getLogger("llm.calls")
+
+# Latency bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# USD per million (prompt, completion) tokens; override with LLM_PRICING_JSON
+DEFAULT_PRICING: Dict[str, Tuple[float, float]] = {
+    "anthropic/claude-3.5-sonnet": (3.0, 15.0),
+    "anthropic/claude-3-haiku": (0.25, 1.25),
+    "openai/gpt-4-turbo": (10.0, 30.0),
+    "openai/gpt-3.5-turbo": (0.5, 1.5),
+    "meta-llama/llama-3.1-70b-instruct": (0.52, 0.75),
+}
+
+
+def load_pricing() -> Dict[str, Tuple[float, float]]:
+    """Pricing table, merged with LLM_PRICING_JSON ({"model": [prompt, completion]})"""
+    pricing = dict(DEFAULT_PRICING)
+    override = os.getenv("LLM_PRICING_JSON")
+    if override:
+        try:
+            pricing.update({model: (float(p), float(c)) for model, (p, c) in json.loads(override).items()})
+        except (ValueError, TypeError) as e:
+            print(f"Warning: ignoring invalid LLM_PRICING_JSON: {e}")
+    return pricing
+
+
+@dataclass
+class LLMCallRecord:
+    """One LLM call as seen by the caller"""
+    model: str
+    caller: str
+    outcome: str  # "ok", "cache_hit", "coalesced", "cancelled", "aborted" or an error class name
+    latency_seconds: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    time_to_first_token_seconds: Optional[float] = None
+    streamed: bool = False
+    cost_usd: float = 0.0
+    timestamp: float = field(default_factory=time.time)
+
+
+class Histogram:
+    """Fixed-bucket histogram with approximate quantiles"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket containing the q-th quantile"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 4),
+            "mean": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 4),
+            "buckets": {
+                **{f"le_{bound}": count for bound, count in zip(self.buckets, self.counts)},
+                "le_inf": self.counts[-1],
+            },
+        }
+
+
+@dataclass
+class CallAggregate:
+    """Counters and histograms for one (caller, model) pair"""
+    calls: int = 0
+    outcomes: Dict[str, int] = field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    latency: Histogram = field(default_factory=Histogram)
+    time_to_first_token: Histogram = field(default_factory=Histogram)
+
+    def add(self, record: LLMCallRecord) -> None:
+        self.calls += 1
+        self.outcomes[record.outcome] = self.outcomes.get(record.outcome, 0) + 1
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.cost_usd += record.cost_usd
+        self.latency.observe(record.latency_seconds)
+        if record.time_to_first_token_seconds is not None:
+            self.time_to_first_token.observe(record.time_to_first_token_seconds)
+
+    def snapshot(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "outcomes": dict(self.outcomes),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "latency_seconds": self.latency.snapshot(),
+            "time_to_first_token_seconds": self.time_to_first_token.snapshot(),
+        }
+
+
+class LLMMetrics:
+    """Aggregates LLMCallRecords per (caller, model) and emits a structured log"""
+
+    def __init__(self, pricing: Optional[Dict[str, Tuple[float, float]]] = None, recent_limit: int = 100):
+        self.pricing = pricing if pricing is not None else load_pricing()
+        self.started_at = time.time()
+        self.recent_limit = recent_limit
+        self.recent: List[LLMCallRecord] = []
+        self._aggregates: Dict[Tuple[str, str], CallAggregate] = {}
+        self.json_repaired = 0  # responses that parsed only after local repair
+        self.json_unrepairable = 0  # responses that repair could not salvage either
+        self.json_repairs: Dict[str, int] = {}  # repair kind -> responses it was applied to
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Estimated USD cost of a call (0 for models without pricing)"""
+        prompt_price, completion_price = self.pricing.get(model, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def record(self, record: LLMCallRecord) -> LLMCallRecord:
+        """Add a call to the aggregates and write it to the call log"""
+        record.cost_usd = self.cost(record.model, record.prompt_tokens, record.completion_tokens)
+        self._aggregates.setdefault((record.caller, record.model), CallAggregate()).add(record)
+        self.recent.append(record)
+        if len(self.recent) > self.recent_limit:
+            del self.recent[: len(self.recent) - self.recent_limit]
+        call_logger.info(json.dumps(asdict(record), sort_keys=True))
+        return record
+
+    def record_json_repair(self, repairs: Optional[List[str]]) -> None:
+        """Count a malformed response: the repairs that salvaged it, or None if none could"""
+        if repairs is None:
+            self.json_unrepairable += 1
+            return
+        self.json_repaired += 1
+        for kind in repairs:
+            self.json_repairs[kind] = self.json_repairs.get(kind, 0) + 1
+
+    def snapshot(self) -> Dict:
+        """Totals plus per-caller/per-model breakdowns, for the metrics endpoint"""
+        by_key = {}
+        totals = CallAggregate()
+        for (caller, model), aggregate in sorted(self._aggregates.items()):
+            by_key.setdefault(caller, {})[model] = aggregate.snapshot()
+            totals.calls += aggregate.calls
+            totals.prompt_tokens += aggregate.prompt_tokens
+            totals.completion_tokens += aggregate.completion_tokens
+            totals.cost_usd += aggregate.cost_usd
+            for outcome, count in aggregate.outcomes.items():
+                totals.outcomes[outcome] = totals.outcomes.get(outcome, 0) + count
+        return {
+            "since": self.started_at,
+            "totals": {
+                "calls": totals.calls,
+                "outcomes": totals.outcomes,
+                "prompt_tokens": totals.prompt_tokens,
+                "completion_tokens": totals.completion_tokens,
+                "total_tokens": totals.prompt_tokens + totals.completion_tokens,
+                "cost_usd": round(totals.cost_usd, 6),
+            },
+            "by_caller": by_key,
+            "json_repair": {
+                "repaired": self.json_repaired,
+                "unrepairable": self.json_unrepairable,
+                "by_kind": dict(self.json_repairs),
+            },
+        }
+
+    def reset(self) -> None:
+        self.started_at = time.time()
+        self.recent.clear()
+        self._aggregates.clear()
+        self.json_repaired = 0
+        self.json_unrepairable = 0
+        self.json_repairs.clear()
+
+
+def _configure_call_log() -> None:
+    """Send the JSON call log to LLM_CALL_LOG_PATH when configured"""
+    path = os.getenv("LLM_CALL_LOG_PATH")
+    if not path or any(isinstance(h, logging.FileHandler) for h in call_logger.handlers):
+        return
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    call_logger.addHandler(handler)
+    call_logger.setLevel(logging.INFO)
+
+
+# Process-wide metrics shared by every caller of ask_llm
+_metrics: Optional[LLMMetrics] = None
+
+
+def get_metrics() -> LLMMetrics:
+    """Return the shared metrics collector"""
+    global _metrics
+    if _metrics is None:
+        _configure_call_log()
+        _metrics = LLMMetrics()
+    return _metrics
+
+
+def set_metrics(metrics: Optional[LLMMetrics]) -> None:
+    """Replace the shared metrics collector (used by tests and benchmarks)"""
+    global _metrics
+    _metrics = metrics
@@ -0,0 +1,277 @@
+"""
+LLM provider layer.
+Wraps the upstream chat-completions API behind an async interface so that
+waiting on the model never blocks the event loop. A single provider (and its
+pooled HTTP client) is shared by the whole process and is created/closed in
+the FastAPI lifespan.
+"""
+import os
+from dataclasses import dataclass
+from typing import Optional, List, Dict, AsyncIterator
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from repo_src.backend.llm_chat.errors import (
+    LLMConnectionError,
+    LLMError,
+    LLMRateLimitError,
+    LLMRequestError,
+    LLMTimeoutError,
+    LLMUpstreamError,
+    parse_retry_after,
+)
+
+
+@dataclass
+class PoolLimits:
+    """Connection pool settings for the shared upstream HTTP client"""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = 120.0
+    connect_timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> "PoolLimits":
+        """Build pool limits from LLM_* environment variables"""
+        return cls(
+            max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30")),
+            timeout=float(os.getenv("LLM_TIMEOUT", "120")),
+            connect_timeout=float(os.getenv("LLM_CONNECT_TIMEOUT", "10")),
+        )
+
+
+@dataclass
+class CompletionRequest:
+    """A single chat-completion request sent to a provider"""
+    model: str
+    messages: List[Dict[str, str]]
+    max_tokens: int = 2048
+    temperature: float = 0.7
+
+
+@dataclass
+class CompletionResult:
+    """The text and usage returned by a provider for one request"""
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+@dataclass
+class StreamChunk:
+    """
+    One increment of a streamed completion. Token counts are only set on
+    the chunk that carries the provider's usage report (normally the last).
+    """
+    text: str = ""
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+class LLMProvider:
+    """
+    Base class for chat-completion providers.
+    Implementations must be safe to share between concurrent requests.
+    """
+
+    name = "base"
+
+    async def complete(self, request: CompletionRequest) -> CompletionResult:
+        raise NotImplementedError
+
+    async def stream(self, request: CompletionRequest) -> AsyncIterator[StreamChunk]:
+        """
+        Stream a completion as it is generated. Providers without native
+        streaming fall back to a single chunk holding the full response.
+        """
+        result = await self.complete(request)
+        yield StreamChunk(
+            text=result.text,
+            prompt_tokens=result.prompt_tokens,
+            completion_tokens=result.completion_tokens,
+        )
+
+    async def aclose(self) -> None:
+        """Release any pooled connections held by the provider"""
+        return None
+
+
+def build_http_client(limits: PoolLimits) -> httpx.AsyncClient:
+    """Create a keep-alive, connection-pooled async HTTP client"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(limits.timeout, connect=limits.connect_timeout),
+    )
+
+
+def translate_openai_error(error: Exception, model: str) -> Exception:
+    """
+    Map an openai client exception onto the LLM layer's typed errors.
+    Exceptions that are not API errors are returned unchanged.
+    """
+    if isinstance(error, LLMError) or not isinstance(error, openai.APIError):
+        return error
+    if isinstance(error, openai.APITimeoutError):
+        return LLMTimeoutError(f"Request to {model} timed out", model)
+    if isinstance(error, openai.APIConnectionError):
+        return LLMConnectionError(f"Could not reach the LLM provider: {error}", model)
+    if isinstance(error, openai.APIStatusError):
+        status = error.status_code
+        if status == 429:
+            retry_after = parse_retry_after(error.response.headers.get("retry-after"))
+            return LLMRateLimitError(f"Rate limited by the LLM provider: {error.message}", model, retry_after)
+        if status >= 500 or status in (408, 409):
+            return LLMUpstreamError(f"LLM provider error {status}: {error.message}", model)
+        return LLMRequestError(f"LLM provider rejected the request ({status}): {error.message}", model)
+    return LLMUpstreamError(f"LLM provider error: {error}", model)
+
+
+class OpenRouterProvider(LLMProvider):
+    """Provider for OpenRouter's OpenAI-compatible chat-completions API"""
+
+    name = "openrouter"
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://openrouter.ai/api/v1",
+        limits: Optional[PoolLimits] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ):
+        self._http_client = http_client or build_http_client(limits or PoolLimits())
+        self._client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            http_client=self._http_client,
+            max_retries=0,  # Retries are handled by llm_chat.retry
+        )
+        self._extra_headers = extra_headers or {}
+
+    async def complete(self, request: CompletionRequest) -> CompletionResult:
+        try:
+            response = await self._client.chat.completions.create(
+                model=request.model,
+                messages=request.messages,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                extra_headers=self._extra_headers,
+            )
+        except openai.APIError as e:
+            raise translate_openai_error(e, request.model) from e
+        usage = response.usage
+        return CompletionResult(
+            text=response.choices[0].message.content or "",
+            model=response.model or request.model,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+    async def stream(self, request: CompletionRequest) -> AsyncIterator[StreamChunk]:
+        try:
+            stream = await self._client.chat.completions.create(
+                model=request.model,
+                messages=request.messages,
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                extra_headers=self._extra_headers,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+        except openai.APIError as e:
+            raise translate_openai_error(e, request.model) from e
+        try:
+            async for event in stream:
+                text = ""
+                if event.choices and event.choices[0].delta.content:
+                    text = event.choices[0].delta.content
+                usage = event.usage
+                if not text and usage is None:
+                    continue
+                yield StreamChunk(
+                    text=text,
+                    prompt_tokens=usage.prompt_tokens if usage else None,
+                    completion_tokens=usage.completion_tokens if usage else None,
+                )
+        except openai.APIError as e:
+            raise translate_openai_error(e, request.model) from e
+        finally:
+            # Closing the response drops the upstream connection, which is
+            # what stops generation (and billing) when the consumer goes away.
+            await stream.close()
+
+    async def aclose(self) -> None:
+        await self._http_client.aclose()
+
+
+# Process-wide provider shared by every caller of ask_llm
+_provider: Optional[LLMProvider] = None
+
+
+def create_provider_from_env() -> Optional[LLMProvider]:
+    """
+    Build the provider configured by the environment.
+
+    LLM_PROVIDER=fake selects the offline stand-in from llm_chat/fake_provider.py,
+    which needs no API key.
+
+    Returns:
+        An LLMProvider, or None if OPENROUTER_API_KEY is not set
+    """
+    if os.getenv("LLM_PROVIDER", "openrouter").lower() == "fake":
+        # Imported lazily: the fake builds on OpenRouterProvider from this module
+        from repo_src.backend.llm_chat.fake_provider import create_fake_provider
+        return create_fake_provider()
+
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        return None
+    return OpenRouterProvider(
+        api_key=api_key,
+        base_url=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+        limits=PoolLimits.from_env(),
+        extra_headers={
+            "HTTP-Referer": os.getenv("YOUR_SITE_URL", "http://localhost:5173"),
+            "X-Title": os.getenv("YOUR_APP_NAME", "AI-Friendly Repo Template"),
+        },
+    )
+
+
+def init_provider() -> Optional[LLMProvider]:
+    """Create the shared provider if it does not exist yet (called at startup)"""
+    global _provider
+    if _provider is None:
+        _provider = create_provider_from_env()
+    return _provider
+
+
+def get_provider() -> Optional[LLMProvider]:
+    """
+    Return the shared provider, creating it lazily for callers that run
+    outside the FastAPI lifespan (e.g. CLI scripts).
+    """
+    return _provider or init_provider()
+
+
+def set_provider(provider: Optional[LLMProvider]) -> None:
+    """Replace the shared provider (used by tests and benchmarks)"""
+    global _provider
+    _provider = provider
+
+
+async def close_provider() -> None:
+    """Close the shared provider and its connection pool (called at shutdown)"""
+    global _provider
+    if _provider is not None:
+        provider, _provider = _provider, None
+        await provider.aclose()
@@ -0,0 +1,102 @@
+"""
+Retry with jittered exponential backoff for retryable LLM errors.
+"""
+import asyncio
+import os
+import random
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from repo_src.backend.llm_chat.errors import LLMError
+
+T = TypeVar("T")
+
+
+@dataclass
+class RetryPolicy:
+    """How many times to retry and how long to wait between attempts"""
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """Build the retry policy from LLM_* environment variables"""
+        return cls(
+            max_attempts=int(os.getenv("LLM_MAX_RETRIES", "3")) + 1,
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", "30")),
+        )
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Delay before the next attempt: "full jitter" exponential backoff,
+        but never shorter than the upstream's Retry-After.
+
+        Args:
+            attempt: Zero-based index of the attempt that just failed
+            retry_after: Seconds requested by the upstream, if any
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+@dataclass
+class RetryStats:
+    """Counters for retry behaviour across all LLM calls"""
+    retries: int = 0
+    recovered: int = 0  # calls that succeeded after at least one retry
+    exhausted: int = 0  # calls that failed after using every attempt
+
+
+retry_stats = RetryStats()
+
+
+async def call_with_retry(
+    fn: Callable[[], Awaitable[T]],
+    policy: Optional[RetryPolicy] = None,
+    description: str = "LLM call"
+) -> T:
+    """
+    Call `fn`, retrying retryable LLMErrors with jittered exponential backoff.
+
+    Args:
+        fn: Zero-argument coroutine factory performing one attempt
+        policy: Retry policy (defaults to the environment-configured policy)
+        description: Label used in log lines
+
+    Returns:
+        The result of the first successful attempt
+
+    Raises:
+        LLMError: The last error, if it is not retryable or attempts run out
+    """
+    policy = policy or RetryPolicy.from_env()
+    attempts = max(1, policy.max_attempts)
+    attempt = 0
+    while True:
+        try:
+            result = await fn()
+        except LLMError as e:
+            if not e.retryable:
+                raise
+            if attempt + 1 >= attempts:
+                retry_stats.exhausted += 1
+                raise
+            delay = policy.backoff(attempt, getattr(e, "retry_after", None))
+            retry_stats.retries += 1
+            print(f"{description} failed ({type(e).__name__}: {e}); "
+                  f"retry {attempt + 1}/{attempts - 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+        else:
+            if attempt > 0:
+                retry_stats.recovered += 1
+            return result
+
+
+def retry_snapshot() -> Dict[str, int]:
+    """Retry counters, for diagnostics endpoints"""
+    return asdict(retry_stats)
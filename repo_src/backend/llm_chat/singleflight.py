@@ -0,0 +1,117 @@
+"""
+Single-flight coalescing of concurrent identical LLM calls.
+
+While a request for a given key is in flight, later callers with the same key
+await the same upstream task instead of starting their own. Every waiter gets
+the leader's result or exception. A cancelled waiter only detaches itself; the
+upstream task is cancelled once no waiters are left.
+"""
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    """Counters describing how many calls were coalesced"""
+    leaders: int = 0  # calls that started an upstream request
+    coalesced: int = 0  # calls that joined an in-flight request
+    failures: int = 0  # upstream requests that raised
+    cancelled: int = 0  # upstream requests cancelled after every waiter left
+
+
+class _Flight:
+    """An in-flight upstream task and the number of callers awaiting it"""
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key"""
+
+    def __init__(self):
+        self.stats = SingleFlightStats()
+        self._flights: Dict[str, _Flight] = {}
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being fetched"""
+        return len(self._flights)
+
+    def is_in_flight(self, key: str) -> bool:
+        """Whether a call for `key` is running, i.e. do() would join it"""
+        flight = self._flights.get(key)
+        return flight is not None and not flight.task.done()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fn` for `key`, or join an identical call that is already running.
+
+        Args:
+            key: Normalized request key; equal keys share one upstream call
+            fn: Zero-argument coroutine factory that performs the call
+
+        Returns:
+            The result of the shared call
+
+        Raises:
+            Whatever `fn` raised, re-raised in every waiter
+        """
+        flight = self._flights.get(key)
+        if flight is None or flight.task.done():
+            task = asyncio.get_running_loop().create_task(fn())
+            flight = _Flight(task)
+            self._flights[key] = flight
+            task.add_done_callback(lambda t: self._finish(key, flight))
+            self.stats.leaders += 1
+        else:
+            self.stats.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            # shield() keeps one caller's cancellation from cancelling the shared task
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.task.done():
+                raise
+            if flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _finish(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if flight.task.cancelled():
+            self.stats.cancelled += 1
+        elif flight.task.exception() is not None:
+            # Reading the exception also marks it as retrieved for asyncio
+            self.stats.failures += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters plus the number of keys in flight, for diagnostics endpoints"""
+        data = asdict(self.stats)
+        data["in_flight"] = self.in_flight()
+        return data
+
+
+# Process-wide coalescer shared by every caller of ask_llm
+_singleflight: Optional[SingleFlight] = None
+
+
+def get_singleflight() -> SingleFlight:
+    """Return the shared coalescer"""
+    global _singleflight
+    if _singleflight is None:
+        _singleflight = SingleFlight()
+    return _singleflight
+
+
+def set_singleflight(singleflight: Optional[SingleFlight]) -> None:
+    """Replace the shared coalescer (None starts a fresh one on next use; used by tests)"""
+    global _singleflight
+    _singleflight = singleflight
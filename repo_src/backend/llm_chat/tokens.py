@@ -0,0 +1,21 @@
+"""
+Cheap token estimates for budgeting LLM requests.
+Exact counts depend on each model's tokenizer; for rate limiting and chunk
+sizing a characters-per-token heuristic is close enough and costs nothing.
+"""
+from typing import Dict, List
+
+# English prose averages roughly four characters per token across common tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text"""
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Estimate prompt tokens for a list of chat messages (content plus per-message overhead)"""
+    return sum(estimate_tokens(message.get("content", "")) + 4 for message in messages)
@@ -32,20 +32,39 @@ else:
 from repo_src.backend.database.setup import init_db
 from repo_src.backend.database import models, connection # For example endpoints
 from repo_src.backend.functions.items import router as items_router # Import the items router
+from repo_src.backend.functions.pagination import NEXT_CURSOR_HEADER
 from repo_src.backend.routers.chat import router as chat_router # Import the chat router
 from repo_src.backend.routers.users import router as users_router # Import the users router
+from repo_src.backend.routers.ingestion import router as ingestion_router # Import the ingestion job router
+from repo_src.backend.llm_chat.providers import init_provider, close_provider
+from repo_src.backend.pipelines.condense import shutdown_condense_pool
+from repo_src.backend.pipelines.job_queue import IngestionWorkerPool
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Initialize database
     print("Application startup: Initializing database...")
     init_db() # Initialize database and create tables
+    # One pooled, keep-alive HTTP client shared by every LLM call
+    if init_provider() is None:
+        print("LLM provider not configured; chat and ingestion calls will fail.")
+    # In-process ingestion workers (INGEST_QUEUE_WORKERS=0 leaves jobs to
+    # separate repo_src/scripts/ingestion_worker.py processes)
+    worker_pool = IngestionWorkerPool()
+    if worker_pool.config.workers > 0:
+        worker_pool.start()
+    app.state.ingestion_workers = worker_pool
     print("Application startup complete.")
-    yield
-    # Shutdown: Clean up resources if needed
-    print("Application shutdown: Cleaning up resources...")
-    # Any cleanup code would go here
-    print("Application shutdown complete.")
+    try:
+        yield
+    finally:
+        # Shutdown: Clean up resources if needed
+        print("Application shutdown: Cleaning up resources...")
+        await worker_pool.stop()
+        await close_provider()
+        # Condensation worker processes outlive the event loop unless stopped
+        shutdown_condense_pool()
+        print("Application shutdown complete.")
 
 app = FastAPI(title="AI-Friendly Repository Backend", version="1.0.0", lifespan=lifespan)
 
@@ -56,12 +75,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=[NEXT_CURSOR_HEADER],  # Let the frontend read list cursors
 )
 
 # Include routers
 app.include_router(items_router)
 app.include_router(chat_router)
 app.include_router(users_router)
+app.include_router(ingestion_router)
 
 @app.get("/")
 async def read_root():
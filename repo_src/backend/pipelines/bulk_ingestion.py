@@ -0,0 +1,396 @@
+"""
+Bulk ingestion: extract and save many profile files concurrently.
+
+Input paths (files, directories, globs or a manifest listing them) are
+resolved to a file list, small files are grouped so they can share one
+batched extraction request, and a pool of asyncio workers runs the
+extractions with bounded concurrency. Extracted profiles are written to the
+database in batches by a single writer task, so a cohort of thousands of
+transcripts is one process and a handful of transactions.
+
+Given the ingestion manifest, files that are unchanged since they were last
+extracted with the current pipeline version are skipped without an LLM call.
+
+Every file also gets a per-stage timing record (see pipelines/stage_timing.py);
+BulkIngestionReport.to_dict() aggregates them into a run summary.
+"""
+import asyncio
+import glob
+import os
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from repo_src.backend.data.schemas import UserCreate
+from repo_src.backend.llm_chat.errors import LLMError
+from repo_src.backend.llm_chat.metrics import get_metrics
+from repo_src.backend.llm_chat.tokens import CHARS_PER_TOKEN
+from repo_src.backend.pipelines.manifest import (
+    FileFingerprint,
+    content_unchanged,
+    fingerprint_content,
+    stat_unchanged,
+)
+from repo_src.backend.pipelines.user_ingestion import (
+    BatchConfig,
+    extract_user_profiles,
+    extraction_pipeline_version,
+    pack_batches,
+)
+from repo_src.backend.pipelines.stage_timing import FileTiming, run_summary, stage, track
+
+
+@dataclass
+class BulkIngestionConfig:
+    """Settings for a bulk ingestion run"""
+    concurrency: int = 8  # extraction requests in flight at once
+    db_batch_size: int = 50  # profiles per database transaction
+    flush_interval: float = 2.0  # max seconds a profile waits for its batch to fill
+    batch_extraction: bool = True  # pack small files into shared extraction requests
+
+    @classmethod
+    def from_env(cls) -> "BulkIngestionConfig":
+        """Build settings from INGEST_* environment variables"""
+        return cls(
+            concurrency=max(1, int(os.getenv("INGEST_CONCURRENCY", "8"))),
+            db_batch_size=max(1, int(os.getenv("INGEST_DB_BATCH_SIZE", "50"))),
+            flush_interval=float(os.getenv("INGEST_FLUSH_INTERVAL", "2")),
+            batch_extraction=os.getenv("INGEST_BATCH_EXTRACTION", "true").lower() in ("1", "true", "yes"),
+        )
+
+
+class SaveError(Exception):
+    """The database rejected a profile"""
+
+
+@dataclass
+class FileFailure:
+    """A file that could not be ingested, and why"""
+    path: str
+    error: str
+
+
+@dataclass
+class BulkIngestionReport:
+    """Outcome and throughput of a bulk ingestion run"""
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0  # unchanged since their last extraction
+    elapsed_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    failures: List[FileFailure] = field(default_factory=list)
+    timings: List[FileTiming] = field(default_factory=list)  # one per finished file
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def done(self) -> int:
+        return self.processed + self.skipped
+
+    @property
+    def files_per_second(self) -> float:
+        return self.processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        tokens = self.prompt_tokens + self.completion_tokens
+        return tokens / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def to_dict(self, **extra: Any) -> Dict[str, Any]:
+        """Machine-readable run summary with per-stage p50/p95 and every file's timings"""
+        timings = sorted(self.timings, key=lambda timing: timing.path)
+        return run_summary(timings, self.elapsed_seconds, **extra)
+
+
+def resolve_input_paths(
+    inputs: List[str],
+    manifest: Optional[str] = None,
+    pattern: str = "*.txt"
+) -> List[Path]:
+    """
+    Expand files, directories (searched recursively for `pattern`), glob
+    patterns and manifest entries into a sorted, de-duplicated file list.
+
+    Args:
+        inputs: Files, directories or glob patterns
+        manifest: Optional file listing one input per line (# starts a comment);
+            relative entries are resolved against the manifest's directory
+        pattern: File pattern used inside directories
+
+    Returns:
+        Absolute paths of the files to ingest
+
+    Raises:
+        FileNotFoundError: If an input matches nothing
+    """
+    entries = list(inputs)
+    base_dirs = [Path.cwd()] * len(entries)
+    if manifest:
+        manifest_path = Path(manifest)
+        for line in manifest_path.read_text(encoding="utf-8").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                entries.append(line)
+                base_dirs.append(manifest_path.parent)
+
+    files = set()
+    for entry, base in zip(entries, base_dirs):
+        path = Path(entry).expanduser()
+        if not path.is_absolute():
+            path = base / path
+        if any(char in entry for char in "*?["):
+            matches = [Path(match) for match in glob.glob(str(path), recursive=True)]
+            matches = [match for match in matches if match.is_file()]
+        elif path.is_dir():
+            matches = [match for match in path.rglob(pattern) if match.is_file()]
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = []
+        if not matches:
+            raise FileNotFoundError(f"No files found for input: {entry}")
+        files.update(match.resolve() for match in matches)
+    return sorted(files)
+
+
+def plan_units(paths: List[Path], batch_config: Optional[BatchConfig]) -> List[List[Path]]:
+    """
+    Group files into extraction units. With a batch config, small files
+    (estimated from their size) are packed into shared requests; every other
+    file is a unit of its own.
+    """
+    if batch_config is None:
+        return [[path] for path in paths]
+    token_counts = [path.stat().st_size // CHARS_PER_TOKEN + 1 for path in paths]
+    batches = pack_batches(token_counts, batch_config)
+    batched = {index for batch in batches for index in batch}
+    units = [[paths[index] for index in batch] for batch in batches]
+    units.extend([path] for index, path in enumerate(paths) if index not in batched)
+    return units
+
+
+def load_manifest(paths: List[Path]) -> Dict[str, Any]:
+    """Fetch the ingestion manifest entries for `paths` from the database"""
+    # Imported here so the extraction pipeline doesn't need a database
+    from repo_src.backend.database.connection import SessionLocal
+    from repo_src.backend.functions.ingestion_manifest import get_manifest_entries
+
+    db = SessionLocal()
+    try:
+        return get_manifest_entries(db, [str(path) for path in paths])
+    finally:
+        db.close()
+
+
+def save_profiles(
+    profiles: List[UserCreate],
+    files: List[FileFingerprint],
+    pipeline_version: str
+) -> Dict[int, str]:
+    """
+    Upsert a batch of profiles and their manifest entries in one transaction.
+    A profile the database rejects doesn't fail the others; its file gets no
+    manifest entry, so it is retried on the next run.
+
+    Returns:
+        Error messages of the profiles that could not be saved, by position
+    """
+    from repo_src.backend.database.connection import SessionLocal
+    from repo_src.backend.functions.ingestion_manifest import record_ingested_files
+    from repo_src.backend.functions.users import UPSERT_FAILED, bulk_upsert_users
+
+    db = SessionLocal()
+    try:
+        outcomes = bulk_upsert_users(db, profiles, batch_size=max(1, len(profiles)), commit=False)
+        errors = {outcome.index: outcome.error for outcome in outcomes if outcome.status == UPSERT_FAILED}
+        saved = [index for index in range(len(profiles)) if index not in errors]
+        record_ingested_files(
+            db, [files[index] for index in saved], [profiles[index].user_id for index in saved], pipeline_version
+        )
+        return errors
+    finally:
+        db.close()
+
+
+def _ingestion_tokens() -> Tuple[int, int]:
+    """Prompt and completion tokens spent by ingestion so far"""
+    totals = get_metrics().snapshot()["by_caller"].get("ingestion", {})
+    return (
+        sum(model["prompt_tokens"] for model in totals.values()),
+        sum(model["completion_tokens"] for model in totals.values()),
+    )
+
+
+def _read_unless_unchanged(
+    path: Path,
+    manifest: Dict[str, Any],
+    pipeline_version: str
+) -> Tuple[Optional[FileFingerprint], Optional[str]]:
+    """
+    Read and fingerprint a file, or return (None, None) when the manifest says
+    it is unchanged. Size and mtime are checked first so untouched files are
+    never read; a touched file with the same content hash is still skipped.
+    """
+    entry = manifest.get(str(path))
+    stat = path.stat()
+    if stat_unchanged(entry, stat, pipeline_version):
+        return None, None
+    content = path.read_bytes()
+    fingerprint = fingerprint_content(path, content, stat)
+    if content_unchanged(entry, fingerprint, pipeline_version):
+        return None, None
+    return fingerprint, content.decode("utf-8")
+
+
+async def ingest_files(
+    paths: List[Path],
+    config: Optional[BulkIngestionConfig] = None,
+    save: Callable[[List[UserCreate], List[FileFingerprint], str], Optional[Dict[int, str]]] = save_profiles,
+    on_progress: Optional[Callable[[BulkIngestionReport], None]] = None,
+    manifest: Optional[Dict[str, Any]] = None,
+) -> BulkIngestionReport:
+    """
+    Extract a profile from every file and save them in batches.
+
+    Args:
+        paths: Files to ingest
+        config: Concurrency and batching settings (defaults to BulkIngestionConfig.from_env())
+        save: Writes one batch of profiles with their file fingerprints and the
+            pipeline version; runs in a worker thread. May return error messages
+            of rows it could not save, by position in the batch
+        on_progress: Called with the running report after every file
+        manifest: Manifest entries by path (see load_manifest); files unchanged
+            since their entry was recorded are skipped. None processes everything.
+
+    Returns:
+        BulkIngestionReport with counts, failures and throughput
+    """
+    config = config or BulkIngestionConfig.from_env()
+    batch_config = replace(BatchConfig.from_env(), concurrency=1) if config.batch_extraction else None
+    report = BulkIngestionReport(total=len(paths))
+    manifest = manifest or {}
+    version = extraction_pipeline_version()
+    start = time.perf_counter()
+    tokens_before = _ingestion_tokens()
+
+    def progress(notify: bool = True) -> None:
+        report.elapsed_seconds = time.perf_counter() - start
+        prompt_tokens, completion_tokens = _ingestion_tokens()
+        report.prompt_tokens = prompt_tokens - tokens_before[0]
+        report.completion_tokens = completion_tokens - tokens_before[1]
+        if notify and on_progress:
+            on_progress(report)
+
+    def finish(timing: FileTiming, status: str) -> None:
+        timing.status = status
+        report.timings.append(timing)
+
+    def fail(timing: FileTiming, error: Exception) -> None:
+        report.failed += 1
+        report.failures.append(FileFailure(timing.path, f"{type(error).__name__}: {error}"))
+        timing.error = report.failures[-1].error
+        finish(timing, "failed")
+        progress()
+
+    units: asyncio.Queue = asyncio.Queue()
+    for unit in plan_units(paths, batch_config):
+        units.put_nowait(unit)
+    pending_writes: asyncio.Queue = asyncio.Queue()
+
+    async def worker() -> None:
+        while True:
+            try:
+                unit = units.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            readable, contents, timings = [], [], []
+            for path in unit:
+                timing = FileTiming(str(path))
+                try:
+                    with track(timing), stage("read"):
+                        fingerprint, text = await asyncio.to_thread(_read_unless_unchanged, path, manifest, version)
+                except (OSError, UnicodeDecodeError) as e:
+                    fail(timing, e)
+                    continue
+                if text is None:
+                    report.skipped += 1
+                    finish(timing, "skipped")
+                    progress()
+                    continue
+                timing.bytes_read = fingerprint.size
+                readable.append(fingerprint)
+                contents.append(text)
+                timings.append(timing)
+            if not readable:
+                continue
+            # Files in one unit share their extraction requests, so they share its timings
+            extraction = FileTiming(f"{len(readable)} files")
+            try:
+                with track(extraction):
+                    results = await extract_user_profiles(contents, config=batch_config)
+            except (ValueError, LLMError) as e:
+                results = [e] * len(readable)
+            extraction.share_among(timings)
+            for fingerprint, timing, result in zip(readable, timings, results):
+                if isinstance(result, Exception):
+                    fail(timing, result)
+                    continue
+                try:
+                    with track(timing), stage("validate"):
+                        profile = UserCreate(**result.value)
+                except (ValueError, TypeError) as e:
+                    fail(timing, e)
+                    continue
+                await pending_writes.put((fingerprint, profile, timing))
+
+    async def writer() -> None:
+        batch: List[Tuple[FileFingerprint, UserCreate, FileTiming]] = []
+        deadline = None
+        finished = False
+        while not finished:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = await asyncio.wait_for(pending_writes.get(), timeout)
+                if item is None:
+                    finished = True
+                else:
+                    batch.append(item)
+                    deadline = deadline or time.monotonic() + config.flush_interval
+            except asyncio.TimeoutError:
+                pass
+            due = deadline is not None and time.monotonic() >= deadline
+            if batch and (finished or due or len(batch) >= config.db_batch_size):
+                save_start = time.perf_counter()
+                try:
+                    row_errors = await asyncio.to_thread(
+                        save, [profile for _, profile, _ in batch], [fingerprint for fingerprint, _, _ in batch], version
+                    ) or {}
+                except Exception as e:
+                    print(f"Error saving batch of {len(batch)} profiles: {e}")
+                    row_errors = {index: e for index in range(len(batch))}
+                save_seconds = time.perf_counter() - save_start
+                for index, (_, _, timing) in enumerate(batch):
+                    timing.add("db", save_seconds / len(batch))
+                    if index in row_errors:
+                        error = row_errors[index]
+                        fail(timing, error if isinstance(error, Exception) else SaveError(error))
+                    else:
+                        report.succeeded += 1
+                        finish(timing, "succeeded")
+                if len(row_errors) < len(batch):
+                    progress()
+                batch, deadline = [], None
+
+    writer_task = asyncio.create_task(writer())
+    try:
+        await asyncio.gather(*(worker() for _ in range(config.concurrency)))
+    finally:
+        await pending_writes.put(None)
+        await writer_task
+    progress(notify=False)
+    return report
@@ -0,0 +1,280 @@
+"""
+Cheap-first model cascade.
+Sends a request to the fastest configured model first and only escalates to
+stronger (slower, pricier) models when the response fails validation or the
+call errors. Per-tier latency, token usage and escalation counts are recorded
+so the cascade can be tuned.
+
+With a stream validator, each tier's response is streamed and checked as it
+arrives: a response that can no longer be valid is aborted mid-generation,
+and reading stops as soon as the answer is complete.
+"""
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+
+from repo_src.backend.llm_chat.errors import LLMError
+from repo_src.backend.llm_chat.llm_interface import DEFAULT_MODEL_NAME, complete_llm, complete_llm_streaming
+from repo_src.backend.llm_chat.tokens import CHARS_PER_TOKEN
+from repo_src.backend.pipelines.stage_timing import record_llm_call, stage
+
+T = TypeVar("T")
+
+DEFAULT_FAST_MODEL = "anthropic/claude-3-haiku"
+
+
+@dataclass
+class CascadeTier:
+    """One model in the cascade and the parameters to call it with"""
+    model: str
+    max_tokens: int = 4096
+    temperature: float = 0.3
+
+
+@dataclass
+class TierAttempt:
+    """Outcome of calling one tier"""
+    model: str
+    latency_seconds: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    accepted: bool = False
+    reason: Optional[str] = None  # why the tier was rejected
+    aborted: bool = False  # streamed response abandoned mid-generation
+
+
+@dataclass
+class CascadeResult(Generic[T]):
+    """The accepted value plus every tier attempt that led to it"""
+    value: T
+    attempts: List[TierAttempt]
+
+    @property
+    def model(self) -> str:
+        return self.attempts[-1].model
+
+    @property
+    def escalated(self) -> bool:
+        return any(not attempt.accepted for attempt in self.attempts)
+
+
+@dataclass
+class TierStats:
+    """Aggregated counters for one model"""
+    attempts: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    errors: int = 0
+    latency_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+@dataclass
+class CascadeStats:
+    """Aggregated counters across all cascade runs"""
+    runs: int = 0
+    escalations: int = 0  # runs that needed more than the first tier
+    failures: int = 0  # runs where every tier was rejected
+    stream_aborts: int = 0  # streamed responses abandoned as invalid mid-generation
+    stream_abort_seconds: float = 0.0  # time spent on aborted responses before aborting
+    stream_abort_tokens: int = 0  # completion tokens generated before aborting (estimated)
+    tiers: Dict[str, TierStats] = field(default_factory=dict)
+
+    def record(self, attempt: TierAttempt, errored: bool = False) -> None:
+        stats = self.tiers.setdefault(attempt.model, TierStats())
+        stats.attempts += 1
+        stats.latency_seconds += attempt.latency_seconds
+        stats.prompt_tokens += attempt.prompt_tokens
+        stats.completion_tokens += attempt.completion_tokens
+        if attempt.accepted:
+            stats.accepted += 1
+        elif errored:
+            stats.errors += 1
+        else:
+            stats.rejected += 1
+
+    def snapshot(self) -> Dict:
+        """Counters with derived averages, for reports and diagnostics endpoints"""
+        return {
+            "runs": self.runs,
+            "escalations": self.escalations,
+            "escalation_rate": round(self.escalations / self.runs, 4) if self.runs else 0.0,
+            "failures": self.failures,
+            "stream_aborts": self.stream_aborts,
+            "stream_abort_seconds": round(self.stream_abort_seconds, 3),
+            "stream_abort_tokens": self.stream_abort_tokens,
+            "tiers": {
+                model: {
+                    "attempts": s.attempts,
+                    "accepted": s.accepted,
+                    "rejected": s.rejected,
+                    "errors": s.errors,
+                    "avg_latency_seconds": round(s.latency_seconds / s.attempts, 3) if s.attempts else 0.0,
+                    "prompt_tokens": s.prompt_tokens,
+                    "completion_tokens": s.completion_tokens,
+                }
+                for model, s in self.tiers.items()
+            },
+        }
+
+
+cascade_stats = CascadeStats()
+
+
+def load_cascade_from_env(max_tokens: int = 4096, temperature: float = 0.3) -> List[CascadeTier]:
+    """
+    Read the cascade from EXTRACTION_MODEL_CASCADE (comma-separated, cheapest first).
+    Defaults to a fast model followed by the configured default model.
+    """
+    configured = os.getenv("EXTRACTION_MODEL_CASCADE", f"{DEFAULT_FAST_MODEL},{DEFAULT_MODEL_NAME}")
+    models = []
+    for model in configured.split(","):
+        model = model.strip()
+        if model and model not in models:
+            models.append(model)
+    return [CascadeTier(model=model, max_tokens=max_tokens, temperature=temperature) for model in models]
+
+
+async def run_cascade(
+    prompt_text: str,
+    system_message: str,
+    tiers: List[CascadeTier],
+    validate: Callable[[str], T],
+    quality_check: Optional[Callable[[T], None]] = None,
+    stats: Optional[CascadeStats] = None,
+    caller: str = "ingestion",
+    stream_validator: Optional[Callable[[bool], Any]] = None,
+) -> CascadeResult[T]:
+    """
+    Call each tier in order until one returns a response that validates.
+
+    Args:
+        prompt_text: The user prompt
+        system_message: The system message
+        tiers: Models to try, cheapest first
+        validate: Parses/validates response text; raises ValueError to reject it
+        quality_check: Extra check that raises ValueError to escalate. It is
+            skipped on the last tier, whose schema-valid answer is always kept.
+        stats: Where to record counters (defaults to the module-level cascade_stats)
+        caller: Tag for the per-call LLM metrics (default: "ingestion")
+        stream_validator: Optional factory, called with whether the tier is the
+            last one, returning an incremental validator (see
+            pipelines/streaming_json.py) with feed(text), done and result_text().
+            Each tier's response is then streamed through it; feed raising
+            ValueError aborts the response, and once done is True the rest of
+            the stream is skipped and result_text() is validated. It also
+            exposes chars_seen, used to count the tokens of aborted responses.
+
+    Returns:
+        CascadeResult with the validated value and per-tier attempts
+
+    Raises:
+        ValueError: If the last tier's response fails validation
+        LLMError: If the last tier's call fails
+    """
+    if not tiers:
+        raise ValueError("Model cascade is empty")
+    stats = stats or cascade_stats
+    stats.runs += 1
+    attempts: List[TierAttempt] = []
+
+    for index, tier in enumerate(tiers):
+        is_last = index == len(tiers) - 1
+        start = time.perf_counter()
+        validators: List[Any] = []
+        try:
+            with stage("llm"):
+                if stream_validator is None:
+                    result = await complete_llm(
+                        prompt_text=prompt_text,
+                        system_message=system_message,
+                        model_override=tier.model,
+                        max_tokens=tier.max_tokens,
+                        temperature=tier.temperature,
+                        include_datetime=False,
+                        caller=caller,
+                    )
+                else:
+                    def new_consumer(is_last=is_last):
+                        validator = stream_validator(is_last)
+                        validators.append(validator)
+
+                        def consume(text: str) -> bool:
+                            validator.feed(text)
+                            return validator.done
+                        return consume
+
+                    result = await complete_llm_streaming(
+                        prompt_text=prompt_text,
+                        new_consumer=new_consumer,
+                        system_message=system_message,
+                        model_override=tier.model,
+                        max_tokens=tier.max_tokens,
+                        temperature=tier.temperature,
+                        include_datetime=False,
+                        caller=caller,
+                    )
+        except ValueError as e:
+            # The stream validator gave up on the response mid-generation
+            latency = time.perf_counter() - start
+            generated = validators[-1].chars_seen // CHARS_PER_TOKEN if validators else 0
+            attempt = TierAttempt(tier.model, latency, completion_tokens=generated,
+                                  reason=f"aborted early: {e}", aborted=True)
+            attempts.append(attempt)
+            record_llm_call(0, generated)
+            stats.record(attempt)
+            stats.stream_aborts += 1
+            stats.stream_abort_seconds += latency
+            stats.stream_abort_tokens += generated
+            print(f"Cascade tier {tier.model} aborted mid-stream: {e}")
+            if is_last:
+                stats.failures += 1
+                raise
+            continue
+        except LLMError as e:
+            attempt = TierAttempt(tier.model, time.perf_counter() - start, reason=f"{type(e).__name__}: {e}")
+            attempts.append(attempt)
+            record_llm_call(0, 0)
+            stats.record(attempt, errored=True)
+            print(f"Cascade tier {tier.model} failed: {attempt.reason}")
+            if is_last:
+                stats.failures += 1
+                raise
+            continue
+
+        attempt = TierAttempt(
+            tier.model,
+            time.perf_counter() - start,
+            prompt_tokens=result.prompt_tokens,
+            completion_tokens=result.completion_tokens,
+        )
+        attempts.append(attempt)
+        record_llm_call(result.prompt_tokens, result.completion_tokens)
+        text = result.text
+        if validators and validators[-1].done:
+            # Validate the parsed object, not the raw stream, which may stop
+            # inside a code fence
+            text = validators[-1].result_text()
+        try:
+            value = validate(text)
+            if quality_check is not None and not is_last:
+                with stage("validate"):
+                    quality_check(value)
+        except ValueError as e:
+            attempt.reason = str(e)
+            stats.record(attempt)
+            print(f"Cascade tier {tier.model} rejected: {e}")
+            if is_last:
+                stats.failures += 1
+                raise
+            continue
+
+        attempt.accepted = True
+        stats.record(attempt)
+        if index > 0:
+            stats.escalations += 1
+        return CascadeResult(value=value, attempts=attempts)
+
+    raise AssertionError("run_cascade exited without a result")
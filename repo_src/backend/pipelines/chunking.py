@@ -0,0 +1,79 @@
+"""
+Token-aware text chunking for long ingestion inputs.
+Splits on paragraph boundaries where possible, falling back to lines,
+sentences and finally raw character windows, and packs the pieces into
+chunks that fit a token budget. Consecutive chunks can overlap so context
+spanning a boundary (e.g. a question and its answer) isn't lost.
+"""
+import re
+from typing import List
+
+from repo_src.backend.llm_chat.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _split_to_fit(text: str, max_tokens: int) -> List[str]:
+    """Break text into pieces that each fit max_tokens, using the coarsest boundary that works"""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    for pattern in (_PARAGRAPH_BREAK, re.compile(r"\n"), _SENTENCE_END):
+        parts = [part for part in pattern.split(text) if part.strip()]
+        if len(parts) > 1:
+            pieces = []
+            for part in parts:
+                pieces.extend(_split_to_fit(part, max_tokens))
+            return pieces
+    # One enormous sentence: fall back to fixed character windows
+    width = max(1, max_tokens * CHARS_PER_TOKEN - 1)
+    return [text[i:i + width] for i in range(0, len(text), width)]
+
+
+def chunk_text(text: str, max_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """
+    Split text into chunks of at most max_tokens (estimated).
+
+    Args:
+        text: The text to split
+        max_tokens: Token budget per chunk
+        overlap_tokens: Trailing pieces of each chunk, up to this many tokens,
+            are repeated at the start of the next chunk
+
+    Returns:
+        List of chunks in document order (a single chunk if the text fits)
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+    text = text.strip()
+    if not text:
+        return []
+
+    pieces = _split_to_fit(text, max_tokens)
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece)
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            # Carry the tail of the finished chunk over as overlap
+            carried: List[str] = []
+            carried_tokens = 0
+            for previous in reversed(current):
+                previous_tokens = estimate_tokens(previous)
+                if carried_tokens + previous_tokens > overlap_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous_tokens
+            if carried_tokens + piece_tokens > max_tokens:
+                carried, carried_tokens = [], 0
+            current, current_tokens = carried, carried_tokens
+        current.append(piece)
+        current_tokens += piece_tokens
+
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
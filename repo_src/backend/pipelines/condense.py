@@ -0,0 +1,393 @@
+"""
+Local extractive pre-condensation of transcripts.
+
+Raw transcripts are full of filler, pleasantries and repeated content, and
+every token of them is paid for in the extraction prompt. When enabled
+(EXTRACTION_CONDENSE), each document over the token budget is condensed
+before the prompt is built (documents within it are left as they are):
+1. Boilerplate is stripped: timestamps, stage directions like "(laughs)",
+   filler words, and sentences that are only greetings or acknowledgements.
+2. Near-duplicate sentences (word-set Jaccard similarity above the
+   threshold) are collapsed into their first occurrence.
+3. If the result is still over the token budget, sentences are ranked with
+   TextRank over TF-IDF cosine similarity and the best ones are kept, in
+   their original order, until the budget is used up. The first sentence
+   (usually a title or introduction carrying the person's name) is always kept.
+
+Condensing is CPU-bound, so large batches run in a process pool.
+"""
+import asyncio
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from repo_src.backend.llm_chat.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+_TIMESTAMP = re.compile(r"^[\[(]?\d{1,2}:\d{2}(?::\d{2})?[\])]?\s+|[\[(]\d{1,2}:\d{2}(?::\d{2})?[\])]\s*")
+_STAGE_DIRECTION = re.compile(
+    r"[\[(](?:laughs?|laughter|inaudible|crosstalk|pause|silence|background noise|coughs?)[\])]\s*", re.I
+)
+_FILLER = re.compile(r"\b(?:um+|uh+|erm+|hmm+|ah+)\b[,.]?\s*|^(?:like|as) I (?:said|mentioned)(?: before| earlier)?,\s*", re.I)
+_HEDGE = re.compile(r",\s*(?:you know|I mean),\s*", re.I)
+_SPEAKER = re.compile(r"^([A-Z][\w .'-]{0,40}):\s+")
+_LIST_ITEM = re.compile(r"^(?:[-*\u2022]|\d{1,3}[.)])\s+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_WORD = re.compile(r"[a-z0-9][a-z0-9'+#.-]*[a-z0-9+#]|[a-z0-9]")
+_PLEASANTRY = re.compile(
+    r"^(?:(?:hi|hello|hey|good (?:morning|afternoon|evening))\b.{0,40}"
+    r"|(?:thanks|thank you)\b.{0,60}"
+    r"|(?:sure|great|okay|ok|yes|yeah|yep|right|absolutely|of course|cool|awesome|nice|perfect|"
+    r"got it|sounds good|no problem|you're welcome|(?:that's a )?(?:great|good) question|that's great)"
+    r"(?:[,!. ]+(?:thanks|thank you|sure|great|so))*)[.!?]*$",
+    re.I,
+)
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by can could did do does for from had has have he her him his how i i'm "
+    "i've if in into is it it's its just me more my no not of on or our out really she so some than that "
+    "that's the their them then there these they this those to too very was we we're were what when where "
+    "which while who why will with would you you're your also about all am been being like lot one well "
+    "now get got think things thing much many way".split()
+)
+
+# Sentences that share no content words (or only very common ones) are not compared
+_MAX_DOCUMENT_FREQUENCY = 0.5
+_DAMPING = 0.85
+
+
+@dataclass
+class CondenseConfig:
+    """Settings for local pre-condensation of extraction inputs"""
+    enabled: bool = False
+    token_budget: int = 3000  # documents over it are condensed to fit (0 = no cap, always clean up)
+    duplicate_threshold: float = 0.8  # word-set Jaccard similarity treated as a repeat
+    processes: int = 0  # worker processes for large batches (0 = one per CPU, 1 = in-process)
+    pool_min_tokens: int = 20000  # smaller workloads are condensed in-process
+
+    @classmethod
+    def from_env(cls) -> "CondenseConfig":
+        """Build settings from EXTRACTION_CONDENSE* environment variables"""
+        return cls(
+            enabled=os.getenv("EXTRACTION_CONDENSE", "false").lower() in ("1", "true", "yes"),
+            token_budget=int(os.getenv("EXTRACTION_CONDENSE_TOKENS", "3000")),
+            duplicate_threshold=float(os.getenv("EXTRACTION_CONDENSE_DUPLICATE_THRESHOLD", "0.8")),
+            processes=max(0, int(os.getenv("EXTRACTION_CONDENSE_PROCESSES", "0"))),
+            pool_min_tokens=int(os.getenv("EXTRACTION_CONDENSE_POOL_MIN_TOKENS", "20000")),
+        )
+
+    def fingerprint(self) -> str:
+        """The settings that change the condensed text, for extraction_pipeline_version"""
+        if not self.enabled:
+            return "off"
+        return f"{self.token_budget}:{self.duplicate_threshold}"
+
+
+@dataclass
+class CondensedText:
+    """A condensed document and what was removed from it"""
+    text: str
+    original_tokens: int
+    condensed_tokens: int
+    boilerplate_removed: int = 0  # sentences
+    duplicates_removed: int = 0  # sentences
+    ranked_out: int = 0  # sentences dropped to meet the token budget
+
+
+@dataclass
+class CondenseStats:
+    """Aggregated counters across all condensed documents"""
+    documents: int = 0
+    original_tokens: int = 0
+    condensed_tokens: int = 0
+    boilerplate_removed: int = 0
+    duplicates_removed: int = 0
+    ranked_out: int = 0
+    seconds: float = 0.0
+
+    def record(self, result: CondensedText) -> None:
+        self.documents += 1
+        self.original_tokens += result.original_tokens
+        self.condensed_tokens += result.condensed_tokens
+        self.boilerplate_removed += result.boilerplate_removed
+        self.duplicates_removed += result.duplicates_removed
+        self.ranked_out += result.ranked_out
+
+    def snapshot(self) -> Dict:
+        saved = self.original_tokens - self.condensed_tokens
+        return {
+            "documents": self.documents,
+            "original_tokens": self.original_tokens,
+            "condensed_tokens": self.condensed_tokens,
+            "reduction": round(saved / self.original_tokens, 4) if self.original_tokens else 0.0,
+            "boilerplate_removed": self.boilerplate_removed,
+            "duplicates_removed": self.duplicates_removed,
+            "ranked_out": self.ranked_out,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+condense_stats = CondenseStats()
+
+
+@dataclass
+class _Sentence:
+    paragraph: int
+    text: str
+    words: List[str] = field(default_factory=list)  # content words, lowercased
+
+
+@dataclass
+class _Turn:
+    """A paragraph of the rendered text: a speaker turn or list item, or a plain paragraph"""
+    label: str  # speaker label or list marker, kept in front of the first sentence
+    block: int  # blank-line-separated block it came from
+
+
+def _turns(block: str) -> List[str]:
+    """
+    Split a blank-line-separated block into turns. A line that starts with a
+    speaker label or list marker starts a new turn; other lines continue the
+    current one (wrapped text).
+    """
+    turns: List[str] = []
+    for line in block.splitlines():
+        line = _STAGE_DIRECTION.sub("", _TIMESTAMP.sub("", line.strip())).strip()
+        if not line:
+            continue
+        if turns and not (_SPEAKER.match(line) or _LIST_ITEM.match(line)):
+            turns[-1] += " " + line
+        else:
+            turns.append(line)
+    return turns
+
+
+def _split(text: str):
+    """Split text into turns (with their speaker labels) and cleaned sentences"""
+    turns: List[_Turn] = []
+    sentences: List[_Sentence] = []
+    boilerplate = 0
+    for block_index, block in enumerate(re.split(r"\n\s*\n", text.replace("\r\n", "\n"))):
+        for turn in _turns(block):
+            label_match = _SPEAKER.match(turn) or _LIST_ITEM.match(turn)
+            label = label_match.group(0) if label_match else ""
+            body = turn[len(label):]
+            kept = []
+            for raw in _SENTENCE_END.split(body):
+                sentence = _FILLER.sub("", _HEDGE.sub(" ", raw.strip()))
+                sentence = re.sub(r"\s{2,}", " ", sentence).strip(" ,")
+                if not sentence:
+                    continue
+                if _PLEASANTRY.match(sentence) and len(sentence.split()) <= 12:
+                    boilerplate += 1
+                    continue
+                if sentence[0].islower():
+                    sentence = sentence[0].upper() + sentence[1:]
+                words = [w for w in _WORD.findall(sentence.lower()) if w not in _STOPWORDS]
+                kept.append(_Sentence(len(turns), sentence, words))
+            if kept:
+                turns.append(_Turn(label, block_index))
+                sentences.extend(kept)
+    return turns, sentences, boilerplate
+
+
+def _remove_duplicates(sentences: List[_Sentence], threshold: float) -> List[_Sentence]:
+    """Keep the first of each group of near-identical sentences"""
+    kept: List[_Sentence] = []
+    kept_sets: List[Set[str]] = []
+    postings: Dict[str, List[int]] = {}
+    for sentence in sentences:
+        words = set(sentence.words) or {sentence.text.lower()}
+        overlap: Dict[int, int] = {}
+        for word in words:
+            for index in postings.get(word, ()):
+                overlap[index] = overlap.get(index, 0) + 1
+        if any(
+            shared / (len(words) + len(kept_sets[index]) - shared) >= threshold
+            for index, shared in overlap.items()
+        ):
+            continue
+        for word in words:
+            postings.setdefault(word, []).append(len(kept))
+        kept.append(sentence)
+        kept_sets.append(words)
+    return kept
+
+
+def textrank(sentences: List[_Sentence], iterations: int = 50, tolerance: float = 1e-6) -> List[float]:
+    """
+    Score sentences by centrality: PageRank over a graph weighted by the
+    TF-IDF cosine similarity between sentences. Similarities are only
+    computed for pairs sharing a content word (via an inverted index), so
+    long, varied transcripts stay well below quadratic cost.
+    """
+    count = len(sentences)
+    if count < 2:
+        return [1.0] * count
+    document_frequency: Dict[str, int] = {}
+    for sentence in sentences:
+        for word in set(sentence.words):
+            document_frequency[word] = document_frequency.get(word, 0) + 1
+    max_frequency = max(2, int(count * _MAX_DOCUMENT_FREQUENCY))
+
+    vectors: List[Dict[str, float]] = []
+    for sentence in sentences:
+        counts: Dict[str, int] = {}
+        for word in sentence.words:
+            counts[word] = counts.get(word, 0) + 1
+        vector = {
+            word: (1 + math.log(n)) * math.log(1 + count / document_frequency[word])
+            for word, n in counts.items() if document_frequency[word] <= max_frequency
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        vectors.append({word: weight / norm for word, weight in vector.items()})
+
+    edges: List[Dict[int, float]] = [{} for _ in range(count)]
+    postings: Dict[str, List[int]] = {}
+    for i, vector in enumerate(vectors):
+        dots: Dict[int, float] = {}
+        for word, weight in vector.items():
+            for j in postings.get(word, ()):
+                dots[j] = dots.get(j, 0.0) + weight * vectors[j][word]
+            postings.setdefault(word, []).append(i)
+        for j, similarity in dots.items():
+            edges[i][j] = edges[j][i] = similarity
+
+    out_weight = [sum(neighbours.values()) for neighbours in edges]
+    scores = [1.0] * count
+    for _ in range(iterations):
+        updated = [
+            (1 - _DAMPING) + _DAMPING * sum(
+                weight * scores[j] / out_weight[j] for j, weight in edges[i].items()
+            )
+            for i in range(count)
+        ]
+        delta = max(abs(a - b) for a, b in zip(updated, scores))
+        scores = updated
+        if delta < tolerance:
+            break
+    return scores
+
+
+def condense_text(text: str, config: Optional[CondenseConfig] = None) -> CondensedText:
+    """
+    Condense one document (see the module docstring for the steps).
+
+    Args:
+        text: Raw transcript or profile text
+        config: Settings (defaults to CondenseConfig.from_env(); `enabled` is not checked here)
+
+    Returns:
+        CondensedText with the condensed text and what was removed
+    """
+    config = config or CondenseConfig.from_env()
+    original_tokens = estimate_tokens(text)
+    if 0 < config.token_budget and original_tokens <= config.token_budget:
+        return CondensedText(text=text, original_tokens=original_tokens, condensed_tokens=original_tokens)
+    turns, sentences, boilerplate = _split(text)
+    unique = _remove_duplicates(sentences, config.duplicate_threshold)
+    duplicates = len(sentences) - len(unique)
+
+    def cost(selected: List[int]) -> int:
+        """Characters of the rendered text for the selected sentence indexes"""
+        paragraphs = {unique[i].paragraph for i in selected}
+        return (sum(len(unique[i].text) + 1 for i in selected)
+                + sum(len(turns[p].label) + 2 for p in paragraphs))
+
+    selected = list(range(len(unique)))
+    budget_chars = config.token_budget * CHARS_PER_TOKEN
+    if config.token_budget > 0 and cost(selected) > budget_chars:
+        scores = textrank(unique)
+        ranked = sorted(range(1, len(unique)), key=lambda i: scores[i], reverse=True)
+        selected, used, paragraphs = [0], cost([0]), {unique[0].paragraph}
+        for i in ranked:
+            extra = len(unique[i].text) + 1
+            if unique[i].paragraph not in paragraphs:
+                extra += len(turns[unique[i].paragraph].label) + 2
+            if used + extra > budget_chars:
+                continue
+            selected.append(i)
+            used += extra
+            paragraphs.add(unique[i].paragraph)
+        selected.sort()
+
+    # Turns from the same block stay on consecutive lines; blocks stay a blank line apart
+    parts: List[str] = []
+    current = None
+    for i in selected:
+        sentence = unique[i]
+        if sentence.paragraph == current:
+            parts.append(" " + sentence.text)
+            continue
+        turn = turns[sentence.paragraph]
+        if current is not None:
+            parts.append("\n" if turn.block == turns[current].block else "\n\n")
+        parts.append(turn.label + sentence.text)
+        current = sentence.paragraph
+    condensed = "".join(parts)
+    return CondensedText(
+        text=condensed,
+        original_tokens=original_tokens,
+        condensed_tokens=estimate_tokens(condensed),
+        boilerplate_removed=boilerplate,
+        duplicates_removed=duplicates,
+        ranked_out=len(unique) - len(selected),
+    )
+
+
+# Process pool shared by all condensation batches, created on first use
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_condense_pool(processes: int = 0) -> ProcessPoolExecutor:
+    """Return the shared condensation process pool"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=processes or None)
+    return _pool
+
+
+def shutdown_condense_pool() -> None:
+    """Stop the shared process pool (used by tests and at shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+async def condense_documents(
+    documents: List[str],
+    config: Optional[CondenseConfig] = None,
+) -> List[str]:
+    """
+    Condense documents before they are put into extraction prompts.
+    Returns them unchanged unless condensation is enabled. Workloads above
+    config.pool_min_tokens run in the shared process pool so the event loop
+    (and the other in-flight extractions) are not blocked.
+
+    Args:
+        documents: Raw texts
+        config: Settings (defaults to CondenseConfig.from_env())
+
+    Returns:
+        The condensed texts, aligned with `documents`
+    """
+    config = config or CondenseConfig.from_env()
+    if not config.enabled or not documents:
+        return documents
+    start = time.perf_counter()
+    total_tokens = sum(estimate_tokens(document) for document in documents)
+    if config.processes == 1 or total_tokens < config.pool_min_tokens:
+        results = [condense_text(document, config) for document in documents]
+    else:
+        loop = asyncio.get_running_loop()
+        pool = get_condense_pool(config.processes)
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, condense_text, document, config) for document in documents
+        ))
+    for result in results:
+        condense_stats.record(result)
+    condense_stats.seconds += time.perf_counter() - start
+    return [result.text for result in results]
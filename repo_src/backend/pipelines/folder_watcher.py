@@ -0,0 +1,288 @@
+"""
+Watch-folder ingestion: ingest transcripts as they are dropped into a directory.
+
+The directory is polled (no platform file-event API is needed, and network
+mounts work the same way). A new or modified file is only picked up once its
+size and mtime have stayed the same for the debounce interval, so a file that
+is still being copied or uploaded is never read half-written. Names that
+upload tools use for partial files (".part", ".tmp", ".crdownload", "~" and
+dot-files) are ignored until they are renamed.
+
+Settled files go through a bounded queue to a fixed number of workers. Each
+worker takes the files that are ready (up to the batch size) and runs them
+through bulk ingestion (pipelines/bulk_ingestion.py), so they get the same
+manifest check, extraction and upsert as a manual run. Bursts of uploads are
+absorbed in three places:
+- At most max_in_flight extraction requests run at once.
+- When the queue is full, the scanner waits for room, which slows it down
+  instead of buffering without limit.
+- Database writes are serialized, so SQLite only ever has one writer.
+Files that fail are retried after retry_interval. Files still queued at
+shutdown are picked up again on the next start; the manifest skips the ones
+that were already ingested.
+"""
+import asyncio
+import os
+import stat as stat_module
+import threading
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from repo_src.backend.pipelines.bulk_ingestion import (
+    BulkIngestionConfig,
+    BulkIngestionReport,
+    ingest_files,
+    load_manifest,
+    save_profiles,
+)
+
+PARTIAL_SUFFIXES = (".part", ".partial", ".tmp", ".crdownload", ".download", "~")
+
+Signature = Tuple[int, int]  # (size, mtime_ns)
+
+
+@dataclass
+class WatchConfig:
+    """Settings for the watch-folder daemon"""
+    pattern: str = "*.txt"  # files to ingest, matched recursively
+    poll_interval: float = 2.0  # seconds between directory scans
+    debounce_seconds: float = 5.0  # how long a file must stay unchanged before it is ingested
+    max_in_flight: int = 4  # ingestion workers, i.e. extraction requests in flight
+    batch_size: int = 8  # most files a worker takes at once (shared batched request, one transaction)
+    queue_size: int = 64  # settled files waiting for a worker before the scanner blocks
+    retry_interval: float = 60.0  # seconds before a failed file is tried again
+
+    @classmethod
+    def from_env(cls) -> "WatchConfig":
+        """Build settings from INGEST_WATCH_* environment variables"""
+        return cls(
+            pattern=os.getenv("INGEST_WATCH_PATTERN", "*.txt"),
+            poll_interval=float(os.getenv("INGEST_WATCH_POLL_INTERVAL", "2")),
+            debounce_seconds=float(os.getenv("INGEST_WATCH_DEBOUNCE_SECONDS", "5")),
+            max_in_flight=max(1, int(os.getenv("INGEST_WATCH_MAX_IN_FLIGHT", "4"))),
+            batch_size=max(1, int(os.getenv("INGEST_WATCH_BATCH_SIZE", "8"))),
+            queue_size=max(1, int(os.getenv("INGEST_WATCH_QUEUE_SIZE", "64"))),
+            retry_interval=float(os.getenv("INGEST_WATCH_RETRY_INTERVAL", "60")),
+        )
+
+
+@dataclass
+class WatchStats:
+    """Counters for a watcher's lifetime"""
+    scans: int = 0
+    dispatched: int = 0  # files handed to the workers
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0  # unchanged since their last ingestion
+    backpressure_waits: int = 0  # settled files that had to wait for room in the queue
+
+
+def is_partial_file(path: Path) -> bool:
+    """True for names that upload and copy tools give files still being written"""
+    name = path.name
+    return name.startswith(".") or name.lower().endswith(PARTIAL_SUFFIXES)
+
+
+class FolderWatcher:
+    """Polls a directory and ingests files once they have settled"""
+
+    def __init__(
+        self,
+        directory: Path,
+        config: Optional[WatchConfig] = None,
+        ingestion: Optional[BulkIngestionConfig] = None,
+        save: Callable = save_profiles,
+        manifest_loader: Callable[[List[Path]], Dict] = load_manifest,
+        ingest: Optional[Callable[[List[Path]], Awaitable[BulkIngestionReport]]] = None,
+        on_report: Optional[Callable[[List[Path], BulkIngestionReport], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            directory: The folder to watch (searched recursively)
+            config: Watch settings (defaults to WatchConfig.from_env())
+            ingestion: Bulk ingestion settings; concurrency and DB batch size
+                are set from the watch settings
+            save: Writes a batch of profiles (see bulk_ingestion.save_profiles);
+                calls are serialized
+            manifest_loader: Fetches manifest entries for a list of paths
+            ingest: Replaces the whole ingestion step for a list of paths
+            on_report: Called after each worker batch with its paths and report
+            clock: Monotonic time source, for tests
+        """
+        self.directory = Path(directory)
+        self.config = config or WatchConfig.from_env()
+        self.ingestion = replace(
+            ingestion or BulkIngestionConfig.from_env(), concurrency=1, db_batch_size=self.config.batch_size
+        )
+        self.save = save
+        self.manifest_loader = manifest_loader
+        self.ingest = ingest or self._ingest
+        self.on_report = on_report
+        self.clock = clock
+        self.stats = WatchStats()
+        self._write_lock = threading.Lock()
+        self._observed: Dict[Path, Tuple[Signature, float]] = {}  # signature and when it was first seen
+        self._dispatched: Dict[Path, Signature] = {}  # signature last handed to a worker
+        self._retry_at: Dict[Path, float] = {}
+        self._in_flight: Set[Path] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def scan(self) -> List[Path]:
+        """
+        Scan the directory once and return the files that are ready to ingest:
+        settled for the debounce interval, changed since they were last
+        dispatched, not in flight and not waiting for a retry.
+        """
+        return self._select(self._list_files())
+
+    def _list_files(self) -> Dict[Path, Signature]:
+        current: Dict[Path, Signature] = {}
+        for path in self.directory.rglob(self.config.pattern):
+            if is_partial_file(path):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:  # deleted or renamed mid-scan
+                continue
+            if stat_module.S_ISREG(stat.st_mode):
+                current[path] = (stat.st_size, stat.st_mtime_ns)
+        return current
+
+    def _select(self, current: Dict[Path, Signature]) -> List[Path]:
+        now = self.clock()
+        self.stats.scans += 1
+        for path in list(self._observed):
+            if path not in current:
+                del self._observed[path]
+                self._dispatched.pop(path, None)
+                self._retry_at.pop(path, None)
+
+        ready = []
+        for path, signature in sorted(current.items()):
+            observed = self._observed.get(path)
+            if observed is None or observed[0] != signature:
+                # New or still being written: (re)start its debounce window
+                self._observed[path] = (signature, now)
+                continue
+            if now - observed[1] < self.config.debounce_seconds:
+                continue
+            if path in self._in_flight or self._dispatched.get(path) == signature:
+                continue
+            if self._retry_at.get(path, now) > now:
+                continue
+            ready.append(path)
+        return ready
+
+    @property
+    def idle(self) -> bool:
+        """True when nothing is queued, in flight or still settling"""
+        settling = any(
+            self._dispatched.get(path) != signature and path not in self._retry_at
+            for path, (signature, _) in self._observed.items()
+        )
+        return not self._in_flight and not settling and (self._queue is None or self._queue.empty())
+
+    def _save(self, *args) -> None:
+        with self._write_lock:
+            self.save(*args)
+
+    async def _ingest(self, paths: List[Path]) -> BulkIngestionReport:
+        manifest = await asyncio.to_thread(self.manifest_loader, paths)
+        return await ingest_files(paths, self.ingestion, save=self._save, manifest=manifest)
+
+    async def _dispatch(self, paths: List[Path]) -> None:
+        for path in paths:
+            self._dispatched[path] = self._observed[path][0]
+            self._in_flight.add(path)
+            self._retry_at.pop(path, None)
+            if self._queue.full():
+                self.stats.backpressure_waits += 1
+            await self._queue.put(path)
+            self.stats.dispatched += 1
+
+    async def _worker(self) -> None:
+        while True:
+            path = await self._queue.get()
+            if path is None:
+                return
+            paths = [path]
+            while len(paths) < self.config.batch_size:
+                try:
+                    path = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if path is None:
+                    self._queue.put_nowait(None)  # leave the stop signal for the next get
+                    break
+                paths.append(path)
+            await self._process(paths)
+
+    async def _process(self, paths: List[Path]) -> None:
+        try:
+            report = await self.ingest(paths)
+        except Exception as e:
+            print(f"Watch ingestion of {len(paths)} file(s) failed: {e}")
+            report = BulkIngestionReport(total=len(paths), failed=len(paths))
+            failed = set(paths)
+        else:
+            failed = {Path(failure.path) for failure in report.failures}
+        self.stats.succeeded += report.succeeded
+        self.stats.failed += report.failed
+        self.stats.skipped += report.skipped
+        for path in paths:
+            self._in_flight.discard(path)
+            if path in failed:
+                # Retry later even if the file doesn't change
+                self._dispatched.pop(path, None)
+                self._retry_at[path] = self.clock() + self.config.retry_interval
+        if self.on_report:
+            self.on_report(paths, report)
+
+    async def _scan_loop(self, until_idle: bool) -> None:
+        while not self._stopping.is_set():
+            try:
+                # Only the directory walk runs in a thread; the bookkeeping stays on the loop
+                await self._dispatch(self._select(await asyncio.to_thread(self._list_files)))
+            except OSError as e:
+                # The directory is missing or unreadable; keep watching
+                print(f"Watch folder scan failed: {e}")
+            if until_idle and self.idle:
+                return
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.config.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, until_idle: bool = False) -> WatchStats:
+        """
+        Watch until request_stop() is called, or with until_idle, until every
+        file found has been ingested. Files already queued when stopping are
+        left for the next start; files in flight are finished.
+
+        Returns:
+            The watcher's counters
+        """
+        self._queue = asyncio.Queue(maxsize=self.config.queue_size)
+        self._stopping = asyncio.Event()
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.config.max_in_flight)]
+        try:
+            await self._scan_loop(until_idle)
+        finally:
+            # Drop what hasn't started, then let each worker finish its batch
+            while not self._queue.empty():
+                path = self._queue.get_nowait()
+                self._in_flight.discard(path)
+                self._dispatched.pop(path, None)
+            for _ in workers:
+                await self._queue.put(None)
+            await asyncio.gather(*workers, return_exceptions=True)
+        return self.stats
+
+    def request_stop(self) -> None:
+        """Ask run() to shut down; safe to call from a signal handler"""
+        if self._stopping is not None:
+            self._stopping.set()
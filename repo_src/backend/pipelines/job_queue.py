@@ -0,0 +1,205 @@
+"""
+Worker pool for the durable ingestion job queue.
+
+Jobs live in the ingestion_jobs table (see functions/ingestion_jobs.py), so
+the API only has to insert a row and return; extraction runs in a pool of
+asyncio workers, either inside the API process (started from the FastAPI
+lifespan) or in separate processes via repo_src/scripts/ingestion_worker.py.
+Any number of pools can share one database.
+
+Each worker leases a job, keeps the lease alive with a heartbeat while the
+LLM call runs, and on failure requeues the job with jittered exponential
+backoff until it runs out of attempts and is dead-lettered.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from repo_src.backend.data.schemas import UserCreate
+from repo_src.backend.functions import ingestion_jobs
+from repo_src.backend.functions.users import upsert_user
+from repo_src.backend.llm_chat.errors import LLMRateLimitError
+from repo_src.backend.llm_chat.retry import RetryPolicy
+from repo_src.backend.pipelines.user_ingestion import extract_user_profile
+
+
+@dataclass
+class JobQueueConfig:
+    """Settings for the ingestion worker pool"""
+    workers: int = 2  # jobs processed concurrently by one pool; 0 disables the in-process pool
+    lease_seconds: float = 300.0  # visibility timeout of a leased job
+    poll_interval: float = 1.0  # idle wait between polls of an empty queue
+    max_attempts: int = 3  # attempts before a job is dead-lettered
+    retry_base_delay: float = 5.0
+    retry_max_delay: float = 300.0
+
+    @classmethod
+    def from_env(cls) -> "JobQueueConfig":
+        """Build settings from INGEST_QUEUE_* environment variables"""
+        return cls(
+            workers=max(0, int(os.getenv("INGEST_QUEUE_WORKERS", "2"))),
+            lease_seconds=float(os.getenv("INGEST_QUEUE_LEASE_SECONDS", "300")),
+            poll_interval=float(os.getenv("INGEST_QUEUE_POLL_INTERVAL", "1")),
+            max_attempts=max(1, int(os.getenv("INGEST_QUEUE_MAX_ATTEMPTS", "3"))),
+            retry_base_delay=float(os.getenv("INGEST_QUEUE_RETRY_BASE_DELAY", "5")),
+            retry_max_delay=float(os.getenv("INGEST_QUEUE_RETRY_MAX_DELAY", "300")),
+        )
+
+    def retry_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Backoff before retrying a job whose `attempt`-th attempt (1-based) failed"""
+        policy = RetryPolicy(self.max_attempts, self.retry_base_delay, self.retry_max_delay)
+        return policy.backoff(attempt - 1, retry_after)
+
+
+class IngestionWorkerPool:
+    """Leases jobs from the queue and extracts profiles with bounded concurrency"""
+
+    def __init__(
+        self,
+        config: Optional[JobQueueConfig] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
+        worker_id: Optional[str] = None,
+    ):
+        if session_factory is None:
+            from repo_src.backend.database.connection import SessionLocal
+            session_factory = SessionLocal
+        self.config = config or JobQueueConfig.from_env()
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stopping = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def _db_call(self, fn, *args, **kwargs):
+        """Run a functions/ingestion_jobs call in a fresh session"""
+        db = self.session_factory()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    def _lease(self) -> Optional[tuple]:
+        jobs = self._db_call(ingestion_jobs.lease_jobs, self.worker_id, 1, self.config.lease_seconds)
+        if not jobs:
+            return None
+        return jobs[0].id, jobs[0].content, jobs[0].attempts
+
+    def _save(self, job_id: int, profile: UserCreate) -> bool:
+        """
+        Write the profile and complete the job in one transaction, so a crash
+        leaves neither. The lease is checked first (compare-and-set on the
+        job row), so a worker whose lease was taken over doesn't overwrite
+        the profile with its possibly older extraction.
+        """
+        db = self.session_factory()
+        try:
+            if not ingestion_jobs.complete_job(db, job_id, self.worker_id, profile.user_id, commit=False):
+                db.rollback()
+                print(f"Ingestion job {job_id}: lease lost to another worker, result discarded")
+                return False
+            upsert_user(db, profile, commit=False)
+            db.commit()
+            return True
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _heartbeat(self, job_id: int) -> None:
+        """Extend the lease every third of the visibility timeout"""
+        while True:
+            await asyncio.sleep(self.config.lease_seconds / 3)
+            if not await asyncio.to_thread(
+                self._db_call, ingestion_jobs.extend_lease, job_id, self.worker_id, self.config.lease_seconds
+            ):
+                print(f"Ingestion job {job_id}: lease lost to another worker")
+                return
+
+    async def process_job(self, job_id: int, content: str, attempt: int) -> None:
+        """Extract, save and complete one leased job, or record the failure"""
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            result = await extract_user_profile(content)
+            profile = UserCreate(**result.value)
+            await asyncio.to_thread(self._save, job_id, profile)
+        except asyncio.CancelledError:
+            # Shutting down mid-extraction: hand the job back without using an attempt
+            self._db_call(ingestion_jobs.release_job, job_id, self.worker_id)
+            raise
+        except Exception as e:
+            retry_after = e.retry_after if isinstance(e, LLMRateLimitError) else None
+            delay = self.config.retry_delay(attempt, retry_after)
+            status = await asyncio.to_thread(
+                self._db_call, ingestion_jobs.fail_job, job_id, self.worker_id,
+                f"{type(e).__name__}: {e}", delay,
+            )
+            if status == ingestion_jobs.DEAD:
+                print(f"Ingestion job {job_id} dead-lettered after {attempt} attempt(s): {e}")
+            elif status == ingestion_jobs.QUEUED:
+                print(f"Ingestion job {job_id} attempt {attempt} failed, retrying in {delay:.1f}s: {e}")
+        finally:
+            heartbeat.cancel()
+
+    async def run_once(self) -> bool:
+        """
+        Lease and process a single job.
+
+        Returns:
+            False if the queue had no due job
+        """
+        leased = await asyncio.to_thread(self._lease)
+        if leased is None:
+            return False
+        await self.process_job(*leased)
+        return True
+
+    async def _worker(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if await self.run_once():
+                    continue
+            except Exception as e:
+                # Database unavailable or similar; keep the worker alive
+                print(f"Ingestion worker error: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.config.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start the workers on the running event loop"""
+        if self._tasks:
+            return
+        self._stopping.clear()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.config.workers)]
+        print(f"Ingestion worker pool {self.worker_id} started with {self.config.workers} worker(s)")
+
+    async def stop(self, grace_seconds: float = 10.0) -> None:
+        """
+        Stop leasing new jobs, give in-flight jobs `grace_seconds` to finish,
+        then cancel the rest (their jobs are released back to the queue).
+        """
+        self._stopping.set()
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=grace_seconds)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        print(f"Ingestion worker pool {self.worker_id} stopped")
+
+    def request_stop(self) -> None:
+        """Ask run_forever() to shut down; safe to call from a signal handler"""
+        self._stopping.set()
+
+    async def run_forever(self) -> None:
+        """Run the workers until stop() is called"""
+        self.start()
+        await self._stopping.wait()
+        await self.stop()
@@ -0,0 +1,174 @@
+"""
+Local repair of almost-valid JSON returned by the LLM.
+
+Models regularly return an answer that is right in substance but not quite
+JSON. They wrap the object in prose, leave a trailing comma, put raw line
+breaks or stray backslashes inside wiki_content, or quote a phrase without
+escaping the quotes. Rejecting such an answer costs another (escalated) LLM
+call. repair_json fixes these malformations in a single pass and reports
+which repairs it applied. Each repaired response is counted in the LLM
+metrics, so the calls it saved are visible at /api/chat/metrics.
+
+Truncated output is deliberately not completed: a cut-off wiki_content
+would pass validation while silently losing content.
+"""
+import json
+import re
+from typing import Any, List, Optional, Set, Tuple
+
+from repo_src.backend.llm_chat.metrics import get_metrics
+
+# Repair kinds, as reported by repair_json and counted in metrics
+SURROUNDING_TEXT = "surrounding_text"
+TRAILING_COMMAS = "trailing_commas"
+CONTROL_CHARACTERS = "control_characters"
+INVALID_ESCAPES = "invalid_escapes"
+UNESCAPED_QUOTES = "unescaped_quotes"
+
+_WHITESPACE = " \t\r\n"
+_VALID_ESCAPES = '"\\/bfnrt'
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_UNICODE_ESCAPE = re.compile(r"u[0-9a-fA-F]{4}")
+_FENCE = re.compile(r"^```[a-zA-Z]*|```$")
+
+# How many candidate opening brackets to try before giving up
+MAX_CANDIDATES = 20
+
+
+def _next_significant(text: str, index: int) -> int:
+    """Index of the first non-whitespace character at or after index"""
+    while index < len(text) and text[index] in _WHITESPACE:
+        index += 1
+    return index
+
+
+def _scan(text: str, start: int) -> Optional[Tuple[str, int, Set[str]]]:
+    """
+    Copy the JSON value starting at text[start] (an object, array or string),
+    repairing it on the way.
+
+    Returns:
+        (repaired text, index just past the value, repairs applied), or None if
+        the value is unbalanced or never closes
+    """
+    out: List[str] = []
+    closers: List[str] = []
+    repairs: Set[str] = set()
+    in_string = False
+    i = start
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if char == "\\":
+                following = text[i + 1:i + 2]
+                if following and following in _VALID_ESCAPES:
+                    out.append(text[i:i + 2])
+                    i += 2
+                elif _UNICODE_ESCAPE.match(text, i + 1):
+                    out.append(text[i:i + 6])
+                    i += 6
+                else:
+                    out.append("\\\\")
+                    repairs.add(INVALID_ESCAPES)
+                    i += 1
+                continue
+            if char == '"':
+                # A quote only ends the string if JSON structure follows it
+                after = _next_significant(text, i + 1)
+                if after == len(text) or text[after] in ",:}]":
+                    in_string = False
+                    out.append(char)
+                    if not closers:
+                        return "".join(out), i + 1, repairs
+                else:
+                    out.append('\\"')
+                    repairs.add(UNESCAPED_QUOTES)
+            elif char < " ":
+                out.append(_CONTROL_ESCAPES.get(char, f"\\u{ord(char):04x}"))
+                repairs.add(CONTROL_CHARACTERS)
+            else:
+                out.append(char)
+            i += 1
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not closers or closers.pop() != char:
+                return None
+            if not closers:
+                out.append(char)
+                return "".join(out), i + 1, repairs
+        elif char == ",":
+            after = _next_significant(text, i + 1)
+            if after < len(text) and text[after] in "}]":
+                repairs.add(TRAILING_COMMAS)
+                i += 1
+                continue
+        out.append(char)
+        i += 1
+    return None
+
+
+def repair_json(text: str, expect: Optional[type] = None) -> Tuple[Any, List[str]]:
+    """
+    Parse the first repairable JSON object or array in an LLM response.
+
+    Args:
+        text: Raw response text
+        expect: dict or list to only accept that kind of value (None for either)
+
+    Returns:
+        (parsed value, sorted list of the repair kinds applied)
+
+    Raises:
+        ValueError: If no candidate in the text parses, even after repair
+    """
+    openers = {dict: "{", list: "["}.get(expect, "{[")
+    candidates = [i for i, char in enumerate(text) if char in openers][:MAX_CANDIDATES]
+    for start in candidates:
+        scanned = _scan(text, start)
+        if scanned is None:
+            continue
+        repaired, end, repairs = scanned
+        try:
+            value = json.loads(repaired)
+        except json.JSONDecodeError:
+            continue
+        # Code fences around the value are expected; anything else is prose
+        surrounding = _FENCE.sub("", text[:start].strip()) + _FENCE.sub("", text[end:].strip())
+        if surrounding.strip():
+            repairs.add(SURROUNDING_TEXT)
+        return value, sorted(repairs)
+    raise ValueError("No repairable JSON value in the response")
+
+
+def repair_value(text: str) -> Tuple[Any, List[str]]:
+    """
+    Parse one JSON value (e.g. a single streamed field), repairing strings,
+    objects and arrays the same way as repair_json.
+
+    Raises:
+        ValueError: If the value doesn't parse even after repair
+    """
+    text = text.strip()
+    scanned = _scan(text, 0) if text[:1] in '"{[' else None
+    if scanned is None or scanned[1] != len(text):
+        raise ValueError("Value cannot be repaired")
+    repaired, _, repairs = scanned
+    try:
+        return json.loads(repaired), sorted(repairs)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Value cannot be repaired: {e}")
+
+
+def record_repairs(repairs: List[str]) -> None:
+    """Count a response that only parsed after repair"""
+    get_metrics().record_json_repair(repairs)
+
+
+def record_repair_failure() -> None:
+    """Count a response that repair could not salvage either"""
+    get_metrics().record_json_repair(None)
@@ -0,0 +1,62 @@
+"""
+File fingerprints for the ingestion manifest.
+
+A file is unchanged when its recorded size and mtime still match (cheap, no
+read needed) or, after a touch or copy, when its content hash matches. In
+both cases the recorded pipeline version must equal the current one, so a
+prompt or model change re-extracts everything.
+"""
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+
+@dataclass
+class FileFingerprint:
+    """Size, mtime and content hash of a source file"""
+    path: str
+    size: int
+    mtime: float
+    content_hash: str
+
+
+def fingerprint_content(path: Path, content: bytes, stat: Optional[os.stat_result] = None) -> FileFingerprint:
+    """
+    Fingerprint a file from bytes already read, so ingestion reads each file once.
+
+    Args:
+        path: The file the bytes came from
+        content: The file bytes
+        stat: Result of os.stat taken before the read (stat'ed now if omitted)
+
+    Returns:
+        FileFingerprint for the file
+    """
+    stat = stat or path.stat()
+    return FileFingerprint(
+        path=str(path),
+        size=stat.st_size,
+        mtime=stat.st_mtime,
+        content_hash=hashlib.sha256(content).hexdigest(),
+    )
+
+
+def stat_unchanged(entry: Optional[Any], stat: os.stat_result, pipeline_version: str) -> bool:
+    """True if a manifest entry matches the file's size and mtime for this pipeline version"""
+    return (
+        entry is not None
+        and entry.pipeline_version == pipeline_version
+        and entry.size == stat.st_size
+        and entry.mtime == stat.st_mtime
+    )
+
+
+def content_unchanged(entry: Optional[Any], fingerprint: FileFingerprint, pipeline_version: str) -> bool:
+    """True if a manifest entry matches the file's content hash for this pipeline version"""
+    return (
+        entry is not None
+        and entry.pipeline_version == pipeline_version
+        and entry.content_hash == fingerprint.content_hash
+    )
@@ -0,0 +1,196 @@
+"""
+Per-stage timing for the ingestion pipeline.
+
+Each file being ingested gets a FileTiming record. While a record is active
+(see track), pipeline code wraps its work in stage(name) blocks, and the
+elapsed time is added to that stage of the record; with no active record the
+blocks cost nothing, so the extraction functions can stay instrumented when
+called from the API or tests.
+
+Stages:
+    read      reading and fingerprinting the input file
+    prompt    condensing the text and building the prompt
+    llm       waiting on LLM calls (rate limiting, retries and, when stream
+              validation is on, incremental parsing of the stream included)
+    parse     parsing the response JSON (including repair)
+    validate  schema and quality checks on the parsed profile
+    db        saving the profile and its manifest entry
+
+The record is held in a context variable, so it follows the async tasks and
+worker threads started while it is active. Files that share one batched
+extraction request share a record until the request finishes; their
+extraction stages are then split evenly between them (see share_among).
+"""
+import contextvars
+import math
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+STAGES = ("read", "prompt", "llm", "parse", "validate", "db")
+
+_current: contextvars.ContextVar[Optional["FileTiming"]] = contextvars.ContextVar("stage_timing", default=None)
+
+
+@dataclass
+class FileTiming:
+    """Where the time went for one ingested file"""
+    path: str
+    status: str = "pending"  # "succeeded", "failed" or "skipped" once finished
+    stages: Dict[str, float] = field(default_factory=dict)  # seconds per stage
+    bytes_read: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_calls: int = 0
+    shared_with: int = 1  # files that shared this file's extraction request(s)
+    error: Optional[str] = None
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.stages.values())
+
+    def add(self, stage_name: str, seconds: float) -> None:
+        self.stages[stage_name] = self.stages.get(stage_name, 0.0) + seconds
+
+    def share_among(self, timings: List["FileTiming"]) -> None:
+        """Add an even share of this record's stages and tokens to each of `timings`"""
+        share = len(timings)
+        for index, timing in enumerate(timings):
+            for name, seconds in self.stages.items():
+                timing.add(name, seconds / share)
+            # Any remainder goes to the first file so the totals still add up
+            timing.prompt_tokens += self.prompt_tokens // share + (self.prompt_tokens % share if index == 0 else 0)
+            timing.completion_tokens += (self.completion_tokens // share
+                                         + (self.completion_tokens % share if index == 0 else 0))
+            timing.llm_calls += self.llm_calls
+            timing.shared_with = share
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "status": self.status,
+            "seconds": round(self.total_seconds, 4),
+            "stages": {name: round(self.stages[name], 4) for name in STAGES if name in self.stages},
+            "bytes_read": self.bytes_read,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "llm_calls": self.llm_calls,
+            "shared_with": self.shared_with,
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+@contextmanager
+def track(timing: FileTiming) -> Iterator[FileTiming]:
+    """Make `timing` the record that stage() blocks add to"""
+    token = _current.set(timing)
+    try:
+        yield timing
+    finally:
+        _current.reset(token)
+
+
+def current_timing() -> Optional[FileTiming]:
+    """The active record, if any"""
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Add the time spent in the block to stage `name` of the active record"""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - start)
+
+
+def record_llm_call(prompt_tokens: int, completion_tokens: int) -> None:
+    """Count one LLM call and its tokens against the active record"""
+    timing = _current.get()
+    if timing is not None:
+        timing.llm_calls += 1
+        timing.prompt_tokens += prompt_tokens
+        timing.completion_tokens += completion_tokens
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q between 0 and 1) of `values`"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize_stages(timings: List[FileTiming]) -> Dict[str, Dict[str, float]]:
+    """Per-stage count, total, mean, p50, p95 and max seconds over the files that ran the stage"""
+    summary = {}
+    for name in STAGES:
+        values = [timing.stages[name] for timing in timings if name in timing.stages]
+        if not values:
+            continue
+        summary[name] = {
+            "count": len(values),
+            "total": round(sum(values), 4),
+            "mean": round(sum(values) / len(values), 4),
+            "p50": round(percentile(values, 0.5), 4),
+            "p95": round(percentile(values, 0.95), 4),
+            "max": round(max(values), 4),
+        }
+    return summary
+
+
+def run_summary(timings: List[FileTiming], elapsed_seconds: float, **extra: Any) -> Dict[str, Any]:
+    """
+    Machine-readable summary of an ingestion run: counts, throughput, the
+    per-stage distribution and every file's record.
+
+    Args:
+        timings: One record per file
+        elapsed_seconds: Wall time of the run
+        **extra: Additional top-level fields (e.g. pipeline_version)
+    """
+    statuses = [timing.status for timing in timings]
+    bytes_read = sum(timing.bytes_read for timing in timings)
+    prompt_tokens = sum(timing.prompt_tokens for timing in timings)
+    completion_tokens = sum(timing.completion_tokens for timing in timings)
+    processed = statuses.count("succeeded") + statuses.count("failed")
+
+    def rate(amount: float) -> float:
+        return round(amount / elapsed_seconds, 2) if elapsed_seconds else 0.0
+
+    return {
+        **extra,
+        "elapsed_seconds": round(elapsed_seconds, 4),
+        "files": {
+            "total": len(timings),
+            "succeeded": statuses.count("succeeded"),
+            "failed": statuses.count("failed"),
+            "skipped": statuses.count("skipped"),
+        },
+        "bytes_read": bytes_read,
+        "tokens": {"prompt": prompt_tokens, "completion": completion_tokens},
+        "throughput": {
+            "files_per_second": rate(processed),
+            "bytes_per_second": rate(bytes_read),
+            "tokens_per_second": rate(prompt_tokens + completion_tokens),
+        },
+        "stages": summarize_stages(timings),
+        "per_file": [timing.to_dict() for timing in timings],
+    }
+
+
+def format_stage_table(summary: Dict[str, Dict[str, float]]) -> List[str]:
+    """Human-readable lines for summarize_stages output"""
+    lines = [f"{'stage':<10} {'files':>6} {'total':>9} {'p50':>9} {'p95':>9} {'max':>9}"]
+    for name, values in summary.items():
+        lines.append(
+            f"{name:<10} {values['count']:>6} {values['total']:>8.3f}s {values['p50']:>8.3f}s "
+            f"{values['p95']:>8.3f}s {values['max']:>8.3f}s"
+        )
+    return lines
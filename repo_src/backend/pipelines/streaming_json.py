@@ -0,0 +1,264 @@
+"""
+Incremental parsing of a streamed JSON object.
+
+Extraction prompts ask for a single JSON object. Fed the completion as it
+streams, IncrementalObjectParser tracks the top-level object and reports
+each top-level field the moment its value is complete, so callers can check
+or post-process fields while the rest is still being generated. It raises
+StreamAbort as soon as the text can no longer become a valid object (a
+syntax error, a wrongly typed field, a preamble that never reaches a "{"),
+which lets the caller close the stream instead of paying for the rest of the
+generation.
+
+With repair enabled, the malformations pipelines/json_repair.py can fix are
+not grounds to abort: trailing commas are skipped, field values are repaired
+as they complete, and any other syntax error after the opening brace stops
+the incremental checks so the whole response is left to the repairing
+parser.
+"""
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from repo_src.backend.pipelines.json_repair import TRAILING_COMMAS, record_repairs, repair_value
+
+_WHITESPACE = " \t\r\n"
+
+
+class StreamAbort(ValueError):
+    """The streamed text can no longer become an acceptable JSON object"""
+
+
+class IncrementalObjectParser:
+    """
+    Character-level scanner for one top-level JSON object, optionally preceded
+    by a code fence or a short preamble. Nested values are only bracket-matched
+    while streaming; each completed top-level value is then parsed with
+    json.loads, so syntax errors surface at the latest when their field ends.
+    """
+
+    def __init__(self, max_preamble_chars: int = 500, repair: bool = False):
+        self.max_preamble_chars = max_preamble_chars
+        self.repair = repair
+        self.fields: Dict[str, Any] = {}
+        self.done = False  # the closing brace of the object has been seen
+        self.unchecked = False  # gave up on a repairable syntax error; the rest is not parsed
+        self.repairs: List[str] = []  # repair kinds applied so far
+        self.chars_seen = 0
+        self._buffer: List[str] = []  # text of the current key or value
+        self._state = "preamble"  # preamble, key_or_end, key_start, key, colon, value, after_value
+        self._key: Optional[str] = None
+        self._depth = 0  # nesting inside the current value
+        self._in_string = False
+        self._escape = False
+
+    def _fail(self, message: str) -> None:
+        raise StreamAbort(f"{message} (after {self.chars_seen} chars)")
+
+    def _syntax_error(self, message: str) -> None:
+        """Abort, or with repair enabled leave the rest of the response to the repairing parser"""
+        if not self.repair:
+            self._fail(message)
+        self.unchecked = True
+
+    def _add_repairs(self, repairs: List[str]) -> None:
+        self.repairs.extend(kind for kind in repairs if kind not in self.repairs)
+
+    def _finish_value(self) -> Optional[Tuple[str, Any]]:
+        text = "".join(self._buffer).strip()
+        self._buffer = []
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError as e:
+            if not self.repair:
+                self._fail(f"Invalid JSON value for field {self._key!r}: {e}")
+            try:
+                value, repairs = repair_value(text)
+            except ValueError:
+                self.unchecked = True
+                return None
+            self._add_repairs(repairs)
+        self.fields[self._key] = value
+        self._state = "after_value"
+        return self._key, value
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """
+        Consume the next piece of the stream.
+
+        Args:
+            text: Newly streamed text
+
+        Returns:
+            (key, value) for every top-level field completed by this text
+
+        Raises:
+            StreamAbort: If the text can no longer become a valid JSON object
+        """
+        completed: List[Tuple[str, Any]] = []
+        for char in text:
+            if self.done or self.unchecked:
+                break
+            self.chars_seen += 1
+            state = self._state
+
+            if state == "preamble":
+                if char == "{":
+                    self._state = "key_or_end"
+                elif self.chars_seen > self.max_preamble_chars:
+                    self._fail("No JSON object in the response")
+                continue
+
+            if state in ("key_or_end", "key_start", "colon", "after_value") and char in _WHITESPACE:
+                continue
+
+            if state in ("key_or_end", "key_start"):
+                if char == '"':
+                    self._state, self._buffer, self._escape = "key", [char], False
+                elif char == "}" and state == "key_or_end":
+                    self.done = True
+                elif char == "}" and self.repair:
+                    self._add_repairs([TRAILING_COMMAS])
+                    self.done = True
+                else:
+                    self._syntax_error(f"Expected a field name, got {char!r}")
+
+            elif state == "key":
+                self._buffer.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._key = json.loads("".join(self._buffer))
+                    self._buffer = []
+                    self._state = "colon"
+
+            elif state == "colon":
+                if char != ":":
+                    self._syntax_error(f"Expected ':' after field {self._key!r}, got {char!r}")
+                else:
+                    self._state, self._depth, self._in_string, self._escape = "value", 0, False, False
+
+            elif state == "value":
+                if self._in_string:
+                    self._buffer.append(char)
+                    if self._escape:
+                        self._escape = False
+                    elif char == "\\":
+                        self._escape = True
+                    elif char == '"':
+                        self._in_string = False
+                        if self._depth == 0:
+                            self._complete(completed)
+                    continue
+                if self._depth == 0 and char in ",}":
+                    # End of a scalar (number, true, false, null)
+                    if not "".join(self._buffer).strip():
+                        self._syntax_error(f"Missing value for field {self._key!r}")
+                    elif self._complete(completed):
+                        self._close_or_continue(char)
+                    continue
+                if char == '"':
+                    self._in_string = True
+                elif char in "{[":
+                    self._depth += 1
+                elif char in "}]":
+                    self._depth -= 1
+                    if self._depth < 0:
+                        self._syntax_error(f"Unbalanced {char!r} in field {self._key!r}")
+                        continue
+                self._buffer.append(char)
+                if self._depth == 0 and char in "}]":
+                    self._complete(completed)
+
+            elif state == "after_value":
+                if char not in ",}":
+                    self._syntax_error(f"Expected ',' or '}}' after field {self._key!r}, got {char!r}")
+                else:
+                    self._close_or_continue(char)
+
+        return completed
+
+    def _complete(self, completed: List[Tuple[str, Any]]) -> bool:
+        """Finish the current value, adding it to `completed` unless it had to be given up on"""
+        field = self._finish_value()
+        if field is None:
+            return False
+        completed.append(field)
+        return True
+
+    def _close_or_continue(self, char: str) -> None:
+        if char == "}":
+            self.done = True
+        else:
+            self._state = "key_start"
+
+
+class StreamingObjectValidator:
+    """
+    Checks a streamed extraction as it arrives.
+
+    Args:
+        required: Fields the object must contain
+        field_types: Allowed Python types per field, checked as soon as the field completes
+        field_checks: Extra checks run the moment a field completes; raise ValueError to reject
+        on_field: Called with (key, value) for every completed top-level field
+        max_preamble_chars: How much text may precede the opening brace
+        repair: Tolerate the malformations pipelines/json_repair.py can fix
+            instead of aborting on them
+    """
+
+    def __init__(
+        self,
+        required: Tuple[str, ...] = (),
+        field_types: Optional[Dict[str, tuple]] = None,
+        field_checks: Optional[Dict[str, Callable[[Any], None]]] = None,
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        max_preamble_chars: int = 500,
+        repair: bool = False,
+    ):
+        self.parser = IncrementalObjectParser(max_preamble_chars, repair)
+        self.required = required
+        self.field_types = field_types or {}
+        self.field_checks = field_checks or {}
+        self.on_field = on_field
+
+    @property
+    def done(self) -> bool:
+        return self.parser.done
+
+    @property
+    def chars_seen(self) -> int:
+        return self.parser.chars_seen
+
+    def feed(self, text: str) -> None:
+        """
+        Consume streamed text, checking each field as it completes.
+
+        Raises:
+            StreamAbort: If the object is malformed, a field has the wrong type,
+                a field check fails, or the object closes without a required field
+        """
+        was_done = self.parser.done
+        for key, value in self.parser.feed(text):
+            allowed = self.field_types.get(key)
+            if allowed is not None and not isinstance(value, allowed):
+                raise StreamAbort(f"Field {key!r} has type {type(value).__name__}")
+            check = self.field_checks.get(key)
+            if check is not None:
+                try:
+                    check(value)
+                except ValueError as e:
+                    raise StreamAbort(str(e))
+            if self.on_field is not None:
+                self.on_field(key, value)
+        if self.parser.done and not was_done:
+            missing = [field for field in self.required if field not in self.parser.fields]
+            if missing:
+                raise StreamAbort(f"Missing required field in LLM response: {missing[0]}")
+            if self.parser.repairs:
+                record_repairs(self.parser.repairs)
+
+    def result_text(self) -> str:
+        """The completed object re-serialised as JSON, for the normal validator"""
+        return json.dumps(self.parser.fields)
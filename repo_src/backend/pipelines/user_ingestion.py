@@ -2,12 +2,28 @@
 Ingestion & Processing Core (Component A)
 Parses raw text files and extracts structured user profile data using LLM
 """
+import asyncio
+import hashlib
 import json
 import os
-from typing import Dict, Any
+import re
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import Awaitable, Dict, Any, List, Optional
 from pathlib import Path
 
-from repo_src.backend.llm_chat.llm_interface import ask_llm
+from pydantic import ValidationError
+
+from repo_src.backend.data.schemas import UserCreate
+from repo_src.backend.llm_chat.errors import LLMError
+from repo_src.backend.llm_chat.providers import close_provider
+from repo_src.backend.llm_chat.tokens import estimate_tokens
+from repo_src.backend.pipelines.cascade import CascadeResult, CascadeTier, TierAttempt, load_cascade_from_env, run_cascade
+from repo_src.backend.pipelines.chunking import chunk_text
+from repo_src.backend.pipelines.condense import CondenseConfig, condense_documents
+from repo_src.backend.pipelines.json_repair import record_repair_failure, record_repairs, repair_json
+from repo_src.backend.pipelines.stage_timing import stage
+from repo_src.backend.pipelines.streaming_json import StreamingObjectValidator
 
 
 EXTRACTION_SYSTEM_MESSAGE = """You are a data extraction assistant for a user profile system.
@@ -37,6 +53,931 @@ TEXT TO ANALYZE:
 
 Return the extracted information as a JSON object."""
 
+# A cheaper tier's answer is escalated if its wiki_content is shorter than this
+# (capped at half the input length so tiny inputs don't always escalate)
+EXTRACTION_MIN_WIKI_CHARS = int(os.getenv("EXTRACTION_MIN_WIKI_CHARS", "200"))
+
+# Stream single-document extractions and abort responses that can no longer
+# be a valid profile (see make_stream_validator)
+EXTRACTION_STREAM_VALIDATION = os.getenv("EXTRACTION_STREAM_VALIDATION", "true").lower() in ("1", "true", "yes")
+
+# Salvage almost-valid JSON (prose around the object, trailing commas, raw
+# newlines or stray quotes in strings) locally instead of re-asking the model
+EXTRACTION_JSON_REPAIR = os.getenv("EXTRACTION_JSON_REPAIR", "true").lower() in ("1", "true", "yes")
+
+
+CHUNK_EXTRACTION_SYSTEM_MESSAGE = """You are a data extraction assistant for a user profile system.
+You will be given ONE PART of a longer interview transcript or profile document about a single person.
+Extract only the information present in this part.
+
+You must return ONLY a valid JSON object with the following schema:
+{
+    "user_id": "a stable, machine-readable identifier (e.g., lowercase name with underscores), or null if the person's name does not appear in this part",
+    "name": "the person's full name, or null if it does not appear in this part",
+    "bio": "a concise one-line summary of who they are based on this part, or null",
+    "wiki_content": "markdown notes (headers and bullet points) covering every descriptive detail about the person in this part: background, skills, interests, projects, experiences, personality traits, goals"
+}
+
+Return ONLY valid JSON, no additional text or explanation"""
+
+
+CHUNK_EXTRACTION_PROMPT_TEMPLATE = """This is part {index} of {total} of the document.
+
+TEXT TO ANALYZE:
+{chunk}
+
+Return the extracted information as a JSON object."""
+
+
+MERGE_SYSTEM_MESSAGE = """You are a data consolidation assistant for a user profile system.
+You will be given partial profiles of ONE person, extracted in order from consecutive parts of a long document.
+Merge them into a single profile.
+
+You must return ONLY a valid JSON object with the following schema:
+{
+    "user_id": "a stable, machine-readable identifier (e.g., lowercase name with underscores)",
+    "name": "the person's full name",
+    "bio": "a concise one-line summary of who they are (50-100 characters)",
+    "wiki_content": "a single comprehensive markdown document combining the wiki_content of every partial profile"
+}
+
+IMPORTANT GUIDELINES:
+1. Keep every distinct detail from the partial wiki_content fields - do not summarize facts away
+2. Remove duplicated facts and organize the result by topic with headers (##, ###) and bullet points
+3. Use the user_id and name that the partial profiles agree on
+4. Return ONLY valid JSON, no additional text or explanation"""
+
+
+MERGE_PROMPT_TEMPLATE = """PARTIAL PROFILES (in document order):
+{partials}
+
+Return the merged profile as a JSON object."""
+
+
+BATCH_EXTRACTION_SYSTEM_MESSAGE = """You are a data extraction assistant for a user profile system.
+You will be given several independent documents, each about a DIFFERENT person, wrapped in <document index="N"> tags.
+Extract one profile per document.
+
+You must return ONLY a valid JSON array with exactly one element per document, each of the form:
+{
+    "index": the document's index attribute (integer),
+    "user_id": "a stable, machine-readable identifier (e.g., lowercase name with underscores)",
+    "name": "the person's full name",
+    "bio": "a concise one-line summary of who they are (50-100 characters)",
+    "wiki_content": "a comprehensive markdown-formatted document containing all descriptive information about the person in that document: background, skills, interests, projects, experiences, personality traits, goals. Use headers (##, ###) and bullet points."
+}
+
+IMPORTANT GUIDELINES:
+1. Never mix information between documents - each profile uses only its own document
+2. The user_id should be stable and machine-readable (e.g., "jane_doe", "john_smith")
+3. Keep the bio very concise - it's just a tagline
+4. Return ONLY the JSON array, no additional text or explanation"""
+
+
+BATCH_DOCUMENT_TEMPLATE = """<document index="{index}">
+{content}
+</document>"""
+
+
+BATCH_EXTRACTION_PROMPT_TEMPLATE = """Please extract a user profile from each of the following documents:
+
+{documents}
+
+Return the profiles as a JSON array, one element per document."""
+
+
+DELTA_SYSTEM_MESSAGE = """You are a data extraction assistant for a user profile system.
+You will be given an EXISTING profile (its name, bio and the section outline of its wiki) and NEW material about the same person.
+Return only the changes the new material calls for; the stored wiki is edited section by section.
+
+You must return ONLY a valid JSON object with the following schema:
+{
+    "bio": "an updated one-line summary (50-100 characters), or null to keep the current bio",
+    "edits": [
+        {
+            "section": "the markdown header of the section exactly as in the outline (e.g. \"## Skills\"), or a new header",
+            "action": "append" to add lines to the section (creating it if it is new), or "replace" to rewrite the section entirely,
+            "content": "the markdown lines to add (bullet points preferred), or the complete new section body"
+        }
+    ]
+}
+
+IMPORTANT GUIDELINES:
+1. Only include facts from the new material that the profile does not already reflect
+2. Prefer "append"; use "replace" only when the new material supersedes the whole section (e.g. a new current role)
+3. Put each fact in the existing section it belongs to; create a new section only when none fits
+4. Return an empty edits list if the new material adds nothing
+5. Return ONLY valid JSON, no additional text or explanation"""
+
+
+DELTA_PROMPT_TEMPLATE = """EXISTING PROFILE
+Name: {name}
+Bio: {bio}
+Wiki outline:
+{outline}
+
+NEW MATERIAL:
+{material}
+
+Return the profile changes as a JSON object."""
+
+# Completion cap for a delta update; edits are much shorter than a whole profile
+EXTRACTION_DELTA_MAX_TOKENS = int(os.getenv("EXTRACTION_DELTA_MAX_TOKENS", "2048"))
+
+
+@dataclass
+class BatchConfig:
+    """Settings for packing several small documents into one extraction request"""
+    max_document_tokens: int = 1500  # larger documents are extracted on their own
+    batch_tokens: int = 6000  # prompt budget for the documents in one request
+    max_documents: int = 8
+    max_tokens: int = 8192  # completion cap for a batch request
+    concurrency: int = 4  # batch and fallback calls in flight at once
+
+    @classmethod
+    def from_env(cls) -> "BatchConfig":
+        """Build settings from EXTRACTION_BATCH_* environment variables"""
+        return cls(
+            max_document_tokens=int(os.getenv("EXTRACTION_BATCH_MAX_DOCUMENT_TOKENS", "1500")),
+            batch_tokens=int(os.getenv("EXTRACTION_BATCH_TOKENS", "6000")),
+            max_documents=max(1, int(os.getenv("EXTRACTION_BATCH_MAX_DOCUMENTS", "8"))),
+            max_tokens=int(os.getenv("EXTRACTION_BATCH_MAX_TOKENS", "8192")),
+            concurrency=max(1, int(os.getenv("EXTRACTION_BATCH_CONCURRENCY", "4"))),
+        )
+
+
+@dataclass
+class MapReduceConfig:
+    """Settings for chunked (map-reduce) extraction of long inputs"""
+    chunk_tokens: int = 6000  # inputs larger than this are chunked
+    overlap_tokens: int = 200
+    concurrency: int = 4  # chunk/merge calls in flight at once
+    map_max_tokens: int = 2048  # completion cap for per-chunk partial profiles
+    merge_strategy: str = "local"  # "local" (section-wise, no LLM call) or "llm"
+
+    @classmethod
+    def from_env(cls) -> "MapReduceConfig":
+        """Build settings from EXTRACTION_CHUNK_* environment variables"""
+        return cls(
+            chunk_tokens=int(os.getenv("EXTRACTION_CHUNK_TOKENS", "6000")),
+            overlap_tokens=int(os.getenv("EXTRACTION_CHUNK_OVERLAP_TOKENS", "200")),
+            concurrency=max(1, int(os.getenv("EXTRACTION_MAP_CONCURRENCY", "4"))),
+            map_max_tokens=int(os.getenv("EXTRACTION_MAP_MAX_TOKENS", "2048")),
+            merge_strategy=os.getenv("EXTRACTION_MERGE_STRATEGY", "local").lower(),
+        )
+
+
+def extraction_pipeline_version(tiers: Optional[List[CascadeTier]] = None) -> str:
+    """
+    Fingerprint of everything that shapes an extracted profile: the prompts,
+    the model cascade, the quality threshold and pre-condensation. Stored in the ingestion
+    manifest so a prompt or model change re-extracts files that are
+    otherwise unchanged.
+
+    Args:
+        tiers: Models in use (defaults to EXTRACTION_MODEL_CASCADE)
+
+    Returns:
+        Short hex digest
+    """
+    tiers = tiers or load_cascade_from_env()
+    parts = [
+        EXTRACTION_SYSTEM_MESSAGE, EXTRACTION_PROMPT_TEMPLATE,
+        CHUNK_EXTRACTION_SYSTEM_MESSAGE, CHUNK_EXTRACTION_PROMPT_TEMPLATE,
+        MERGE_SYSTEM_MESSAGE, MERGE_PROMPT_TEMPLATE,
+        BATCH_EXTRACTION_SYSTEM_MESSAGE, BATCH_DOCUMENT_TEMPLATE, BATCH_EXTRACTION_PROMPT_TEMPLATE,
+        DELTA_SYSTEM_MESSAGE, DELTA_PROMPT_TEMPLATE,
+        ",".join(tier.model for tier in tiers),
+        str(EXTRACTION_MIN_WIKI_CHARS),
+    ]
+    condense = CondenseConfig.from_env()
+    if condense.enabled:
+        parts.append(f"condense:{condense.fingerprint()}")
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _load_json(llm_response: str, expect: Optional[type] = None) -> Any:
+    """
+    Parse JSON from response text, optionally wrapped in a code fence.
+    If that fails, common malformations are repaired (see pipelines/json_repair.py);
+    `expect` (dict or list) limits which value the repair may pick out of the text.
+    """
+    # Clean up the response in case there's any wrapper text
+    response_text = llm_response.strip()
+
+    # Try to extract JSON if it's wrapped in markdown code blocks
+    if "```json" in response_text:
+        start = response_text.find("```json") + 7
+        end = response_text.find("```", start)
+        response_text = response_text[start:end].strip()
+    elif "```" in response_text:
+        start = response_text.find("```") + 3
+        end = response_text.find("```", start)
+        response_text = response_text[start:end].strip()
+
+    try:
+        return json.loads(response_text)
+    except json.JSONDecodeError as e:
+        error = e
+
+    if EXTRACTION_JSON_REPAIR:
+        try:
+            value, repairs = repair_json(llm_response, expect=expect)
+        except ValueError:
+            record_repair_failure()
+        else:
+            record_repairs(repairs)
+            print(f"Repaired malformed LLM JSON ({', '.join(repairs) or 'code fence'})")
+            return value
+
+    print(f"Error parsing LLM response as JSON: {error}")
+    print(f"LLM Response was: {llm_response}")
+    raise ValueError(f"LLM did not return valid JSON. Response: {llm_response[:200]}...")
+
+
+def _load_json_object(llm_response: str) -> Dict[str, Any]:
+    """Parse a JSON object from response text, optionally wrapped in a code fence"""
+    user_data = _load_json(llm_response, expect=dict)
+    if not isinstance(user_data, dict):
+        raise ValueError("LLM response is not a JSON object")
+    return user_data
+
+
+def parse_extraction_response(llm_response: str) -> Dict[str, Any]:
+    """
+    Parse the LLM's extraction output into a dictionary.
+
+    Args:
+        llm_response: Raw response text, optionally wrapped in a code fence
+
+    Returns:
+        Dictionary containing the extracted user profile data
+
+    Raises:
+        ValueError: If the response is not valid JSON or lacks required fields
+    """
+    user_data = _load_json_object(llm_response)
+
+    # Validate required fields
+    required_fields = ["user_id", "name"]
+    for field in required_fields:
+        if field not in user_data:
+            raise ValueError(f"Missing required field in LLM response: {field}")
+
+    return user_data
+
+
+def validate_extraction(llm_response: str) -> Dict[str, Any]:
+    """
+    Parse the LLM's extraction output and validate it against UserCreate.
+
+    Raises:
+        ValueError: If the response can't be parsed or doesn't match the schema
+    """
+    with stage("parse"):
+        user_data = parse_extraction_response(llm_response)
+    try:
+        with stage("validate"):
+            UserCreate(**user_data)
+    except (ValidationError, TypeError) as e:
+        raise ValueError(f"LLM response does not match the user schema: {e}")
+    return user_data
+
+
+def make_quality_check(file_content: str, min_wiki_chars: Optional[int] = None):
+    """Build the cascade quality check for one input document"""
+    threshold = min(
+        EXTRACTION_MIN_WIKI_CHARS if min_wiki_chars is None else min_wiki_chars,
+        len(file_content) // 2,
+    )
+
+    def quality_check(user_data: Dict[str, Any]) -> None:
+        wiki_length = len((user_data.get("wiki_content") or "").strip())
+        if wiki_length < threshold:
+            raise ValueError(f"wiki_content too short ({wiki_length} < {threshold} chars)")
+
+    return quality_check
+
+
+def make_stream_validator(file_content: str, min_wiki_chars: Optional[int] = None):
+    """
+    Build the cascade's stream validator factory for one input document.
+    A streamed profile is abandoned as soon as it is malformed JSON that
+    repair can't fix, user_id or name is not a string, or the object closes
+    without them. On tiers
+    that may still escalate, the wiki_content quality check runs the moment
+    that field completes instead of after the whole response.
+    """
+    quality_check = make_quality_check(file_content, min_wiki_chars)
+
+    def check_wiki(wiki_content: Any) -> None:
+        quality_check({"wiki_content": wiki_content})
+
+    def factory(is_last: bool) -> StreamingObjectValidator:
+        return StreamingObjectValidator(
+            required=("user_id", "name"),
+            field_types={
+                "user_id": (str,),
+                "name": (str,),
+                "bio": (str, type(None)),
+                "wiki_content": (str, type(None)),
+            },
+            field_checks={} if is_last else {"wiki_content": check_wiki},
+            repair=EXTRACTION_JSON_REPAIR,
+        )
+
+    return factory
+
+
+def parse_partial_extraction(llm_response: str) -> Dict[str, Any]:
+    """
+    Parse a partial profile extracted from one chunk. Unlike a full profile,
+    user_id and name may be missing or null.
+
+    Raises:
+        ValueError: If the response is not a JSON object
+    """
+    with stage("parse"):
+        return _load_json_object(llm_response)
+
+
+async def _gather_bounded(calls: List[Awaitable], limit: int) -> List[Any]:
+    """Await `calls` with at most `limit` running at once, cancelling the rest on failure"""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(call: Awaitable) -> Any:
+        async with semaphore:
+            return await call
+
+    tasks = [asyncio.ensure_future(bounded(call)) for call in calls]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _group_partials(partials: List[Dict[str, Any]], max_tokens: int) -> List[List[Dict[str, Any]]]:
+    """
+    Group consecutive partial profiles so each group's JSON fits max_tokens.
+    Every group gets at least two partials (when there are two) so that each
+    round of merging shrinks the list, even if that overshoots the budget.
+    """
+    groups: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_tokens = 0
+    for partial in partials:
+        partial_tokens = estimate_tokens(json.dumps(partial))
+        if len(current) >= 2 and current_tokens + partial_tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(partial)
+        current_tokens += partial_tokens
+    if len(current) == 1 and groups:
+        groups[-1].extend(current)
+    elif current:
+        groups.append(current)
+    return groups
+
+
+_MARKDOWN_HEADER = re.compile(r"^(#{1,6})\s+(.*\S)\s*$")
+
+
+def merge_wiki_sections(documents: List[str]) -> str:
+    """
+    Merge markdown documents section by section.
+
+    Sections with the same header (case-insensitive) are combined under the
+    first occurrence, in first-seen order, and lines repeated across
+    documents (e.g. facts from overlapping chunks) are kept once.
+    """
+    sections: Dict[str, List[str]] = {}
+    headers: Dict[str, str] = {}
+    seen_lines: Dict[str, set] = {}
+
+    for document in documents:
+        key = ""  # text before the first header
+        for line in (document or "").splitlines():
+            match = _MARKDOWN_HEADER.match(line)
+            if match:
+                key = match.group(2).lower()
+                headers.setdefault(key, line.strip())
+                sections.setdefault(key, [])
+                continue
+            stripped = line.strip()
+            if not stripped:
+                continue
+            seen = seen_lines.setdefault(key, set())
+            if stripped in seen:
+                continue
+            seen.add(stripped)
+            sections.setdefault(key, []).append(line.rstrip())
+
+    blocks = []
+    for key, lines in sections.items():
+        if key in headers:
+            if not lines:
+                continue
+            blocks.append(headers[key] + "\n\n" + "\n".join(lines))
+        elif lines:
+            blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def merge_partial_profiles(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge partial profiles without an LLM call: user_id and name are the most
+    common non-empty values (earliest wins ties), bio is the first non-empty
+    one, and wiki_content is merged with merge_wiki_sections.
+    """
+    def most_common(field: str) -> Optional[str]:
+        values = [str(p[field]).strip() for p in partials if p.get(field)]
+        values = [value for value in values if value]
+        if not values:
+            return None
+        counts = Counter(values)
+        return max(values, key=lambda value: (counts[value], -values.index(value)))
+
+    merged: Dict[str, Any] = {
+        "user_id": most_common("user_id"),
+        "name": most_common("name"),
+        "bio": next((p["bio"] for p in partials if p.get("bio")), None),
+        "wiki_content": merge_wiki_sections([p.get("wiki_content") or "" for p in partials]),
+    }
+    return {field: value for field, value in merged.items() if value is not None}
+
+
+async def extract_user_profile_map_reduce(
+    file_content: str,
+    tiers: Optional[List[CascadeTier]] = None,
+    config: Optional[MapReduceConfig] = None
+) -> CascadeResult[Dict[str, Any]]:
+    """
+    Extract a user profile from a long text by chunking it, extracting partial
+    profiles from the chunks in parallel, and merging them into one profile.
+
+    With the "local" merge strategy the partials are merged section by section
+    without another LLM call, so the profile keeps every chunk's detail and
+    costs no extra generation time. With "llm" the model rewrites them into one
+    document; merges run hierarchically while the partials exceed the chunk
+    budget. Either way the result is validated against UserCreate.
+
+    Args:
+        file_content: The text to analyze
+        tiers: Models to try, cheapest first (defaults to EXTRACTION_MODEL_CASCADE)
+        config: Chunking and parallelism settings (defaults to MapReduceConfig.from_env())
+
+    Returns:
+        CascadeResult whose value is the profile dictionary and whose attempts
+        cover every chunk and merge call
+
+    Raises:
+        ValueError: If a chunk or the merged profile could not be extracted
+        LLMError: If an LLM call fails on every tier
+    """
+    config = config or MapReduceConfig.from_env()
+    tiers = tiers or load_cascade_from_env(max_tokens=4096, temperature=0.3)
+    with stage("prompt"):
+        chunks = chunk_text(file_content, config.chunk_tokens, config.overlap_tokens)
+    if not chunks:
+        raise ValueError("Nothing to extract: the input is empty")
+    print(f"Map-reduce extraction: {len(chunks)} chunks of up to {config.chunk_tokens} tokens")
+
+    # Partial profiles only cover one chunk, so they get a smaller completion cap
+    map_tiers = [replace(tier, max_tokens=min(tier.max_tokens, config.map_max_tokens)) for tier in tiers]
+
+    map_results = await _gather_bounded([
+        run_cascade(
+            prompt_text=CHUNK_EXTRACTION_PROMPT_TEMPLATE.format(index=index, total=len(chunks), chunk=chunk),
+            system_message=CHUNK_EXTRACTION_SYSTEM_MESSAGE,
+            tiers=map_tiers,
+            validate=parse_partial_extraction,
+        )
+        for index, chunk in enumerate(chunks, start=1)
+    ], config.concurrency)
+    partials = [result.value for result in map_results]
+    attempts = [attempt for result in map_results for attempt in result.attempts]
+
+    if config.merge_strategy != "llm":
+        profile = merge_partial_profiles(partials)
+        validate_extraction(json.dumps(profile))
+        return CascadeResult(value=profile, attempts=attempts)
+
+    def merge(group: List[Dict[str, Any]], validate, quality_check=None):
+        return run_cascade(
+            prompt_text=MERGE_PROMPT_TEMPLATE.format(partials=json.dumps(group, indent=2)),
+            system_message=MERGE_SYSTEM_MESSAGE,
+            tiers=tiers,
+            validate=validate,
+            quality_check=quality_check,
+        )
+
+    # Intermediate merges until the partials fit in one merge prompt
+    groups = _group_partials(partials, config.chunk_tokens)
+    while len(groups) > 1:
+        merged = await _gather_bounded(
+            [merge(group, parse_partial_extraction) for group in groups], config.concurrency
+        )
+        attempts.extend(attempt for result in merged for attempt in result.attempts)
+        groups = _group_partials([result.value for result in merged], config.chunk_tokens)
+
+    final = await merge(groups[0], validate_extraction, make_quality_check(file_content))
+    return CascadeResult(value=final.value, attempts=attempts + final.attempts)
+
+
+async def extract_user_profile(
+    file_content: str,
+    tiers: Optional[List[CascadeTier]] = None,
+    config: Optional[MapReduceConfig] = None,
+    condense: Optional[CondenseConfig] = None
+) -> CascadeResult[Dict[str, Any]]:
+    """
+    Extract a user profile from raw text using the cheap-first model cascade.
+    The text is first condensed locally when EXTRACTION_CONDENSE is on (see
+    pipelines/condense.py). Inputs larger than the configured chunk size go
+    through extract_user_profile_map_reduce instead of a single prompt.
+
+    Args:
+        file_content: The text to analyze
+        tiers: Models to try, cheapest first (defaults to EXTRACTION_MODEL_CASCADE)
+        config: Chunking settings (defaults to MapReduceConfig.from_env())
+        condense: Pre-condensation settings (defaults to CondenseConfig.from_env())
+
+    Returns:
+        CascadeResult whose value is the extracted profile dictionary
+
+    Raises:
+        ValueError: If no tier produced a valid profile
+        LLMError: If the last tier's LLM call fails
+    """
+    with stage("prompt"):
+        (file_content,) = await condense_documents([file_content], condense)
+    return await _extract_user_profile(file_content, tiers, config)
+
+
+async def _extract_user_profile(
+    file_content: str,
+    tiers: Optional[List[CascadeTier]],
+    config: Optional[MapReduceConfig]
+) -> CascadeResult[Dict[str, Any]]:
+    """extract_user_profile for text that has already been condensed"""
+    config = config or MapReduceConfig.from_env()
+    if estimate_tokens(file_content) > config.chunk_tokens:
+        return await extract_user_profile_map_reduce(file_content, tiers, config)
+
+    with stage("prompt"):
+        prompt = EXTRACTION_PROMPT_TEMPLATE.format(file_content=file_content)
+    return await run_cascade(
+        prompt_text=prompt,
+        system_message=EXTRACTION_SYSTEM_MESSAGE,
+        # Lower temperature for more consistent extraction, more tokens for wiki_content
+        tiers=tiers or load_cascade_from_env(max_tokens=4096, temperature=0.3),
+        validate=validate_extraction,
+        quality_check=make_quality_check(file_content),
+        stream_validator=make_stream_validator(file_content) if EXTRACTION_STREAM_VALIDATION else None,
+    )
+
+
+def pack_batches(token_counts: List[int], config: BatchConfig) -> List[List[int]]:
+    """
+    Greedily pack document indexes into batches that fit the prompt budget.
+    Documents above config.max_document_tokens are left out; the caller
+    extracts them individually.
+
+    Args:
+        token_counts: Estimated tokens of each document, in order
+        config: Batching settings
+
+    Returns:
+        Lists of document indexes, one per batch
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, tokens in enumerate(token_counts):
+        if tokens > config.max_document_tokens:
+            continue
+        if current and (current_tokens + tokens > config.batch_tokens or len(current) >= config.max_documents):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_batch_response(llm_response: str) -> Dict[int, Any]:
+    """
+    Parse a batch extraction response into {document index: element}.
+    Elements are not validated here; see extract_user_profiles.
+
+    Raises:
+        ValueError: If the response is not a JSON array
+    """
+    with stage("parse"):
+        elements = _load_json(llm_response, expect=list)
+    if isinstance(elements, dict) and isinstance(elements.get("profiles"), list):
+        elements = elements["profiles"]
+    if not isinstance(elements, list):
+        raise ValueError("Batch response is not a JSON array")
+    by_index: Dict[int, Any] = {}
+    for element in elements:
+        if isinstance(element, dict) and "index" in element:
+            try:
+                by_index.setdefault(int(element["index"]), element)
+            except (TypeError, ValueError):
+                continue
+    return by_index
+
+
+def _share_attempts(attempts: List[TierAttempt], count: int) -> List[List[TierAttempt]]:
+    """
+    Split the attempts of one shared request across the `count` documents it
+    answered, so summing tokens over the documents counts the request once.
+    Each document keeps every attempt (model, latency, outcome) with its
+    share of the tokens; the first documents take the remainder.
+    """
+    shares: List[List[TierAttempt]] = [[] for _ in range(count)]
+    for attempt in attempts:
+        prompt_share, prompt_extra = divmod(attempt.prompt_tokens, count or 1)
+        completion_share, completion_extra = divmod(attempt.completion_tokens, count or 1)
+        for position, share in enumerate(shares):
+            share.append(replace(
+                attempt,
+                prompt_tokens=prompt_share + (position < prompt_extra),
+                completion_tokens=completion_share + (position < completion_extra),
+            ))
+    return shares
+
+
+async def extract_user_profiles(
+    documents: List[str],
+    tiers: Optional[List[CascadeTier]] = None,
+    config: Optional[BatchConfig] = None,
+    condense: Optional[CondenseConfig] = None
+) -> List[Any]:
+    """
+    Extract one profile per document, packing small documents into shared
+    requests to save the per-request system prompt and round trip.
+
+    Each element of a batch response is validated on its own (schema and
+    quality check). Documents whose element is missing or invalid, or whose
+    whole batch failed, fall back to extract_user_profile. Large documents
+    go straight to extract_user_profile. Documents are condensed first, all
+    at once, when EXTRACTION_CONDENSE is on.
+
+    Args:
+        documents: Raw texts to analyze
+        tiers: Models to try, cheapest first (defaults to EXTRACTION_MODEL_CASCADE)
+        config: Batching settings (defaults to BatchConfig.from_env())
+        condense: Pre-condensation settings (defaults to CondenseConfig.from_env())
+
+    Returns:
+        A list aligned with `documents`: a CascadeResult per document, or the
+        exception that document's extraction raised (like asyncio.gather with
+        return_exceptions=True). Documents answered by one shared request
+        split its token counts between them
+    """
+    config = config or BatchConfig.from_env()
+    with stage("prompt"):
+        documents = await condense_documents(documents, condense)
+    tiers = tiers or load_cascade_from_env(max_tokens=4096, temperature=0.3)
+    batch_tiers = [replace(tier, max_tokens=config.max_tokens) for tier in tiers]
+    results: List[Any] = [None] * len(documents)
+    token_counts = [estimate_tokens(document) for document in documents]
+    batches = [batch for batch in pack_batches(token_counts, config) if len(batch) > 1]
+
+    async def run_batch(batch: List[int]) -> None:
+        with stage("prompt"):
+            prompt = BATCH_EXTRACTION_PROMPT_TEMPLATE.format(documents="\n\n".join(
+                BATCH_DOCUMENT_TEMPLATE.format(index=index, content=documents[index].strip()) for index in batch
+            ))
+        try:
+            batch_result = await run_cascade(
+                prompt_text=prompt,
+                system_message=BATCH_EXTRACTION_SYSTEM_MESSAGE,
+                tiers=batch_tiers,
+                validate=parse_batch_response,
+            )
+        except (ValueError, LLMError) as e:
+            print(f"Batch of {len(batch)} documents failed, extracting individually: {e}")
+            return
+        accepted = {}
+        for index in batch:
+            element = batch_result.value.get(index)
+            if element is None:
+                continue
+            profile = {key: value for key, value in element.items() if key != "index"}
+            try:
+                validate_extraction(json.dumps(profile))
+                with stage("validate"):
+                    make_quality_check(documents[index])(profile)
+            except ValueError as e:
+                print(f"Batch element {index} rejected, extracting individually: {e}")
+                continue
+            accepted[index] = profile
+        shares = _share_attempts(batch_result.attempts, len(accepted))
+        for (index, profile), attempts in zip(accepted.items(), shares):
+            results[index] = CascadeResult(value=profile, attempts=attempts)
+
+    await _gather_bounded([run_batch(batch) for batch in batches], config.concurrency)
+
+    async def run_single(index: int) -> None:
+        try:
+            results[index] = await _extract_user_profile(documents[index], tiers, None)
+        except (ValueError, LLMError) as e:
+            results[index] = e
+
+    pending = [index for index, result in enumerate(results) if result is None]
+    batched = len(documents) - len(pending)
+    if batches:
+        print(f"Batch extraction: {batched} of {len(documents)} documents from {len(batches)} batched requests, "
+              f"{len(pending)} extracted individually")
+    await _gather_bounded([run_single(index) for index in pending], config.concurrency)
+    return results
+
+
+DELTA_ACTIONS = ("append", "replace")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s")
+
+
+@dataclass
+class SectionEdit:
+    """One section-level change to a stored wiki_content"""
+    section: str  # markdown header line, e.g. "## Skills"
+    action: str  # "append" or "replace"
+    content: str
+
+
+@dataclass
+class ProfileUpdate:
+    """The changes new material makes to an existing profile"""
+    bio: Optional[str]  # None keeps the stored bio
+    edits: List[SectionEdit]
+
+
+def _split_sections(wiki_content: str) -> List[List[Any]]:
+    """Split markdown into [key, header line, body lines] in document order; the text before the first header has key "" """
+    sections: List[List[Any]] = [["", None, []]]
+    for line in (wiki_content or "").splitlines():
+        match = _MARKDOWN_HEADER.match(line)
+        if match:
+            sections.append([match.group(2).lower(), line.strip(), []])
+        else:
+            sections[-1][2].append(line.rstrip())
+    return sections
+
+
+def _render_sections(sections: List[List[Any]]) -> str:
+    blocks = []
+    for _, header, lines in sections:
+        body = "\n".join(lines).strip("\n")
+        if header is None:
+            if body:
+                blocks.append(body)
+        elif body:
+            blocks.append(header + "\n\n" + body)
+    return "\n\n".join(blocks)
+
+
+def wiki_outline(wiki_content: str) -> str:
+    """The section headers of a wiki, with each section's size, as sent in delta prompts"""
+    outline = []
+    for key, header, lines in _split_sections(wiki_content):
+        count = sum(1 for line in lines if line.strip())
+        if header is None:
+            if count:
+                outline.append(f"(introduction, {count} lines)")
+        else:
+            outline.append(f"{header} ({count} lines)")
+    return "\n".join(outline) or "(empty)"
+
+
+def apply_section_edits(wiki_content: str, edits: List[SectionEdit]) -> str:
+    """
+    Merge section-level edits into a wiki. "append" adds the lines the
+    section doesn't already contain; "replace" swaps the section body.
+    Edits to sections that don't exist add them at the end. Sections are
+    matched by header text (case-insensitive, any level).
+    """
+    sections = _split_sections(wiki_content)
+    by_key = {section[0]: section for section in sections if section[1] is not None}
+    for edit in edits:
+        match = _MARKDOWN_HEADER.match(edit.section.strip())
+        header = match.group(0).strip() if match else f"## {edit.section.strip()}"
+        key = _MARKDOWN_HEADER.match(header).group(2).lower()
+        lines = [line.rstrip() for line in edit.content.strip("\n").splitlines()]
+        section = by_key.get(key)
+        if section is None:
+            section = [key, header, []]
+            sections.append(section)
+            by_key[key] = section
+        if edit.action == "replace":
+            section[2] = lines
+            continue
+        existing = {line.strip() for line in section[2] if line.strip()}
+        added = [line for line in lines if not line.strip() or line.strip() not in existing]
+        if not any(line.strip() for line in added):
+            continue
+        body = section[2]
+        while body and not body[-1].strip():
+            body = body[:-1]
+        # Continue a list directly; start anything else as a new paragraph
+        continues_list = body and _LIST_ITEM.match(body[-1]) and _LIST_ITEM.match(added[0])
+        section[2] = body + ([] if continues_list or not body else [""]) + added
+    return _render_sections(sections)
+
+
+def parse_profile_update(llm_response: str) -> ProfileUpdate:
+    """
+    Parse the LLM's delta-update output.
+
+    Raises:
+        ValueError: If the response is not a JSON object of the expected shape
+    """
+    with stage("parse"):
+        data = _load_json_object(llm_response)
+    bio = data.get("bio")
+    if bio is not None and not isinstance(bio, str):
+        raise ValueError("bio in the profile update must be a string or null")
+    edits = data.get("edits")
+    if not isinstance(edits, list):
+        raise ValueError("Profile update is missing its edits list")
+    parsed = []
+    for edit in edits:
+        if not isinstance(edit, dict):
+            raise ValueError("Each profile edit must be an object")
+        section, action, content = edit.get("section"), edit.get("action", "append"), edit.get("content")
+        if not isinstance(section, str) or not section.strip():
+            raise ValueError("Profile edit is missing its section")
+        if action not in DELTA_ACTIONS:
+            raise ValueError(f"Unknown profile edit action: {action!r}")
+        if not isinstance(content, str) or not content.strip():
+            raise ValueError(f"Profile edit for {section!r} has no content")
+        parsed.append(SectionEdit(section=section.strip(), action=action, content=content))
+    return ProfileUpdate(bio=bio.strip() if bio and bio.strip() else None, edits=parsed)
+
+
+def merge_profile_update(profile: Dict[str, Any], update: ProfileUpdate) -> Dict[str, Any]:
+    """Apply a ProfileUpdate to a stored profile, returning the updated profile dictionary"""
+    return {
+        **profile,
+        "bio": update.bio or profile.get("bio"),
+        "wiki_content": apply_section_edits(profile.get("wiki_content") or "", update.edits),
+    }
+
+
+def build_delta_prompt(profile: Dict[str, Any], new_material: str) -> str:
+    """The delta-update prompt: the stored profile's outline plus the new material"""
+    return DELTA_PROMPT_TEMPLATE.format(
+        name=profile.get("name") or profile.get("user_id"),
+        bio=profile.get("bio") or "(none)",
+        outline=wiki_outline(profile.get("wiki_content") or ""),
+        material=new_material.strip(),
+    )
+
+
+async def extract_profile_update(
+    profile: Dict[str, Any],
+    new_material: str,
+    tiers: Optional[List[CascadeTier]] = None,
+    condense: Optional[CondenseConfig] = None
+) -> CascadeResult[ProfileUpdate]:
+    """
+    Work out how new material changes an existing profile, without
+    regenerating it. Only the new material and the stored wiki's section
+    outline are sent, and the model answers with section-level edits, so
+    prompt and completion stay small however long the stored wiki is.
+    Apply the result with merge_profile_update, ideally to a freshly read
+    copy of the profile so concurrent updates to other sections survive.
+
+    Args:
+        profile: The stored profile (user_id, name, bio, wiki_content)
+        new_material: The new transcript or notes about the same person
+        tiers: Models to try, cheapest first (defaults to EXTRACTION_MODEL_CASCADE)
+        condense: Pre-condensation settings for the new material (defaults to CondenseConfig.from_env())
+
+    Returns:
+        CascadeResult whose value is the ProfileUpdate
+
+    Raises:
+        ValueError: If no tier produced a valid update
+        LLMError: If the last tier's LLM call fails
+    """
+    with stage("prompt"):
+        (new_material,) = await condense_documents([new_material], condense)
+        if not new_material.strip():
+            raise ValueError("Nothing to extract: the new material is empty")
+        prompt = build_delta_prompt(profile, new_material)
+    tiers = tiers or load_cascade_from_env(max_tokens=EXTRACTION_DELTA_MAX_TOKENS, temperature=0.3)
+    return await run_cascade(
+        prompt_text=prompt,
+        system_message=DELTA_SYSTEM_MESSAGE,
+        tiers=[replace(tier, max_tokens=min(tier.max_tokens, EXTRACTION_DELTA_MAX_TOKENS)) for tier in tiers],
+        validate=parse_profile_update,
+    )
+
 
 async def process_file(file_path: str) -> Dict[str, Any]:
     """
@@ -51,6 +992,7 @@ async def process_file(file_path: str) -> Dict[str, Any]:
     Raises:
         FileNotFoundError: If the file doesn't exist
         ValueError: If the LLM response is not valid JSON
+        LLMError: If the LLM call fails after retries
     """
     # Read the file
     file_path_obj = Path(file_path)
@@ -60,46 +1002,12 @@ async def process_file(file_path: str) -> Dict[str, Any]:
     with open(file_path_obj, 'r', encoding='utf-8') as f:
         file_content = f.read()
 
-    # Use LLM to extract information
-    prompt = EXTRACTION_PROMPT_TEMPLATE.format(file_content=file_content)
-
-    llm_response = await ask_llm(
-        prompt_text=prompt,
-        system_message=EXTRACTION_SYSTEM_MESSAGE,
-        model_override=None,  # Use default model
-        max_tokens=4096,  # More tokens for comprehensive wiki_content
-        temperature=0.3  # Lower temperature for more consistent extraction
-    )
-
-    # Parse the JSON response
-    try:
-        # Clean up the response in case there's any wrapper text
-        response_text = llm_response.strip()
-
-        # Try to extract JSON if it's wrapped in markdown code blocks
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            response_text = response_text[start:end].strip()
-        elif "```" in response_text:
-            start = response_text.find("```") + 3
-            end = response_text.find("```", start)
-            response_text = response_text[start:end].strip()
-
-        user_data = json.loads(response_text)
-
-        # Validate required fields
-        required_fields = ["user_id", "name"]
-        for field in required_fields:
-            if field not in user_data:
-                raise ValueError(f"Missing required field in LLM response: {field}")
-
-        return user_data
-
-    except json.JSONDecodeError as e:
-        print(f"Error parsing LLM response as JSON: {e}")
-        print(f"LLM Response was: {llm_response}")
-        raise ValueError(f"LLM did not return valid JSON. Response: {llm_response[:200]}...")
+    # Use the LLM cascade to extract information
+    result = await extract_user_profile(file_content)
+    if result.escalated:
+        rejected = sum(1 for attempt in result.attempts if not attempt.accepted)
+        print(f"Extraction escalated to {result.model} after {rejected} rejected tier(s)")
+    return result.value
 
 
 def process_file_sync(file_path: str) -> Dict[str, Any]:
@@ -113,4 +1021,13 @@ def process_file_sync(file_path: str) -> Dict[str, Any]:
         Dictionary containing extracted user profile data
     """
     import asyncio
-    return asyncio.run(process_file(file_path))
+
+    async def _run() -> Dict[str, Any]:
+        try:
+            return await process_file(file_path)
+        finally:
+            # The pooled client is bound to this event loop; release it
+            # before asyncio.run() closes the loop.
+            await close_provider()
+
+    return asyncio.run(_run())
@@ -1,14 +1,35 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator
+import json
 import os
+import time
 
-from repo_src.backend.data.schemas import ChatRequest, ChatResponse
-from repo_src.backend.llm_chat.llm_interface import ask_llm
+from repo_src.backend.data.schemas import ChatRequest, ChatResponse, ChatStreamSummary
+from repo_src.backend.llm_chat.llm_interface import ask_llm, stream_llm
+from repo_src.backend.llm_chat.cache import get_cache
+from repo_src.backend.llm_chat.singleflight import get_singleflight
+from repo_src.backend.llm_chat.errors import LLMError, LLMRateLimitError
+from repo_src.backend.llm_chat.limiter import limiter_snapshots
+from repo_src.backend.llm_chat.retry import retry_snapshot
+from repo_src.backend.llm_chat.metrics import get_metrics
 
 router = APIRouter(
     prefix="/api/chat",
     tags=["chat"],
 )
 
+def _llm_error_to_http(error: LLMError) -> HTTPException:
+    """Map a typed LLM error onto an HTTP error response"""
+    headers = None
+    if isinstance(error, LLMRateLimitError) and error.retry_after is not None:
+        headers = {"Retry-After": str(int(error.retry_after + 0.999))}
+    return HTTPException(
+        status_code=error.status_code,
+        detail=f"Failed to get response from LLM: {error}",
+        headers=headers
+    )
+
 @router.post("/", response_model=ChatResponse, status_code=status.HTTP_200_OK)
 async def handle_chat_request(request: ChatRequest):
     """
@@ -31,23 +52,16 @@ async def handle_chat_request(request: ChatRequest):
             system_message=request.system_message,
             model_override=request.model,
             max_tokens=request.max_tokens,
-            temperature=request.temperature
+            temperature=request.temperature,
+            caller="chat"
         )
 
-        # Check if the response is an error message
-        if response_text.startswith("Error:"):
-            raise HTTPException(
-                status_code=500,
-                detail=response_text
-            )
-
         return ChatResponse(
             response=response_text,
             model_used=model_used
         )
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
+    except LLMError as e:
+        raise _llm_error_to_http(e)
     except Exception as e:
         print(f"Error processing chat request: {e}")
         raise HTTPException(
@@ -55,6 +69,129 @@ async def handle_chat_request(request: ChatRequest):
             detail=f"An error occurred while processing your request: {str(e)}"
         )
 
+def _sse_event(event: str, data: str) -> str:
+    """Format a single Server-Sent Event"""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _chat_event_stream(request: ChatRequest, http_request: Request) -> AsyncIterator[str]:
+    """
+    Forward LLM tokens as SSE `token` events and finish with a `done` event
+    carrying timing and token counts. If the client disconnects, the upstream
+    stream is closed so no further tokens are generated.
+    """
+    model_used = request.model or os.getenv("OPENROUTER_MODEL_NAME", "anthropic/claude-3.5-sonnet")
+    start = time.perf_counter()
+    first_token_at = None
+    prompt_tokens = None
+    completion_tokens = None
+    chunk_count = 0
+
+    stream = stream_llm(
+        prompt_text=request.prompt,
+        system_message=request.system_message,
+        model_override=request.model,
+        max_tokens=request.max_tokens,
+        temperature=request.temperature,
+        caller="chat_stream"
+    )
+    try:
+        async for chunk in stream:
+            if await http_request.is_disconnected():
+                print("Chat stream client disconnected; cancelling upstream request")
+                return
+            if chunk.prompt_tokens is not None:
+                prompt_tokens = chunk.prompt_tokens
+            if chunk.completion_tokens is not None:
+                completion_tokens = chunk.completion_tokens
+            if not chunk.text:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            chunk_count += 1
+            yield _sse_event("token", json.dumps({"text": chunk.text}))
+    except Exception as e:
+        print(f"Error streaming chat response: {e}")
+        payload = {"detail": str(e)}
+        if isinstance(e, LLMError):
+            payload["status_code"] = e.status_code
+            payload["retryable"] = e.retryable
+        yield _sse_event("error", json.dumps(payload))
+        return
+    finally:
+        await stream.aclose()
+
+    usage_estimated = completion_tokens is None
+    if usage_estimated:
+        # Providers normally send one token per delta; use that as an estimate
+        completion_tokens = chunk_count
+    summary = ChatStreamSummary(
+        model_used=model_used,
+        time_to_first_token_ms=(first_token_at - start) * 1000 if first_token_at else None,
+        total_time_ms=(time.perf_counter() - start) * 1000,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=(prompt_tokens or 0) + completion_tokens,
+        usage_estimated=usage_estimated,
+    )
+    yield _sse_event("done", summary.model_dump_json())
+
+
+@router.post("/stream")
+async def handle_chat_stream_request(request: ChatRequest, http_request: Request):
+    """
+    Streams the LLM's response as Server-Sent Events.
+
+    Events:
+        token: {"text": "..."} for every text delta from the provider
+        done: ChatStreamSummary with time-to-first-token and token counts
+        error: {"detail": "..."} if the upstream call fails
+
+    Args:
+        request: ChatRequest containing the prompt and optional parameters
+        http_request: The raw request, used to detect client disconnects
+
+    Returns:
+        A text/event-stream response
+    """
+    return StreamingResponse(
+        _chat_event_stream(request, http_request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Returns hit/miss counters for the LLM response cache.
+    """
+    cache = get_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.snapshot()}
+
+@router.get("/singleflight/stats")
+async def get_singleflight_stats():
+    """
+    Returns how many LLM calls were coalesced into an in-flight identical request.
+    """
+    return get_singleflight().snapshot()
+
+@router.get("/limits/stats")
+async def get_limit_stats():
+    """
+    Returns per-model concurrency limits and retry counters.
+    """
+    return {"models": limiter_snapshots(), "retries": retry_snapshot()}
+
+@router.get("/metrics")
+async def get_llm_metrics():
+    """
+    Returns token, cost and latency accounting for every LLM call,
+    broken down by caller (chat, chat_stream, ingestion) and model.
+    """
+    return get_metrics().snapshot()
+
 @router.get("/models")
 async def get_available_models():
     """
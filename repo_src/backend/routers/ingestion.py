@@ -0,0 +1,121 @@
+"""
+Ingestion job API.
+Submitting text or a file only queues a job and returns 202 with its id;
+extraction runs in the ingestion worker pool and the caller polls for status.
+"""
+
+import os
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from repo_src.backend.database.connection import get_db
+from repo_src.backend.data.schemas import IngestionJobCreate, IngestionJobResponse
+from repo_src.backend.functions.ingestion_jobs import count_jobs_by_status, enqueue_job, get_job
+from repo_src.backend.pipelines.job_queue import JobQueueConfig
+
+# Largest accepted upload; transcripts are text, so this is generous
+MAX_UPLOAD_BYTES = int(os.getenv("INGEST_MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+
+router = APIRouter(
+    prefix="/api/ingestion",
+    tags=["ingestion"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.post("/jobs", response_model=IngestionJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_text(
+    job_data: IngestionJobCreate,
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a profile extraction for a piece of text.
+
+    Args:
+        job_data: The text and an optional label
+        db: Database session (injected)
+
+    Returns:
+        The queued job; poll GET /api/ingestion/jobs/{id} for its result
+    """
+    return enqueue_job(db, job_data.text, job_data.source_name, JobQueueConfig.from_env().max_attempts)
+
+
+@router.post("/jobs/upload", response_model=IngestionJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_file(
+    request: Request,
+    filename: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a profile extraction for an uploaded file.
+    The request body is the raw UTF-8 file content, e.g.
+    `curl --data-binary @transcript.txt "/api/ingestion/jobs/upload?filename=transcript.txt"`.
+
+    Args:
+        request: The incoming request; its body is the file content
+        filename: Original filename, shown in job status
+        db: Database session (injected)
+
+    Returns:
+        The queued job
+
+    Raises:
+        HTTPException: 413 if the file is too large, 400 if it is empty or not UTF-8 text
+    """
+    body = await request.body()
+    if len(body) > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds {MAX_UPLOAD_BYTES} bytes"
+        )
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload must be UTF-8 text")
+    if not text.strip():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload is empty")
+    return enqueue_job(db, text, filename, JobQueueConfig.from_env().max_attempts)
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_job_status(
+    job_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Get the status of an ingestion job.
+
+    Args:
+        job_id: The job id returned on submission
+        db: Database session (injected)
+
+    Returns:
+        The job, including user_id once it has succeeded or last_error if it failed
+
+    Raises:
+        HTTPException: 404 if the job does not exist
+    """
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Ingestion job {job_id} not found"
+        )
+    return job
+
+
+@router.get("/stats", response_model=Dict[str, int])
+async def get_queue_stats(db: Session = Depends(get_db)):
+    """
+    Count jobs by status (queued, running, succeeded, dead).
+
+    Args:
+        db: Database session (injected)
+
+    Returns:
+        Mapping of status to job count
+    """
+    return count_jobs_by_status(db)
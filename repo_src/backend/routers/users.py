@@ -3,9 +3,9 @@ Interactive API (Component C) for User operations.
 RESTful API endpoints that expose user data to the frontend.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from repo_src.backend.database.connection import get_db
 from repo_src.backend.data.schemas import (
@@ -15,6 +15,7 @@ from repo_src.backend.data.schemas import (
     UserSummary
 )
 from repo_src.backend.adapters.user_service import UserService
+from repo_src.backend.functions.pagination import NEXT_CURSOR_HEADER, InvalidCursor
 
 router = APIRouter(
     prefix="/users",
@@ -25,24 +26,41 @@ router = APIRouter(
 
 @router.get("", response_model=List[UserSummary], response_model_by_alias=True)
 async def get_users(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=0),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Get a list of all users (summary view).
+    Get a list of all users (summary view), in id order.
     Returns only userId, name, and bio for each user.
 
+    Page through the list by passing the X-Next-Cursor response header back
+    as cursor; the header is absent on the last page. skip still works but
+    gets slower the deeper the page.
+
     Args:
+        response: The outgoing response, for the X-Next-Cursor header
         skip: Number of records to skip for pagination (default: 0)
         limit: Maximum number of records to return (default: 100)
+        cursor: Cursor for the next page, from the previous response
         db: Database session (injected)
 
     Returns:
         List of user summaries
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid or combined with skip;
+            422 if limit is negative
     """
-    users = UserService.get_all_users(db, skip=skip, limit=limit)
-    return users
+    try:
+        page = UserService.get_users_page(db, limit=limit, skip=skip, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 
 @router.get("/{user_id}", response_model=UserResponse, response_model_by_alias=True)
@@ -0,0 +1,122 @@
+"""
+Shared test setup. Every test starts and ends with clean process-wide LLM
+state (no response cache, provider, coalesced calls, limiters, metrics or
+condensation pool), and ScriptedProvider stands in for the LLM.
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.llm_chat.cache import set_cache
+from repo_src.backend.llm_chat.fake_provider import FakeLLMConfig, FakeOpenRouterProvider
+from repo_src.backend.llm_chat.limiter import reset_limiters
+from repo_src.backend.llm_chat.metrics import LLMMetrics, set_metrics
+from repo_src.backend.llm_chat.providers import CompletionResult, LLMProvider, StreamChunk, set_provider
+from repo_src.backend.llm_chat.singleflight import set_singleflight
+from repo_src.backend.pipelines.condense import shutdown_condense_pool
+
+
+class ScriptedProvider(LLMProvider):
+    """
+    Answers from a script and records every request.
+
+    The script is a dict of responses by model, a list of responses returned
+    in order (the last one repeats), or a function of the request. A response
+    that is an exception is raised instead. Streams are sent `piece`
+    characters at a time.
+    """
+
+    def __init__(self, script, piece=16, delay=0.0, prompt_tokens=0, completion_tokens=0):
+        self.script = script
+        self.piece = piece
+        self.delay = delay
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.requests = []
+        self.in_flight = 0
+        self.peak = 0  # most completions in flight at once
+        self.sent = {}  # chunks streamed, by model
+        self.closed = {}  # whether the stream was closed before its end, by model
+
+    @property
+    def models(self):
+        return [request.model for request in self.requests]
+
+    @property
+    def prompts(self):
+        return [request.messages[-1]["content"] for request in self.requests]
+
+    def calls_with(self, system_message):
+        """Number of requests sent with the given system message"""
+        return sum(1 for request in self.requests if request.messages[0]["content"] == system_message)
+
+    def answer(self, request):
+        self.requests.append(request)
+        if callable(self.script):
+            response = self.script(request)
+        elif isinstance(self.script, dict):
+            response = self.script[request.model]
+        else:
+            response = self.script[min(len(self.requests), len(self.script)) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def complete(self, request):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            text = self.answer(request)
+        finally:
+            self.in_flight -= 1
+        return CompletionResult(text=text, model=request.model,
+                                prompt_tokens=self.prompt_tokens, completion_tokens=self.completion_tokens)
+
+    async def stream(self, request):
+        text = self.answer(request)
+        self.sent[request.model] = 0
+        try:
+            for i in range(0, len(text), self.piece):
+                self.sent[request.model] += 1
+                yield StreamChunk(text=text[i:i + self.piece])
+        finally:
+            self.closed[request.model] = self.sent[request.model] * self.piece < len(text)
+
+
+def reset_llm_state():
+    set_cache(None)
+    set_provider(None)
+    set_singleflight(None)
+    reset_limiters()
+    set_metrics(None)
+    shutdown_condense_pool()
+
+
+@pytest.fixture(autouse=True)
+def clean_llm_state(monkeypatch):
+    """No retries, and nothing shared with other tests through module-level LLM state"""
+    monkeypatch.setenv("LLM_MAX_RETRIES", "0")
+    reset_llm_state()
+    yield
+    reset_llm_state()
+
+
+@pytest.fixture
+def metrics():
+    """A fresh metrics collector installed as the shared one"""
+    collector = LLMMetrics()
+    set_metrics(collector)
+    return collector
+
+
+@pytest.fixture
+def fake_llm():
+    """The fake OpenRouter provider with no latency, installed as the shared provider"""
+    provider = FakeOpenRouterProvider(FakeLLMConfig(latency_distribution="fixed", latency_ms=0, tokens_per_second=0))
+    set_provider(provider)
+    return provider
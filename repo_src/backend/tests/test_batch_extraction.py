@@ -0,0 +1,124 @@
+"""
+Tests for multi-profile batch extraction.
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.llm_chat.providers import set_provider
+from repo_src.backend.llm_chat.tokens import estimate_tokens
+from repo_src.backend.pipelines.cascade import CascadeResult, CascadeTier
+from repo_src.backend.pipelines.user_ingestion import (
+    BATCH_EXTRACTION_SYSTEM_MESSAGE,
+    BatchConfig,
+    extract_user_profiles,
+    pack_batches,
+    parse_batch_response,
+)
+from repo_src.backend.tests.conftest import ScriptedProvider
+
+TIERS = [CascadeTier(model="test/model")]
+TEST_DATA = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../test_data'))
+
+
+def profile(name, **extra):
+    return {"user_id": name.lower(), "name": name, "wiki_content": f"## About\n\n{name} " * 20, **extra}
+
+
+def batch_provider(batch_response, single_response=json.dumps(profile("Single"))):
+    """Answers batch prompts with `batch_response` and single-document prompts with `single_response`"""
+    def answer(request):
+        if request.messages[0]["content"] == BATCH_EXTRACTION_SYSTEM_MESSAGE:
+            return batch_response
+        return single_response
+    return ScriptedProvider(answer)
+
+
+def single_calls(provider):
+    return len(provider.requests) - provider.calls_with(BATCH_EXTRACTION_SYSTEM_MESSAGE)
+
+
+def test_pack_batches_respects_budgets():
+    documents = ["a" * 400] * 5 + ["b" * 40000] + ["c" * 400] * 2
+    config = BatchConfig(max_document_tokens=1000, batch_tokens=350, max_documents=3)
+
+    batches = pack_batches([estimate_tokens(document) for document in documents], config)
+
+    assert batches == [[0, 1, 2], [3, 4, 6], [7]]  # document 5 is too large to batch
+
+
+def test_parse_batch_response_keys_by_index():
+    response = "```json\n" + json.dumps([{"index": 1, "name": "B"}, {"index": "0", "name": "A"}, "junk"]) + "\n```"
+
+    assert parse_batch_response(response) == {1: {"index": 1, "name": "B"}, 0: {"index": "0", "name": "A"}}
+    with pytest.raises(ValueError):
+        parse_batch_response('{"not": "an array"}')
+
+
+def test_invalid_and_missing_elements_fall_back_individually():
+    documents = [f"Document about person {i}. " * 10 for i in range(4)]
+    provider = batch_provider(json.dumps([
+        {"index": 0, **profile("Zero")},
+        {"index": 1, "user_id": "one"},  # missing name
+        {"index": 3, **profile("Three")},
+    ]))  # document 2 missing entirely
+    set_provider(provider)
+
+    results = asyncio.run(extract_user_profiles(documents, tiers=TIERS))
+
+    assert provider.calls_with(BATCH_EXTRACTION_SYSTEM_MESSAGE) == 1
+    assert single_calls(provider) == 2
+    assert all(isinstance(result, CascadeResult) for result in results)
+    assert [result.value["name"] for result in results] == ["Zero", "Single", "Single", "Three"]
+    assert "index" not in results[0].value
+
+
+def test_batch_tokens_are_split_across_its_documents():
+    documents = [f"Document about person {i}. " * 10 for i in range(3)]
+    provider = batch_provider(json.dumps([{"index": i, **profile(f"P{i}")} for i in range(3)]))
+    provider.prompt_tokens, provider.completion_tokens = 100, 50
+    set_provider(provider)
+
+    results = asyncio.run(extract_user_profiles(documents, tiers=TIERS))
+
+    assert provider.calls_with(BATCH_EXTRACTION_SYSTEM_MESSAGE) == 1
+    assert [attempt.prompt_tokens for result in results for attempt in result.attempts] == [34, 33, 33]
+    assert sum(attempt.completion_tokens for result in results for attempt in result.attempts) == 50
+    assert all(result.model == "test/model" for result in results)
+
+
+def test_unparseable_batch_falls_back_for_every_document():
+    documents = [f"Document about person {i}. " * 10 for i in range(3)]
+    provider = batch_provider("this is not json")
+    set_provider(provider)
+
+    results = asyncio.run(extract_user_profiles(documents, tiers=TIERS))
+
+    assert provider.calls_with(BATCH_EXTRACTION_SYSTEM_MESSAGE) == 1
+    assert single_calls(provider) == 3
+    assert all(result.value["name"] == "Single" for result in results)
+
+
+def test_failures_are_returned_per_document():
+    set_provider(batch_provider(json.dumps([{"index": 0, **profile("Zero")}]), single_response="nope"))
+
+    results = asyncio.run(extract_user_profiles(["doc zero " * 20, "doc one " * 20], tiers=TIERS))
+
+    assert results[0].value["name"] == "Zero"
+    assert isinstance(results[1], ValueError)
+
+
+def test_sample_profiles_share_one_request_with_fake_provider(fake_llm):
+    documents = []
+    for name in ("alice", "bob", "carol"):
+        with open(os.path.join(TEST_DATA, f"sample_user_{name}.txt"), encoding="utf-8") as f:
+            documents.append(f.read())
+
+    results = asyncio.run(extract_user_profiles(documents, tiers=TIERS))
+
+    assert fake_llm.transport.stats.requests == 1
+    assert [result.value["user_id"] for result in results] == ["alice_johnson", "robert_chen", "carol_martinez"]
@@ -0,0 +1,165 @@
+"""
+Tests for concurrent bulk ingestion of many files.
+"""
+import asyncio
+import os
+import shutil
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.database.models import Base, IngestionManifestEntry, User
+from repo_src.backend.data.schemas import UserCreate
+from repo_src.backend.functions.ingestion_manifest import get_manifest_entries, record_ingested_files
+from repo_src.backend.functions.users import UPSERT_CREATED, UPSERT_UPDATED, bulk_upsert_users
+from repo_src.backend.pipelines.bulk_ingestion import (
+    BulkIngestionConfig,
+    ingest_files,
+    resolve_input_paths,
+)
+from repo_src.backend.pipelines.manifest import fingerprint_content
+
+TEST_DATA = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../test_data'))
+SAMPLES = ("alice", "bob", "carol")
+
+pytestmark = pytest.mark.usefixtures("fake_llm")
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def cohort(tmp_path):
+    for name in SAMPLES:
+        shutil.copy(os.path.join(TEST_DATA, f"sample_user_{name}.txt"), tmp_path / f"{name}.txt")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "notes.md").write_text("not a transcript")
+    return tmp_path
+
+
+def saver(session_factory, batches):
+    def save(profiles, files, pipeline_version):
+        batches.append(len(profiles))
+        db = session_factory()
+        try:
+            record_ingested_files(db, files, [p.user_id for p in profiles], pipeline_version, commit=False)
+            bulk_upsert_users(db, profiles)
+        finally:
+            db.close()
+    return save
+
+
+def test_resolve_directories_globs_and_manifests(cohort):
+    assert [p.name for p in resolve_input_paths([str(cohort)])] == ["alice.txt", "bob.txt", "carol.txt"]
+    assert [p.name for p in resolve_input_paths([str(cohort / "**" / "*.md")])] == ["notes.md"]
+
+    manifest = cohort / "cohort.txt"
+    manifest.write_text("# spring cohort\nalice.txt\nnested/notes.md  # follow-up\n\nalice.txt\n")
+    assert [p.name for p in resolve_input_paths([], manifest=str(manifest))] == ["alice.txt", "notes.md"]
+
+    with pytest.raises(FileNotFoundError):
+        resolve_input_paths([str(cohort / "missing")])
+
+
+def test_bulk_upsert_applies_repeated_user_ids_in_order(session_factory):
+    db = session_factory()
+    bulk_upsert_users(db, [UserCreate(user_id="a", name="A"), UserCreate(user_id="b", name="B")])
+
+    outcomes = bulk_upsert_users(db, [UserCreate(user_id="a", name="A2"), UserCreate(user_id="a", name="A3"),
+                                      UserCreate(user_id="c", name="C")])
+
+    assert [outcome.status for outcome in outcomes] == [UPSERT_UPDATED, UPSERT_UPDATED, UPSERT_CREATED]
+    assert sorted((u.user_id, u.name) for u in db.query(User).all()) == [("a", "A3"), ("b", "B"), ("c", "C")]
+    db.close()
+
+
+def test_ingest_files_saves_every_profile(cohort, session_factory):
+    paths = resolve_input_paths([str(cohort)])
+    batches, progress = [], []
+
+    report = asyncio.run(ingest_files(
+        paths, BulkIngestionConfig(concurrency=2, db_batch_size=2),
+        save=saver(session_factory, batches), on_progress=lambda r: progress.append(r.done),
+    ))
+
+    assert (report.succeeded, report.failed) == (3, 0)
+    assert batches == [2, 1]
+    assert progress[-1] == 3
+    assert report.prompt_tokens > 0 and report.files_per_second > 0
+    db = session_factory()
+    assert sorted(u.user_id for u in db.query(User).all()) == ["alice_johnson", "carol_martinez", "robert_chen"]
+    db.close()
+
+
+def test_failures_are_reported_per_file(cohort, session_factory):
+    (cohort / "broken.txt").write_bytes(b"\xff\xfe not utf-8")
+    paths = resolve_input_paths([str(cohort)])
+
+    report = asyncio.run(ingest_files(
+        paths, BulkIngestionConfig(batch_extraction=False), save=saver(session_factory, []),
+    ))
+
+    assert (report.succeeded, report.failed) == (3, 1)
+    assert report.failures[0].path.endswith("broken.txt")
+    assert "UnicodeDecodeError" in report.failures[0].error
+
+
+def test_failed_save_marks_the_batch_failed(cohort):
+    def save(profiles, files, pipeline_version):
+        raise RuntimeError("database is locked")
+
+    report = asyncio.run(ingest_files(resolve_input_paths([str(cohort)]), BulkIngestionConfig(), save=save))
+
+    assert (report.succeeded, report.failed) == (0, 3)
+    assert all("database is locked" in failure.error for failure in report.failures)
+
+
+def manifest_of(session_factory, paths):
+    db = session_factory()
+    try:
+        return get_manifest_entries(db, [str(path) for path in paths])
+    finally:
+        db.close()
+
+
+def test_unchanged_files_are_skipped_on_rerun(cohort, session_factory, monkeypatch):
+    paths = resolve_input_paths([str(cohort)])
+    save = saver(session_factory, [])
+    asyncio.run(ingest_files(paths, BulkIngestionConfig(), save=save))
+
+    manifest = manifest_of(session_factory, paths)
+    assert manifest[str(paths[0])].user_id == "alice_johnson"
+
+    # Touched but identical content is still skipped; edited content is not
+    os.utime(paths[0], (0, 0))
+    paths[1].write_text(paths[1].read_text() + "\nBob also keeps bees.\n")
+    report = asyncio.run(ingest_files(paths, BulkIngestionConfig(), save=save, manifest=manifest))
+    assert (report.succeeded, report.skipped) == (1, 2)
+
+    # A prompt or model change invalidates every entry
+    monkeypatch.setenv("EXTRACTION_MODEL_CASCADE", "other/model")
+    report = asyncio.run(ingest_files(paths, BulkIngestionConfig(), save=save,
+                                      manifest=manifest_of(session_factory, paths)))
+    assert (report.succeeded, report.skipped) == (3, 0)
+
+
+def test_record_ingested_files_updates_in_place(session_factory, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("first")
+    db = session_factory()
+    record_ingested_files(db, [fingerprint_content(path, b"first")], ["a"], "v1")
+    path.write_text("second version")
+    record_ingested_files(db, [fingerprint_content(path, b"second version")], ["a2"], "v2")
+
+    entries = db.query(IngestionManifestEntry).all()
+    assert len(entries) == 1
+    assert (entries[0].user_id, entries[0].pipeline_version, entries[0].size) == ("a2", "v2", 14)
+    db.close()
@@ -0,0 +1,100 @@
+"""
+Tests for the cheap-first extraction model cascade.
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.llm_chat.errors import LLMUpstreamError
+from repo_src.backend.llm_chat.providers import set_provider
+from repo_src.backend.pipelines.cascade import CascadeStats, CascadeTier, run_cascade
+from repo_src.backend.pipelines.user_ingestion import process_file, validate_extraction
+from repo_src.backend.tests.conftest import ScriptedProvider
+
+TIERS = [CascadeTier(model="fast/model"), CascadeTier(model="strong/model")]
+
+GOOD_PROFILE = json.dumps({
+    "user_id": "jane_doe",
+    "name": "Jane Doe",
+    "bio": "Engineer",
+    "wiki_content": "## Background\n\n" + "Jane builds distributed systems. " * 20,
+})
+THIN_PROFILE = json.dumps({"user_id": "jane_doe", "name": "Jane Doe", "wiki_content": "Engineer."})
+
+
+def run(responses, quality_check=None):
+    provider = ScriptedProvider(responses, prompt_tokens=100, completion_tokens=50)
+    set_provider(provider)
+    stats = CascadeStats()
+    result = asyncio.run(run_cascade(
+        "prompt", "system", TIERS, validate_extraction, quality_check=quality_check, stats=stats
+    ))
+    return result, provider, stats
+
+
+def test_fast_tier_accepted_without_escalation():
+    result, provider, stats = run({"fast/model": GOOD_PROFILE, "strong/model": GOOD_PROFILE})
+
+    assert result.value["user_id"] == "jane_doe"
+    assert result.model == "fast/model"
+    assert provider.models == ["fast/model"]
+    assert stats.escalations == 0
+    assert stats.tiers["fast/model"].prompt_tokens == 100
+
+
+def test_invalid_json_escalates():
+    result, provider, stats = run({"fast/model": "not json", "strong/model": GOOD_PROFILE})
+
+    assert result.model == "strong/model"
+    assert result.attempts[0].accepted is False
+    assert "valid JSON" in result.attempts[0].reason
+    assert provider.models == ["fast/model", "strong/model"]
+    assert stats.snapshot()["escalation_rate"] == 1.0
+
+
+def test_quality_check_escalates_but_not_on_last_tier():
+    def needs_long_wiki(profile):
+        if len(profile.get("wiki_content") or "") < 100:
+            raise ValueError("too short")
+
+    result, provider, stats = run(
+        {"fast/model": THIN_PROFILE, "strong/model": THIN_PROFILE}, quality_check=needs_long_wiki
+    )
+
+    assert result.model == "strong/model"
+    assert stats.tiers["fast/model"].rejected == 1
+    assert stats.tiers["strong/model"].accepted == 1
+
+
+def test_upstream_error_escalates():
+    result, provider, stats = run({"fast/model": LLMUpstreamError("boom"), "strong/model": GOOD_PROFILE})
+
+    assert result.model == "strong/model"
+    assert stats.tiers["fast/model"].errors == 1
+
+
+def test_all_tiers_invalid_raises():
+    with pytest.raises(ValueError):
+        run({"fast/model": "nope", "strong/model": "still nope"})
+
+
+def test_schema_validation_rejects_wrong_types():
+    with pytest.raises(ValueError):
+        validate_extraction(json.dumps({"user_id": "x", "name": ["not", "a", "string"]}))
+
+
+def test_process_file_uses_cascade(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXTRACTION_MODEL_CASCADE", "fast/model,strong/model")
+    transcript = tmp_path / "jane.txt"
+    transcript.write_text("Jane Doe is an engineer who builds distributed systems. " * 10)
+    provider = ScriptedProvider({"fast/model": THIN_PROFILE, "strong/model": GOOD_PROFILE})
+    set_provider(provider)
+
+    profile = asyncio.run(process_file(str(transcript)))
+
+    assert profile["user_id"] == "jane_doe"
+    assert provider.models == ["fast/model", "strong/model"]
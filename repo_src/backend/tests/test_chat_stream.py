@@ -0,0 +1,154 @@
+"""
+Tests for the streaming chat endpoint (POST /api/chat/stream).
+"""
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.main import app
+from repo_src.backend.data.schemas import ChatRequest
+from repo_src.backend.llm_chat.providers import (
+    LLMProvider,
+    OpenRouterProvider,
+    StreamChunk,
+    set_provider,
+)
+from repo_src.backend.routers.chat import _chat_event_stream
+
+client = TestClient(app)
+
+
+def make_sse_body(tokens, prompt_tokens=12):
+    """Build an OpenAI-compatible streamed completion body"""
+    lines = []
+    for token in tokens:
+        chunk = {
+            "id": "s", "object": "chat.completion.chunk", "created": 0, "model": "test/model",
+            "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+        }
+        lines.append(f"data: {json.dumps(chunk)}\n\n")
+    usage_chunk = {
+        "id": "s", "object": "chat.completion.chunk", "created": 0, "model": "test/model",
+        "choices": [],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                  "total_tokens": prompt_tokens + len(tokens)},
+    }
+    lines.append(f"data: {json.dumps(usage_chunk)}\n\n")
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines)
+
+
+def parse_sse(text):
+    """Parse an SSE body into a list of (event, data) tuples"""
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def streaming_upstream():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        assert body["stream"] is True
+        return httpx.Response(
+            200,
+            content=make_sse_body(["Hel", "lo", " world"]),
+            headers={"content-type": "text/event-stream"},
+        )
+
+    set_provider(OpenRouterProvider(
+        api_key="test-key",
+        base_url="http://upstream.test/api/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    ))
+
+
+def test_stream_forwards_tokens_and_summary(streaming_upstream):
+    """Tokens arrive as separate events, followed by a done summary"""
+    response = client.post("/api/chat/stream", json={"prompt": "hi", "model": "test/model"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+
+    assert [data["text"] for event, data in events if event == "token"] == ["Hel", "lo", " world"]
+    event, summary = events[-1]
+    assert event == "done"
+    assert summary["model_used"] == "test/model"
+    assert summary["prompt_tokens"] == 12
+    assert summary["completion_tokens"] == 3
+    assert summary["total_tokens"] == 15
+    assert summary["usage_estimated"] is False
+    assert summary["time_to_first_token_ms"] is not None
+
+
+def test_stream_reports_upstream_error():
+    """Upstream failures are reported as an error event"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(400, json={"error": {"message": "bad model"}})
+
+    set_provider(OpenRouterProvider(
+        api_key="test-key",
+        base_url="http://upstream.test/api/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    ))
+    response = client.post("/api/chat/stream", json={"prompt": "hi"})
+
+    events = parse_sse(response.text)
+    assert events[-1][0] == "error"
+
+
+class EndlessProvider(LLMProvider):
+    """Provider that streams forever and records when its stream is closed"""
+
+    def __init__(self):
+        self.closed = False
+        self.chunks_sent = 0
+
+    async def stream(self, request):
+        try:
+            while True:
+                self.chunks_sent += 1
+                yield StreamChunk(text="tok ")
+                await asyncio.sleep(0)
+        finally:
+            self.closed = True
+
+
+class DisconnectingRequest:
+    """Stand-in for a Starlette Request whose client leaves after a few polls"""
+
+    def __init__(self, disconnect_after: int):
+        self.polls = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self):
+        self.polls += 1
+        return self.polls > self.disconnect_after
+
+
+def test_stream_cancels_upstream_on_disconnect():
+    """An abandoned stream closes the provider stream instead of running on"""
+    provider = EndlessProvider()
+    set_provider(provider)
+
+    async def consume():
+        events = []
+        async for event in _chat_event_stream(ChatRequest(prompt="hi"), DisconnectingRequest(3)):
+            events.append(event)
+        return events
+
+    events = asyncio.run(consume())
+
+    assert len(events) == 3
+    assert all(event.startswith("event: token") for event in events)
+    assert provider.closed is True
+    assert provider.chunks_sent == 4
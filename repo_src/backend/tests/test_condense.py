@@ -0,0 +1,138 @@
+"""
+Tests for local extractive pre-condensation of extraction inputs.
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend import main
+from repo_src.backend.llm_chat.providers import set_provider
+from repo_src.backend.llm_chat.tokens import estimate_tokens
+from repo_src.backend.pipelines.cascade import CascadeTier
+from repo_src.backend.pipelines import condense
+from repo_src.backend.pipelines.condense import (
+    CondenseConfig,
+    condense_documents,
+    condense_text,
+    get_condense_pool,
+)
+from repo_src.backend.pipelines.user_ingestion import extract_user_profile
+from repo_src.backend.tests.conftest import ScriptedProvider
+
+TEST_DATA = Path(__file__).resolve().parents[3] / "test_data"
+PROFILE = {"user_id": "ada", "name": "Ada", "wiki_content": "## About\n\n" + "Ada writes compilers. " * 20}
+
+TRANSCRIPT = """Interview Transcript: Ada Lovelace
+
+[00:00:05] Interviewer: Hi Ada, thanks for joining us today!
+
+Ada: Hello! Thanks for having me.
+
+Interviewer: Tell me about your work.
+
+Ada: Um, so I write compilers for a living. I mostly work in Rust and OCaml. (laughs) I also, you know, teach parsing workshops.
+
+Ada: Like I said, I write compilers for a living. I mostly work in Rust and OCaml.
+
+Interviewer: Great. What do you do for fun?
+
+Ada: I play the cello in a community orchestra and I restore old mechanical calculators.
+"""
+
+
+@pytest.fixture(autouse=True)
+def no_stream_validation(monkeypatch):
+    monkeypatch.setenv("EXTRACTION_STREAM_VALIDATION", "false")
+
+
+def test_boilerplate_and_repeats_are_removed():
+    result = condense_text(TRANSCRIPT, CondenseConfig(token_budget=0))
+
+    assert result.text.startswith("Interview Transcript: Ada Lovelace")
+    for removed in ("00:00:05", "Thanks for having me", "(laughs)", "Um", "you know", "Like I said"):
+        assert removed not in result.text
+    assert result.text.count("Rust and OCaml") == 1
+    assert "cello" in result.text and "Ada: So I write compilers" in result.text
+    assert "I also teach parsing workshops." in result.text
+    assert result.boilerplate_removed == 4 and result.duplicates_removed == 2
+    assert result.condensed_tokens < result.original_tokens
+
+
+def test_each_line_with_a_speaker_label_is_its_own_turn():
+    text = ("Interviewer: hello there friend.\n"
+            "Ada: I work on compilers, mostly in Rust.\n"
+            "Interviewer: thanks!\n"
+            "Ada: I also play the cello.\n"
+            "- Rust\n"
+            "- OCaml\n")
+
+    result = condense_text(text, CondenseConfig(token_budget=0))
+
+    assert result.text == "Ada: I work on compilers, mostly in Rust.\nAda: I also play the cello.\n- Rust\n- OCaml"
+    assert result.boilerplate_removed == 2
+
+
+def test_documents_within_the_budget_are_unchanged():
+    text = (TEST_DATA / "sample_user_bob.txt").read_text()
+
+    result = condense_text(text, CondenseConfig(token_budget=estimate_tokens(text)))
+
+    assert result.text == text
+    assert (result.condensed_tokens, result.ranked_out, result.boilerplate_removed) == (result.original_tokens, 0, 0)
+
+
+@pytest.mark.parametrize("budget", [150, 300, 500])
+def test_token_budget_keeps_the_title_and_original_order(budget):
+    text = (TEST_DATA / "sample_user_alice.txt").read_text()
+
+    result = condense_text(text, CondenseConfig(token_budget=budget))
+
+    assert result.condensed_tokens <= budget
+    assert result.ranked_out > 0
+    assert result.text.startswith("Interview Transcript: Alice Johnson")
+    bodies = [block.split(": ", 1)[-1] for block in result.text.split("\n\n")[1:]]
+    positions = [text.find(body[:30]) for body in bodies]
+    assert -1 not in positions and positions == sorted(positions)
+
+
+def test_disabled_condensation_is_a_no_op():
+    documents = [TRANSCRIPT]
+    assert asyncio.run(condense_documents(documents, CondenseConfig(enabled=False))) is documents
+
+
+def test_process_pool_matches_in_process():
+    documents = [(TEST_DATA / name).read_text() for name in sorted(os.listdir(TEST_DATA)) if name.endswith(".txt")]
+    inline = CondenseConfig(enabled=True, token_budget=400, processes=1)
+    pooled = CondenseConfig(enabled=True, token_budget=400, processes=2, pool_min_tokens=0)
+
+    assert asyncio.run(condense_documents(documents, pooled)) == asyncio.run(condense_documents(documents, inline))
+
+
+def test_extraction_prompt_uses_condensed_text():
+    provider = ScriptedProvider([json.dumps(PROFILE)])
+    set_provider(provider)
+    config = CondenseConfig(enabled=True, token_budget=0)
+
+    asyncio.run(extract_user_profile(TRANSCRIPT, tiers=[CascadeTier(model="test/model")], condense=config))
+
+    assert "Like I said" not in provider.prompts[0]
+    assert estimate_tokens(provider.prompts[0]) < estimate_tokens(TRANSCRIPT) + 50
+
+
+def test_app_shutdown_stops_the_process_pool(monkeypatch):
+    monkeypatch.setenv("INGEST_QUEUE_WORKERS", "0")
+    monkeypatch.setattr(main, "init_db", lambda: None)
+    monkeypatch.setattr(main, "init_provider", lambda: None)
+
+    async def serve():
+        async with main.lifespan(main.app):
+            get_condense_pool(1)
+
+    asyncio.run(serve())
+
+    assert condense._pool is None
@@ -0,0 +1,137 @@
+"""
+Tests for delta re-ingestion: section-level updates to a stored profile.
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.data.schemas import UserCreate, UserUpdate
+from repo_src.backend.database.models import Base
+from repo_src.backend.functions.users import create_or_update_user, get_user_for_update, update_user
+from repo_src.backend.llm_chat.providers import set_provider
+from repo_src.backend.pipelines.cascade import CascadeTier
+from repo_src.backend.pipelines.condense import CondenseConfig
+from repo_src.backend.pipelines.user_ingestion import (
+    SectionEdit,
+    apply_section_edits,
+    extract_profile_update,
+    merge_profile_update,
+    parse_profile_update,
+    wiki_outline,
+)
+from repo_src.backend.tests.conftest import ScriptedProvider
+
+WIKI = """Ada is a compiler engineer.
+
+## Skills
+
+- Rust
+- OCaml
+
+## Hobbies
+
+- Cello"""
+
+PROFILE = {"user_id": "ada", "name": "Ada Lovelace", "bio": "Compiler engineer", "wiki_content": WIKI}
+TIERS = [CascadeTier(model="cheap/model"), CascadeTier(model="strong/model")]
+
+
+@pytest.fixture(autouse=True)
+def no_stream_validation(monkeypatch):
+    monkeypatch.setattr("repo_src.backend.pipelines.user_ingestion.EXTRACTION_STREAM_VALIDATION", False)
+
+
+def test_outline_lists_sections_without_their_content():
+    outline = wiki_outline(WIKI)
+
+    assert outline == "(introduction, 1 lines)\n## Skills (2 lines)\n## Hobbies (1 lines)"
+    assert wiki_outline("") == "(empty)"
+
+
+def test_edits_are_merged_by_section():
+    merged = apply_section_edits(WIKI, [
+        SectionEdit("## skills", "append", "- Rust\n- Haskell"),
+        SectionEdit("## Hobbies", "replace", "- Restoring mechanical calculators"),
+        SectionEdit("## Current Role", "append", "- Staff engineer at Analytical Engines"),
+    ])
+
+    assert merged == """Ada is a compiler engineer.
+
+## Skills
+
+- Rust
+- OCaml
+- Haskell
+
+## Hobbies
+
+- Restoring mechanical calculators
+
+## Current Role
+
+- Staff engineer at Analytical Engines"""
+    assert apply_section_edits(WIKI, []) == WIKI
+
+
+@pytest.mark.parametrize("response", [
+    '{"bio": null}',
+    '{"edits": [{"section": "## Skills", "action": "delete", "content": "x"}]}',
+    '{"edits": [{"section": "## Skills", "action": "append", "content": " "}]}',
+    '{"bio": 3, "edits": []}',
+])
+def test_malformed_updates_are_rejected(response):
+    with pytest.raises(ValueError):
+        parse_profile_update(response)
+
+
+def test_update_sends_only_the_outline_and_new_material():
+    answer = {"bio": None, "edits": [{"section": "## Skills", "action": "append", "content": "- Haskell"}]}
+    provider = ScriptedProvider({"cheap/model": json.dumps(answer)})
+    set_provider(provider)
+
+    result = asyncio.run(extract_profile_update(
+        PROFILE, "Ada: These days I mostly write Haskell.", tiers=TIERS, condense=CondenseConfig(enabled=False)
+    ))
+
+    prompt = provider.requests[0].messages[-1]["content"]
+    assert "## Skills (2 lines)" in prompt and "These days I mostly write Haskell." in prompt
+    assert "OCaml" not in prompt and "Cello" not in prompt
+    assert provider.requests[0].max_tokens <= 2048
+
+    merged = merge_profile_update(PROFILE, result.value)
+    assert merged["bio"] == "Compiler engineer"
+    assert "- OCaml\n- Haskell" in merged["wiki_content"]
+
+
+def test_invalid_update_escalates():
+    valid = {"bio": "Compiler engineer and Haskeller", "edits": []}
+    provider = ScriptedProvider({"cheap/model": '{"edits": "none"}', "strong/model": json.dumps(valid)})
+    set_provider(provider)
+
+    result = asyncio.run(extract_profile_update(PROFILE, "New notes.", tiers=TIERS, condense=CondenseConfig()))
+
+    assert result.model == "strong/model"
+    assert merge_profile_update(PROFILE, result.value)["bio"] == "Compiler engineer and Haskeller"
+
+
+def test_merge_into_locked_row():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    create_or_update_user(db, UserCreate(**PROFILE))
+
+    user = get_user_for_update(db, "ada")
+    current = {"user_id": user.user_id, "name": user.name, "bio": user.bio, "wiki_content": user.wiki_content}
+    merged = apply_section_edits(current["wiki_content"], [SectionEdit("## Hobbies", "append", "- Chess")])
+    updated = update_user(db, "ada", UserUpdate(wiki_content=merged))
+
+    assert updated.wiki_content.endswith("- Cello\n- Chess")
+    assert get_user_for_update(db, "missing") is None
+    db.close()
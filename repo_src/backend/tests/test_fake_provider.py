@@ -0,0 +1,128 @@
+"""
+Tests for the offline fake LLM provider.
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.llm_chat.errors import LLMRateLimitError, LLMUpstreamError
+from repo_src.backend.llm_chat.fake_provider import FakeLLMConfig, FakeOpenRouterProvider, fake_extraction
+from repo_src.backend.llm_chat.llm_interface import ask_llm, stream_llm
+from repo_src.backend.llm_chat.providers import create_provider_from_env, set_provider
+from repo_src.backend.pipelines.user_ingestion import process_file, validate_extraction
+
+TEST_DATA = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../test_data'))
+INSTANT = dict(latency_distribution="fixed", latency_ms=0, tokens_per_second=0)
+
+
+def use_fake(**overrides):
+    provider = FakeOpenRouterProvider(FakeLLMConfig(**{**INSTANT, **overrides}))
+    set_provider(provider)
+    return provider
+
+
+def test_env_selects_fake_provider(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "fake")
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+
+    assert isinstance(create_provider_from_env(), FakeOpenRouterProvider)
+
+
+def test_invalid_distribution_is_rejected(monkeypatch):
+    monkeypatch.setenv("FAKE_LLM_LATENCY_DISTRIBUTION", "gaussian")
+
+    with pytest.raises(ValueError):
+        FakeLLMConfig.from_env()
+
+
+def test_extraction_is_deterministic_and_valid():
+    with open(os.path.join(TEST_DATA, "sample_user_alice.txt"), encoding="utf-8") as f:
+        transcript = f.read()
+
+    first = fake_extraction(transcript, max_tokens=4096)
+
+    assert first == fake_extraction(transcript, max_tokens=4096)
+    profile = validate_extraction(first)
+    assert profile["user_id"] == "alice_johnson"
+    assert profile["name"] == "Alice Johnson"
+    assert "rock climber" in profile["wiki_content"]
+    assert "Interviewer" not in profile["wiki_content"]
+
+
+def test_process_file_end_to_end():
+    provider = use_fake()
+
+    profile = asyncio.run(process_file(os.path.join(TEST_DATA, "sample_user_bob.txt")))
+
+    assert profile["user_id"] == "robert_chen"
+    # Streamed extraction stops reading at the object's closing brace
+    assert provider.transport.stats.requests == 1
+    assert provider.transport.snapshot()["in_flight"] == 0
+
+
+def test_chat_reply_is_deterministic_with_usage():
+    provider = use_fake(completion_tokens=10)
+
+    async def run():
+        return await ask_llm("hello", use_cache=False), await ask_llm("hello", use_cache=False)
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert len(first.split()) == 10
+    assert provider.transport.stats.completion_tokens > 0
+
+
+def test_latency_and_token_rate_are_applied():
+    use_fake(latency_ms=50, tokens_per_second=200, completion_tokens=10)
+
+    start = time.perf_counter()
+    asyncio.run(ask_llm("hi"))
+
+    # 50 ms to first token plus roughly 15 estimated tokens at 200 tok/s
+    assert time.perf_counter() - start >= 0.1
+
+
+def test_injected_429_carries_retry_after():
+    provider = use_fake(rate_limit_rate=1.0, retry_after=7)
+
+    with pytest.raises(LLMRateLimitError) as error:
+        asyncio.run(ask_llm("hi"))
+    assert error.value.retry_after == 7
+    assert provider.transport.stats.rate_limited == 1
+
+
+def test_injected_errors():
+    use_fake(error_rate=1.0)
+
+    with pytest.raises(LLMUpstreamError):
+        asyncio.run(ask_llm("hi"))
+
+
+def test_concurrency_limit_rejects_excess_requests():
+    provider = use_fake(latency_ms=50, concurrency_limit=2)
+
+    async def run():
+        return await asyncio.gather(
+            *(ask_llm(f"prompt {i}") for i in range(4)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert sum(isinstance(r, LLMRateLimitError) for r in results) == 2
+    assert provider.transport.stats.peak_in_flight == 2
+
+
+def test_streaming_paces_tokens_and_reports_usage():
+    provider = use_fake(completion_tokens=5, tokens_per_second=100)
+
+    async def run():
+        return [chunk async for chunk in stream_llm("hi")]
+
+    chunks = asyncio.run(run())
+    text = "".join(chunk.text for chunk in chunks)
+    assert len(text.split()) == 5
+    assert chunks[-1].completion_tokens is not None
+    assert provider.transport.snapshot()["in_flight"] == 0
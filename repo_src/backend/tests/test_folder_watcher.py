@@ -0,0 +1,144 @@
+"""
+Tests for the watch-folder ingestion daemon.
+"""
+import asyncio
+import os
+import shutil
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.database.models import Base, User
+from repo_src.backend.functions.ingestion_manifest import get_manifest_entries, record_ingested_files
+from repo_src.backend.functions.users import bulk_upsert_users
+from repo_src.backend.pipelines.bulk_ingestion import BulkIngestionReport, FileFailure
+from repo_src.backend.pipelines.folder_watcher import FolderWatcher, WatchConfig
+
+TEST_DATA = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../test_data'))
+
+pytestmark = pytest.mark.usefixtures("fake_llm")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def fast_config(**overrides) -> WatchConfig:
+    return WatchConfig(**{"poll_interval": 0.01, "debounce_seconds": 0, "retry_interval": 60, **overrides})
+
+
+def test_files_are_dispatched_once_they_settle(tmp_path):
+    clock = Clock()
+    watcher = FolderWatcher(tmp_path, WatchConfig(debounce_seconds=5), clock=clock)
+    transcript = tmp_path / "alice.txt"
+    transcript.write_text("Interview with")
+
+    assert watcher.scan() == []
+    clock.now += 3
+    transcript.write_text("Interview with Alice")  # still being written
+    assert watcher.scan() == []
+    clock.now += 4
+    assert watcher.scan() == []  # only 4s since the last change
+    clock.now += 1
+    assert watcher.scan() == [transcript]
+
+
+def test_partial_and_hidden_files_are_ignored(tmp_path):
+    watcher = FolderWatcher(tmp_path, fast_config(pattern="*"))
+    for name in ("upload.txt.part", "copy.tmp", ".alice.txt.swp", "notes.txt~"):
+        (tmp_path / name).write_text("partial")
+    (tmp_path / "done.txt").write_text("complete")
+
+    watcher.scan()
+    assert [path.name for path in watcher.scan()] == ["done.txt"]
+
+
+def test_watch_ingests_new_and_modified_files(tmp_path):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+
+    def save(profiles, files, pipeline_version):
+        db = session_factory()
+        try:
+            record_ingested_files(db, files, [p.user_id for p in profiles], pipeline_version, commit=False)
+            bulk_upsert_users(db, profiles)
+        finally:
+            db.close()
+
+    def manifest_loader(paths):
+        db = session_factory()
+        try:
+            return get_manifest_entries(db, [str(path) for path in paths])
+        finally:
+            db.close()
+
+    for name in ("alice", "bob"):
+        shutil.copy(os.path.join(TEST_DATA, f"sample_user_{name}.txt"), tmp_path / f"{name}.txt")
+    watcher = FolderWatcher(tmp_path, fast_config(), save=save, manifest_loader=manifest_loader)
+
+    stats = asyncio.run(watcher.run(until_idle=True))
+
+    assert (stats.succeeded, stats.failed) == (2, 0)
+    db = session_factory()
+    assert sorted(user.user_id for user in db.query(User).all()) == ["alice_johnson", "robert_chen"]
+    db.close()
+
+    # A modified file is picked up again; an untouched one is not
+    with open(tmp_path / "bob.txt", "a") as f:
+        f.write("\nBob: I also started learning the piano this year.\n")
+    stats = asyncio.run(watcher.run(until_idle=True))
+    assert (stats.succeeded, stats.dispatched) == (3, 3)
+
+
+def test_in_flight_work_is_bounded_and_the_scanner_waits(tmp_path):
+    running, peak, batches = [0], [0], []
+
+    async def ingest(paths):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.02)
+        running[0] -= 1
+        batches.append(len(paths))
+        return BulkIngestionReport(total=len(paths), succeeded=len(paths))
+
+    for index in range(12):
+        (tmp_path / f"user_{index:02}.txt").write_text(f"transcript {index}")
+    watcher = FolderWatcher(tmp_path, fast_config(max_in_flight=2, batch_size=2, queue_size=2), ingest=ingest)
+
+    stats = asyncio.run(watcher.run(until_idle=True))
+
+    assert stats.succeeded == 12
+    assert peak[0] == 2
+    assert max(batches) <= 2
+    assert stats.backpressure_waits > 0
+
+
+def test_failed_files_are_retried_after_the_interval(tmp_path):
+    clock = Clock()
+    attempts = []
+
+    async def ingest(paths):
+        attempts.append([path.name for path in paths])
+        if len(attempts) == 1:
+            return BulkIngestionReport(total=1, failed=1, failures=[FileFailure(str(paths[0]), "LLMError: quota")])
+        return BulkIngestionReport(total=1, succeeded=1)
+
+    (tmp_path / "alice.txt").write_text("transcript")
+    watcher = FolderWatcher(tmp_path, fast_config(retry_interval=30), ingest=ingest, clock=clock)
+
+    stats = asyncio.run(watcher.run(until_idle=True))
+    assert (stats.failed, stats.succeeded) == (1, 0)
+    assert watcher.scan() == []  # waiting for the retry
+
+    clock.now += 30
+    stats = asyncio.run(watcher.run(until_idle=True))
+    assert stats.succeeded == 1 and attempts == [["alice.txt"], ["alice.txt"]]
@@ -0,0 +1,222 @@
+"""
+Tests for the durable ingestion job queue, its worker pool and API.
+"""
+import asyncio
+import json
+import os
+import sys
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.database.connection import get_db
+from repo_src.backend.database.models import Base, IngestionJob, User
+from repo_src.backend.functions import ingestion_jobs
+from repo_src.backend.llm_chat.providers import set_provider
+from repo_src.backend.data.schemas import UserCreate
+from repo_src.backend.main import app
+from repo_src.backend.pipelines import job_queue
+from repo_src.backend.pipelines.job_queue import IngestionWorkerPool, JobQueueConfig
+from repo_src.backend.tests.conftest import ScriptedProvider
+
+PROFILE = {"user_id": "ada", "name": "Ada", "wiki_content": "## About\n\n" + "Ada writes compilers. " * 20}
+
+
+@pytest.fixture(autouse=True)
+def single_model(monkeypatch):
+    monkeypatch.setenv("EXTRACTION_MODEL_CASCADE", "test/model")
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def pool_for(session_factory, **config):
+    settings = dict(workers=1, lease_seconds=30, poll_interval=0.01, max_attempts=2,
+                    retry_base_delay=0, retry_max_delay=0)
+    return IngestionWorkerPool(JobQueueConfig(**{**settings, **config}), session_factory, worker_id="test")
+
+
+def test_a_leased_job_is_invisible_until_its_lease_expires(session_factory):
+    db = session_factory()
+    job = ingestion_jobs.enqueue_job(db, "transcript", max_attempts=2)
+
+    assert [j.id for j in ingestion_jobs.lease_jobs(db, "a", 5, lease_seconds=60)] == [job.id]
+    assert ingestion_jobs.lease_jobs(db, "b", 5, lease_seconds=60) == []
+
+    later = ingestion_jobs.utcnow() + timedelta(seconds=61)
+    stolen = ingestion_jobs.lease_jobs(db, "b", 5, lease_seconds=60, now=later)
+    assert [(j.lease_owner, j.attempts) for j in stolen] == [("b", 2)]
+    assert ingestion_jobs.complete_job(db, job.id, "a", "x") is False  # "a" lost its lease
+
+    # Expired again with no attempts left: dead-lettered rather than re-leased
+    assert ingestion_jobs.lease_jobs(db, "c", 5, 60, now=later + timedelta(seconds=61)) == []
+    assert ingestion_jobs.get_job(db, job.id).status == ingestion_jobs.DEAD
+    assert ingestion_jobs.count_jobs_by_status(db)[ingestion_jobs.DEAD] == 1
+    db.close()
+
+
+def test_worker_extracts_and_saves_the_profile(session_factory):
+    set_provider(ScriptedProvider([json.dumps(PROFILE)]))
+    db = session_factory()
+    job = ingestion_jobs.enqueue_job(db, "Ada writes compilers.", source_name="ada.txt")
+
+    assert asyncio.run(pool_for(session_factory).run_once()) is True
+
+    db.refresh(job)
+    assert (job.status, job.user_id, job.attempts) == (ingestion_jobs.SUCCEEDED, "ada", 1)
+    assert db.query(User).filter(User.user_id == "ada").count() == 1
+    assert asyncio.run(pool_for(session_factory).run_once()) is False
+    db.close()
+
+
+def test_a_worker_that_lost_its_lease_does_not_overwrite_the_profile(session_factory):
+    db = session_factory()
+    job = ingestion_jobs.enqueue_job(db, "Ada writes compilers.")
+    ingestion_jobs.lease_jobs(db, "test", 1, lease_seconds=60)
+    ingestion_jobs.lease_jobs(db, "other", 1, 60, now=ingestion_jobs.utcnow() + timedelta(seconds=61))
+    db.close()
+
+    assert pool_for(session_factory)._save(job.id, UserCreate(**PROFILE)) is False
+
+    db = session_factory()
+    assert db.query(User).count() == 0
+    job = ingestion_jobs.get_job(db, job.id)
+    assert (job.status, job.lease_owner) == (ingestion_jobs.RUNNING, "other")
+    db.close()
+
+
+def test_profile_and_completion_commit_together(session_factory, monkeypatch):
+    db = session_factory()
+    job_id = ingestion_jobs.enqueue_job(db, "Ada writes compilers.").id
+    ingestion_jobs.lease_jobs(db, "test", 1, lease_seconds=60)
+    db.close()
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("crashed while writing the profile")
+
+    upsert_user = job_queue.upsert_user
+    monkeypatch.setattr(job_queue, "upsert_user", crash)
+    with pytest.raises(RuntimeError):
+        pool_for(session_factory)._save(job_id, UserCreate(**PROFILE))
+    db = session_factory()
+    assert ingestion_jobs.get_job(db, job_id).status == ingestion_jobs.RUNNING  # completion rolled back too
+    db.close()
+
+    monkeypatch.setattr(job_queue, "upsert_user", upsert_user)
+    assert pool_for(session_factory)._save(job_id, UserCreate(**PROFILE)) is True
+    db = session_factory()
+    assert ingestion_jobs.get_job(db, job_id).status == ingestion_jobs.SUCCEEDED
+    assert db.query(User).filter(User.user_id == "ada").count() == 1
+    db.close()
+
+
+def test_failures_retry_then_dead_letter(session_factory):
+    provider = ScriptedProvider(["not json"])
+    set_provider(provider)
+    db = session_factory()
+    job = ingestion_jobs.enqueue_job(db, "unparseable", max_attempts=2)
+    pool = pool_for(session_factory)
+
+    asyncio.run(pool.run_once())
+    db.refresh(job)
+    assert (job.status, job.attempts) == (ingestion_jobs.QUEUED, 1)
+    assert "ValueError" in job.last_error
+
+    asyncio.run(pool.run_once())
+    db.refresh(job)
+    assert (job.status, job.attempts) == (ingestion_jobs.DEAD, 2)
+    assert job.finished_at is not None
+    assert asyncio.run(pool.run_once()) is False
+    db.close()
+
+
+def test_retry_waits_for_backoff(session_factory):
+    set_provider(ScriptedProvider(["not json"]))
+    db = session_factory()
+    job = ingestion_jobs.enqueue_job(db, "unparseable", max_attempts=3)
+    pool = pool_for(session_factory, retry_base_delay=60, retry_max_delay=60)
+
+    asyncio.run(pool.run_once())
+
+    db.refresh(job)
+    assert job.status == ingestion_jobs.QUEUED
+    assert job.available_at > ingestion_jobs.utcnow()
+    assert asyncio.run(pool.run_once()) is False  # not due yet
+    db.close()
+
+
+def test_pool_drains_queue_concurrently(tmp_path):
+    # A file database, so each worker thread gets its own connection
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    set_provider(ScriptedProvider([json.dumps(PROFILE)]))
+    db = session_factory()
+    jobs = [ingestion_jobs.enqueue_job(db, f"transcript {i}") for i in range(5)]
+    pool = pool_for(session_factory, workers=3)
+
+    async def run():
+        pool.start()
+        for _ in range(200):
+            if ingestion_jobs.count_jobs_by_status(db)[ingestion_jobs.SUCCEEDED] == len(jobs):
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+
+    asyncio.run(run())
+    assert ingestion_jobs.count_jobs_by_status(db) == {"queued": 0, "running": 0, "succeeded": 5, "dead": 0}
+    db.close()
+
+
+@pytest.fixture
+def client(session_factory):
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    if previous is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = previous
+
+
+def test_submit_and_poll(client, session_factory):
+    response = client.post("/api/ingestion/jobs", json={"text": "Ada writes compilers.", "source_name": "note"})
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.json()["status"] == "queued"
+
+    set_provider(ScriptedProvider([json.dumps(PROFILE)]))
+    asyncio.run(pool_for(session_factory).run_once())
+
+    status = client.get(f"/api/ingestion/jobs/{job_id}").json()
+    assert (status["status"], status["user_id"], status["source_name"]) == ("succeeded", "ada", "note")
+    assert client.get("/api/ingestion/stats").json()["succeeded"] == 1
+    assert client.get("/api/ingestion/jobs/999").status_code == 404
+
+
+def test_upload_raw_file(client, session_factory):
+    response = client.post("/api/ingestion/jobs/upload?filename=ada.txt", content="Ada writes compilers.".encode())
+
+    assert response.status_code == 202
+    db = session_factory()
+    job = db.query(IngestionJob).one()
+    assert (job.source_name, job.content) == ("ada.txt", "Ada writes compilers.")
+    db.close()
+    assert client.post("/api/ingestion/jobs/upload", content=b"\xff\xfe").status_code == 400
+    assert client.post("/api/ingestion/jobs/upload", content=b"  ").status_code == 400
@@ -0,0 +1,115 @@
+"""
+Tests for local repair of malformed LLM JSON.
+
+tests/fixtures/malformed_extractions holds recorded bad extraction outputs;
+expected_repairs.json lists the repairs each needs, or null for outputs that
+must still be rejected.
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.llm_chat.providers import set_provider
+from repo_src.backend.pipelines.cascade import CascadeStats, CascadeTier, run_cascade
+from repo_src.backend.pipelines.json_repair import repair_json, repair_value
+from repo_src.backend.pipelines.streaming_json import StreamAbort
+from repo_src.backend.pipelines.user_ingestion import make_stream_validator, parse_batch_response, validate_extraction
+from repo_src.backend.tests.conftest import ScriptedProvider
+
+FIXTURES = Path(__file__).parent / "fixtures" / "malformed_extractions"
+EXPECTED = json.loads((FIXTURES / "expected_repairs.json").read_text())
+REPAIRABLE = [name for name, repairs in EXPECTED.items() if repairs is not None and "batch" not in name]
+TIERS = [CascadeTier(model="cheap/model"), CascadeTier(model="strong/model")]
+
+
+def fixture(name: str) -> str:
+    return (FIXTURES / name).read_text()
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_recorded_outputs_are_repaired_or_rejected(name, metrics):
+    expected = EXPECTED[name]
+    text = fixture(name)
+
+    if expected is None:
+        with pytest.raises(ValueError):
+            validate_extraction(text)
+        assert metrics.snapshot()["json_repair"]["unrepairable"] == 1
+        return
+
+    if "batch" in name:
+        assert sorted(parse_batch_response(text)) == [0, 1]
+    else:
+        profile = validate_extraction(text)
+        assert (profile["user_id"], profile["name"]) == ("ada_lovelace", "Ada Lovelace")
+    assert repair_json(text)[1] == expected
+    stats = metrics.snapshot()["json_repair"]
+    assert stats["repaired"] == 1
+    assert stats["by_kind"] == {kind: 1 for kind in expected}
+
+
+def test_repaired_strings_keep_their_content():
+    profile = validate_extraction(fixture("unescaped_quotes.txt"))
+    assert profile["bio"] == 'Known as "the compiler whisperer" at work'
+
+    profile = validate_extraction(fixture("invalid_escapes.txt"))
+    assert "C:\\Users\\ada\\src" in profile["wiki_content"]
+    assert "\\d+" in profile["wiki_content"]
+
+    profile = validate_extraction(fixture("everything_at_once.txt"))
+    assert profile["wiki_content"] == "## About\n\nAda writes compilers.\n\n## Tools\n\n- Emacs\n- GDB"
+
+
+def test_expected_type_skips_other_brackets():
+    text = 'Fields [user_id, name] are below: {"user_id": "a", "name": "A",}'
+    assert repair_json(text, expect=dict)[0] == {"user_id": "a", "name": "A"}
+    with pytest.raises(ValueError):
+        repair_json('{"user_id": "a"', expect=dict)
+    assert repair_value('"line one\nline two"') == ("line one\nline two", ["control_characters"])
+
+
+def test_valid_json_is_not_counted(metrics):
+    validate_extraction(json.dumps({"user_id": "a", "name": "A"}))
+    assert metrics.snapshot()["json_repair"] == {"repaired": 0, "unrepairable": 0, "by_kind": {}}
+
+
+@pytest.mark.parametrize("name", REPAIRABLE)
+@pytest.mark.parametrize("piece", [1, 7, 100000])
+def test_stream_validation_does_not_abort_repairable_output(name, piece):
+    text = fixture(name)
+    validator = make_stream_validator("x" * 1000)(True)
+
+    try:
+        for i in range(0, len(text), piece):
+            validator.feed(text[i:i + piece])
+            if validator.done:
+                break
+    except StreamAbort as e:
+        pytest.fail(f"Repairable output aborted: {e}")
+
+    if validator.done:
+        assert json.loads(validator.result_text()) == validate_extraction(text)
+    else:
+        assert validator.parser.unchecked
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_repair_saves_the_escalation(streamed, metrics):
+    provider = ScriptedProvider({"cheap/model": fixture("everything_at_once.txt"),
+                                 "strong/model": json.dumps({"user_id": "x", "name": "X"})})
+    set_provider(provider)
+
+    result = asyncio.run(run_cascade(
+        prompt_text="extract", system_message="system", tiers=TIERS,
+        validate=validate_extraction, stats=CascadeStats(),
+        stream_validator=make_stream_validator("x" * 10) if streamed else None,
+    ))
+
+    assert result.value["user_id"] == "ada_lovelace"
+    assert provider.models == ["cheap/model"]
+    assert metrics.snapshot()["json_repair"]["repaired"] == 1
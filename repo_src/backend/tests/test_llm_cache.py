@@ -0,0 +1,215 @@
+"""
+Tests for the tiered LLM response cache.
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.llm_chat import cache as cache_module
+from repo_src.backend.llm_chat.cache import (
+    CacheConfig,
+    LRUCache,
+    ResponseCache,
+    make_cache_key,
+    set_cache,
+)
+from repo_src.backend.llm_chat import llm_interface
+from repo_src.backend.llm_chat.llm_interface import ask_llm, complete_llm, complete_llm_streaming
+from repo_src.backend.llm_chat.providers import CompletionResult, set_provider
+from repo_src.backend.tests.conftest import ScriptedProvider
+
+
+def result(text: str) -> CompletionResult:
+    return CompletionResult(text=text, model="test/model", prompt_tokens=3, completion_tokens=2)
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    response_cache = ResponseCache(CacheConfig(path=str(tmp_path / "cache.db"), max_entries=2))
+    yield response_cache
+    response_cache.close()
+
+
+def test_cache_key_covers_datetime_prefix():
+    """The injected date/time line is part of the key"""
+    monday = make_cache_key("m", "Current date and time: Monday, May 05, 2025 at 09:41 AM\n\nBe helpful.", "hi", 0.7, 100)
+    tuesday = make_cache_key("m", "Current date and time: Tuesday, May 06, 2025 at 09:41 AM\n\nBe helpful.", "hi", 0.7, 100)
+    assert monday != tuesday != make_cache_key("m", "Be helpful.", "hi", 0.7, 100)
+
+
+def test_default_path_does_not_depend_on_working_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    monkeypatch.delenv("LLM_CACHE_PATH", raising=False)
+    monkeypatch.chdir(tmp_path)
+
+    config = CacheConfig.from_env()
+    response_cache = ResponseCache(config)
+    response_cache.close()
+
+    assert config.path == str(tmp_path / "xdg" / "social-os" / "llm_cache.db")
+    assert os.path.exists(config.path)
+    assert not os.path.exists(tmp_path / "llm_cache.db")
+
+
+def test_cache_key_covers_request_parameters():
+    """Every request parameter participates in the key"""
+    base = make_cache_key("m", "s", "p", 0.7, 100)
+    assert base != make_cache_key("other", "s", "p", 0.7, 100)
+    assert base != make_cache_key("m", "other", "p", 0.7, 100)
+    assert base != make_cache_key("m", "s", "other", 0.7, 100)
+    assert base != make_cache_key("m", "s", "p", 0.3, 100)
+    assert base != make_cache_key("m", "s", "p", 0.7, 200)
+
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(max_entries=2, ttl_seconds=60)
+    lru.set("a", result("a"))
+    lru.set("b", result("b"))
+    lru.get("a")
+    assert lru.set("c", result("c")) == 1
+
+    assert lru.get("a")[0] is not None
+    assert lru.get("b")[0] is None
+
+
+def test_memory_and_disk_hits_are_counted(disk_cache):
+    disk_cache.set("k", result("cached"))
+    assert disk_cache.get("k").text == "cached"
+    assert disk_cache.stats.memory_hits == 1
+
+    disk_cache.memory.clear()
+    assert disk_cache.get("k").text == "cached"
+    assert disk_cache.stats.disk_hits == 1
+
+    assert disk_cache.get("missing") is None
+    assert disk_cache.stats.misses == 1
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "persist.db")
+    first = ResponseCache(CacheConfig(path=path))
+    first.set("k", result("persisted"))
+    first.close()
+
+    second = ResponseCache(CacheConfig(path=path))
+    try:
+        assert second.get("k").text == "persisted"
+        assert second.stats.disk_hits == 1
+    finally:
+        second.close()
+
+
+def test_expired_entries_are_not_served(tmp_path, monkeypatch):
+    response_cache = ResponseCache(CacheConfig(path=str(tmp_path / "ttl.db"), ttl_seconds=10))
+    now = 1_000_000.0
+    monkeypatch.setattr(cache_module.time, "time", lambda: now)
+    response_cache.set("k", result("old"))
+
+    now += 11
+    try:
+        assert response_cache.get("k") is None
+        assert response_cache.stats.expirations == 2  # memory and disk tiers
+    finally:
+        response_cache.close()
+
+
+def test_disk_tier_evicts_to_size_limit(tmp_path):
+    response_cache = ResponseCache(CacheConfig(path=str(tmp_path / "size.db"), max_bytes=400))
+    try:
+        for i in range(10):
+            response_cache.set(f"k{i}", result("x" * 50))
+        total = response_cache.disk._conn.execute("SELECT SUM(size) FROM llm_cache").fetchone()[0]
+        assert total <= 400
+        assert response_cache.stats.evictions > 0
+    finally:
+        response_cache.close()
+
+
+def test_lru_is_safe_across_threads():
+    """Concurrent expiries and evictions of the same keys don't corrupt the LRU"""
+    lru = LRUCache(max_entries=4, ttl_seconds=0)
+    errors = []
+
+    def hammer():
+        try:
+            for i in range(20000):
+                lru.set(f"k{i % 2}", result("x"), stored_at=1.0)
+                lru.get(f"k{(i + 1) % 2}")
+        except Exception as e:  # KeyError from OrderedDict without the lock
+            errors.append(e)
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads often enough to interleave get/del
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+
+
+def test_different_injected_times_do_not_share_a_cached_answer(disk_cache, monkeypatch):
+    provider = ScriptedProvider(["answer 1", "answer 2", "answer 3"])
+    set_provider(provider)
+    set_cache(disk_cache)
+    now = ["Monday, May 05, 2025 at 09:41 AM"]
+    monkeypatch.setattr(llm_interface, "_get_current_datetime", lambda: now[0])
+
+    async def run():
+        first = await ask_llm("What day is it?", temperature=0.2)
+        same_minute = await ask_llm("What day is it?", temperature=0.2)
+        now[0] = "Tuesday, May 06, 2025 at 09:41 AM"
+        next_day = await ask_llm("What day is it?", temperature=0.2)
+        return first, same_minute, next_day
+
+    first, same_minute, next_day = asyncio.run(run())
+
+    assert first == same_minute == "answer 1"
+    assert next_day == "answer 2"
+    assert len(provider.requests) == 2
+
+
+def test_ask_llm_serves_repeats_from_cache(disk_cache, monkeypatch):
+    monkeypatch.setattr(llm_interface, "_get_current_datetime", lambda: "Monday, May 05, 2025 at 09:41 AM")
+    provider = ScriptedProvider(["answer 1", "answer 2", "answer 3"])
+    set_provider(provider)
+    set_cache(disk_cache)
+
+    async def run():
+        first = await ask_llm("same prompt", temperature=0.2)
+        second = await ask_llm("same prompt", temperature=0.2)
+        bypass = await ask_llm("same prompt", temperature=0.2, use_cache=False)
+        return first, second, bypass
+
+    first, second, bypass = asyncio.run(run())
+
+    assert first == second == "answer 1"
+    assert bypass == "answer 2"
+    assert len(provider.requests) == 2
+
+
+def test_streams_stopped_early_are_not_cached(disk_cache, monkeypatch):
+    monkeypatch.setattr(llm_interface, "_get_current_datetime", lambda: "Monday, May 05, 2025 at 09:41 AM")
+    provider = ScriptedProvider(["first half. second half.", "full answer"], piece=5)
+    set_provider(provider)
+    set_cache(disk_cache)
+
+    async def run():
+        partial = await complete_llm_streaming("same prompt", lambda: lambda text: True, temperature=0.2)
+        full = await complete_llm("same prompt", temperature=0.2)
+        streamed = await complete_llm_streaming("same prompt", lambda: lambda text: False, temperature=0.2)
+        return partial, full, streamed
+
+    partial, full, streamed = asyncio.run(run())
+
+    assert partial.text == "first"
+    assert full.text == streamed.text == "full answer"
+    assert len(provider.requests) == 2
@@ -0,0 +1,92 @@
+"""
+Tests for the async LLM interface and provider layer.
+The upstream API is replaced by an httpx MockTransport so no network is used.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.llm_chat import llm_interface
+from repo_src.backend.llm_chat.llm_interface import ask_llm
+from repo_src.backend.llm_chat.providers import OpenRouterProvider, set_provider
+from repo_src.backend.llm_chat.errors import LLMNotConfiguredError
+
+
+def make_completion_body(text: str, model: str = "test/model") -> dict:
+    """Build a minimal OpenAI-compatible chat-completion response body"""
+    return {
+        "id": "cmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 11, "completion_tokens": 7, "total_tokens": 18},
+    }
+
+
+def make_provider(handler) -> OpenRouterProvider:
+    """Create an OpenRouterProvider whose HTTP traffic goes to `handler`"""
+    return OpenRouterProvider(
+        api_key="test-key",
+        base_url="http://upstream.test/api/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+
+@pytest.fixture
+def slow_provider():
+    """Provider whose upstream takes 0.2s per request without blocking the loop"""
+    requests_seen = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(json.loads(request.content))
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json=make_completion_body("pong"))
+
+    set_provider(make_provider(handler))
+    return requests_seen
+
+
+def test_ask_llm_returns_text(slow_provider):
+    """ask_llm returns the completion text and sends the expected payload"""
+    response = asyncio.run(ask_llm("ping", system_message="Be brief.", temperature=0.1))
+
+    assert response == "pong"
+    payload = slow_provider[0]
+    assert payload["model"] == llm_interface.DEFAULT_MODEL_NAME
+    assert payload["temperature"] == 0.1
+    assert payload["messages"][1] == {"role": "user", "content": "ping"}
+    assert "Be brief." in payload["messages"][0]["content"]
+
+
+def test_concurrent_calls_overlap(slow_provider):
+    """Concurrent ask_llm calls share the event loop instead of serializing"""
+    async def run_many():
+        return await asyncio.gather(*(ask_llm(f"ping {i}") for i in range(5)))
+
+    start = time.perf_counter()
+    responses = asyncio.run(run_many())
+    elapsed = time.perf_counter() - start
+
+    assert responses == ["pong"] * 5
+    # Five sequential calls would take at least 1.0s
+    assert elapsed < 0.6
+
+
+def test_ask_llm_without_provider(monkeypatch):
+    """Without a configured provider, ask_llm raises a typed error"""
+    set_provider(None)
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+
+    with pytest.raises(LLMNotConfiguredError):
+        asyncio.run(ask_llm("ping"))
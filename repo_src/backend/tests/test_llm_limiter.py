@@ -0,0 +1,171 @@
+"""
+Tests for rate-limit handling: typed errors, retry with backoff and the
+adaptive per-model limiter.
+"""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.main import app
+from repo_src.backend.llm_chat.errors import (
+    LLMRateLimitError,
+    LLMRequestError,
+    LLMUpstreamError,
+    parse_retry_after,
+)
+from repo_src.backend.llm_chat.limiter import AdaptiveLimiter, LimiterConfig, TokenBucket
+from repo_src.backend.llm_chat.llm_interface import ask_llm
+from repo_src.backend.llm_chat.providers import OpenRouterProvider, set_provider
+from repo_src.backend.llm_chat.retry import RetryPolicy, call_with_retry
+
+client = TestClient(app)
+
+FAST_RETRIES = {"LLM_MAX_RETRIES": "3", "LLM_RETRY_BASE_DELAY": "0.001", "LLM_RETRY_MAX_DELAY": "0.01"}
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    for key, value in FAST_RETRIES.items():
+        monkeypatch.setenv(key, value)
+
+
+def scripted_upstream(responses):
+    """Install a provider whose upstream replies with `responses` in order"""
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        status, headers = responses[min(len(calls), len(responses)) - 1]
+        if status == 200:
+            return httpx.Response(200, json={
+                "id": "x", "object": "chat.completion", "created": 0, "model": "test/model",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+            })
+        return httpx.Response(status, json={"error": {"message": f"status {status}"}}, headers=headers)
+
+    set_provider(OpenRouterProvider(
+        api_key="test-key",
+        base_url="http://upstream.test/api/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    ))
+    return calls
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("not a date") is None
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_backoff_respects_retry_after_and_cap():
+    policy = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=4.0)
+    assert all(0 <= policy.backoff(10) <= 4.0 for _ in range(50))
+    assert policy.backoff(0, retry_after=7.0) >= 7.0
+
+
+def test_429_is_retried_then_succeeds():
+    calls = scripted_upstream([(429, {"retry-after": "0"}), (503, {}), (200, {})])
+
+    assert asyncio.run(ask_llm("hi")) == "ok"
+    assert len(calls) == 3
+
+
+def test_non_retryable_error_is_raised_immediately():
+    calls = scripted_upstream([(400, {})])
+
+    with pytest.raises(LLMRequestError):
+        asyncio.run(ask_llm("hi"))
+    assert len(calls) == 1
+
+
+def test_retries_exhausted_raise_last_error():
+    calls = scripted_upstream([(500, {})])
+
+    with pytest.raises(LLMUpstreamError):
+        asyncio.run(ask_llm("hi"))
+    assert len(calls) == 4
+
+
+def test_chat_endpoint_maps_rate_limit_to_429():
+    scripted_upstream([(429, {"retry-after": "0"})])
+
+    response = client.post("/api/chat/", json={"prompt": "hi"})
+
+    assert response.status_code == 429
+    assert "Rate limited" in response.json()["detail"]
+
+
+def test_call_with_retry_passes_through_other_exceptions():
+    async def boom():
+        raise KeyError("not an LLM error")
+
+    with pytest.raises(KeyError):
+        asyncio.run(call_with_retry(boom, RetryPolicy(max_attempts=3, base_delay=0)))
+
+
+def test_limiter_caps_concurrency():
+    limiter = AdaptiveLimiter("m", LimiterConfig(initial_concurrency=2, max_concurrency=2))
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        async with limiter.acquire():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(work() for _ in range(8)))
+
+    asyncio.run(run())
+    assert peak == 2
+    assert limiter.in_flight == 0
+
+
+def test_limiter_aimd_adjustments():
+    limiter = AdaptiveLimiter("m", LimiterConfig(initial_concurrency=8, min_concurrency=1, max_concurrency=16))
+
+    limiter.on_rate_limited()
+    assert limiter.limit == 4
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+
+    for _ in range(10):
+        limiter.on_rate_limited()
+    assert limiter.limit == 1
+
+
+def test_limiter_shrinks_on_rate_limit_inside_block():
+    limiter = AdaptiveLimiter("m", LimiterConfig(initial_concurrency=8))
+
+    async def run():
+        with pytest.raises(LLMRateLimitError):
+            async with limiter.acquire():
+                raise LLMRateLimitError("slow down", "m", retry_after=0.05)
+        start = time.monotonic()
+        async with limiter.acquire():
+            pass
+        return time.monotonic() - start
+
+    waited = asyncio.run(run())
+    assert 4 <= limiter.limit < 5  # halved, then one additive step
+    assert limiter.throttled == 1
+    assert waited >= 0.04  # Retry-After paused the next caller
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=600)  # 10 per second
+
+    async def run():
+        await bucket.acquire(600)
+        return await bucket.acquire(1)
+
+    waited = asyncio.run(run())
+    assert waited == pytest.approx(0.1, abs=0.05)
@@ -0,0 +1,132 @@
+"""
+Tests for per-call token, cost and latency accounting.
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.main import app
+from repo_src.backend.llm_chat.cache import CacheConfig, ResponseCache, set_cache
+from repo_src.backend.llm_chat.errors import LLMRequestError
+from repo_src.backend.llm_chat.llm_interface import ask_llm, stream_llm
+from repo_src.backend.llm_chat.metrics import Histogram, LLMCallRecord, LLMMetrics, set_metrics
+from repo_src.backend.llm_chat.providers import CompletionResult, LLMProvider, StreamChunk, set_provider
+
+client = TestClient(app)
+
+
+class FakeProvider(LLMProvider):
+    """Answers after a short delay with fixed usage, or raises `error`"""
+
+    def __init__(self, error=None):
+        self.error = error
+
+    async def complete(self, request):
+        await asyncio.sleep(0.02)
+        if self.error:
+            raise self.error
+        return CompletionResult(text="ok", model=request.model, prompt_tokens=1000, completion_tokens=500)
+
+    async def stream(self, request):
+        await asyncio.sleep(0.01)
+        yield StreamChunk(text="he")
+        yield StreamChunk(text="llo")
+        yield StreamChunk(prompt_tokens=10, completion_tokens=2)
+
+
+@pytest.fixture
+def metrics():
+    """The shared metrics collector, with a price for priced/model"""
+    collector = LLMMetrics(pricing={"priced/model": (3.0, 15.0)})
+    set_metrics(collector)
+    return collector
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(0.1, 1.0, 10.0))
+    for value in [0.05] * 90 + [0.5] * 9 + [20.0]:
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.95) == 1.0
+    assert histogram.quantile(1.0) == 20.0
+    assert histogram.snapshot()["buckets"]["le_inf"] == 1
+
+
+def test_successful_call_records_tokens_and_cost(metrics):
+    set_provider(FakeProvider())
+
+    asyncio.run(ask_llm("hi", model_override="priced/model", caller="ingestion"))
+
+    snapshot = metrics.snapshot()
+    entry = snapshot["by_caller"]["ingestion"]["priced/model"]
+    assert entry["calls"] == 1
+    assert entry["outcomes"] == {"ok": 1}
+    assert entry["total_tokens"] == 1500
+    assert entry["cost_usd"] == pytest.approx(0.0105)
+    assert entry["latency_seconds"]["sum"] >= 0.02
+    assert snapshot["totals"]["cost_usd"] == pytest.approx(0.0105)
+
+
+def test_cache_hits_and_coalesced_calls_cost_nothing(metrics):
+    set_provider(FakeProvider())
+    set_cache(ResponseCache(CacheConfig(path=None)))
+
+    async def run():
+        await asyncio.gather(*(ask_llm("same", model_override="priced/model") for _ in range(3)))
+        await ask_llm("same", model_override="priced/model")
+
+    asyncio.run(run())
+
+    entry = metrics.snapshot()["by_caller"]["default"]["priced/model"]
+    assert entry["outcomes"] == {"ok": 1, "coalesced": 2, "cache_hit": 1}
+    assert entry["total_tokens"] == 1500
+
+
+def test_errors_are_recorded_by_type(metrics):
+    set_provider(FakeProvider(error=LLMRequestError("bad request", "m")))
+
+    with pytest.raises(LLMRequestError):
+        asyncio.run(ask_llm("hi", model_override="m", caller="chat"))
+
+    assert metrics.snapshot()["by_caller"]["chat"]["m"]["outcomes"] == {"LLMRequestError": 1}
+
+
+def test_stream_records_time_to_first_token(metrics):
+    set_provider(FakeProvider())
+
+    async def run():
+        return [chunk async for chunk in stream_llm("hi", model_override="m", caller="chat_stream")]
+
+    asyncio.run(run())
+
+    record = metrics.recent[-1]
+    assert record.streamed is True
+    assert record.outcome == "ok"
+    assert record.completion_tokens == 2
+    assert record.time_to_first_token_seconds >= 0.01
+
+
+def test_records_are_logged_as_json(metrics, caplog):
+    with caplog.at_level("INFO", logger="llm.calls"):
+        metrics.record(LLMCallRecord(model="priced/model", caller="chat", outcome="ok", latency_seconds=0.5,
+                                     prompt_tokens=10, completion_tokens=5))
+
+    logged = json.loads(caplog.records[-1].getMessage())
+    assert logged["caller"] == "chat"
+    assert logged["cost_usd"] > 0
+
+
+def test_metrics_endpoint(metrics):
+    set_provider(FakeProvider())
+    client.post("/api/chat/", json={"prompt": "hi", "model": "priced/model"})
+
+    response = client.get("/api/chat/metrics")
+
+    assert response.status_code == 200
+    assert response.json()["by_caller"]["chat"]["priced/model"]["calls"] == 1
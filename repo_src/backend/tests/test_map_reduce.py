@@ -0,0 +1,175 @@
+"""
+Tests for token-aware chunking and map-reduce extraction of long inputs.
+"""
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.llm_chat.providers import set_provider
+from repo_src.backend.llm_chat.tokens import estimate_tokens
+from repo_src.backend.pipelines.cascade import CascadeTier
+from repo_src.backend.pipelines.chunking import chunk_text
+from repo_src.backend.pipelines.user_ingestion import (
+    CHUNK_EXTRACTION_SYSTEM_MESSAGE,
+    MERGE_SYSTEM_MESSAGE,
+    MapReduceConfig,
+    _group_partials,
+    extract_user_profile,
+    merge_partial_profiles,
+    merge_wiki_sections,
+)
+from repo_src.backend.tests.conftest import ScriptedProvider
+
+TIERS = [CascadeTier(model="test/model")]
+
+
+def paragraphs(count, words=40):
+    return "\n\n".join(f"Paragraph {i}: " + "Jane likes distributed systems. " * (words // 4) for i in range(count))
+
+
+def map_reduce_answer(request):
+    """Answers chunk prompts with a partial profile and merge prompts with the merged profile"""
+    system, prompt = request.messages[0]["content"], request.messages[1]["content"]
+    if system == CHUNK_EXTRACTION_SYSTEM_MESSAGE:
+        part = prompt.split("part ")[1].split(" of")[0]
+        body = {
+            "user_id": "jane_doe" if part == "1" else None,
+            "name": "Jane Doe" if part == "1" else None,
+            "wiki_content": f"## Facts\n\n- fact {part}\n- shared fact",
+        }
+    elif system == MERGE_SYSTEM_MESSAGE:
+        partials = json.loads(prompt.split("PARTIAL PROFILES (in document order):\n")[1].rsplit("\n\nReturn", 1)[0])
+        body = {
+            "user_id": "jane_doe",
+            "name": "Jane Doe",
+            "wiki_content": "\n".join(p["wiki_content"] for p in partials),
+        }
+    else:
+        body = {"user_id": "jane_doe", "name": "Jane Doe", "wiki_content": "single shot " * 50}
+    return json.dumps(body)
+
+
+def test_chunks_respect_budget_and_keep_all_text():
+    text = paragraphs(30)
+    chunks = chunk_text(text, max_tokens=200)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    for i in range(30):
+        assert any(f"Paragraph {i}:" in chunk for chunk in chunks)
+
+
+def test_chunk_overlap_repeats_trailing_paragraph():
+    chunks = chunk_text(paragraphs(10, words=20), max_tokens=200, overlap_tokens=60)
+
+    first_tail = chunks[0].split("\n\n")[-1]
+    assert chunks[1].startswith(first_tail)
+
+
+def test_oversized_paragraph_is_split():
+    chunks = chunk_text("word " * 5000, max_tokens=100)
+
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert "".join(chunks).count("word") == 5000
+
+
+def test_small_input_is_one_chunk():
+    assert chunk_text("short text", max_tokens=100) == ["short text"]
+    assert chunk_text("   ", max_tokens=100) == []
+
+
+def test_group_partials_always_makes_progress():
+    huge = [{"wiki_content": "x" * 2000} for _ in range(5)]
+
+    groups = _group_partials(huge, max_tokens=10)
+
+    assert len(groups) < 5
+    assert all(len(group) >= 2 for group in groups)
+
+
+def test_merge_wiki_sections_combines_headers_and_dedupes():
+    merged = merge_wiki_sections([
+        "## Skills\n\n- Python\n- Go\n\n## Background\n\nGrew up in Ohio.",
+        "## skills\n\n- Go\n- Rust",
+    ])
+
+    assert merged == "## Skills\n\n- Python\n- Go\n- Rust\n\n## Background\n\nGrew up in Ohio."
+
+
+def test_merge_partial_profiles_votes_on_identity():
+    merged = merge_partial_profiles([
+        {"user_id": "jane", "name": None, "wiki_content": "- a"},
+        {"user_id": "jane_doe", "name": "Jane Doe", "bio": "Engineer", "wiki_content": "- b"},
+        {"user_id": "jane_doe", "name": "Jane Doe", "wiki_content": "- a"},
+    ])
+
+    assert merged == {"user_id": "jane_doe", "name": "Jane Doe", "bio": "Engineer", "wiki_content": "- a\n- b"}
+
+
+def test_long_input_uses_map_reduce_with_local_merge():
+    provider = ScriptedProvider(map_reduce_answer)
+    set_provider(provider)
+    config = MapReduceConfig(chunk_tokens=200, overlap_tokens=0, concurrency=4)
+
+    result = asyncio.run(extract_user_profile(paragraphs(20), tiers=TIERS, config=config))
+
+    chunk_calls = provider.calls_with(CHUNK_EXTRACTION_SYSTEM_MESSAGE)
+    assert chunk_calls > 1
+    assert provider.calls_with(MERGE_SYSTEM_MESSAGE) == 0
+    assert len(result.attempts) == chunk_calls
+    assert not result.escalated
+    assert result.value["name"] == "Jane Doe"
+    assert result.value["wiki_content"].count("## Facts") == 1
+    assert result.value["wiki_content"].count("- shared fact") == 1
+    for part in range(1, chunk_calls + 1):
+        assert f"- fact {part}" in result.value["wiki_content"]
+
+
+def test_llm_merge_strategy():
+    provider = ScriptedProvider(map_reduce_answer)
+    set_provider(provider)
+    config = MapReduceConfig(chunk_tokens=200, overlap_tokens=0, concurrency=4, merge_strategy="llm")
+
+    result = asyncio.run(extract_user_profile(paragraphs(8), tiers=TIERS, config=config))
+
+    chunk_calls = provider.calls_with(CHUNK_EXTRACTION_SYSTEM_MESSAGE)
+    assert chunk_calls > 1
+    assert provider.calls_with(MERGE_SYSTEM_MESSAGE) == 1
+    assert result.value["name"] == "Jane Doe"
+    for part in range(1, chunk_calls + 1):
+        assert f"- fact {part}" in result.value["wiki_content"]
+
+
+def test_map_concurrency_is_bounded():
+    provider = ScriptedProvider(map_reduce_answer, delay=0.01)
+    set_provider(provider)
+    config = MapReduceConfig(chunk_tokens=100, overlap_tokens=0, concurrency=2)
+
+    asyncio.run(extract_user_profile(paragraphs(20), tiers=TIERS, config=config))
+
+    assert provider.peak == 2
+
+
+def test_many_partials_merge_hierarchically():
+    provider = ScriptedProvider(map_reduce_answer)
+    set_provider(provider)
+    # Tiny budget: partial profiles can't all fit in one merge prompt
+    config = MapReduceConfig(chunk_tokens=60, overlap_tokens=0, concurrency=8, merge_strategy="llm")
+
+    result = asyncio.run(extract_user_profile(paragraphs(16, words=20), tiers=TIERS, config=config))
+
+    assert provider.calls_with(MERGE_SYSTEM_MESSAGE) > 1
+    for part in range(1, provider.calls_with(CHUNK_EXTRACTION_SYSTEM_MESSAGE) + 1):
+        assert f"- fact {part}\n" in result.value["wiki_content"] + "\n"
+
+
+def test_short_input_stays_single_shot():
+    provider = ScriptedProvider(map_reduce_answer)
+    set_provider(provider)
+
+    result = asyncio.run(extract_user_profile("Jane Doe is an engineer.", tiers=TIERS))
+
+    assert len(provider.requests) == 1  # neither chunk nor merge prompts
+    assert result.value["user_id"] == "jane_doe"
@@ -0,0 +1,98 @@
+"""
+Tests for keyset (cursor) pagination.
+"""
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.database.connection import Base, get_db
+from repo_src.backend.database.models import Item
+from repo_src.backend.functions.pagination import InvalidCursor, decode_cursor, encode_cursor, paginate
+from repo_src.backend.main import app
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def client(session_factory):
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    if previous is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = previous
+
+
+def test_cursors_round_trip_and_are_scoped():
+    cursor = encode_cursor("items", 42)
+
+    assert decode_cursor("items", cursor) == 42
+    for bad in ("", "%%%", encode_cursor("items", 1)[:-2], "WyJpdGVtcyIsInNldmVuIl0"):
+        with pytest.raises(InvalidCursor):
+            decode_cursor("items", bad)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("users", cursor)
+
+
+def test_pages_seek_past_the_last_id(session_factory):
+    db = session_factory()
+    db.add_all([Item(name=f"item {i}") for i in range(7)])
+    db.commit()
+
+    first = paginate(db.query(Item), Item.id, "items", 3)
+    second = paginate(db.query(Item), Item.id, "items", 3, cursor=first.next_cursor)
+    last = paginate(db.query(Item), Item.id, "items", 3, cursor=second.next_cursor)
+
+    assert [item.id for item in first.items + second.items + last.items] == list(range(1, 8))
+    assert last.next_cursor is None
+    # A full last page doesn't promise another one
+    assert paginate(db.query(Item), Item.id, "items", 7).next_cursor is None
+    db.close()
+
+
+def test_negative_limits_are_rejected(client, session_factory):
+    client.post("/api/items/", json={"name": "Lamp"})
+
+    for path in ("/users", "/api/items/"):
+        assert client.get(path, params={"limit": -1}).status_code == 422
+        assert client.get(path, params={"limit": 0}).json() == []
+    db = session_factory()
+    page = paginate(db.query(Item), Item.id, "items", -1)
+    assert (page.items, page.next_cursor) == ([], None)
+    db.close()
+
+
+def test_items_endpoint_pages_by_cursor_and_skip(client):
+    for i in range(5):
+        client.post("/api/items/", json={"name": f"item {i}"})
+
+    response = client.get("/api/items/?limit=2")
+    names = [item["name"] for item in response.json()]
+    while "x-next-cursor" in response.headers:
+        response = client.get("/api/items/", params={"limit": 2, "cursor": response.headers["x-next-cursor"]})
+        names += [item["name"] for item in response.json()]
+
+    assert names == [f"item {i}" for i in range(5)]
+    assert [item["name"] for item in client.get("/api/items/?skip=3&limit=5").json()] == ["item 3", "item 4"]
+    users_cursor = encode_cursor("users", 1)
+    assert client.get("/api/items/", params={"cursor": users_cursor}).status_code == 400
@@ -0,0 +1,120 @@
+"""
+Tests for single-flight coalescing of identical LLM calls.
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.llm_chat.singleflight import SingleFlight
+from repo_src.backend.llm_chat.llm_interface import ask_llm
+from repo_src.backend.llm_chat.providers import set_provider
+from repo_src.backend.tests.conftest import ScriptedProvider
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert calls == 1
+    assert flight.stats.leaders == 1
+    assert flight.stats.coalesced == 4
+    assert flight.in_flight() == 0
+
+
+def test_errors_propagate_to_every_waiter():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.stats.failures == 1
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+
+    async def fetch():
+        return "value"
+
+    async def run():
+        await flight.do("k", fetch)
+        await flight.do("k", fetch)
+
+    asyncio.run(run())
+    assert flight.stats.leaders == 2
+    assert flight.stats.coalesced == 0
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run():
+        first = asyncio.create_task(flight.do("k", fetch))
+        second = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "value"
+    assert flight.stats.cancelled == 0
+
+
+def test_upstream_cancelled_when_all_waiters_leave():
+    flight = SingleFlight()
+    finished = False
+
+    async def fetch():
+        nonlocal finished
+        await asyncio.sleep(1)
+        finished = True
+
+    async def run():
+        waiters = [asyncio.create_task(flight.do("k", fetch)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert finished is False
+    assert flight.stats.cancelled == 1
+    assert flight.in_flight() == 0
+
+
+def test_ask_llm_coalesces_identical_prompts():
+    provider = ScriptedProvider(["shared"], delay=0.05)
+    set_provider(provider)
+
+    async def run():
+        return await asyncio.gather(*(ask_llm("same") for _ in range(4)), ask_llm("different"))
+
+    results = asyncio.run(run())
+
+    assert results == ["shared"] * 5
+    assert len(provider.requests) == 2
@@ -0,0 +1,67 @@
+"""
+Tests for the SQLite pragma profile and pool sizing in database/connection.py.
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.database.connection import PoolConfig, SQLitePragmas, create_db_engine
+
+
+def pragma(conn, name):
+    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_production_profile_is_applied_to_every_connection(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path}/app.db", SQLitePragmas(), PoolConfig(size=3, max_overflow=1))
+
+    with engine.connect() as first, engine.connect() as second:
+        for conn in (first, second):
+            assert pragma(conn, "journal_mode") == "wal"
+            assert pragma(conn, "synchronous") == 1  # NORMAL
+            assert pragma(conn, "busy_timeout") == 5000
+            assert pragma(conn, "cache_size") == -8192
+            assert pragma(conn, "mmap_size") == 256 * 1024 * 1024
+            assert pragma(conn, "temp_store") == 2  # MEMORY
+    assert engine.pool.size() == 3
+    engine.dispose()
+
+
+def test_readers_do_not_block_a_writer_in_wal_mode(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path}/app.db", SQLitePragmas(busy_timeout_ms=100))
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    with engine.connect() as reader:
+        reader.exec_driver_sql("BEGIN")
+        assert reader.execute(text("SELECT count(*) FROM t")).scalar() == 1
+        # The reader's open read transaction would make this commit wait, then
+        # fail with "database is locked", under the rollback journal
+        with engine.begin() as writer:
+            writer.execute(text("INSERT INTO t VALUES (2)"))
+        assert reader.execute(text("SELECT count(*) FROM t")).scalar() == 1  # its snapshot
+        reader.exec_driver_sql("COMMIT")
+    engine.dispose()
+
+
+def test_profile_from_env(monkeypatch):
+    monkeypatch.setenv("SQLITE_SYNCHRONOUS", "full")
+    monkeypatch.setenv("SQLITE_MMAP_SIZE_MB", "0")
+
+    pragmas = SQLitePragmas.from_env()
+
+    assert (pragmas.journal_mode, pragmas.synchronous, pragmas.mmap_size_mb) == ("WAL", "FULL", 0)
+    monkeypatch.setenv("SQLITE_PRAGMA_PROFILE", "off")
+    assert SQLitePragmas.from_env() is None
+
+
+def test_invalid_pragma_values_are_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        SQLitePragmas(journal_mode="WAL; DROP TABLE users").statements()
+    monkeypatch.setenv("SQLITE_TEMP_STORE", "disk")
+    with pytest.raises(ValueError):
+        SQLitePragmas.from_env()
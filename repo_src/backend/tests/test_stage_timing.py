@@ -0,0 +1,123 @@
+"""
+Tests for per-stage ingestion timings and the run summary.
+"""
+import asyncio
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.pipelines.bulk_ingestion import BulkIngestionConfig, ingest_files, resolve_input_paths
+from repo_src.backend.pipelines.stage_timing import (
+    FileTiming,
+    percentile,
+    run_summary,
+    stage,
+    summarize_stages,
+    track,
+)
+from repo_src.backend.pipelines.user_ingestion import extract_user_profile
+
+TEST_DATA = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../test_data'))
+
+pytestmark = pytest.mark.usefixtures("fake_llm")
+
+
+@pytest.fixture(autouse=True)
+def no_stream_validation(monkeypatch):
+    monkeypatch.setenv("EXTRACTION_STREAM_VALIDATION", "false")
+
+
+@pytest.fixture
+def cohort(tmp_path):
+    for name in ("alice", "bob", "carol"):
+        shutil.copy(os.path.join(TEST_DATA, f"sample_user_{name}.txt"), tmp_path / f"{name}.txt")
+    return tmp_path
+
+
+def test_stages_are_ignored_without_an_active_record():
+    with stage("llm"):
+        pass
+
+    timing = FileTiming("a.txt")
+    with track(timing):
+        with stage("llm"):
+            pass
+        with stage("llm"):
+            pass
+    with stage("llm"):
+        pass
+
+    assert list(timing.stages) == ["llm"] and timing.stages["llm"] > 0
+
+
+def test_extraction_records_every_stage_and_its_tokens():
+    timing = FileTiming("alice.txt")
+    with open(os.path.join(TEST_DATA, "sample_user_alice.txt")) as f:
+        content = f.read()
+
+    with track(timing):
+        asyncio.run(extract_user_profile(content))
+
+    assert {"prompt", "llm", "parse", "validate"} <= set(timing.stages)
+    assert timing.llm_calls >= 1
+    assert timing.prompt_tokens > 0 and timing.completion_tokens > 0
+
+
+def test_shared_requests_are_split_between_their_files():
+    shared = FileTiming("batch", stages={"llm": 3.0}, prompt_tokens=10, completion_tokens=5, llm_calls=1)
+    files = [FileTiming("a"), FileTiming("b"), FileTiming("c")]
+
+    shared.share_among(files)
+
+    assert [timing.stages["llm"] for timing in files] == [1.0, 1.0, 1.0]
+    assert sum(timing.prompt_tokens for timing in files) == 10
+    assert sum(timing.completion_tokens for timing in files) == 5
+    assert all(timing.shared_with == 3 for timing in files)
+
+
+def test_percentiles_and_stage_summary():
+    values = [float(i) for i in range(1, 21)]
+    assert (percentile(values, 0.5), percentile(values, 0.95)) == (10.0, 19.0)
+    assert percentile([], 0.5) == 0.0
+
+    timings = [FileTiming(str(i), stages={"llm": value}) for i, value in enumerate(values)]
+    timings[0].stages["db"] = 0.5
+
+    summary = summarize_stages(timings)
+
+    assert list(summary) == ["llm", "db"]
+    assert summary["llm"]["p50"] == 10.0 and summary["llm"]["p95"] == 19.0 and summary["llm"]["total"] == 210.0
+    assert summary["db"]["count"] == 1
+
+
+def test_bulk_report_summarizes_each_file(cohort):
+    (cohort / "broken.txt").write_bytes(b"\xff\xfe not utf-8")
+    paths = resolve_input_paths([str(cohort)])
+
+    report = asyncio.run(ingest_files(paths, BulkIngestionConfig(), save=lambda *args: None))
+    summary = json.loads(json.dumps(report.to_dict(pipeline_version="test")))
+
+    assert summary["pipeline_version"] == "test"
+    assert summary["files"] == {"total": 4, "succeeded": 3, "failed": 1, "skipped": 0}
+    assert set(summary["stages"]) == {"read", "prompt", "llm", "parse", "validate", "db"}
+    assert summary["stages"]["db"]["count"] == 3
+    by_name = {os.path.basename(entry["path"]): entry for entry in summary["per_file"]}
+    assert by_name["broken.txt"]["status"] == "failed" and "UnicodeDecodeError" in by_name["broken.txt"]["error"]
+    alice = by_name["alice.txt"]
+    assert alice["bytes_read"] == os.path.getsize(cohort / "alice.txt")
+    assert alice["prompt_tokens"] > 0 and alice["llm_calls"] >= 1
+    assert summary["bytes_read"] == sum(entry["bytes_read"] for entry in summary["per_file"])
+    assert summary["tokens"]["prompt"] == sum(entry["prompt_tokens"] for entry in summary["per_file"])
+
+
+def test_run_summary_counts_skipped_files_but_not_their_throughput():
+    timings = [FileTiming("a", status="succeeded", bytes_read=100), FileTiming("b", status="skipped")]
+
+    summary = run_summary(timings, 2.0)
+
+    assert summary["files"]["skipped"] == 1
+    assert summary["throughput"] == {"files_per_second": 0.5, "bytes_per_second": 50.0, "tokens_per_second": 0.0}
@@ -0,0 +1,134 @@
+"""
+Tests for early-abort streaming validation of extraction output.
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.llm_chat.errors import LLMRateLimitError
+from repo_src.backend.llm_chat.providers import StreamChunk, set_provider
+from repo_src.backend.pipelines.cascade import CascadeStats, CascadeTier, run_cascade
+from repo_src.backend.pipelines.streaming_json import IncrementalObjectParser, StreamAbort, StreamingObjectValidator
+from repo_src.backend.pipelines.user_ingestion import make_stream_validator, validate_extraction
+from repo_src.backend.tests.conftest import ScriptedProvider
+
+TIERS = [CascadeTier(model="cheap/model"), CascadeTier(model="strong/model")]
+PROFILE = {"user_id": "ada", "name": "Ada", "bio": "Compiler writer",
+           "wiki_content": "## About\n\n" + "Ada writes compilers. " * 20}
+
+
+def cascade(provider, stats=None, file_content="x" * 1000):
+    set_provider(provider)
+    return asyncio.run(run_cascade(
+        prompt_text="extract", system_message="system", tiers=TIERS,
+        validate=validate_extraction, stats=stats or CascadeStats(),
+        stream_validator=make_stream_validator(file_content),
+    ))
+
+
+@pytest.mark.parametrize("piece", [1, 3, 64, 10000])
+def test_parser_reports_fields_as_they_complete(piece):
+    obj = {"user_id": "a", "name": 'A "B"', "n": -1.5, "tags": ["x", {"y": "}"}], "ok": True, "none": None}
+    text = "```json\n" + json.dumps(obj, indent=2) + "\n```\nHope this helps!"
+    parser = IncrementalObjectParser()
+
+    completed = []
+    for i in range(0, len(text), piece):
+        completed.extend(key for key, _ in parser.feed(text[i:i + piece]))
+
+    assert parser.done and parser.fields == obj
+    assert completed == list(obj)
+
+
+@pytest.mark.parametrize("text", [
+    '{"user_id": "a",}',
+    '{"user_id" "a"}',
+    '{"user_id": "a" "name": "b"}',
+    '{"user_id": nul, "name": "b"}',
+    '{"user_id": ["a"]]}',
+    "I'm sorry, but I can't help with that. " * 20,
+])
+def test_parser_aborts_malformed_output(text):
+    with pytest.raises(StreamAbort):
+        IncrementalObjectParser().feed(text)
+
+
+def test_validator_checks_types_and_required_fields():
+    with pytest.raises(StreamAbort, match="user_id"):
+        StreamingObjectValidator(field_types={"user_id": (str,)}).feed('{"user_id": 42, ')
+    with pytest.raises(StreamAbort, match="name"):
+        StreamingObjectValidator(required=("user_id", "name")).feed('{"user_id": "a"}')
+
+    seen = []
+    validator = StreamingObjectValidator(on_field=lambda key, value: seen.append(key))
+    validator.feed('{"a": 1, "b": ')
+    assert seen == ["a"] and not validator.done
+
+
+def test_off_topic_response_is_aborted_and_escalated():
+    prose = "I'm sorry, but I can't help with extracting that profile today. " * 40
+    provider = ScriptedProvider({"cheap/model": prose, "strong/model": json.dumps(PROFILE)})
+    stats = CascadeStats()
+
+    result = cascade(provider, stats)
+
+    assert result.value["user_id"] == "ada"
+    assert result.attempts[0].aborted and "aborted early" in result.attempts[0].reason
+    assert provider.closed["cheap/model"]
+    assert provider.sent["cheap/model"] * provider.piece < len(prose) // 3
+    assert stats.stream_aborts == 1 and stats.stream_abort_tokens > 0
+
+
+def test_short_wiki_aborts_before_the_rest_is_generated():
+    short = {"user_id": "ada", "name": "Ada", "wiki_content": "Too short.", "bio": "x" * 2000}
+    provider = ScriptedProvider({"cheap/model": json.dumps(short), "strong/model": json.dumps(PROFILE)})
+
+    result = cascade(provider)
+
+    assert "wiki_content too short" in result.attempts[0].reason
+    assert provider.closed["cheap/model"]  # the long bio after wiki_content was never read
+    assert result.model == "strong/model"
+
+
+def test_reading_stops_at_the_closing_brace():
+    trailing = "\n```\n\nLet me know if you need anything else! " * 50
+    provider = ScriptedProvider({"cheap/model": "```json\n" + json.dumps(PROFILE) + trailing})
+
+    result = cascade(provider)
+
+    assert result.value == PROFILE
+    assert provider.closed["cheap/model"]
+    assert not result.escalated
+
+
+def test_retry_restarts_validation(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_RETRIES", "1")
+    monkeypatch.setenv("LLM_RETRY_BASE_DELAY", "0")
+
+    class FlakyProvider(ScriptedProvider):
+        calls = 0
+
+        async def stream(self, request):
+            self.calls += 1
+            if self.calls == 1:
+                yield StreamChunk(text='{"user_id": "half')
+                raise LLMRateLimitError("slow down", retry_after=0)
+            async for chunk in super().stream(request):
+                yield chunk
+
+    result = cascade(FlakyProvider({"cheap/model": json.dumps(PROFILE)}))
+
+    assert result.value["user_id"] == "ada"
+
+
+def test_aborted_calls_are_recorded_in_metrics(metrics):
+    provider = ScriptedProvider({"cheap/model": "no json here " * 100, "strong/model": json.dumps(PROFILE)})
+
+    cascade(provider)
+
+    outcomes = metrics.snapshot()["by_caller"]["ingestion"]["cheap/model"]["outcomes"]
+    assert outcomes == {"aborted": 1}
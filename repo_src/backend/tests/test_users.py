@@ -1,13 +1,17 @@
 """
 Unit tests for user CRUD operations (Component B - SQL Service)
 """
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from repo_src.backend.adapters.user_service import UserService
 from repo_src.backend.database.models import Base, User
 from repo_src.backend.functions.users import (
+    bulk_upsert_users,
     create_or_update_user,
     get_user_by_id,
     get_all_users,
@@ -168,6 +172,16 @@ def test_update_user_not_found(test_db):
     assert result is None
 
 
+def test_update_user_without_commit_joins_the_callers_transaction(test_db):
+    """With commit=False the update is undone by the caller's rollback"""
+    create_or_update_user(test_db, UserCreate(user_id="update_test", name="Original Name"))
+
+    update_user(test_db, "update_test", UserUpdate(name="Updated Name"), commit=False)
+    test_db.rollback()
+
+    assert get_user_by_id(test_db, "update_test").name == "Original Name"
+
+
 def test_delete_user(test_db):
     """Test deleting a user"""
     # Create a user
@@ -228,3 +242,93 @@ def test_unique_user_id_constraint(test_db):
     # Should be the same database record (same ID)
     assert user1.id == user2.id
     assert user2.name == "Second User"  # Name should be updated
+
+
+def test_bulk_upsert_reports_each_row(test_db):
+    """Bulk upsert creates and updates in batches and reports every row in input order"""
+    create_or_update_user(test_db, UserCreate(user_id="alice", name="Alice", bio="Designer"))
+    rows = [
+        UserCreate(user_id="bob", name="Bob"),
+        UserCreate(user_id="alice", name="Alice Smith"),
+        UserCreate(user_id="carol", name="Carol"),
+        UserCreate(user_id="bob", name="Robert"),  # later in the same call, another batch
+    ]
+
+    outcomes = bulk_upsert_users(test_db, rows, batch_size=2)
+
+    assert [(o.index, o.user_id, o.status) for o in outcomes] == [
+        (0, "bob", "created"), (1, "alice", "updated"), (2, "carol", "created"), (3, "bob", "updated"),
+    ]
+    assert outcomes[0].id == outcomes[3].id
+    users = {user.user_id: user for user in test_db.query(User).all()}
+    assert users["bob"].name == "Robert"
+    assert (users["alice"].name, users["alice"].bio) == ("Alice Smith", "Designer")  # unset fields are kept
+
+
+def test_bulk_upsert_is_one_transaction(test_db):
+    """Loading many users takes a few statements per batch and a single commit"""
+    statements, commits = [], []
+    engine = test_db.get_bind()
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    event.listen(engine, "commit", lambda *args: commits.append(1))
+
+    outcomes = bulk_upsert_users(test_db, (UserCreate(user_id=f"u{i}", name=f"U{i}") for i in range(250)),
+                                 batch_size=100)
+
+    assert len(outcomes) == 250 and len(commits) == 1
+    assert len([s for s in statements if not s.startswith(("SAVEPOINT", "RELEASE"))]) == 6  # SELECT + INSERT per batch
+    assert test_db.query(User).count() == 250
+
+
+def test_bulk_upsert_isolates_failing_rows(test_db):
+    """A row the database rejects is reported without losing the rest of its batch"""
+    test_db.execute(text(
+        "CREATE TRIGGER reject_banned BEFORE INSERT ON users WHEN NEW.user_id = 'banned' "
+        "BEGIN SELECT RAISE(ABORT, 'banned user'); END"
+    ))
+    test_db.commit()
+    rows = [UserCreate(user_id=user_id, name=user_id) for user_id in ("a", "banned", "b")]
+
+    outcomes = bulk_upsert_users(test_db, rows)
+
+    assert [o.status for o in outcomes] == ["created", "failed", "created"]
+    assert "banned user" in outcomes[1].error
+    assert sorted(user.user_id for user in test_db.query(User).all()) == ["a", "b"]
+
+
+def test_upsert_is_a_single_statement(test_db):
+    """create_or_update_user is one INSERT ... ON CONFLICT, without a prior read"""
+    create_or_update_user(test_db, UserCreate(user_id="dana", name="Dana", bio="Astronomer"))
+    statements = []
+    event.listen(test_db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    user = create_or_update_user(test_db, UserCreate(user_id="dana", name="Dana Park"))
+
+    assert len(statements) == 1 and "ON CONFLICT" in statements[0]
+    assert (user.name, user.bio) == ("Dana Park", "Astronomer")
+
+
+def test_concurrent_upserts_of_one_user_do_not_conflict(tmp_path):
+    """Many workers upserting the same user_id at once never hit the unique constraint"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'hammer.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def hammer(worker):
+        upsert = UserService.create_or_update_user if worker % 2 else create_or_update_user
+        db = SessionLocal()
+        try:
+            for attempt in range(25):
+                user = upsert(db, UserCreate(user_id="contested", name=f"Worker {worker}.{attempt}"))
+                assert user.user_id == "contested"
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(hammer, range(8)))  # re-raises any worker's exception
+
+    db = SessionLocal()
+    users = db.query(User).filter(User.user_id == "contested").all()
+    assert len(users) == 1 and users[0].name.startswith("Worker ")
+    db.close()
+    engine.dispose()
@@ -4,7 +4,7 @@ Tests for the Users API endpoints.
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -97,6 +97,25 @@ def test_get_all_users():
     assert "wikiContent" not in data[0]  # Summary view doesn't include wikiContent
 
 
+def test_list_does_not_load_wiki_content():
+    """Test that the list query leaves the wiki_content column unread."""
+    client.post("/users", json={"user_id": "alice", "name": "Alice", "wiki_content": "x" * 20000})
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/users")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert response.json() == [{"userId": "alice", "name": "Alice", "bio": None}]
+    assert len(statements) == 1 and "wiki_content" not in statements[0]
+
+
 def test_get_user_by_id():
     """Test getting a single user by ID."""
     # Create a user
@@ -196,6 +215,26 @@ def test_pagination():
     assert len(response.json()) == 2
 
 
+def test_cursor_pagination():
+    """Test paging through users with the X-Next-Cursor header."""
+    for i in range(5):
+        client.post("/users", json={"user_id": f"user{i}", "name": f"User {i}"})
+
+    response = client.get("/users?limit=2")
+    seen = [user["userId"] for user in response.json()]
+    while "x-next-cursor" in response.headers:
+        response = client.get(f"/users?limit=2&cursor={response.headers['x-next-cursor']}")
+        assert response.status_code == 200
+        seen += [user["userId"] for user in response.json()]
+        # A user added mid-scan doesn't shift the remaining pages
+        client.post("/users", json={"user_id": f"late{len(seen)}", "name": "Late"})
+
+    assert seen[:5] == [f"user{i}" for i in range(5)]
+    assert len(seen) == len(set(seen))
+    assert client.get("/users?skip=1&cursor=abc").status_code == 400
+    assert client.get("/users?cursor=not-a-cursor").status_code == 400
+
+
 def test_partial_update():
     """Test that partial updates only change specified fields."""
     # Create a user
@@ -0,0 +1,134 @@
+"""
+Tests that write endpoints get server-generated columns back from the write
+statement itself (RETURNING) instead of re-reading the row after commit.
+"""
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+from repo_src.backend.database.connection import Base, get_db
+from repo_src.backend.main import app
+
+WRITES = ("INSERT", "UPDATE", "DELETE")
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(engine):
+    # Same session settings as get_db
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = session_factory(expire_on_commit=False)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    if previous is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = previous
+
+
+@pytest.fixture
+def statements(engine):
+    """SQL statements issued by the request under test; clear() it before the request"""
+    issued = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        issued.append(" ".join(statement.split()).upper())
+
+    yield issued
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def writes(issued):
+    return [statement for statement in issued if statement.startswith(WRITES)]
+
+
+def test_create_item_is_one_insert(client, statements):
+    statements.clear()
+    response = client.post("/api/items/", json={"name": "Lamp", "description": "Desk lamp"})
+
+    assert response.status_code == 201
+    assert response.json()["id"] and response.json()["created_at"]
+    assert len(statements) == 1
+    assert statements[0].startswith("INSERT INTO ITEMS") and "RETURNING" in statements[0]
+
+
+def test_update_item_is_one_update(client, statements):
+    item_id = client.post("/api/items/", json={"name": "Lamp"}).json()["id"]
+
+    statements.clear()
+    response = client.put(f"/api/items/{item_id}", json={"description": "Floor lamp"})
+
+    assert response.status_code == 200
+    assert response.json()["description"] == "Floor lamp" and response.json()["name"] == "Lamp"
+    assert response.json()["updated_at"]
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE ITEMS") and "RETURNING" in statements[0]
+    assert client.put("/api/items/999", json={"name": "Missing"}).status_code == 404
+
+
+def test_create_user_writes_once_and_never_reads_back(client, statements):
+    statements.clear()
+    response = client.post("/users", json={"user_id": "ada", "name": "Ada", "bio": "Writes compilers"})
+
+    assert response.status_code == 201
+    assert response.json()["createdAt"]
+    # The duplicate check, then the INSERT; nothing after the write
+    assert len(writes(statements)) == 1
+    assert statements[-1].startswith("INSERT INTO USERS") and "RETURNING" in statements[-1]
+
+
+def test_update_user_is_one_update(client, statements):
+    client.post("/users", json={"user_id": "ada", "name": "Ada"})
+
+    statements.clear()
+    response = client.put("/users/ada", json={"bio": "Writes compilers"})
+
+    assert response.status_code == 200
+    assert response.json()["bio"] == "Writes compilers" and response.json()["name"] == "Ada"
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE USERS") and "RETURNING" in statements[0]
+    assert client.put("/users/nobody", json={"bio": "?"}).status_code == 404
+
+
+def test_submit_job_is_one_insert(client, statements):
+    statements.clear()
+    response = client.post("/api/ingestion/jobs", json={"text": "Ada writes compilers."})
+
+    assert response.status_code == 202
+    assert response.json()["id"] and response.json()["status"] == "queued"
+    assert len(statements) == 1 and "RETURNING" in statements[0]
+
+
+def test_update_item_without_update_returning_reads_then_updates(client, engine, statements, monkeypatch):
+    item_id = client.post("/api/items/", json={"name": "Lamp"}).json()["id"]
+    monkeypatch.setattr(engine.dialect, "update_returning", False)
+
+    statements.clear()
+    response = client.put(f"/api/items/{item_id}", json={"description": "Floor lamp"})
+
+    assert response.status_code == 200
+    assert response.json()["description"] == "Floor lamp" and response.json()["name"] == "Lamp"
+    assert statements[0].startswith("SELECT") and not any("RETURNING" in statement for statement in statements)
+    assert client.put("/api/items/999", json={"name": "Missing"}).status_code == 404
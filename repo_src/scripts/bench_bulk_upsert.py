@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: loading users one at a time vs in bulk on SQLite.
+
+For each row count, a fresh SQLite file database is loaded with synthetic
+users (insert pass), then every user is written again with a new bio (update
+pass). Compared:
+  per-row      functions/users.create_or_update_user per user (an upsert and a commit each)
+  orm-batch    one SELECT of the existing users, then ORM objects and one commit
+  bulk/<size>  functions/users.bulk_upsert_users with the given batch size
+
+Reports wall time, rows/s and SQL statements per pass. The per-row loader
+is skipped above --per-row-limit rows, since it commits (and fsyncs) once per row.
+
+Usage:
+    python repo_src/scripts/bench_bulk_upsert.py [--rows 10000,100000] [--batch-sizes 100,500,2000]
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from repo_src.backend.data.schemas import UserCreate
+from repo_src.backend.database.models import Base, User
+from repo_src.backend.functions.users import bulk_upsert_users, create_or_update_user
+
+WIKI = "## About\n\n" + "Works on distributed systems and mentors new engineers. " * 8
+
+
+def make_users(count: int, bio: str):
+    return [
+        UserCreate(user_id=f"user_{index:07d}", name=f"User {index}", bio=f"{bio} #{index}", wiki_content=WIKI)
+        for index in range(count)
+    ]
+
+
+def per_row(db, users):
+    for user in users:
+        create_or_update_user(db, user)
+
+
+def orm_batch(db, users):
+    # Baseline: load the existing rows, then update or add an ORM object per user
+    latest = {user.user_id: user for user in users}
+    existing = {user.user_id: user for user in db.query(User).filter(User.user_id.in_(list(latest))).all()}
+    for user_id, user in latest.items():
+        if user_id in existing:
+            for key, value in user.model_dump(exclude_unset=True).items():
+                setattr(existing[user_id], key, value)
+        else:
+            db.add(User(**user.model_dump()))
+    db.commit()
+
+
+def bulk(batch_size):
+    def load(db, users):
+        bulk_upsert_users(db, users, batch_size=batch_size)
+    return load
+
+
+def run_pass(session_factory, counter, loader, users):
+    db = session_factory()
+    counter[0] = 0
+    start = time.perf_counter()
+    try:
+        loader(db, users)
+    finally:
+        db.close()
+    return time.perf_counter() - start, counter[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-row vs bulk user upserts on SQLite")
+    parser.add_argument("--rows", default="10000,100000", help="Comma-separated row counts")
+    parser.add_argument("--batch-sizes", default="100,500,2000", help="Comma-separated bulk batch sizes")
+    parser.add_argument("--per-row-limit", type=int, default=10000,
+                        help="Skip the per-row loader above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'loader':<11} {'insert':>9} {'rows/s':>9} {'stmts':>7} {'update':>9} {'rows/s':>9} {'stmts':>7}")
+    for count in [int(value) for value in args.rows.split(",")]:
+        inserts, updates = make_users(count, "Engineer"), make_users(count, "Staff engineer")
+        loaders = [("orm-batch", orm_batch)]
+        loaders += [(f"bulk/{size}", bulk(int(size))) for size in args.batch_sizes.split(",")]
+        if count <= args.per_row_limit:
+            loaders.insert(0, ("per-row", per_row))
+        for label, loader in loaders:
+            with tempfile.TemporaryDirectory() as directory:
+                engine = create_engine(f"sqlite:///{directory}/bench.db")
+                Base.metadata.create_all(bind=engine)
+                counter = [0]
+
+                @event.listens_for(engine, "before_cursor_execute")
+                def count_statement(*_):
+                    counter[0] += 1
+
+                session_factory = sessionmaker(bind=engine, autoflush=False)
+                insert_seconds, insert_statements = run_pass(session_factory, counter, loader, inserts)
+                update_seconds, update_statements = run_pass(session_factory, counter, loader, updates)
+                engine.dispose()
+            print(f"{count:>7} {label:<11} {insert_seconds:>8.2f}s {count / insert_seconds:>9.0f} {insert_statements:>7} "
+                  f"{update_seconds:>8.2f}s {count / update_seconds:>9.0f} {update_statements:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark: token reduction vs information kept by local pre-condensation.
+
+For each transcript in test_data/ and a range of token budgets, reports the
+prompt tokens saved and the share of the document's key terms (names,
+technologies, places, numbers - capitalised or numeric words past the start
+of a sentence) that survive condensation. With --extract, each document is
+also extracted from both the original and the condensed text through the
+configured LLM (needs OPENROUTER_API_KEY), and the key terms of the original
+extraction's wiki_content found in the condensed one are reported.
+
+Finally, times condensing a batch of documents in-process vs in the process pool.
+
+Usage:
+    python repo_src/scripts/bench_condense.py [--budgets 1.0,0.75,0.5,0.35] [--batch 400] [--extract]
+"""
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from repo_src.backend.llm_chat.tokens import estimate_tokens
+from repo_src.backend.pipelines.condense import (
+    CondenseConfig,
+    condense_documents,
+    condense_text,
+    shutdown_condense_pool,
+)
+
+_LABEL = re.compile(r"^[A-Z][\w .'-]{0,40}:\s+", re.M)
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+def key_terms(text: str) -> set:
+    """Capitalised or numeric words that don't start a sentence (a cheap proxy for facts)"""
+    terms = set()
+    for sentence in _SENTENCE.split(_LABEL.sub("", text)):
+        for word in re.findall(r"[A-Za-z0-9][\w+#.-]*[\w+#]|\d", sentence)[1:]:
+            if (word[0].isupper() or word[0].isdigit()) and word not in ("I", "I'm", "I've", "I'd"):
+                terms.add(word)
+    return terms
+
+
+def recall(terms: set, text: str) -> float:
+    return sum(1 for term in terms if term in text) / len(terms) if terms else 1.0
+
+
+async def extraction_recall(original: str, condensed: str) -> float:
+    from repo_src.backend.pipelines.user_ingestion import extract_user_profile
+    disabled = CondenseConfig(enabled=False)
+    full = await extract_user_profile(original, condense=disabled)
+    short = await extract_user_profile(condensed, condense=disabled)
+    return recall(key_terms(full.value.get("wiki_content") or ""), short.value.get("wiki_content") or "")
+
+
+async def main_async(args) -> None:
+    files = sorted((project_root / "test_data").glob("*.txt"))
+    fractions = [float(f) for f in args.budgets.split(",")]
+
+    header = f"{'file':<26} {'budget':>7} {'tokens':>13} {'saved':>6} {'key terms kept':>15}"
+    print(header + (f" {'wiki terms kept':>16}" if args.extract else ""))
+    totals = {fraction: [0, 0, 0.0] for fraction in fractions}
+    for path in files:
+        text = path.read_text(encoding="utf-8")
+        original = estimate_tokens(text)
+        terms = key_terms(text)
+        for fraction in fractions:
+            # A fraction of 1.0 only strips boilerplate and repeats
+            budget = 0 if fraction >= 1 else int(original * fraction)
+            result = condense_text(text, CondenseConfig(enabled=True, token_budget=budget))
+            kept = recall(terms, result.text)
+            saved = 1 - result.condensed_tokens / original
+            totals[fraction][0] += original
+            totals[fraction][1] += result.condensed_tokens
+            totals[fraction][2] += kept / len(files)
+            line = (f"{path.name:<26} {budget or 'none':>7} {original:>5} -> {result.condensed_tokens:>5} "
+                    f"{saved:>6.0%} {kept:>15.0%}")
+            if args.extract:
+                line += f" {await extraction_recall(text, result.text):>16.0%}"
+            print(line)
+    print()
+    for fraction, (original, condensed, kept) in totals.items():
+        label = "none" if fraction >= 1 else f"{fraction:.0%}"
+        print(f"budget {label:>5}: {1 - condensed / original:.0%} fewer prompt tokens, {kept:.0%} of key terms kept")
+
+    # Throughput: a batch of larger documents, in-process vs the process pool
+    samples = [path.read_text(encoding="utf-8") * 4 for path in files]
+    batch = [samples[i % len(samples)] + f"\n\nSession {i}." for i in range(args.batch)]
+    tokens = sum(estimate_tokens(document) for document in batch)
+    print(f"\nCondensing {len(batch)} documents ({tokens} tokens) to {args.batch_budget} tokens each:")
+    for label, processes in (("in-process", 1), (f"process pool ({args.processes or os.cpu_count()})", args.processes)):
+        config = CondenseConfig(enabled=True, token_budget=args.batch_budget, processes=processes, pool_min_tokens=0)
+        if processes != 1:
+            await condense_documents(batch[:1], config)  # start the workers outside the timing
+        start = time.perf_counter()
+        await condense_documents(batch, config)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<20} {elapsed:6.2f}s  {len(batch) / elapsed:7.1f} docs/s")
+    shutdown_condense_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local pre-condensation of transcripts")
+    parser.add_argument("--budgets", default="1.0,0.75,0.5,0.35",
+                        help="Token budgets as fractions of each document (1.0 = no cap)")
+    parser.add_argument("--batch", type=int, default=400, help="Documents in the throughput batch")
+    parser.add_argument("--batch-budget", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=0, help="Pool size (0 = one per CPU)")
+    parser.add_argument("--extract", action="store_true", help="Also compare real extractions (uses the LLM)")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
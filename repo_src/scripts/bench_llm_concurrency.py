@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark: do concurrent /api/chat calls and /users reads overlap?
+
+Drives the FastAPI app in-process (httpx ASGI transport) while the upstream
+LLM is simulated by an httpx MockTransport with a fixed latency. Two upstream
+modes are compared:
+
+    async     - the handler awaits asyncio.sleep (how the pooled async client behaves)
+    blocking  - the handler calls time.sleep (how the old synchronous client behaved)
+
+Usage:
+    python repo_src/scripts/bench_llm_concurrency.py [--chats 10] [--reads 50] [--latency 0.5]
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+# Cached answers from one mode would be served to the next and hide the upstream latency
+os.environ["LLM_CACHE_ENABLED"] = "false"
+
+from repo_src.backend.main import app
+from repo_src.backend.database.connection import Base, get_db
+from repo_src.backend.database.models import User
+from repo_src.backend.llm_chat.cache import set_cache
+from repo_src.backend.llm_chat.providers import OpenRouterProvider, set_provider, close_provider
+
+
+def make_completion_body(text: str) -> dict:
+    """Minimal OpenAI-compatible chat-completion response body"""
+    return {
+        "id": "bench",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "bench/model",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+    }
+
+
+def install_fake_upstream(latency: float, blocking: bool) -> None:
+    """Point the shared provider at a simulated upstream with fixed latency"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if blocking:
+            time.sleep(latency)
+        else:
+            await asyncio.sleep(latency)
+        return httpx.Response(200, json=make_completion_body("ok"))
+
+    set_provider(OpenRouterProvider(
+        api_key="bench",
+        base_url="http://upstream.bench/api/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    ))
+
+
+def setup_database(user_count: int = 50) -> None:
+    """Use a shared in-memory database seeded with a few users"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = SessionLocal()
+    db.add_all([User(user_id=f"bench_{i}", name=f"Bench {i}", bio="bench") for i in range(user_count)])
+    db.commit()
+    db.close()
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+
+async def timed(coro_factory):
+    """Run a request coroutine and return its latency in seconds"""
+    start = time.perf_counter()
+    response = await coro_factory()
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run_mode(chats: int, reads: int, latency: float, blocking: bool) -> dict:
+    """Fire `chats` chat calls and `reads` user list reads at once"""
+    set_cache(None)  # every chat call must reach the simulated upstream
+    install_fake_upstream(latency, blocking)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        chat_calls = [
+            timed(lambda i=i: client.post("/api/chat/", json={"prompt": f"hello {i}"}))
+            for i in range(chats)
+        ]
+        # Stagger reads slightly so they land while chats are in flight
+        async def delayed_read(i):
+            await asyncio.sleep(0.001 * i)
+            return await timed(lambda: client.get("/users"))
+
+        read_calls = [delayed_read(i) for i in range(reads)]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*chat_calls, *read_calls)
+        wall = time.perf_counter() - start
+    await close_provider()
+
+    chat_latencies = results[:chats]
+    read_latencies = sorted(results[chats:])
+    return {
+        "wall": wall,
+        "serial_estimate": chats * latency,
+        "chat_p50": statistics.median(chat_latencies),
+        "read_p50": statistics.median(read_latencies),
+        "read_max": read_latencies[-1],
+    }
+
+
+def print_report(mode: str, stats: dict) -> None:
+    overlap = stats["serial_estimate"] / stats["wall"] if stats["wall"] else 0.0
+    print(f"{mode:<9} wall={stats['wall']:.3f}s  serial_chat_time={stats['serial_estimate']:.3f}s  "
+          f"overlap={overlap:.1f}x  chat_p50={stats['chat_p50']:.3f}s  "
+          f"users_p50={stats['read_p50'] * 1000:.1f}ms  users_max={stats['read_max'] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM call concurrency against /users reads")
+    parser.add_argument("--chats", type=int, default=10, help="Concurrent /api/chat calls")
+    parser.add_argument("--reads", type=int, default=50, help="Concurrent GET /users calls")
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated upstream latency (s)")
+    args = parser.parse_args()
+
+    setup_database()
+    print(f"{args.chats} chat calls + {args.reads} /users reads, upstream latency {args.latency}s\n")
+    for mode, blocking in (("async", False), ("blocking", True)):
+        stats = asyncio.run(run_mode(args.chats, args.reads, args.latency, blocking))
+        print_report(mode, stats)
+
+
+if __name__ == "__main__":
+    main()
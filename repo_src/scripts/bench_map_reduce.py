@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-shot vs map-reduce extraction of long transcripts.
+
+The upstream model is simulated in-process. Each call takes
+    base latency + prompt_tokens / prefill rate + completion_tokens / decode rate
+where the completion length scales with the input (capped at max_tokens),
+so a single huge prompt pays for one long serial generation while
+map-reduce pays for several shorter parallel ones plus the merge. Both merge
+strategies are measured: "local" merges the partial profiles section by
+section in-process, "llm" asks the model to rewrite them. Inputs that exceed
+the simulated context window fail in single-shot mode, as they would upstream.
+
+Usage:
+    python repo_src/scripts/bench_map_reduce.py [--sizes 5000,20000,60000] [--chunk-tokens 6000] [--concurrency 8]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from repo_src.backend.llm_chat.cache import set_cache
+from repo_src.backend.llm_chat.errors import LLMRequestError
+from repo_src.backend.llm_chat.providers import CompletionResult, LLMProvider, set_provider
+from repo_src.backend.llm_chat.tokens import estimate_message_tokens, estimate_tokens
+from repo_src.backend.pipelines.cascade import CascadeTier
+from repo_src.backend.pipelines.user_ingestion import (
+    MERGE_SYSTEM_MESSAGE,
+    MapReduceConfig,
+    extract_user_profile,
+)
+
+
+class SimulatedModel(LLMProvider):
+    """Answers extraction and merge prompts with latency proportional to token counts"""
+
+    def __init__(self, args):
+        self.args = args
+        self.calls = 0
+
+    async def complete(self, request):
+        self.calls += 1
+        prompt_tokens = estimate_message_tokens(request.messages)
+        if prompt_tokens > self.args.context_window:
+            raise LLMRequestError(
+                f"prompt of {prompt_tokens} tokens exceeds the {self.args.context_window}-token context window",
+                request.model,
+            )
+        is_merge = request.messages[0]["content"] == MERGE_SYSTEM_MESSAGE
+        ratio = self.args.merge_output_ratio if is_merge else self.args.output_ratio
+        completion_tokens = min(request.max_tokens, int(prompt_tokens * ratio))
+        latency = (
+            self.args.base_latency
+            + prompt_tokens / self.args.prefill_tps
+            + completion_tokens / self.args.decode_tps
+        )
+        await asyncio.sleep(latency * self.args.time_scale)
+        body = {
+            "user_id": "alice_example",
+            "name": "Alice Example",
+            "bio": "Simulated profile",
+            "wiki_content": "## Notes\n\n" + "- detail\n" * (completion_tokens // 3),
+        }
+        return CompletionResult(
+            text=json.dumps(body), model=request.model,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+        )
+
+
+def build_transcript(target_tokens: int) -> str:
+    """Repeat the sample transcripts until the text reaches target_tokens"""
+    samples = [p.read_text(encoding="utf-8") for p in sorted((project_root / "test_data").glob("*.txt"))]
+    parts = []
+    tokens = 0
+    while tokens < target_tokens:
+        part = f"--- Session {len(parts) + 1} ---\n\n{samples[len(parts) % len(samples)]}"
+        parts.append(part)
+        tokens += estimate_tokens(part)
+    return "\n\n".join(parts)
+
+
+async def run_once(text: str, config: MapReduceConfig, args) -> dict:
+    provider = SimulatedModel(args)
+    set_provider(provider)
+    tiers = [CascadeTier(model="bench/model", max_tokens=args.max_tokens)]
+    start = time.perf_counter()
+    try:
+        await extract_user_profile(text, tiers=tiers, config=config)
+        outcome = "ok"
+    except (LLMRequestError, ValueError) as e:
+        outcome = f"failed ({type(e).__name__})"
+    return {"seconds": (time.perf_counter() - start) / args.time_scale, "calls": provider.calls, "outcome": outcome}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-shot and map-reduce extraction wall time")
+    parser.add_argument("--sizes", default="5000,20000,60000,150000", help="Comma-separated input sizes in tokens")
+    parser.add_argument("--chunk-tokens", type=int, default=6000)
+    parser.add_argument("--overlap-tokens", type=int, default=200)
+    parser.add_argument("--map-max-tokens", type=int, default=2048, help="Completion cap per chunk")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-tokens", type=int, default=4096, help="Completion cap per call")
+    parser.add_argument("--context-window", type=int, default=128000)
+    parser.add_argument("--base-latency", type=float, default=0.3, help="Fixed seconds per call")
+    parser.add_argument("--prefill-tps", type=float, default=5000, help="Simulated prompt tokens per second")
+    parser.add_argument("--decode-tps", type=float, default=80, help="Simulated output tokens per second")
+    parser.add_argument("--output-ratio", type=float, default=0.3, help="Completion tokens per prompt token")
+    parser.add_argument("--merge-output-ratio", type=float, default=0.8)
+    parser.add_argument("--time-scale", type=float, default=0.05,
+                        help="Sleep this fraction of each simulated latency; reported times are rescaled")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LLM_MAX_RETRIES", "0")
+    set_cache(None)
+
+    modes = [("single-shot", MapReduceConfig(chunk_tokens=10**9))]
+    for strategy in ("local", "llm"):
+        modes.append((f"map-{strategy}", MapReduceConfig(
+            args.chunk_tokens, args.overlap_tokens, args.concurrency, args.map_max_tokens, strategy
+        )))
+
+    print(f"{'input tokens':>12} | {'mode':<11} | {'wall (s)':>8} | {'calls':>5} | outcome")
+    print("-" * 56)
+    for size in (int(s) for s in args.sizes.split(",")):
+        text = build_transcript(size)
+        for label, config in modes:
+            result = asyncio.run(run_once(text, config, args))
+            print(f"{estimate_tokens(text):>12} | {label:<11} | {result['seconds']:>8.2f} | "
+                  f"{result['calls']:>5} | {result['outcome']}")
+
+
+if __name__ == "__main__":
+    main()
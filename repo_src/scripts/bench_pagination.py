@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: OFFSET vs keyset (cursor) pagination of GET /users on SQLite.
+
+Loads --rows synthetic users into a fresh SQLite file database, then pages
+through them with UserService.get_users_page: once following next_cursor
+from the first page to the last, and once with skip at every
+--offset-stride-th page across the same range (OFFSET is random access,
+and walking every page of a million rows with it takes minutes). Each page
+gets a new session, as a request would.
+
+Reports per-page latency percentiles for both, and the latency at a few
+depths into the list (for the cursor walk, the median of the pages around
+that depth).
+
+Usage:
+    python repo_src/scripts/bench_pagination.py [--rows 1000000] [--page-size 100] [--offset-stride 50]
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from repo_src.backend.adapters.user_service import UserService
+from repo_src.backend.database.models import Base, User
+from repo_src.backend.pipelines.stage_timing import percentile
+
+DEPTHS = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+
+def load_users(engine, count: int, chunk: int = 20000) -> None:
+    with engine.begin() as conn:
+        for start in range(0, count, chunk):
+            conn.execute(insert(User), [
+                {"user_id": f"user_{index:07d}", "name": f"User {index}", "bio": f"Engineer #{index}"}
+                for index in range(start, min(start + chunk, count))
+            ])
+
+
+def timed_page(session_factory, **kwargs):
+    db = session_factory()
+    start = time.perf_counter()
+    try:
+        page = UserService.get_users_page(db, **kwargs)
+    finally:
+        db.close()
+    return time.perf_counter() - start, page
+
+
+def walk_cursor(session_factory, page_size: int):
+    latencies, cursor = [], None
+    while True:
+        seconds, page = timed_page(session_factory, limit=page_size, cursor=cursor)
+        latencies.append(seconds)
+        cursor = page.next_cursor
+        if cursor is None:
+            return latencies
+
+
+def sample_offset(session_factory, page_size: int, pages: int, stride: int):
+    indexes = sorted(set(range(0, pages, stride)) | {pages - 1})
+    return {index: timed_page(session_factory, limit=page_size, skip=index * page_size)[0] for index in indexes}
+
+
+def around(latencies, index: int, width: int = 25):
+    """Median latency of the cursor pages around an index, so one GC pause doesn't stand in for a depth"""
+    return percentile(latencies[max(0, index - width):index + width + 1], 0.5)
+
+
+def at_depth(latencies, depth: float):
+    """Latency of the sampled page nearest to a fraction of the way through the list"""
+    pages = max(latencies) + 1
+    target = depth * (pages - 1)
+    return latencies[min(latencies, key=lambda index: abs(index - target))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OFFSET vs cursor pagination on SQLite")
+    parser.add_argument("--rows", type=int, default=1000000, help="Users to load")
+    parser.add_argument("--page-size", type=int, default=100, help="Rows per page")
+    parser.add_argument("--offset-stride", type=int, default=50, help="Time every Nth page with skip")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        start = time.perf_counter()
+        load_users(engine, args.rows)
+        print(f"Loaded {args.rows} users in {time.perf_counter() - start:.1f}s")
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+
+        start = time.perf_counter()
+        cursor = walk_cursor(session_factory, args.page_size)
+        cursor_total = time.perf_counter() - start
+        offset = sample_offset(session_factory, args.page_size, len(cursor), max(1, args.offset_stride))
+        engine.dispose()
+
+    ms = 1000
+    print(f"\n{len(cursor)} pages of {args.page_size}; cursor walk took {cursor_total:.1f}s, "
+          f"{len(offset)} OFFSET pages sampled")
+    print(f"{'method':<8} {'p50':>9} {'p95':>9} {'max':>9}")
+    for label, values in (("cursor", cursor), ("offset", list(offset.values()))):
+        print(f"{label:<8} {percentile(values, 0.5) * ms:>7.2f}ms {percentile(values, 0.95) * ms:>7.2f}ms "
+              f"{max(values) * ms:>7.2f}ms")
+
+    print(f"\n{'depth':>6} {'page':>7} {'cursor':>9} {'offset':>9}")
+    for depth in DEPTHS:
+        index = round(depth * (len(cursor) - 1))
+        print(f"{depth:>6.0%} {index:>7} {around(cursor, index) * ms:>7.2f}ms {at_depth(offset, depth) * ms:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
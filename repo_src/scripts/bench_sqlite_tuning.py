@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: mixed read/write load on SQLite with and without the pragma profile.
+
+For each profile, a fresh SQLite file database is seeded with --rows users.
+Then, for --seconds, --readers threads serve API-style reads while one
+writer thread upserts profiles the way ingestion does (one commit each, or
+--write-batch users per commit). The reads alternate between a GET /users
+page and a GET /users/{id} lookup. Compared:
+  defaults     SQLite and driver defaults (rollback journal, synchronous=FULL)
+  production   SQLitePragmas() from database/connection.py (WAL, synchronous=NORMAL, ...)
+
+Reports throughput and latency percentiles for reads and writes, and how
+many operations failed with "database is locked".
+
+Usage:
+    python repo_src/scripts/bench_sqlite_tuning.py [--readers 8] [--seconds 10] [--write-batch 1]
+"""
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from repo_src.backend.adapters.user_service import UserService
+from repo_src.backend.data.schemas import UserCreate
+from repo_src.backend.database.connection import PoolConfig, SQLitePragmas, create_db_engine
+from repo_src.backend.database.models import Base
+from repo_src.backend.functions.users import bulk_upsert_users
+from repo_src.backend.pipelines.stage_timing import percentile
+
+WIKI = "## About\n\n" + "Works on distributed systems and mentors new engineers. " * 40
+
+
+class UpsertFailed(Exception):
+    """A bulk upsert reported a failed row (it catches per-row errors itself)"""
+
+
+def make_user(index: int, bio: str) -> UserCreate:
+    return UserCreate(user_id=f"user_{index:07d}", name=f"User {index}", bio=f"{bio} #{index}", wiki_content=WIKI)
+
+
+class Worker(threading.Thread):
+    def __init__(self, session_factory, operation, deadline):
+        super().__init__()
+        self.session_factory = session_factory
+        self.operation = operation
+        self.deadline = deadline
+        self.latencies = []
+        self.locked = 0
+
+    def run(self):
+        rng = random.Random(id(self))
+        while time.perf_counter() < self.deadline:
+            db = self.session_factory()
+            start = time.perf_counter()
+            try:
+                self.operation(db, rng)
+                self.latencies.append(time.perf_counter() - start)
+            except (OperationalError, UpsertFailed) as e:
+                if "locked" not in str(e):
+                    raise
+                db.rollback()
+                self.locked += 1
+            finally:
+                db.close()
+
+
+def run_profile(pragmas, args):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(f"sqlite:///{directory}/bench.db", pragmas,
+                                  PoolConfig(size=args.readers + 1, max_overflow=0))
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+        db = session_factory()
+        bulk_upsert_users(db, [make_user(index, "Engineer") for index in range(args.rows)])
+        db.close()
+
+        def read(db, rng):
+            if rng.random() < 0.5:
+                UserService.get_users_page(db, limit=50, skip=rng.randrange(args.rows))
+            else:
+                UserService.get_user_by_user_id(db, f"user_{rng.randrange(args.rows):07d}").wiki_content
+
+        def write(db, rng):
+            start = rng.randrange(args.rows * 2)  # half updates, half new users
+            users = [make_user(start + offset, f"Staff engineer {rng.random():.6f}") for offset in range(args.write_batch)]
+            errors = [outcome.error for outcome in bulk_upsert_users(db, users) if outcome.error]
+            if errors:
+                raise UpsertFailed(errors[0])
+
+        deadline = time.perf_counter() + args.seconds
+        readers = [Worker(session_factory, read, deadline) for _ in range(args.readers)]
+        writer = Worker(session_factory, write, deadline)
+        for worker in readers + [writer]:
+            worker.start()
+        for worker in readers + [writer]:
+            worker.join()
+        engine.dispose()
+
+    reads = [latency for worker in readers for latency in worker.latencies]
+    return reads, writer.latencies, sum(worker.locked for worker in readers), writer.locked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mixed read/write SQLite load per pragma profile")
+    parser.add_argument("--rows", type=int, default=20000, help="Users to seed")
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent reader threads")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration of each run")
+    parser.add_argument("--write-batch", type=int, default=1, help="Users upserted per write transaction")
+    args = parser.parse_args()
+
+    ms = 1000
+    print(f"{args.readers} readers + 1 writer ({args.write_batch} user(s) per commit), {args.seconds:g}s, {args.rows} users")
+    print(f"{'profile':<11} {'reads/s':>8} {'read p50':>9} {'read p95':>9} "
+          f"{'writes/s':>9} {'write p50':>10} {'write p95':>10} {'locked':>7}")
+    for label, pragmas in (("defaults", None), ("production", SQLitePragmas())):
+        reads, writes, read_locked, write_locked = run_profile(pragmas, args)
+        print(f"{label:<11} {len(reads) / args.seconds:>8.0f} {percentile(reads, 0.5) * ms:>7.2f}ms "
+              f"{percentile(reads, 0.95) * ms:>7.2f}ms {len(writes) / args.seconds:>9.0f} "
+              f"{percentile(writes, 0.5) * ms:>8.2f}ms {percentile(writes, 0.95) * ms:>8.2f}ms "
+              f"{read_locked + write_locked:>7}")
+
+
+if __name__ == "__main__":
+    main()
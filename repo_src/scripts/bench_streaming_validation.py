@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark: buffered vs streamed (early-abort) validation of extractions.
+
+Runs the sample transcripts through the two-tier extraction cascade against
+the offline fake upstream (llm_chat/fake_provider.py), with a fraction of
+answers replaced by off-topic prose. Buffered validation waits for each
+whole completion before rejecting it; streamed validation aborts a bad
+answer within its first few hundred characters and stops reading valid ones
+at the closing brace. Reports wall time, per-extraction latency and the
+completion tokens the upstream generated.
+
+Usage:
+    python repo_src/scripts/bench_streaming_validation.py [--extractions 24] [--malformed-rate 0.3]
+        [--tokens-per-second 200] [--latency-ms 300] [--concurrency 4]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from repo_src.backend.llm_chat.cache import set_cache
+from repo_src.backend.llm_chat.errors import LLMError
+from repo_src.backend.llm_chat.fake_provider import FakeLLMConfig, FakeOpenRouterProvider
+from repo_src.backend.llm_chat.limiter import reset_limiters
+from repo_src.backend.llm_chat.providers import set_provider
+from repo_src.backend.pipelines import user_ingestion
+from repo_src.backend.pipelines.cascade import CascadeTier, cascade_stats
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+async def run_mode(streamed: bool, documents, args) -> dict:
+    provider = FakeOpenRouterProvider(FakeLLMConfig(
+        latency_distribution="fixed",
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+    ))
+    set_provider(provider)
+    reset_limiters()
+    user_ingestion.EXTRACTION_STREAM_VALIDATION = streamed
+    tiers = [CascadeTier(model="fake/cheap"), CascadeTier(model="fake/strong")]
+    aborts_before = cascade_stats.stream_aborts
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, failures = [], 0
+
+    async def extract(text: str) -> None:
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await user_ingestion.extract_user_profile(text, tiers=tiers)
+            except (ValueError, LLMError):
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(extract(text) for text in documents))
+    wall = time.perf_counter() - start
+    await provider.aclose()
+
+    latencies.sort()
+    stats = provider.transport.stats
+    return {
+        "mode": "streamed" if streamed else "buffered",
+        "wall": wall,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "requests": stats.requests,
+        "completion_tokens": stats.completion_tokens,
+        "failures": failures,
+        "aborts": cascade_stats.stream_aborts - aborts_before,
+    }
+
+
+async def main_async(args) -> None:
+    samples = [p.read_text(encoding="utf-8") for p in sorted((project_root / "test_data").glob("*.txt"))]
+    # A unique line per document keeps the fake's malformed-answer draws independent
+    documents = [f"{samples[i % len(samples)]}\n(session {i})" for i in range(args.extractions)]
+    print(f"{args.extractions} extractions, {args.malformed_rate:.0%} of answers off-topic, "
+          f"{args.tokens_per_second:g} tok/s, {args.latency_ms:g} ms to first token, concurrency {args.concurrency}\n")
+    print(f"{'mode':<10} {'wall':>8} {'p50':>8} {'p95':>8} {'requests':>9} {'tokens':>8} {'aborts':>7} {'failed':>7}")
+    results = []
+    for streamed in (False, True):
+        r = await run_mode(streamed, documents, args)
+        results.append(r)
+        print(f"{r['mode']:<10} {r['wall']:>7.2f}s {r['p50']:>7.2f}s {r['p95']:>7.2f}s {r['requests']:>9} "
+              f"{r['completion_tokens']:>8} {r['aborts']:>7} {r['failures']:>7}")
+    buffered, streamed = results
+    saved_tokens = buffered["completion_tokens"] - streamed["completion_tokens"]
+    print(f"\nstreamed validation saved {saved_tokens} completion tokens "
+          f"({saved_tokens / max(1, buffered['completion_tokens']):.0%}) and "
+          f"{buffered['wall'] - streamed['wall']:.2f}s wall time "
+          f"({(buffered['wall'] - streamed['wall']) / buffered['wall']:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark buffered vs streamed extraction validation")
+    parser.add_argument("--extractions", type=int, default=24)
+    parser.add_argument("--malformed-rate", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ.setdefault("LLM_MAX_RETRIES", "0")
+    set_cache(None)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
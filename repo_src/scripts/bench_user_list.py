@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: listing users with and without loading wiki_content.
+
+Loads --rows synthetic users, each with a --wiki-kb KB wiki page, into a
+fresh SQLite file database, then lists them page by page the way GET /users
+does (UserSummary serialization) with two queries:
+  full      db.query(User), every column including wiki_content
+  summary   UserService.get_users_page, summary columns only (wiki_content deferred)
+
+Reports the median latency of a page and the peak Python memory allocated
+while building it (tracemalloc), for each page size.
+
+Usage:
+    python repo_src/scripts/bench_user_list.py [--rows 5000] [--wiki-kb 20] [--page-sizes 100,1000]
+"""
+import sys
+import time
+import argparse
+import statistics
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from repo_src.backend.adapters.user_service import UserService
+from repo_src.backend.data.schemas import UserSummary
+from repo_src.backend.database.models import Base, User
+
+
+def load_users(engine, count: int, wiki_kb: int, chunk: int = 500) -> None:
+    paragraph = "Works on distributed systems, mentors new engineers and writes about databases. "
+    wiki = (paragraph * (wiki_kb * 1024 // len(paragraph) + 1))[:wiki_kb * 1024]
+    with engine.begin() as conn:
+        for start in range(0, count, chunk):
+            conn.execute(insert(User), [
+                {"user_id": f"user_{index:07d}", "name": f"User {index}", "bio": f"Engineer #{index}",
+                 "wiki_content": wiki}
+                for index in range(start, min(start + chunk, count))
+            ])
+
+
+def full(db, limit):
+    return db.query(User).order_by(User.id).limit(limit).all()
+
+
+def summary(db, limit):
+    return UserService.get_users_page(db, limit=limit).items
+
+
+def list_page(session_factory, query, limit):
+    db = session_factory()
+    try:
+        return [UserSummary.model_validate(user).model_dump(by_alias=True) for user in query(db, limit)]
+    finally:
+        db.close()
+
+
+def measure(session_factory, query, limit, repeats):
+    list_page(session_factory, query, limit)  # warm the page cache
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        list_page(session_factory, query, limit)
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    list_page(session_factory, query, limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(seconds), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark user listing with and without wiki_content")
+    parser.add_argument("--rows", type=int, default=5000, help="Users to load")
+    parser.add_argument("--wiki-kb", type=int, default=20, help="Size of each user's wiki page in KB")
+    parser.add_argument("--page-sizes", default="100,1000", help="Comma-separated page sizes")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per page size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{directory}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        load_users(engine, args.rows, args.wiki_kb)
+        session_factory = sessionmaker(bind=engine, autoflush=False)
+
+        print(f"{args.rows} users with {args.wiki_kb} KB wiki pages")
+        print(f"{'page':>6} {'query':<8} {'latency':>10} {'peak mem':>10}")
+        for limit in [int(value) for value in args.page_sizes.split(",")]:
+            for label, query in (("full", full), ("summary", summary)):
+                seconds, peak = measure(session_factory, query, limit, args.repeats)
+                print(f"{limit:>6} {label:<8} {seconds * 1000:>8.2f}ms {peak / 1024 / 1024:>8.2f}MB")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,20 +6,71 @@ CLI script to run the end-to-end ingestion process for user profiles.
 Usage:
     python repo_src/scripts/ingest_user.py <filepath>
     OR via pnpm: pnpm run ingest-user <filepath>
+
+Bulk mode (directories, globs, several files or a manifest):
+    python repo_src/scripts/ingest_user.py test_data/ "transcripts/**/*.md" --concurrency 8
+    python repo_src/scripts/ingest_user.py --manifest cohort.txt --db-batch-size 100
+
+Files that are unchanged since they were last ingested with the same prompts
+and models are skipped; pass --force to re-extract them anyway.
+
+New material about an existing user can update their profile in place:
+    python repo_src/scripts/ingest_user.py new_interview.txt --update alice_johnson
+
+Every run ends with where the time went per stage (read, prompt, llm, parse,
+validate, db). For a machine-readable run summary, use --report json (the
+JSON goes to stdout, the progress output to stderr) or --report-file:
+    python repo_src/scripts/ingest_user.py test_data/ --report json > run.json
 """
 import sys
+import json
+import time
+import asyncio
 import argparse
+import contextlib
 from pathlib import Path
+from typing import Optional
 
 # Add the project root to the Python path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from repo_src.backend.pipelines.user_ingestion import process_file_sync
-from repo_src.backend.functions.users import create_or_update_user
+from repo_src.backend.pipelines.user_ingestion import (
+    build_delta_prompt,
+    extract_profile_update,
+    extract_user_profile,
+    extraction_pipeline_version,
+    merge_profile_update,
+)
+from repo_src.backend.pipelines.bulk_ingestion import (
+    BulkIngestionConfig,
+    BulkIngestionReport,
+    ingest_files,
+    load_manifest,
+    resolve_input_paths,
+)
+from repo_src.backend.pipelines.manifest import content_unchanged, fingerprint_content
+from repo_src.backend.pipelines.stage_timing import (
+    STAGES,
+    FileTiming,
+    format_stage_table,
+    run_summary,
+    stage,
+    track,
+)
+from repo_src.backend.llm_chat.providers import close_provider
+from repo_src.backend.functions.ingestion_manifest import get_manifest_entries, record_ingested_files
+from repo_src.backend.functions.users import (
+    UPSERT_FAILED,
+    bulk_upsert_users,
+    get_user_by_id,
+    get_user_for_update,
+    update_user,
+)
 from repo_src.backend.database.connection import SessionLocal, engine
 from repo_src.backend.database.models import Base
-from repo_src.backend.data.schemas import UserCreate
+from repo_src.backend.data.schemas import UserCreate, UserUpdate
+from repo_src.backend.llm_chat.tokens import estimate_tokens
 
 
 def ensure_database():
@@ -28,16 +79,54 @@ def ensure_database():
     print("✓ Database tables verified/created")
 
 
-def ingest_user_from_file(file_path: str) -> dict:
+def print_stage_timings(timing: FileTiming) -> None:
+    """Print one file's per-stage timings"""
+    stages = ", ".join(f"{name} {timing.stages[name]:.3f}s" for name in STAGES if name in timing.stages)
+    print(f"   Timings:    {stages or 'none'}")
+    print(f"   Volume:     {timing.bytes_read} bytes read, {timing.llm_calls} LLM call(s), "
+          f"{timing.prompt_tokens} prompt + {timing.completion_tokens} completion tokens")
+
+
+async def _extract_profile(content: str):
+    try:
+        result = await extract_user_profile(content)
+    finally:
+        # The pooled client is bound to this event loop; release it
+        # before asyncio.run() closes the loop.
+        await close_provider()
+    if result.escalated:
+        rejected = sum(1 for attempt in result.attempts if not attempt.accepted)
+        print(f"Extraction escalated to {result.model} after {rejected} rejected tier(s)")
+    return result.value
+
+
+def ingest_user_from_file(file_path: str, force: bool = False, timing: Optional[FileTiming] = None) -> dict:
     """
     Main ingestion function: processes a file and saves to database.
 
     Args:
         file_path: Path to the file to ingest
+        force: Re-extract even if the manifest says the file is unchanged
+        timing: Record to fill with per-stage timings (a new one if omitted)
 
     Returns:
         Dictionary with status and user data
     """
+    timing = timing or FileTiming(file_path)
+    with track(timing):
+        result = _ingest_user_from_file(file_path, force, timing)
+    timing.status = {"success": "succeeded", "error": "failed"}.get(result["status"], result["status"])
+    timing.error = result.get("message")
+    print_stage_timings(timing)
+
+    print(f"\n{'='*60}")
+    print(f"INGESTION COMPLETE")
+    print(f"{'='*60}\n")
+
+    return result
+
+
+def _ingest_user_from_file(file_path: str, force: bool, timing: FileTiming) -> dict:
     print(f"\n{'='*60}")
     print(f"STARTING USER INGESTION")
     print(f"{'='*60}\n")
@@ -46,15 +135,31 @@ def ingest_user_from_file(file_path: str) -> dict:
     print("Step 1: Ensuring database is ready...")
     ensure_database()
 
+    version = extraction_pipeline_version()
+    path = Path(file_path)
+    with stage("read"):
+        raw = path.read_bytes()
+        fingerprint = fingerprint_content(path, raw)
+    timing.bytes_read = len(raw)
+    if not force:
+        db = SessionLocal()
+        try:
+            entry = get_manifest_entries(db, [str(path)]).get(str(path))
+        finally:
+            db.close()
+        if content_unchanged(entry, fingerprint, version):
+            print(f"\n✓ Unchanged since last ingestion (user {entry.user_id}); skipping. Use --force to re-extract.")
+            return {"status": "skipped", "user_id": entry.user_id}
+
     # Step 2: Process the file with LLM
     print(f"\nStep 2: Processing file: {file_path}")
     print("   This will use the LLM to extract user profile data...")
 
     try:
-        user_data_dict = process_file_sync(file_path)
+        user_data_dict = asyncio.run(_extract_profile(raw.decode("utf-8")))
         print(f"✓ Successfully extracted user data for: {user_data_dict.get('name', 'Unknown')}")
         print(f"   User ID: {user_data_dict.get('user_id', 'Unknown')}")
-        print(f"   Bio: {user_data_dict.get('bio', 'N/A')[:80]}...")
+        print(f"   Bio: {(user_data_dict.get('bio') or 'N/A')[:80]}...")
     except Exception as e:
         print(f"✗ Error processing file: {e}")
         return {"status": "error", "message": str(e)}
@@ -63,44 +168,266 @@ def ingest_user_from_file(file_path: str) -> dict:
     print("\nStep 3: Saving user profile to database...")
     db = SessionLocal()
     try:
-        user_create = UserCreate(**user_data_dict)
-        db_user = create_or_update_user(db, user_create)
+        with stage("validate"):
+            user_create = UserCreate(**user_data_dict)
+        with stage("db"):
+            # The profile and its manifest entry are committed together
+            (outcome,) = bulk_upsert_users(db, [user_create], commit=False)
+            if outcome.status == UPSERT_FAILED:
+                raise ValueError(outcome.error)
+            record_ingested_files(db, [fingerprint], [user_create.user_id], version)
 
-        print(f"✓ Successfully saved/updated user: {db_user.name}")
-        print(f"   Database ID: {db_user.id}")
-        print(f"   User ID: {db_user.user_id}")
-        print(f"   Created: {db_user.created_at}")
-        print(f"   Updated: {db_user.updated_at}")
+        print(f"✓ Successfully {outcome.status} user: {user_create.name}")
+        print(f"   Database ID: {outcome.id}")
+        print(f"   User ID: {user_create.user_id}")
 
-        result = {
+        return {
             "status": "success",
-            "user_id": db_user.user_id,
-            "name": db_user.name,
-            "database_id": db_user.id
+            "user_id": user_create.user_id,
+            "name": user_create.name,
+            "database_id": outcome.id
         }
 
     except Exception as e:
         print(f"✗ Error saving to database: {e}")
-        result = {"status": "error", "message": str(e)}
+        return {"status": "error", "message": str(e)}
     finally:
         db.close()
 
+
+def _profile_dict(user) -> dict:
+    return {"user_id": user.user_id, "name": user.name, "bio": user.bio, "wiki_content": user.wiki_content}
+
+
+async def _extract_update(profile: dict, material: str):
+    try:
+        return await extract_profile_update(profile, material)
+    finally:
+        await close_provider()
+
+
+def update_user_from_file(file_path: str, user_id: str, force: bool = False, timing: Optional[FileTiming] = None) -> dict:
+    """
+    Delta re-ingestion: apply new material to an existing user's profile.
+    Only the new material and the stored wiki's section outline go to the
+    LLM, which answers with section-level edits that are merged here. Falls
+    back to a full ingestion if the user doesn't exist yet.
+
+    Args:
+        file_path: Path to the file with the new material
+        user_id: The existing user to update
+        force: Process the file even if the manifest says it is unchanged
+        timing: Record to fill with per-stage timings (a new one if omitted)
+
+    Returns:
+        Dictionary with status and user data
+    """
+    timing = timing or FileTiming(file_path)
+    with track(timing):
+        result = _update_user_from_file(file_path, user_id, force, timing)
+    timing.status = {"success": "succeeded", "error": "failed"}.get(result["status"], result["status"])
+    timing.error = result.get("message")
+    print_stage_timings(timing)
+
     print(f"\n{'='*60}")
-    print(f"INGESTION COMPLETE")
+    print(f"UPDATE COMPLETE")
     print(f"{'='*60}\n")
-
     return result
 
 
+def _update_user_from_file(file_path: str, user_id: str, force: bool, timing: FileTiming) -> dict:
+    print(f"\n{'='*60}")
+    print(f"STARTING PROFILE UPDATE: {user_id}")
+    print(f"{'='*60}\n")
+    print("Step 1: Ensuring database is ready...")
+    ensure_database()
+
+    db = SessionLocal()
+    try:
+        user = get_user_by_id(db, user_id)
+        profile = _profile_dict(user) if user else None
+    finally:
+        db.close()
+    if profile is None:
+        print(f"   No stored profile for {user_id}; running a full ingestion instead")
+        return _ingest_user_from_file(file_path, force, timing)
+
+    version = extraction_pipeline_version()
+    path = Path(file_path)
+    with stage("read"):
+        raw = path.read_bytes()
+        fingerprint = fingerprint_content(path, raw)
+    timing.bytes_read = len(raw)
+    content = raw.decode("utf-8")
+    if not force:
+        db = SessionLocal()
+        try:
+            entry = get_manifest_entries(db, [str(path)]).get(str(path))
+        finally:
+            db.close()
+        if content_unchanged(entry, fingerprint, version):
+            print(f"\n✓ Already applied (user {entry.user_id}); skipping. Use --force to apply it again.")
+            return {"status": "skipped", "user_id": entry.user_id}
+
+    wiki_tokens = estimate_tokens(profile["wiki_content"] or "")
+    print(f"\nStep 2: Extracting changes from: {file_path}")
+    print(f"   Delta prompt ~{estimate_tokens(build_delta_prompt(profile, content))} tokens; "
+          f"the stored wiki it leaves out is ~{wiki_tokens} tokens")
+    try:
+        result = asyncio.run(_extract_update(profile, content))
+    except Exception as e:
+        print(f"✗ Error extracting the update: {e}")
+        return {"status": "error", "message": str(e)}
+    update = result.value
+    tokens = sum(attempt.prompt_tokens + attempt.completion_tokens for attempt in result.attempts)
+    print(f"✓ {len(update.edits)} section edit(s){', new bio' if update.bio else ''} using {tokens} tokens "
+          f"(regenerating would resend all source material and rewrite the ~{wiki_tokens}-token wiki)")
+    for edit in update.edits:
+        print(f"   {edit.action:<8} {edit.section}")
+
+    print("\nStep 3: Merging the edits into the stored profile...")
+    db = SessionLocal()
+    try:
+        # Merge into the current row, locked, in case it changed during the LLM call;
+        # the profile and its manifest entry are committed together
+        with stage("db"):
+            user = get_user_for_update(db, user_id)
+            merged = merge_profile_update(_profile_dict(user), update)
+            db_user = update_user(db, user_id, UserUpdate(bio=merged["bio"], wiki_content=merged["wiki_content"]),
+                                  commit=False)
+            record_ingested_files(db, [fingerprint], [user_id], version)
+        print(f"✓ Updated user: {db_user.name} (updated {db_user.updated_at})")
+        return {"status": "success", "user_id": user_id, "name": db_user.name, "database_id": db_user.id}
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Error saving to database: {e}")
+        return {"status": "error", "message": str(e)}
+    finally:
+        db.close()
+
+
+def print_progress(report: BulkIngestionReport) -> None:
+    """Overwrite a single progress line on the terminal"""
+    print(
+        f"\r   {report.done}/{report.total} files "
+        f"({report.succeeded} ok, {report.failed} failed, {report.skipped} unchanged) "
+        f"{report.files_per_second:.2f} files/s  {report.tokens_per_second:.0f} tokens/s",
+        end="",
+        flush=True,
+    )
+
+
+async def ingest_many(paths, config: BulkIngestionConfig, manifest) -> BulkIngestionReport:
+    """Run a bulk ingestion and release the shared LLM client afterwards"""
+    try:
+        return await ingest_files(paths, config, on_progress=print_progress, manifest=manifest)
+    finally:
+        await close_provider()
+
+
+def bulk_ingest(paths, config: BulkIngestionConfig, force: bool = False) -> dict:
+    """
+    Ingest many files concurrently, saving profiles in batches.
+
+    Args:
+        paths: Files to ingest
+        config: Concurrency and batching settings
+        force: Re-extract files even if the manifest says they are unchanged
+
+    Returns:
+        Dictionary with status and run counts
+    """
+    print(f"\n{'='*60}")
+    print(f"STARTING BULK INGESTION: {len(paths)} files")
+    print(f"{'='*60}\n")
+    ensure_database()
+    print(f"   concurrency {config.concurrency}, DB batch size {config.db_batch_size}, "
+          f"batch extraction {'on' if config.batch_extraction else 'off'}\n")
+
+    manifest = None if force else load_manifest(paths)
+    report = asyncio.run(ingest_many(paths, config, manifest))
+
+    print(f"\n\n{'='*60}")
+    print("INGESTION COMPLETE")
+    print(f"{'='*60}")
+    print(f"   Files:      {report.processed} processed ({report.succeeded} ingested, {report.failed} failed), "
+          f"{report.skipped} skipped as unchanged, {report.total} total")
+    print(f"   Time:       {report.elapsed_seconds:.1f}s ({report.files_per_second:.2f} files/s)")
+    print(f"   Tokens:     {report.prompt_tokens} prompt + {report.completion_tokens} completion "
+          f"({report.tokens_per_second:.0f} tokens/s)")
+    summary = report.to_dict(pipeline_version=extraction_pipeline_version())
+    if summary["stages"]:
+        print("   Stages (per file; files sharing a batched request split its time):")
+        for line in format_stage_table(summary["stages"]):
+            print(f"      {line}")
+    for failure in report.failures:
+        print(f"   ✗ {failure.path}: {failure.error}")
+    print()
+
+    return {
+        "status": "success" if report.failed == 0 else "error",
+        "succeeded": report.succeeded,
+        "failed": report.failed,
+        "summary": summary,
+    }
+
+
 def main():
     """Main CLI entry point"""
     parser = argparse.ArgumentParser(
-        description="Ingest a user profile from a text file into the Social OS database"
+        description="Ingest user profiles from text files into the Social OS database"
     )
     parser.add_argument(
-        "file_path",
+        "paths",
+        nargs="*",
+        help="Files, directories or glob patterns containing user profile information"
+    )
+    parser.add_argument(
+        "--manifest",
+        type=str,
+        help="File listing inputs to ingest, one per line"
+    )
+    parser.add_argument(
+        "--pattern",
         type=str,
-        help="Path to the text file containing user profile information"
+        default="*.txt",
+        help="File pattern to match inside directories (default: *.txt)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Extraction requests in flight at once (default: INGEST_CONCURRENCY or 8)"
+    )
+    parser.add_argument(
+        "--db-batch-size",
+        type=int,
+        help="Profiles saved per database transaction (default: INGEST_DB_BATCH_SIZE or 50)"
+    )
+    parser.add_argument(
+        "--no-batch",
+        action="store_true",
+        help="Extract every file in its own request instead of packing small files together"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-extract files even if they are unchanged since their last ingestion"
+    )
+    parser.add_argument(
+        "--update",
+        metavar="USER_ID",
+        help="Apply a single file as new material to this existing user's profile instead of re-extracting it"
+    )
+    parser.add_argument(
+        "--report",
+        choices=["text", "json"],
+        default="text",
+        help="json prints a machine-readable run summary to stdout and the progress output to stderr"
+    )
+    parser.add_argument(
+        "--report-file",
+        metavar="PATH",
+        help="Also write the JSON run summary to this file"
     )
     parser.add_argument(
         "--verbose",
@@ -110,21 +437,59 @@ def main():
     )
 
     args = parser.parse_args()
+    if not args.paths and not args.manifest:
+        parser.error("give at least one path or --manifest")
+
+    if args.update and (len(args.paths) != 1 or args.manifest or not Path(args.paths[0]).is_file()):
+        parser.error("--update takes exactly one file")
 
-    # Verify file exists
-    file_path = Path(args.file_path)
-    if not file_path.exists():
-        print(f"Error: File not found: {args.file_path}")
+    # With --report json, stdout carries only the summary
+    output = contextlib.redirect_stdout(sys.stderr) if args.report == "json" else contextlib.nullcontext()
+    with output:
+        result = run(args)
+    if result is None:
         sys.exit(1)
 
-    # Run ingestion
-    result = ingest_user_from_file(str(file_path.absolute()))
+    summary = result.get("summary")
+    if summary is not None:
+        if args.report == "json":
+            print(json.dumps(summary, indent=2))
+        if args.report_file:
+            Path(args.report_file).write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+    sys.exit(0 if result["status"] in ("success", "skipped") else 1)
 
-    # Exit with appropriate code
-    if result["status"] == "success":
-        sys.exit(0)
-    else:
-        sys.exit(1)
+
+def run(args) -> Optional[dict]:
+    """Run the ingestion the arguments ask for; returns its result dictionary, with the run summary"""
+    # A single plain file (or an update) keeps the step-by-step output
+    if args.update or (len(args.paths) == 1 and not args.manifest and Path(args.paths[0]).is_file()):
+        file_path = str(Path(args.paths[0]).resolve())
+        timing = FileTiming(file_path)
+        start = time.perf_counter()
+        if args.update:
+            result = update_user_from_file(file_path, args.update, force=args.force, timing=timing)
+        else:
+            result = ingest_user_from_file(file_path, force=args.force, timing=timing)
+        result["summary"] = run_summary(
+            [timing], time.perf_counter() - start, pipeline_version=extraction_pipeline_version()
+        )
+        return result
+
+    try:
+        paths = resolve_input_paths(args.paths, manifest=args.manifest, pattern=args.pattern)
+    except (FileNotFoundError, OSError) as e:
+        print(f"Error: {e}")
+        return None
+
+    config = BulkIngestionConfig.from_env()
+    if args.concurrency:
+        config.concurrency = max(1, args.concurrency)
+    if args.db_batch_size:
+        config.db_batch_size = max(1, args.db_batch_size)
+    if args.no_batch:
+        config.batch_extraction = False
+
+    return bulk_ingest(paths, config, force=args.force)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Standalone ingestion worker.
+
+Processes jobs from the ingestion_jobs queue (submitted through
+/api/ingestion/jobs) outside the API process. Run as many of these as the
+LLM rate limits allow, on any host that can reach the database; set
+INGEST_QUEUE_WORKERS=0 on the API to leave all extraction to them.
+
+Usage:
+    python repo_src/scripts/ingestion_worker.py [--workers 4] [--lease-seconds 300]
+    python repo_src/scripts/ingestion_worker.py --drain   # exit once the queue is empty
+"""
+import sys
+import asyncio
+import signal
+import argparse
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from repo_src.backend.database.setup import init_db
+from repo_src.backend.llm_chat.providers import close_provider
+from repo_src.backend.pipelines.condense import shutdown_condense_pool
+from repo_src.backend.pipelines.job_queue import IngestionWorkerPool, JobQueueConfig
+
+
+async def drain(pool: IngestionWorkerPool) -> None:
+    """Process due jobs with every worker until none are left"""
+    async def worker():
+        while await pool.run_once():
+            pass
+    await asyncio.gather(*(worker() for _ in range(pool.config.workers)))
+
+
+async def run(args) -> None:
+    config = JobQueueConfig.from_env()
+    config.workers = max(1, args.workers or config.workers or 1)
+    if args.lease_seconds:
+        config.lease_seconds = args.lease_seconds
+    pool = IngestionWorkerPool(config)
+
+    try:
+        if args.drain:
+            await drain(pool)
+            return
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, pool.request_stop)
+            except NotImplementedError:  # Windows
+                pass
+        await pool.run_forever()
+    finally:
+        await close_provider()
+        shutdown_condense_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued ingestion jobs")
+    parser.add_argument("--workers", type=int, help="Jobs processed concurrently (default: INGEST_QUEUE_WORKERS or 2)")
+    parser.add_argument("--lease-seconds", type=float, help="Visibility timeout for leased jobs")
+    parser.add_argument("--drain", action="store_true", help="Exit once no jobs are due instead of polling")
+    args = parser.parse_args()
+
+    init_db()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Load test for /api/chat (or /api/chat/stream) against the offline fake LLM.
+
+Drives the FastAPI app in-process (httpx ASGI transport) with a fixed number
+of concurrent clients for a fixed number of requests and reports throughput
+and latency percentiles. The upstream is the fake provider configured by the
+FAKE_LLM_* environment variables (see llm_chat/fake_provider.py), so no API
+key or network access is needed.
+
+Usage:
+    python repo_src/scripts/load_test_chat.py [--requests 500] [--concurrency 50] [--stream] [--unique]
+    FAKE_LLM_RATE_LIMIT_RATE=0.05 FAKE_LLM_LATENCY_MS=800 python repo_src/scripts/load_test_chat.py
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+from collections import Counter
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["LLM_CACHE_ENABLED"] = "false"  # measure the provider, not cache hits
+
+import httpx
+
+from repo_src.backend.main import app
+from repo_src.backend.llm_chat.providers import close_provider, get_provider
+from repo_src.backend.llm_chat.metrics import get_metrics
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(args) -> None:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    statuses = Counter()
+    queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            prompt = f"load test prompt {i if args.unique else i % 10}"
+            path = "/api/chat/stream" if args.stream else "/api/chat/"
+            start = time.perf_counter()
+            response = await client.post(path, json={"prompt": prompt, "max_tokens": args.max_tokens})
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(args.concurrency)))
+        wall = time.perf_counter() - start
+
+    latencies.sort()
+    provider = get_provider()
+    print(f"{args.requests} requests, {args.concurrency} concurrent clients, "
+          f"{'stream' if args.stream else 'chat'} endpoint")
+    print(f"wall {wall:.2f}s  throughput {args.requests / wall:.1f} req/s")
+    print(f"latency p50 {percentile(latencies, 0.5) * 1000:.0f}ms  p95 {percentile(latencies, 0.95) * 1000:.0f}ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:.0f}ms  max {latencies[-1] * 1000:.0f}ms")
+    print(f"status codes {dict(statuses)}")
+    print(f"fake upstream {provider.transport.snapshot()}")
+    print(f"LLM call outcomes {get_metrics().snapshot()['totals']['outcomes']}")
+    await close_provider()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the chat API against the fake LLM provider")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--stream", action="store_true", help="Use /api/chat/stream")
+    parser.add_argument("--unique", action="store_true",
+                        help="Unique prompts (default: 10 distinct prompts, so coalescing kicks in)")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
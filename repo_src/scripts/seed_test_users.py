@@ -4,17 +4,18 @@ Seed the database with test user data for development and testing.
 This bypasses the LLM ingestion and directly inserts sample users.
 
 Usage:
-    python repo_src/scripts/seed_test_users.py
+    python repo_src/scripts/seed_test_users.py [--batch-size 500]
     OR via pnpm: pnpm run seed-users
 """
 import sys
+import argparse
 from pathlib import Path
 
 # Add the project root to the Python path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from repo_src.backend.functions.users import create_or_update_user
+from repo_src.backend.functions.users import DEFAULT_UPSERT_BATCH_SIZE, UPSERT_FAILED, bulk_upsert_users
 from repo_src.backend.database.connection import SessionLocal, engine
 from repo_src.backend.database.models import Base
 from repo_src.backend.data.schemas import UserCreate
@@ -273,8 +274,8 @@ def ensure_database():
     print("✓ Database tables verified/created")
 
 
-def seed_users():
-    """Seed the database with sample users"""
+def seed_users(batch_size: int = DEFAULT_UPSERT_BATCH_SIZE):
+    """Seed the database with sample users, in one transaction"""
     print(f"\n{'='*60}")
     print(f"SEEDING DATABASE WITH TEST USERS")
     print(f"{'='*60}\n")
@@ -283,27 +284,32 @@ def seed_users():
     print("Step 1: Ensuring database is ready...")
     ensure_database()
 
-    # Create session
-    db = SessionLocal()
     success_count = 0
     error_count = 0
 
-    try:
-        print(f"\nStep 2: Creating/updating {len(SAMPLE_USERS)} users...\n")
-
-        for user_data in SAMPLE_USERS:
-            try:
-                user_create = UserCreate(**user_data)
-                db_user = create_or_update_user(db, user_create)
-
-                print(f"✓ {db_user.name} (@{db_user.user_id})")
-                print(f"   ID: {db_user.id} | Created: {db_user.created_at}")
-                success_count += 1
+    print(f"\nStep 2: Creating/updating {len(SAMPLE_USERS)} users...\n")
+    users = []
+    for user_data in SAMPLE_USERS:
+        try:
+            users.append(UserCreate(**user_data))
+        except Exception as e:
+            print(f"✗ Invalid user {user_data['name']}: {e}")
+            error_count += 1
 
-            except Exception as e:
-                print(f"✗ Error creating user {user_data['name']}: {e}")
+    db = SessionLocal()
+    try:
+        for outcome in bulk_upsert_users(db, users, batch_size=batch_size):
+            user = users[outcome.index]
+            if outcome.status == UPSERT_FAILED:
+                print(f"✗ Error creating user {user.name}: {outcome.error}")
                 error_count += 1
-
+            else:
+                print(f"✓ {user.name} (@{user.user_id})")
+                print(f"   ID: {outcome.id} | {outcome.status.capitalize()}")
+                success_count += 1
+    except Exception as e:
+        print(f"✗ Error saving users: {e}")
+        error_count += len(users)
     finally:
         db.close()
 
@@ -319,5 +325,9 @@ def seed_users():
 
 
 if __name__ == "__main__":
-    success = seed_users()
+    parser = argparse.ArgumentParser(description="Seed the database with test users")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_UPSERT_BATCH_SIZE,
+                        help=f"Users per insert/update batch (default: {DEFAULT_UPSERT_BATCH_SIZE})")
+    args = parser.parse_args()
+    success = seed_users(batch_size=args.batch_size)
     sys.exit(0 if success else 1)
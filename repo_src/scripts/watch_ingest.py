@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Watch-folder ingestion daemon.
+
+Watches a drop folder and ingests transcripts as they arrive or change,
+through the same extraction and upsert path as ingest_user.py. A file is
+only picked up once it has stopped changing for the debounce interval, and
+the number of extractions in flight is bounded, so a burst of uploads is
+worked through at a steady pace. Stop it with Ctrl+C; in-flight files are
+finished first.
+
+Usage:
+    python repo_src/scripts/watch_ingest.py drop/ [--pattern "*.txt"] [--max-in-flight 4]
+    OR via pnpm: pnpm run ingest-watch drop/
+    python repo_src/scripts/watch_ingest.py drop/ --once   # ingest what is there, then exit
+"""
+import sys
+import asyncio
+import signal
+import argparse
+from pathlib import Path
+
+# Add the project root to the Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from repo_src.backend.database.setup import init_db
+from repo_src.backend.llm_chat.providers import close_provider
+from repo_src.backend.pipelines.condense import shutdown_condense_pool
+from repo_src.backend.pipelines.folder_watcher import FolderWatcher, WatchConfig
+
+
+def print_report(paths, report) -> None:
+    """One line per worker batch, plus its failures"""
+    names = ", ".join(path.name for path in paths[:3]) + (f" +{len(paths) - 3}" if len(paths) > 3 else "")
+    print(f"   {names}: {report.succeeded} ingested, {report.failed} failed, "
+          f"{report.skipped} unchanged ({report.elapsed_seconds:.1f}s)")
+    for failure in report.failures:
+        print(f"   ✗ {failure.path}: {failure.error}")
+
+
+async def run(args) -> None:
+    config = WatchConfig.from_env()
+    config.pattern = args.pattern or config.pattern
+    if args.max_in_flight:
+        config.max_in_flight = max(1, args.max_in_flight)
+    if args.debounce is not None:
+        config.debounce_seconds = args.debounce
+    if args.poll_interval:
+        config.poll_interval = args.poll_interval
+    if args.once:
+        # Files already in place don't need to settle
+        config.debounce_seconds = 0
+    watcher = FolderWatcher(Path(args.directory), config, on_report=print_report)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, watcher.request_stop)
+        except NotImplementedError:  # Windows
+            pass
+
+    print(f"Watching {Path(args.directory).resolve()} for {config.pattern} "
+          f"(debounce {config.debounce_seconds:g}s, {config.max_in_flight} in flight, queue {config.queue_size})")
+    try:
+        stats = await watcher.run(until_idle=args.once)
+    finally:
+        await close_provider()
+        shutdown_condense_pool()
+    print(f"Stopped: {stats.succeeded} ingested, {stats.failed} failed, {stats.skipped} unchanged, "
+          f"{stats.backpressure_waits} backpressure wait(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest user profile files as they are dropped into a folder")
+    parser.add_argument("directory", help="Folder to watch (searched recursively)")
+    parser.add_argument("--pattern", help="Files to ingest (default: INGEST_WATCH_PATTERN or *.txt)")
+    parser.add_argument("--max-in-flight", type=int,
+                        help="Extraction requests in flight at once (default: INGEST_WATCH_MAX_IN_FLIGHT or 4)")
+    parser.add_argument("--debounce", type=float,
+                        help="Seconds a file must stay unchanged before it is ingested (default: 5)")
+    parser.add_argument("--poll-interval", type=float, help="Seconds between folder scans (default: 2)")
+    parser.add_argument("--once", action="store_true", help="Ingest the files present now, then exit")
+    args = parser.parse_args()
+
+    if not Path(args.directory).is_dir():
+        parser.error(f"not a directory: {args.directory}")
+    init_db()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()